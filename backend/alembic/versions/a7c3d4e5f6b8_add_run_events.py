@@ -0,0 +1,38 @@
+"""add_run_events
+
+Revision ID: a7c3d4e5f6b8
+Revises: f3a1b2c4d5e6
+Create Date: 2026-10-17 14:26:37.104582
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7c3d4e5f6b8'
+down_revision = 'f3a1b2c4d5e6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Run events published by the executing process, tailed by the run streams of all processes
+    op.create_table(
+        'run_events',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('run_id', sa.Integer(), nullable=False),
+        sa.Column('origin', sa.String(length=100), nullable=False),
+        sa.Column('event', sa.String(length=30), nullable=False),
+        sa.Column('data', sa.JSON(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_run_events_run_id'), 'run_events', ['run_id'], unique=False)
+    op.create_index(op.f('ix_run_events_created_at'), 'run_events', ['created_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_run_events_created_at'), table_name='run_events')
+    op.drop_index(op.f('ix_run_events_run_id'), table_name='run_events')
+    op.drop_table('run_events')
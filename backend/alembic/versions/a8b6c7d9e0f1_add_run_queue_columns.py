@@ -0,0 +1,60 @@
+"""add_run_queue_columns
+
+Revision ID: a8b6c7d9e0f1
+Revises: f7a5b6c8d9e0
+Create Date: 2026-10-16 19:27:53.904416
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import text
+
+
+# revision identifiers, used by Alembic.
+revision = 'a8b6c7d9e0f1'
+down_revision = 'f7a5b6c8d9e0'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # DB-backed run queue: workers claim queued runs and hold them with a lease
+    op.add_column('analysis_runs', sa.Column('priority', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('analysis_runs', sa.Column('custom_config', sa.JSON(), nullable=True))
+    op.add_column('analysis_runs', sa.Column('claimed_by', sa.String(length=100), nullable=True))
+    op.add_column('analysis_runs', sa.Column('heartbeat_at', sa.DateTime(timezone=True), nullable=True))
+    op.add_column('analysis_runs', sa.Column('lease_expires_at', sa.DateTime(timezone=True), nullable=True))
+    op.add_column('analysis_runs', sa.Column('attempts', sa.Integer(), server_default='0', nullable=False))
+    op.create_index('ix_analysis_runs_queue', 'analysis_runs', ['status', 'priority', 'id'], unique=False)
+
+    # Runs left queued/running by in-process background tasks. Manual ones may have
+    # had a custom config that was never stored: fail them visibly (with the reason
+    # as a step) so they can be started again
+    conn = op.get_bind()
+    unresumable = (
+        "status IN ('queued', 'running') AND finished_at IS NULL "
+        "AND NOT (trigger_type = 'SCHEDULED' AND analysis_type_id IS NOT NULL)"
+    )
+    conn.execute(text(
+        "INSERT INTO analysis_steps (run_id, step_name, input_blob, output_blob, cache_hit) "
+        "SELECT id, 'pipeline_error', '{\"error\": \"Interrupted by the run queue upgrade\"}', "
+        "'Pipeline failed: interrupted by the run queue upgrade, start the analysis again', 0 "
+        f"FROM analysis_runs WHERE {unresumable}"
+    ))
+    conn.execute(text(f"UPDATE analysis_runs SET status = 'failed', finished_at = CURRENT_TIMESTAMP WHERE {unresumable}"))
+    # Scheduled ones use their analysis type's config: queue them for the workers
+    # (interrupted ones count as a first attempt, so the worker drops their partial steps)
+    conn.execute(text(
+        "UPDATE analysis_runs SET attempts = CASE WHEN status = 'running' THEN 1 ELSE 0 END, status = 'queued' "
+        "WHERE status IN ('queued', 'running') AND finished_at IS NULL"
+    ))
+
+
+def downgrade() -> None:
+    op.drop_index('ix_analysis_runs_queue', table_name='analysis_runs')
+    op.drop_column('analysis_runs', 'attempts')
+    op.drop_column('analysis_runs', 'lease_expires_at')
+    op.drop_column('analysis_runs', 'heartbeat_at')
+    op.drop_column('analysis_runs', 'claimed_by')
+    op.drop_column('analysis_runs', 'custom_config')
+    op.drop_column('analysis_runs', 'priority')
@@ -0,0 +1,47 @@
+"""add_llm_response_cache
+
+Revision ID: b3f1c2d4e5a6
+Revises: 62681ea9e3d9
+Create Date: 2026-10-16 10:12:41.203118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b3f1c2d4e5a6'
+down_revision = '62681ea9e3d9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Persistent tier of the LLM response cache
+    op.create_table(
+        'llm_response_cache',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('key', sa.String(length=64), nullable=False),
+        sa.Column('model', sa.String(length=200), nullable=False),
+        sa.Column('content', sa.Text(length=16777215), nullable=False),  # MEDIUMTEXT in MySQL
+        sa.Column('tokens_used', sa.Integer(), nullable=True),
+        sa.Column('cost_est', sa.Float(), nullable=True),
+        sa.Column('hit_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('expires_at', sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_llm_response_cache_id'), 'llm_response_cache', ['id'], unique=False)
+    op.create_index(op.f('ix_llm_response_cache_key'), 'llm_response_cache', ['key'], unique=True)
+    op.create_index(op.f('ix_llm_response_cache_expires_at'), 'llm_response_cache', ['expires_at'], unique=False)
+    
+    # Mark steps served from the cache so cost accounting stays honest
+    op.add_column('analysis_steps', sa.Column('cache_hit', sa.Boolean(), nullable=False, server_default='0'))
+
+
+def downgrade() -> None:
+    op.drop_column('analysis_steps', 'cache_hit')
+    op.drop_index(op.f('ix_llm_response_cache_expires_at'), table_name='llm_response_cache')
+    op.drop_index(op.f('ix_llm_response_cache_key'), table_name='llm_response_cache')
+    op.drop_index(op.f('ix_llm_response_cache_id'), table_name='llm_response_cache')
+    op.drop_table('llm_response_cache')
@@ -0,0 +1,73 @@
+"""add_analysis_schedules
+
+Revision ID: b9c7d8e0f1a2
+Revises: a8b6c7d9e0f1
+Create Date: 2026-10-16 20:41:06.527193
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import text
+
+
+# revision identifiers, used by Alembic.
+revision = 'b9c7d8e0f1a2'
+down_revision = 'a8b6c7d9e0f1'
+branch_labels = None
+depends_on = None
+
+
+def _daystart_cron() -> str:
+    """Crontab for DAYSTART_SCHEDULE ("HH:MM", server time), 08:00 if unset/invalid."""
+    try:
+        from app.core.config import DAYSTART_SCHEDULE
+        hour, minute = (int(part) for part in DAYSTART_SCHEDULE.split(":"))
+    except Exception:
+        hour, minute = 8, 0
+    return f"{minute} {hour} * * *"
+
+
+def upgrade() -> None:
+    op.create_table(
+        'analysis_schedules',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(length=100), nullable=False),
+        sa.Column('analysis_type_id', sa.Integer(), nullable=False),
+        sa.Column('timeframe', sa.String(length=10), nullable=True),
+        sa.Column('cron', sa.String(length=100), nullable=False),
+        sa.Column('timezone', sa.String(length=50), nullable=True),
+        sa.Column('exchange', sa.String(length=50), nullable=True),
+        sa.Column('instrument_type', sa.String(length=20), nullable=True),
+        sa.Column('jitter_seconds', sa.Integer(), server_default='60', nullable=False),
+        sa.Column('is_enabled', sa.Boolean(), server_default='1', nullable=False),
+        sa.Column('last_fired_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('last_run_count', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['analysis_type_id'], ['analysis_types.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('name')
+    )
+    op.create_index(op.f('ix_analysis_schedules_id'), 'analysis_schedules', ['id'], unique=False)
+
+    # Jittered scheduled runs are not claimed before their start time
+    op.add_column('analysis_runs', sa.Column('scheduled_for', sa.DateTime(timezone=True), nullable=True))
+
+    # Daystart over all enabled MOEX instruments at DAYSTART_SCHEDULE.
+    # Created disabled: enabling it starts spending LLM credits every morning.
+    conn = op.get_bind()
+    daystart = conn.execute(text("SELECT id FROM analysis_types WHERE name = 'daystart'")).fetchone()
+    if daystart:
+        conn.execute(
+            text(
+                "INSERT INTO analysis_schedules (name, analysis_type_id, timeframe, cron, exchange, jitter_seconds, is_enabled, last_run_count) "
+                "VALUES ('daystart_morning', :analysis_type_id, NULL, :cron, 'MOEX', 120, 0, 0)"
+            ),
+            {"analysis_type_id": daystart[0], "cron": _daystart_cron()},
+        )
+
+
+def downgrade() -> None:
+    op.drop_column('analysis_runs', 'scheduled_for')
+    op.drop_index(op.f('ix_analysis_schedules_id'), table_name='analysis_schedules')
+    op.drop_table('analysis_schedules')
@@ -0,0 +1,49 @@
+"""add_run_batches
+
+Revision ID: c0d8e9f1a2b3
+Revises: b9c7d8e0f1a2
+Create Date: 2026-10-16 21:36:44.190263
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c0d8e9f1a2b3'
+down_revision = 'b9c7d8e0f1a2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'run_batches',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('trigger_type', sa.Enum('MANUAL', 'SCHEDULED', name='triggertype'), nullable=False),
+        sa.Column('analysis_type_id', sa.Integer(), nullable=True),
+        sa.Column('schedule_id', sa.Integer(), nullable=True),
+        sa.Column('run_count', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['analysis_type_id'], ['analysis_types.id'], ),
+        sa.ForeignKeyConstraint(['schedule_id'], ['analysis_schedules.id'], ondelete='SET NULL'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_run_batches_id'), 'run_batches', ['id'], unique=False)
+
+    # Runs queued together (POST /api/runs/batch, schedule ticks)
+    op.add_column('analysis_runs', sa.Column('batch_id', sa.Integer(), nullable=True))
+    op.create_index(op.f('ix_analysis_runs_batch_id'), 'analysis_runs', ['batch_id'], unique=False)
+    op.create_foreign_key(
+        'fk_analysis_runs_batch_id',
+        'analysis_runs', 'run_batches',
+        ['batch_id'], ['id']
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint('fk_analysis_runs_batch_id', 'analysis_runs', type_='foreignkey')
+    op.drop_index(op.f('ix_analysis_runs_batch_id'), table_name='analysis_runs')
+    op.drop_column('analysis_runs', 'batch_id')
+    op.drop_index(op.f('ix_run_batches_id'), table_name='run_batches')
+    op.drop_table('run_batches')
@@ -0,0 +1,33 @@
+"""add_data_cache_payload_bin
+
+Revision ID: c4d2e3f5a6b7
+Revises: b3f1c2d4e5a6
+Create Date: 2026-10-16 11:02:17.584930
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4d2e3f5a6b7'
+down_revision = 'b3f1c2d4e5a6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Columnar binary payload (MEDIUMBLOB in MySQL); legacy JSON payload becomes optional
+    op.add_column('data_cache', sa.Column('payload_bin', sa.LargeBinary(length=16777215), nullable=True))
+    op.alter_column('data_cache', 'payload',
+                    existing_type=sa.Text(length=16777215),
+                    nullable=True)
+
+
+def downgrade() -> None:
+    # Binary-only rows cannot be represented in the legacy format; drop them (it's a cache)
+    op.execute("DELETE FROM data_cache WHERE payload IS NULL")
+    op.alter_column('data_cache', 'payload',
+                    existing_type=sa.Text(length=16777215),
+                    nullable=False)
+    op.drop_column('data_cache', 'payload_bin')
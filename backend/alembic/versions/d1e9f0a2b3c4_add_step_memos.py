@@ -0,0 +1,54 @@
+"""add_step_memos
+
+Revision ID: d1e9f0a2b3c4
+Revises: c0d8e9f1a2b3
+Create Date: 2026-10-16 22:18:27.603415
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd1e9f0a2b3c4'
+down_revision = 'c0d8e9f1a2b3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Steps reusing the output of an identical step of another run
+    op.add_column('analysis_steps', sa.Column('reused_from_step_id', sa.Integer(), nullable=True))
+    op.create_foreign_key(
+        'fk_analysis_steps_reused_from_step_id',
+        'analysis_steps', 'analysis_steps',
+        ['reused_from_step_id'], ['id'],
+        ondelete='SET NULL'
+    )
+
+    op.create_table(
+        'step_memos',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('key', sa.String(length=64), nullable=False),
+        sa.Column('instrument', sa.String(length=50), nullable=False),
+        sa.Column('timeframe', sa.String(length=10), nullable=False),
+        sa.Column('candle_ts', sa.BigInteger(), nullable=False),
+        sa.Column('step_id', sa.Integer(), nullable=False),
+        sa.Column('hit_count', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('expires_at', sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(['step_id'], ['analysis_steps.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_step_memos_id'), 'step_memos', ['id'], unique=False)
+    op.create_index(op.f('ix_step_memos_key'), 'step_memos', ['key'], unique=True)
+    op.create_index(op.f('ix_step_memos_expires_at'), 'step_memos', ['expires_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_step_memos_expires_at'), table_name='step_memos')
+    op.drop_index(op.f('ix_step_memos_key'), table_name='step_memos')
+    op.drop_index(op.f('ix_step_memos_id'), table_name='step_memos')
+    op.drop_table('step_memos')
+    op.drop_constraint('fk_analysis_steps_reused_from_step_id', 'analysis_steps', type_='foreignkey')
+    op.drop_column('analysis_steps', 'reused_from_step_id')
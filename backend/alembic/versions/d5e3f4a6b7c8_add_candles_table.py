@@ -0,0 +1,37 @@
+"""add_candles_table
+
+Revision ID: d5e3f4a6b7c8
+Revises: c4d2e3f5a6b7
+Create Date: 2026-10-16 13:24:05.917342
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd5e3f4a6b7c8'
+down_revision = 'c4d2e3f5a6b7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Persistent candle store: one row per (instrument, timeframe, candle open time)
+    op.create_table(
+        'candles',
+        sa.Column('instrument_id', sa.Integer(), nullable=False),
+        sa.Column('timeframe', sa.String(length=10), nullable=False),
+        sa.Column('ts', sa.BigInteger(), nullable=False),  # epoch milliseconds (UTC)
+        sa.Column('open', sa.Float(precision=53), nullable=False),  # DOUBLE in MySQL
+        sa.Column('high', sa.Float(precision=53), nullable=False),
+        sa.Column('low', sa.Float(precision=53), nullable=False),
+        sa.Column('close', sa.Float(precision=53), nullable=False),
+        sa.Column('volume', sa.Float(precision=53), nullable=False),
+        sa.ForeignKeyConstraint(['instrument_id'], ['instruments.id'], ),
+        sa.PrimaryKeyConstraint('instrument_id', 'timeframe', 'ts')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('candles')
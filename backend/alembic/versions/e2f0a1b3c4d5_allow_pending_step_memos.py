@@ -0,0 +1,30 @@
+"""allow_pending_step_memos
+
+Revision ID: e2f0a1b3c4d5
+Revises: d1e9f0a2b3c4
+Create Date: 2026-10-16 23:41:05.218734
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2f0a1b3c4d5'
+down_revision = 'd1e9f0a2b3c4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # A memo without a step is a claim: the identical step is being computed
+    op.alter_column('step_memos', 'step_id',
+                    existing_type=sa.Integer(),
+                    nullable=True)
+
+
+def downgrade() -> None:
+    op.execute("DELETE FROM step_memos WHERE step_id IS NULL")
+    op.alter_column('step_memos', 'step_id',
+                    existing_type=sa.Integer(),
+                    nullable=False)
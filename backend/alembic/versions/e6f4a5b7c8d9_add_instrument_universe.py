@@ -0,0 +1,39 @@
+"""add_instrument_universe
+
+Revision ID: e6f4a5b7c8d9
+Revises: d5e3f4a6b7c8
+Create Date: 2026-10-16 15:08:41.552107
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e6f4a5b7c8d9'
+down_revision = 'd5e3f4a6b7c8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Persisted snapshot of provider instrument listings (MOEX ISS, Binance markets)
+    op.create_table(
+        'instrument_universe',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('source', sa.String(length=50), nullable=False),
+        sa.Column('symbols', sa.JSON(), nullable=False),
+        sa.Column('etag', sa.String(length=255), nullable=True),
+        sa.Column('last_modified', sa.String(length=100), nullable=True),
+        sa.Column('fetched_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_instrument_universe_id'), 'instrument_universe', ['id'], unique=False)
+    op.create_index(op.f('ix_instrument_universe_source'), 'instrument_universe', ['source'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_instrument_universe_source'), table_name='instrument_universe')
+    op.drop_index(op.f('ix_instrument_universe_id'), table_name='instrument_universe')
+    op.drop_table('instrument_universe')
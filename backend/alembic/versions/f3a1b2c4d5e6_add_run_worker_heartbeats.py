@@ -0,0 +1,34 @@
+"""add_run_worker_heartbeats
+
+Revision ID: f3a1b2c4d5e6
+Revises: e2f0a1b3c4d5
+Create Date: 2026-10-17 10:12:48.530917
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3a1b2c4d5e6'
+down_revision = 'e2f0a1b3c4d5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Live dedicated run queue workers (API processes execute runs while there are none)
+    op.create_table(
+        'run_worker_heartbeats',
+        sa.Column('worker_id', sa.String(length=100), nullable=False),
+        sa.Column('concurrency', sa.Integer(), nullable=False),
+        sa.Column('started_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('heartbeat_at', sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint('worker_id')
+    )
+    op.create_index(op.f('ix_run_worker_heartbeats_heartbeat_at'), 'run_worker_heartbeats', ['heartbeat_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_run_worker_heartbeats_heartbeat_at'), table_name='run_worker_heartbeats')
+    op.drop_table('run_worker_heartbeats')
@@ -0,0 +1,78 @@
+"""add_data_source_priority
+
+Revision ID: f7a5b6c8d9e0
+Revises: e6f4a5b7c8d9
+Create Date: 2026-10-16 18:42:10.318274
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import text
+
+
+# revision identifiers, used by Alembic.
+revision = 'f7a5b6c8d9e0'
+down_revision = 'e6f4a5b7c8d9'
+branch_labels = None
+depends_on = None
+
+# Alternate sources used by provider failover routing
+NEW_SOURCES = [
+    {
+        "name": "moex_iss",
+        "display_name": "MOEX ISS",
+        "description": "Moscow Exchange public ISS API. Alternate source for MOEX stocks and futures when Tinkoff is unavailable (intraday candles may be delayed by 15 minutes).",
+        "supports_crypto": False,
+        "supports_stocks": True,
+        "supports_forex": False,
+        "priority": 20,
+    },
+    {
+        "name": "ccxt_bybit",
+        "display_name": "CCXT (Bybit)",
+        "description": "Bybit spot market via CCXT. Alternate source for crypto pairs when Binance is unavailable.",
+        "supports_crypto": True,
+        "supports_stocks": False,
+        "supports_forex": False,
+        "priority": 20,
+    },
+]
+
+# Preferred sources of each asset class (lower priority = tried first)
+PRIORITIES = {"tinkoff": 10, "ccxt": 10, "yfinance": 10}
+
+
+def upgrade() -> None:
+    # Lower priority is tried first when several sources can serve an instrument
+    op.add_column(
+        'available_data_sources',
+        sa.Column('priority', sa.Integer(), server_default='100', nullable=False),
+    )
+
+    conn = op.get_bind()
+    for name, priority in PRIORITIES.items():
+        conn.execute(
+            text("UPDATE available_data_sources SET priority = :priority WHERE name = :name"),
+            {"name": name, "priority": priority},
+        )
+    for source in NEW_SOURCES:
+        exists = conn.execute(
+            text("SELECT 1 FROM available_data_sources WHERE name = :name"), {"name": source["name"]}
+        ).first()
+        if exists:
+            continue
+        conn.execute(
+            text("""
+                INSERT INTO available_data_sources
+                    (name, display_name, description, supports_crypto, supports_stocks, supports_forex, is_enabled, priority)
+                VALUES
+                    (:name, :display_name, :description, :supports_crypto, :supports_stocks, :supports_forex, :is_enabled, :priority)
+            """),
+            {**source, "is_enabled": True},
+        )
+
+
+def downgrade() -> None:
+    conn = op.get_bind()
+    conn.execute(text("DELETE FROM available_data_sources WHERE name IN ('moex_iss', 'ccxt_bybit')"))
+    op.drop_column('available_data_sources', 'priority')
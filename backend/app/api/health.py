@@ -16,3 +16,15 @@ async def health_check():
         "service": "max-signal-bot-api",
     }
 
+
+
+@router.get("/health/cache")
+async def cache_stats():
+    """In-process cache statistics (market data L1 cache, LLM response cache)."""
+    from app.services.data.memory_cache import get_market_data_memory_cache
+    from app.services.llm.cache import get_llm_response_cache
+    
+    return {
+        "market_data": get_market_data_memory_cache().stats(),
+        "llm_responses": dict(get_llm_response_cache().stats),
+    }
@@ -1,13 +1,16 @@
 """
 Instruments endpoints.
 """
-from fastapi import APIRouter, Depends, HTTPException
-from typing import List, Set, Dict
+from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import List, Dict, Optional, Tuple
 from pydantic import BaseModel
+import base64
+import bisect
+import threading
 from sqlalchemy.orm import Session
 from app.core.database import get_db
 from app.models.instrument import Instrument
-import ccxt
+from app.services.data.universe import get_instrument_universe
 import logging
 
 router = APIRouter()
@@ -32,6 +35,13 @@ class InstrumentWithStatusResponse(BaseModel):
     id: int | None = None  # Database ID if exists
 
 
+class InstrumentPageResponse(BaseModel):
+    """One page of the instrument catalog."""
+    items: List[InstrumentWithStatusResponse]
+    next_cursor: str | None = None  # Pass as `cursor` to get the next page (None on the last page)
+    total: int  # Number of instruments matching the filters
+
+
 class ToggleInstrumentRequest(BaseModel):
     """Request model for toggling instrument enabled status."""
     symbol: str
@@ -95,13 +105,8 @@ def _get_exchange_for_symbol(symbol: str) -> str | None:
     # FIRST: Check if it's a MOEX instrument (priority check to avoid conflicts)
     # Note: MOEX currently doesn't return NG1! or B1!, but if it did, this ensures
     # it would be correctly identified as MOEX, not NYMEX
-    try:
-        moex_symbols = _get_all_moex_instruments()
-        if symbol_upper in moex_symbols:
-            return 'MOEX'
-    except Exception:
-        # If MOEX API fails, continue with other checks
-        pass
+    if get_instrument_universe().is_moex(symbol_upper):
+        return 'MOEX'
     
     # Futures contracts (NYMEX/CME) - only if NOT in MOEX
     futures_tickers = [
@@ -189,84 +194,18 @@ def _get_predefined_instruments() -> List[Dict]:
 
 
 def _get_all_crypto_instruments() -> List[str]:
-    """Get all available crypto instruments from CCXT (Binance)."""
-    try:
-        exchange = ccxt.binance({
-            'enableRateLimit': True,
-            'options': {'defaultType': 'spot'}
-        })
-        markets = exchange.load_markets()
-        # Filter for USDT pairs only
-        usdt_pairs = [symbol for symbol in markets.keys() if symbol.endswith('/USDT')]
-        return sorted(usdt_pairs)
-    except Exception as e:
-        logger.error(f"Failed to fetch crypto instruments from CCXT: {e}")
-        return []
+    """Get all available crypto instruments (Binance USDT pairs) from the universe registry."""
+    return get_instrument_universe().crypto_symbols()
 
 
 def _get_all_moex_instruments() -> List[str]:
-    """Get all available MOEX instruments from MOEX ISS API.
+    """Get all available MOEX instruments from the universe registry.
     
     Returns list of tickers including stocks and futures (e.g., ['SBER', 'GAZP', 'NGX5']).
-    Uses MOEX ISS API which is free and public.
-    
-    Queries:
-    - TQBR board: T+2 stocks (main equity board) via apimoex
-    - Futures engine: All futures contracts via direct API call
+    Listings come from the MOEX ISS API (TQBR board and futures engine) and are
+    refreshed in the background, so this doesn't make network requests.
     """
-    try:
-        import requests
-        import apimoex
-        
-        all_tickers = set()
-        
-        with requests.Session() as session:
-            # Get securities from main trading board (TQBR - T+2 stocks)
-            try:
-                data = apimoex.get_board_securities(session, board='TQBR')
-                tickers = set(sec.get('SECID') for sec in data if sec.get('SECID'))
-                all_tickers.update(tickers)
-                logger.info(f"Fetched {len(tickers)} MOEX stocks from TQBR board")
-            except Exception as e:
-                logger.warning(f"Failed to fetch TQBR board: {e}")
-            
-            # Get futures contracts from MOEX ISS API (futures engine)
-            # Futures are in a different engine/market structure: engines/futures/markets/forts/boards/FUT
-            try:
-                futures_url = "https://iss.moex.com/iss/engines/futures/markets/forts/boards/FUT/securities.json"
-                futures_response = session.get(futures_url, params={'limit': 1000})
-                futures_response.raise_for_status()
-                futures_data = futures_response.json()
-                
-                # Extract securities data
-                securities = futures_data.get('securities', {}).get('data', [])
-                columns = futures_data.get('securities', {}).get('columns', [])
-                
-                # Find SECID column index
-                secid_idx = columns.index('SECID') if 'SECID' in columns else 0
-                
-                # Extract tickers
-                futures_tickers = set()
-                for sec in securities:
-                    if len(sec) > secid_idx and sec[secid_idx]:
-                        futures_tickers.add(sec[secid_idx])
-                
-                all_tickers.update(futures_tickers)
-                logger.info(f"Fetched {len(futures_tickers)} MOEX futures contracts from FUT board")
-            except Exception as e:
-                logger.warning(f"Failed to fetch MOEX futures: {e}")
-        
-        tickers_list = sorted(all_tickers)
-        logger.info(f"Total MOEX instruments fetched: {len(tickers_list)} (stocks + futures)")
-        return tickers_list
-            
-    except ImportError:
-        logger.warning("apimoex package not installed. MOEX instruments will not be available.")
-        logger.warning("Install with: pip install apimoex")
-        return []
-    except Exception as e:
-        logger.error(f"Failed to fetch MOEX instruments from ISS API: {e}")
-        return []
+    return get_instrument_universe().moex_symbols()
 
 
 def _get_all_equity_instruments() -> List[str]:
@@ -406,68 +345,209 @@ async def list_instruments(
     return [InstrumentResponse(**inst) for inst in result]
 
 
-@router.get("/all", response_model=List[InstrumentWithStatusResponse])
-async def list_all_instruments(db: Session = Depends(get_db)):
-    """List all available instruments with their enabled status.
+# Separator for sort keys / search haystack (never occurs in symbols or names)
+_SEP = "\x1f"
+
+
+class _InstrumentCatalog:
+    """Sorted, searchable snapshot of every listable instrument.
+
+    Built from the instrument universe registry (crypto, MOEX) and the curated
+    equity list, ordered by (type, exchange, symbol). Rebuilt only when the
+    universe version changes, so requests just filter and slice it.
+    """
+
+    def __init__(self, version: int, entries: List[Dict]):
+        self.version = version
+        self.entries = entries
+        self.keys = [_sort_key(e) for e in entries]
+        self.symbol_index: Dict[str, List[int]] = {}
+        for i, entry in enumerate(entries):
+            self.symbol_index.setdefault(entry["symbol"], []).append(i)
+        # Substring index: one line per entry ("symbol<SEP>display name", lowercased);
+        # matches are located with str.find over the whole haystack and mapped back
+        # to entries via line start offsets.
+        lines = [f"{e['symbol']}{_SEP}{e['display_name']}".lower() for e in entries]
+        self.haystack = "\n".join(lines)
+        self.line_starts = []
+        offset = 0
+        for line in lines:
+            self.line_starts.append(offset)
+            offset += len(line) + 1
+
+    def search(self, query: str) -> List[int]:
+        """Indices of entries whose symbol or display name contains `query` (case-insensitive)."""
+        needle = query.lower()
+        if not needle or "\n" in needle or _SEP in needle:
+            return []
+        result = []
+        last = -1
+        pos = self.haystack.find(needle)
+        while pos != -1:
+            index = bisect.bisect_right(self.line_starts, pos) - 1
+            if index != last:
+                result.append(index)
+                last = index
+            # Continue from the next entry: one hit per entry is enough
+            next_line = self.line_starts[index + 1] if index + 1 < len(self.line_starts) else len(self.haystack)
+            pos = self.haystack.find(needle, next_line)
+        return result
+
+
+_catalog: Optional[_InstrumentCatalog] = None
+_catalog_lock = threading.Lock()
+
+
+def _sort_key(entry: Dict) -> str:
+    return f"{entry['type']}{_SEP}{entry['exchange'] or ''}{_SEP}{entry['symbol']}"
+
+
+def _encode_cursor(key: str) -> str:
+    return base64.urlsafe_b64encode(key.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> str:
+    try:
+        key = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("utf-8")
+    except Exception:
+        key = ""
+    if key.count(_SEP) != 2:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return key
+
+
+def _build_catalog_entries() -> List[Dict]:
+    entries = []
+    for symbol in _get_all_crypto_instruments():
+        entries.append({
+            "symbol": symbol,
+            "type": "crypto",
+            "exchange": "binance",
+            "display_name": _get_display_name(symbol, "crypto", "binance"),
+        })
+    for symbol in _get_all_equity_instruments():
+        # Determine correct exchange (NYMEX/CME for futures, NASDAQ/NYSE for stocks)
+        exchange = _get_exchange_for_symbol(symbol)
+        entries.append({
+            "symbol": symbol,
+            "type": "equity",
+            "exchange": exchange,
+            "display_name": _get_display_name(symbol, "equity", exchange),
+        })
+    for symbol in _get_all_moex_instruments():
+        entries.append({
+            "symbol": symbol,
+            "type": "equity",  # MOEX stocks are also equities
+            "exchange": "MOEX",
+            "display_name": _get_display_name(symbol, "equity", "MOEX"),
+        })
+    entries.sort(key=_sort_key)
+    return entries
+
+
+def _get_catalog() -> _InstrumentCatalog:
+    """Get the instrument catalog, rebuilding it if the universe changed."""
+    global _catalog
+    universe = get_instrument_universe()
+    # Load listings first so the version reflects them
+    universe.crypto_symbols()
+    universe.moex_symbols()
+    version = universe.version
+    if _catalog is None or _catalog.version != version:
+        with _catalog_lock:
+            if _catalog is None or _catalog.version != version:
+                _catalog = _InstrumentCatalog(version, _build_catalog_entries())
+                logger.info(f"instrument_catalog_built: entries={len(_catalog.entries)}, version={version}")
+    return _catalog
+
+
+@router.get("/all", response_model=InstrumentPageResponse)
+async def list_all_instruments(
+    search: str | None = None,
+    type: str | None = None,
+    exchange: str | None = None,
+    is_enabled: bool | None = None,
+    cursor: str | None = None,
+    limit: int = Query(100, ge=1, le=500),
+    db: Session = Depends(get_db)
+):
+    """List available instruments with their enabled status, one page at a time.
     
     This endpoint is used in the Settings page to manage which instruments
-    appear in dropdowns. It includes:
+    appear in dropdowns. It covers:
     - All crypto pairs from CCXT (Binance USDT pairs)
     - Comprehensive list of equities (stocks, ETFs, indices, commodity futures)
-    - All MOEX instruments from MOEX ISS API (dynamically fetched)
+    - All MOEX instruments from MOEX ISS API
     - Current enabled status from database
-    """
-    # Get all instruments from database
-    db_instruments = db.query(Instrument).all()
-    db_instruments_map: Dict[str, Instrument] = {inst.symbol: inst for inst in db_instruments}
-    
-    result = []
     
-    # Add crypto instruments
-    crypto_symbols = _get_all_crypto_instruments()
-    for symbol in crypto_symbols:
-        db_inst = db_instruments_map.get(symbol)
-        result.append(InstrumentWithStatusResponse(
-            symbol=symbol,
-            type="crypto",
-            exchange="binance",
-            display_name=_get_display_name(symbol, "crypto", "binance"),
-            is_enabled=db_inst.is_enabled if db_inst else False,  # Default to disabled (admin must enable)
-            id=db_inst.id if db_inst else None
-        ))
-    
-    # Add equity instruments (US stocks, ETFs, commodity futures)
-    equity_symbols = _get_all_equity_instruments()
-    for symbol in equity_symbols:
-        db_inst = db_instruments_map.get(symbol)
-        # Determine correct exchange (NYMEX/CME for futures, NASDAQ/NYSE for stocks)
-        exchange = _get_exchange_for_symbol(symbol)
-        result.append(InstrumentWithStatusResponse(
-            symbol=symbol,
-            type="equity",
-            exchange=exchange,
-            display_name=_get_display_name(symbol, "equity", exchange),
-            is_enabled=db_inst.is_enabled if db_inst else False,  # Default to disabled (admin must enable)
-            id=db_inst.id if db_inst else None
-        ))
+    Instruments are ordered by type, exchange, then symbol. Filters are applied
+    server-side against the cached catalog, so the response size depends on
+    `limit`, not on the number of listed instruments.
     
-    # Add MOEX instruments (dynamically fetched from MOEX ISS API)
-    moex_symbols = _get_all_moex_instruments()
-    for symbol in moex_symbols:
-        db_inst = db_instruments_map.get(symbol)
-        result.append(InstrumentWithStatusResponse(
-            symbol=symbol,
-            type="equity",  # MOEX stocks are also equities
-            exchange="MOEX",
-            display_name=_get_display_name(symbol, "equity", "MOEX"),
-            is_enabled=db_inst.is_enabled if db_inst else False,  # Default to disabled (admin must enable)
-            id=db_inst.id if db_inst else None
+    Args:
+        search: Case-insensitive substring of the symbol or display name
+        type: "crypto" or "equity"
+        exchange: Exchange name (e.g. "MOEX", "binance"), case-insensitive
+        is_enabled: Only enabled (true) or only disabled (false) instruments
+        cursor: `next_cursor` from the previous page
+        limit: Page size
+    """
+    catalog = _get_catalog()
+    entries = catalog.entries
+
+    # Enabled status lives in the DB (only instruments toggled at least once have rows)
+    db_instruments_map: Dict[str, Tuple[bool, int]] = {
+        symbol: (enabled, inst_id)
+        for symbol, enabled, inst_id in db.query(Instrument.symbol, Instrument.is_enabled, Instrument.id)
+    }
+
+    if search and search.strip():
+        candidates = catalog.search(search.strip())
+    elif is_enabled:
+        # Enabled instruments are a handful of DB rows: look them up instead of scanning
+        candidates = sorted({
+            i for symbol, (enabled, _) in db_instruments_map.items() if enabled
+            for i in catalog.symbol_index.get(symbol, ())
+        })
+    else:
+        candidates = range(len(entries))
+
+    type_filter = type.lower() if type else None
+    exchange_filter = exchange.lower() if exchange else None
+
+    def matches(entry: Dict) -> bool:
+        if type_filter and entry["type"] != type_filter:
+            return False
+        if exchange_filter and (entry["exchange"] or "").lower() != exchange_filter:
+            return False
+        if is_enabled is not None:
+            status = db_instruments_map.get(entry["symbol"])
+            return (status[0] if status else False) == is_enabled
+        return True
+
+    matched = [i for i in candidates if matches(entries[i])]
+
+    start = 0
+    if cursor:
+        # Both lists are sorted by catalog position, which follows the sort key order
+        start = bisect.bisect_left(matched, bisect.bisect_right(catalog.keys, _decode_cursor(cursor)))
+    page = matched[start:start + limit]
+
+    items = []
+    for i in page:
+        entry = entries[i]
+        status = db_instruments_map.get(entry["symbol"])
+        items.append(InstrumentWithStatusResponse(
+            **entry,
+            is_enabled=status[0] if status else False,  # Default to disabled (admin must enable)
+            id=status[1] if status else None
         ))
-    
-    # Sort by type, then exchange, then symbol
-    result.sort(key=lambda x: (x.type, x.exchange or "", x.symbol))
-    
-    return result
+
+    next_cursor = None
+    if start + limit < len(matched):
+        next_cursor = _encode_cursor(catalog.keys[page[-1]])
+
+    return InstrumentPageResponse(items=items, next_cursor=next_cursor, total=len(matched))
 
 
 @router.put("/toggle", response_model=InstrumentWithStatusResponse)
@@ -486,8 +566,7 @@ async def toggle_instrument(request: ToggleInstrumentRequest, db: Session = Depe
     if not instrument:
         # Determine type and exchange
         # Check if it's a MOEX instrument (from MOEX ISS API list)
-        moex_symbols = _get_all_moex_instruments()
-        is_moex = symbol in moex_symbols
+        is_moex = get_instrument_universe().is_moex(symbol)
         
         if is_moex:
             inst_type = "equity"
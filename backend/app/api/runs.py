@@ -1,18 +1,22 @@
 """
 Analysis runs endpoints.
 """
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from fastapi.concurrency import run_in_threadpool
 import logging
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
-from typing import Optional, List
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime, timezone
 from app.core.database import get_db
-from app.models.analysis_run import AnalysisRun, RunStatus, TriggerType
+from app.models.analysis_run import AnalysisRun, TriggerType
 from app.models.instrument import Instrument
+from app.models.analysis_type import AnalysisType
+from app.models.run_batch import RunBatch
 from app.models.settings import AppSettings
 from app.services.data.adapters import DataService
-from app.services.analysis.pipeline import AnalysisPipeline
+from app.services.analysis.run_queue import enqueue_run, enqueue_batch, batch_progress
 from app.services.telegram.publisher import publish_to_telegram
 from app.models.telegram_post import TelegramPost, PostStatus
 
@@ -20,6 +24,9 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Max runs per POST /batch
+BATCH_MAX_RUNS = 200
+
 
 class CreateRunRequest(BaseModel):
     """Request model for creating a run."""
@@ -37,6 +44,8 @@ class RunStepResponse(BaseModel):
     llm_model: Optional[str] = None
     tokens_used: int = 0
     cost_est: float = 0.0
+    cache_hit: bool = False
+    reused_from_step_id: Optional[int] = None  # Output copied from an identical step of another run
     created_at: datetime
 
 
@@ -53,18 +62,62 @@ class RunResponse(BaseModel):
     steps: list[RunStepResponse] = []
     analysis_type_id: Optional[int] = None
     analysis_type_config: Optional[dict] = None  # Include config to find publishable steps
+    batch_id: Optional[int] = None
+
+
+def _require_openrouter_key(db: Session):
+    """Raise 400 unless the OpenRouter API key is configured."""
+    openrouter_setting = db.query(AppSettings).filter(
+        AppSettings.key == "openrouter_api_key"
+    ).first()
+    if not openrouter_setting or not openrouter_setting.value:
+        raise HTTPException(
+            status_code=400,
+            detail="OpenRouter API key is not configured. Please set it in Settings → OpenRouter Configuration before running analyses."
+        )
+
+
+def _get_or_create_instrument(db: Session, symbol: str, exchange: Optional[str] = None) -> Instrument:
+    """Get the instrument record, creating it (disabled, not committed) if missing.
+    
+    Args:
+        db: Database session
+        symbol: Instrument symbol
+        exchange: Exchange reported by the data provider (detected from the symbol if unknown)
+    """
+    instrument = db.query(Instrument).filter(Instrument.symbol == symbol).first()
+    if instrument:
+        return instrument
+    
+    # Determine type and exchange
+    inst_type = "crypto" if "/" in symbol.upper() else "equity"
+    
+    # Use exchange from market data if available, otherwise try to determine from symbol
+    if not exchange or exchange == "unknown":
+        # Import exchange detection function
+        from app.api.instruments import _get_exchange_for_symbol
+        exchange = _get_exchange_for_symbol(symbol) or "unknown"
+    
+    instrument = Instrument(
+        symbol=symbol,
+        type=inst_type,
+        exchange=exchange,
+        is_enabled=False  # New instruments are disabled by default (admin must enable in Settings)
+    )
+    db.add(instrument)
+    db.flush()
+    return instrument
 
 
 @router.post("", response_model=RunResponse)
 async def create_run(
     request: CreateRunRequest,
-    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db)
 ):
     """Create a new analysis run.
     
-    For now, this just fetches market data and creates a run record.
-    The actual analysis pipeline will be implemented later.
+    Validates the instrument by fetching market data and queues the run; a
+    run queue worker (API process or python -m app.worker) executes it.
     """
     # Validate instrument exists (for now, just check format)
     # TODO: Check against instruments table
@@ -72,7 +125,8 @@ async def create_run(
     # Fetch market data to validate instrument/timeframe
     data_service = DataService(db=db)
     try:
-        market_data = data_service.fetch_market_data(
+        market_data = await run_in_threadpool(
+            data_service.fetch_market_data,
             instrument=request.instrument,
             timeframe=request.timeframe,
             use_cache=True
@@ -80,99 +134,20 @@ async def create_run(
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Failed to fetch market data: {str(e)}")
     
-    # Validate OpenRouter API key is configured
-    openrouter_setting = db.query(AppSettings).filter(
-        AppSettings.key == "openrouter_api_key"
-    ).first()
-    if not openrouter_setting or not openrouter_setting.value:
-        raise HTTPException(
-            status_code=400,
-            detail="OpenRouter API key is not configured. Please set it in Settings → OpenRouter Configuration before running analyses."
-        )
+    _require_openrouter_key(db)
     
-    # Create or get instrument record
-    instrument = db.query(Instrument).filter(Instrument.symbol == request.instrument).first()
-    if not instrument:
-        # Determine type and exchange
-        inst_type = "crypto" if "/" in request.instrument.upper() else "equity"
-        
-        # Use exchange from market_data if available, otherwise try to determine from symbol
-        exchange = market_data.exchange
-        if not exchange or exchange == "unknown":
-            # Import exchange detection function
-            from app.api.instruments import _get_exchange_for_symbol
-            exchange = _get_exchange_for_symbol(request.instrument) or "unknown"
-        
-        instrument = Instrument(
-            symbol=request.instrument,
-            type=inst_type,
-            exchange=exchange,
-            is_enabled=False  # New instruments are disabled by default (admin must enable in Settings)
-        )
-        db.add(instrument)
-        db.commit()
-        db.refresh(instrument)
+    # Create or get instrument record (may look the exchange up over the network)
+    instrument = await run_in_threadpool(_get_or_create_instrument, db, request.instrument, market_data.exchange)
     
-    # Create run record
-    run = AnalysisRun(
-        trigger_type=TriggerType.MANUAL,
+    # Queue the run (manual lane)
+    run = enqueue_run(
+        db,
         instrument_id=instrument.id,
-        analysis_type_id=request.analysis_type_id,
         timeframe=request.timeframe,
-        status=RunStatus.QUEUED
+        trigger_type=TriggerType.MANUAL,
+        analysis_type_id=request.analysis_type_id,
+        custom_config=request.custom_config,
     )
-    db.add(run)
-    db.commit()
-    db.refresh(run)
-    
-    # Start pipeline execution in background
-    def run_pipeline():
-        # Create new DB session for background task
-        from app.core.database import SessionLocal
-        bg_db = SessionLocal()
-        bg_run = None
-        try:
-            bg_run = bg_db.query(AnalysisRun).filter(AnalysisRun.id == run.id).first()
-            if not bg_run:
-                logger.error(f"Run {run.id} not found in database")
-                return
-            
-            # Initialize pipeline (this will read API key from Settings)
-            pipeline = AnalysisPipeline()
-            
-            # Pass custom_config if provided
-            custom_config = request.custom_config if request.custom_config is not None else None
-            
-            # Run the pipeline
-            pipeline.run(bg_run, bg_db, custom_config=custom_config)
-            
-        except Exception as e:
-            import traceback
-            error_msg = str(e)
-            error_traceback = traceback.format_exc()
-            logger.error(f"Pipeline execution failed for run {run.id}: {error_msg}\n{error_traceback}")
-            
-            # Update run status to FAILED
-            if bg_run:
-                try:
-                    bg_run.status = RunStatus.FAILED
-                    bg_run.finished_at = datetime.now(timezone.utc)
-                    # Save error message in a step
-                    from app.models.analysis_step import AnalysisStep
-                    error_step = AnalysisStep(
-                        run_id=bg_run.id,
-                        step_name="pipeline_error",
-                        input_blob={"error": error_msg, "traceback": error_traceback},
-                        output_blob=f"Pipeline failed: {error_msg}",
-                    )
-                    bg_db.add(error_step)
-                    bg_db.commit()
-                except Exception as db_error:
-                    logger.error(f"Failed to update run status to FAILED: {db_error}")
-        finally:
-            bg_db.close()
-    
-    background_tasks.add_task(run_pipeline)
     
     return RunResponse(
         id=run.id,
@@ -185,10 +160,162 @@ async def create_run(
         cost_est_total=run.cost_est_total,
         steps=[],
         analysis_type_id=run.analysis_type_id,
-        analysis_type_config=None  # Config not needed for initial response
+        analysis_type_config=None,  # Config not needed for initial response
+        batch_id=run.batch_id
     )
 
 
+class BatchRunItem(BaseModel):
+    """One (instrument, timeframe) pair of a batch."""
+    instrument: str
+    timeframe: str
+
+
+class CreateBatchRequest(BaseModel):
+    """Request model for creating a batch of runs."""
+    analysis_type_id: int
+    items: List[BatchRunItem]
+    custom_config: Optional[dict] = None  # Optional config override shared by all runs
+
+
+class BatchRunSummary(BaseModel):
+    """Run of a batch (without steps)."""
+    id: int
+    instrument: str
+    timeframe: str
+    status: str
+    finished_at: Optional[datetime] = None
+    cost_est_total: float = 0.0
+
+
+class BatchRejectedItem(BaseModel):
+    """Pair left out of a batch because its market data couldn't be fetched."""
+    instrument: str
+    timeframe: str
+    error: str
+
+
+class BatchResponse(BaseModel):
+    """Response model for a batch with aggregated progress."""
+    id: int
+    trigger_type: str
+    analysis_type_id: Optional[int] = None
+    schedule_id: Optional[int] = None
+    created_at: datetime
+    status: str  # queued, running, completed, completed_with_errors
+    total: int
+    finished: int
+    progress: float  # finished / total
+    counts: dict  # Runs per status
+    cost_est_total: float = 0.0
+    runs: List[BatchRunSummary] = []
+    rejected: List[BatchRejectedItem] = []
+
+
+def _batch_response(db: Session, batch: RunBatch, rejected: Optional[List[BatchRejectedItem]] = None) -> BatchResponse:
+    progress = batch_progress(db, batch.id)
+    runs = (
+        db.query(AnalysisRun.id, Instrument.symbol, AnalysisRun.timeframe, AnalysisRun.status,
+                 AnalysisRun.finished_at, AnalysisRun.cost_est_total)
+        .join(Instrument, Instrument.id == AnalysisRun.instrument_id)
+        .filter(AnalysisRun.batch_id == batch.id)
+        .order_by(AnalysisRun.id)
+        .all()
+    )
+    return BatchResponse(
+        id=batch.id,
+        trigger_type=batch.trigger_type.value,
+        analysis_type_id=batch.analysis_type_id,
+        schedule_id=batch.schedule_id,
+        created_at=batch.created_at,
+        runs=[
+            BatchRunSummary(
+                id=run_id,
+                instrument=symbol,
+                timeframe=timeframe,
+                status=status.value,
+                finished_at=finished_at,
+                cost_est_total=cost or 0.0,
+            )
+            for run_id, symbol, timeframe, status, finished_at, cost in runs
+        ],
+        rejected=rejected or [],
+        **progress,
+    )
+
+
+def _resolve_batch_instruments(db: Session, data_service: DataService, pairs: List[Tuple[str, str]]) -> Dict[str, int]:
+    """Instrument IDs of batch pairs; new instruments take the exchange from the now cached market data."""
+    instrument_ids = {}
+    for instrument, timeframe in pairs:
+        if instrument in instrument_ids:
+            continue
+        record = db.query(Instrument).filter(Instrument.symbol == instrument).first()
+        if not record:
+            market_data = data_service.fetch_market_data(instrument, timeframe, use_cache=True)
+            record = _get_or_create_instrument(db, instrument, market_data.exchange)
+        instrument_ids[instrument] = record.id
+    return instrument_ids
+
+
+@router.post("/batch", response_model=BatchResponse)
+async def create_batch(
+    request: CreateBatchRequest,
+    db: Session = Depends(get_db)
+):
+    """Queue one analysis type over many (instrument, timeframe) pairs.
+    
+    Market data for all pairs is fetched up front with one DataService,
+    grouped by provider and fetched concurrently; pairs whose data can't be
+    fetched are rejected (listed in the response). The runs are created in one
+    transaction and queued together; poll GET /api/runs/batch/{id} for progress.
+    """
+    items = list(dict.fromkeys((item.instrument, item.timeframe) for item in request.items))
+    if not items:
+        raise HTTPException(status_code=400, detail="Batch has no items")
+    if len(items) > BATCH_MAX_RUNS:
+        raise HTTPException(status_code=400, detail=f"Batch has {len(items)} items (max {BATCH_MAX_RUNS})")
+    
+    analysis_type = db.query(AnalysisType).filter(AnalysisType.id == request.analysis_type_id).first()
+    if not analysis_type:
+        raise HTTPException(status_code=404, detail="Analysis type not found")
+    _require_openrouter_key(db)
+    
+    # Fetch market data for all pairs (validates instruments/timeframes)
+    data_service = DataService(db=db)
+    errors = await run_in_threadpool(data_service.prefetch, items)
+    rejected = [
+        BatchRejectedItem(instrument=instrument, timeframe=timeframe, error=f"Failed to fetch market data: {errors[(instrument, timeframe)]}")
+        for instrument, timeframe in items if errors.get((instrument, timeframe))
+    ]
+    accepted = [pair for pair in items if not errors.get(pair)]
+    if not accepted:
+        raise HTTPException(status_code=400, detail=f"Failed to fetch market data for all items: {rejected[0].error}")
+    
+    # Instrument records (blocking DB and provider calls: off the event loop)
+    instrument_ids = await run_in_threadpool(_resolve_batch_instruments, db, data_service, accepted)
+    
+    # Batch and runs in one transaction (manual lane)
+    batch, runs = enqueue_batch(
+        db,
+        [(instrument_ids[instrument], timeframe) for instrument, timeframe in accepted],
+        trigger_type=TriggerType.MANUAL,
+        analysis_type_id=analysis_type.id,
+        custom_config=request.custom_config,
+    )
+    logger.info(f"run_batch_created: batch_id={batch.id}, runs={len(runs)}, rejected={len(rejected)}")
+    return _batch_response(db, batch, rejected)
+
+
+@router.get("/batch/{batch_id}", response_model=BatchResponse)
+async def get_batch(batch_id: int, db: Session = Depends(get_db)):
+    """Get a batch with aggregated progress of its runs."""
+    batch = db.query(RunBatch).filter(RunBatch.id == batch_id).first()
+    if not batch:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    return _batch_response(db, batch)
+
+
 @router.get("/{run_id}", response_model=RunResponse)
 async def get_run(run_id: int, db: Session = Depends(get_db)):
     """Get analysis run details."""
@@ -206,6 +333,8 @@ async def get_run(run_id: int, db: Session = Depends(get_db)):
             llm_model=step.llm_model,
             tokens_used=step.tokens_used,
             cost_est=step.cost_est,
+            cache_hit=bool(step.cache_hit),
+            reused_from_step_id=step.reused_from_step_id,
             created_at=step.created_at
         ))
     
@@ -220,7 +349,32 @@ async def get_run(run_id: int, db: Session = Depends(get_db)):
         cost_est_total=run.cost_est_total,
         steps=steps,
         analysis_type_id=run.analysis_type_id,
-        analysis_type_config=run.analysis_type.config if run.analysis_type else None
+        analysis_type_config=run.analysis_type.config if run.analysis_type else None,
+        batch_id=run.batch_id
+    )
+
+
+@router.get("/{run_id}/stream")
+async def stream_run(run_id: int, request: Request, db: Session = Depends(get_db)):
+    """Stream a run's progress as server-sent events (EventSource).
+    
+    Sends a 'snapshot' of the steps persisted so far, then run_started,
+    step_started, delta (partial LLM output), step_completed/step_failed and
+    run_finished events; the stream ends after run_finished. Replaces polling
+    GET /api/runs/{id} while the run is queued or running.
+    """
+    from app.services.analysis.run_events import stream_run_events
+    
+    if not db.query(AnalysisRun.id).filter(AnalysisRun.id == run_id).first():
+        raise HTTPException(status_code=404, detail="Run not found")
+    
+    return StreamingResponse(
+        stream_run_events(run_id, request.is_disconnected),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",  # nginx: don't buffer the stream
+        },
     )
 
 
@@ -251,7 +405,8 @@ async def list_runs(
             cost_est_total=run.cost_est_total,
             steps=[],  # Don't include steps in list view
             analysis_type_id=run.analysis_type_id,
-            analysis_type_config=None  # Don't include config in list view
+            analysis_type_config=None,  # Don't include config in list view
+            batch_id=run.batch_id
         ))
     
     return result
@@ -0,0 +1,203 @@
+"""
+Analysis schedule endpoints.
+"""
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from pydantic import BaseModel
+from typing import List, Optional
+from datetime import datetime
+from app.core.database import get_db
+from app.core.auth import get_current_admin_user_dependency
+from app.models.analysis_schedule import AnalysisSchedule
+from app.models.analysis_type import AnalysisType
+from app.models.run_batch import RunBatch
+from app.models.user import User
+from app.services.analysis.scheduler import (
+    parse_cron,
+    next_fire_time,
+    schedule_instruments,
+    schedule_timeframe,
+    fire_schedule,
+    get_run_scheduler,
+)
+
+router = APIRouter()
+
+
+class ScheduleResponse(BaseModel):
+    """Response model for a schedule."""
+    id: int
+    name: str
+    analysis_type_id: int
+    analysis_type_name: Optional[str] = None
+    timeframe: str  # Resolved (schedule's own or the analysis type's default)
+    cron: str
+    timezone: Optional[str] = None
+    exchange: Optional[str] = None
+    instrument_type: Optional[str] = None
+    jitter_seconds: int
+    is_enabled: bool
+    instrument_count: int  # Enabled instruments the next tick would run
+    last_fired_at: Optional[datetime] = None
+    last_run_count: int = 0
+    last_batch_id: Optional[int] = None  # GET /api/runs/batch/{id} for the last tick's progress
+    next_fire_at: Optional[datetime] = None
+
+
+class CreateScheduleRequest(BaseModel):
+    """Request model for creating a schedule."""
+    name: str
+    analysis_type_id: int
+    cron: str  # e.g. "0 8 * * 1-5"
+    timeframe: Optional[str] = None
+    timezone: Optional[str] = None
+    exchange: Optional[str] = None
+    instrument_type: Optional[str] = None
+    jitter_seconds: int = 60
+    is_enabled: bool = True
+
+
+class UpdateScheduleRequest(BaseModel):
+    """Request model for updating a schedule (only provided fields change)."""
+    name: Optional[str] = None
+    analysis_type_id: Optional[int] = None
+    cron: Optional[str] = None
+    timeframe: Optional[str] = None
+    timezone: Optional[str] = None
+    exchange: Optional[str] = None
+    instrument_type: Optional[str] = None
+    jitter_seconds: Optional[int] = None
+    is_enabled: Optional[bool] = None
+
+
+def _to_response(db: Session, schedule: AnalysisSchedule) -> ScheduleResponse:
+    return ScheduleResponse(
+        id=schedule.id,
+        name=schedule.name,
+        analysis_type_id=schedule.analysis_type_id,
+        analysis_type_name=schedule.analysis_type.name if schedule.analysis_type else None,
+        timeframe=schedule_timeframe(schedule),
+        cron=schedule.cron,
+        timezone=schedule.timezone,
+        exchange=schedule.exchange,
+        instrument_type=schedule.instrument_type,
+        jitter_seconds=schedule.jitter_seconds,
+        is_enabled=schedule.is_enabled,
+        instrument_count=len(schedule_instruments(db, schedule)),
+        last_fired_at=schedule.last_fired_at,
+        last_run_count=schedule.last_run_count or 0,
+        last_batch_id=db.query(func.max(RunBatch.id)).filter(RunBatch.schedule_id == schedule.id).scalar(),
+        next_fire_at=next_fire_time(schedule),
+    )
+
+
+def _validate(db: Session, schedule: AnalysisSchedule):
+    try:
+        parse_cron(schedule.cron, schedule.timezone)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if schedule.jitter_seconds < 0:
+        raise HTTPException(status_code=400, detail="jitter_seconds must be >= 0")
+    if not db.query(AnalysisType).filter(AnalysisType.id == schedule.analysis_type_id).first():
+        raise HTTPException(status_code=400, detail="Analysis type not found")
+    duplicate = db.query(AnalysisSchedule).filter(AnalysisSchedule.name == schedule.name).first()
+    if duplicate and duplicate.id != schedule.id:
+        raise HTTPException(status_code=400, detail=f"Schedule '{schedule.name}' already exists")
+
+
+def _reload_scheduler():
+    """Apply schedule changes in this process now (others reload periodically)."""
+    scheduler = get_run_scheduler()
+    if scheduler.running:
+        scheduler.reload()
+
+
+@router.get("", response_model=List[ScheduleResponse])
+async def list_schedules(db: Session = Depends(get_db)):
+    """List analysis schedules."""
+    schedules = db.query(AnalysisSchedule).order_by(AnalysisSchedule.name).all()
+    return [_to_response(db, schedule) for schedule in schedules]
+
+
+@router.get("/{schedule_id}", response_model=ScheduleResponse)
+async def get_schedule(schedule_id: int, db: Session = Depends(get_db)):
+    """Get a schedule by ID."""
+    schedule = db.query(AnalysisSchedule).filter(AnalysisSchedule.id == schedule_id).first()
+    if not schedule:
+        raise HTTPException(status_code=404, detail="Schedule not found")
+    return _to_response(db, schedule)
+
+
+@router.post("", response_model=ScheduleResponse)
+async def create_schedule(
+    request: CreateScheduleRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_admin_user_dependency)
+):
+    """Create a schedule (admin only)."""
+    schedule = AnalysisSchedule(**request.model_dump())
+    _validate(db, schedule)
+    db.add(schedule)
+    db.commit()
+    db.refresh(schedule)
+    _reload_scheduler()
+    return _to_response(db, schedule)
+
+
+@router.put("/{schedule_id}", response_model=ScheduleResponse)
+async def update_schedule(
+    schedule_id: int,
+    request: UpdateScheduleRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_admin_user_dependency)
+):
+    """Update a schedule (admin only)."""
+    schedule = db.query(AnalysisSchedule).filter(AnalysisSchedule.id == schedule_id).first()
+    if not schedule:
+        raise HTTPException(status_code=404, detail="Schedule not found")
+    for field, value in request.model_dump(exclude_unset=True).items():
+        setattr(schedule, field, value)
+    _validate(db, schedule)
+    db.commit()
+    db.refresh(schedule)
+    _reload_scheduler()
+    return _to_response(db, schedule)
+
+
+@router.delete("/{schedule_id}")
+async def delete_schedule(
+    schedule_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_admin_user_dependency)
+):
+    """Delete a schedule (admin only). Runs it already queued are kept."""
+    schedule = db.query(AnalysisSchedule).filter(AnalysisSchedule.id == schedule_id).first()
+    if not schedule:
+        raise HTTPException(status_code=404, detail="Schedule not found")
+    db.delete(schedule)
+    db.commit()
+    _reload_scheduler()
+    return {"success": True}
+
+
+@router.post("/{schedule_id}/fire")
+async def fire_schedule_now(
+    schedule_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_admin_user_dependency)
+):
+    """Fire a schedule now, even if disabled (admin only).
+
+    Prefetches market data for all its instruments before queueing the runs,
+    so this takes a few seconds for large schedules.
+    """
+    schedule = db.query(AnalysisSchedule).filter(AnalysisSchedule.id == schedule_id).first()
+    if not schedule:
+        raise HTTPException(status_code=404, detail="Schedule not found")
+    try:
+        runs = await run_in_threadpool(fire_schedule, schedule_id, True)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to fire schedule: {str(e)}")
+    return {"success": True, "runs_queued": runs}
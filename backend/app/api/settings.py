@@ -38,6 +38,7 @@ class DataSourceResponse(BaseModel):
     supports_stocks: bool
     supports_forex: bool
     is_enabled: bool
+    priority: int
     
     class Config:
         from_attributes = True
@@ -48,7 +49,8 @@ class UpdateModelRequest(BaseModel):
 
 
 class UpdateDataSourceRequest(BaseModel):
-    is_enabled: bool
+    is_enabled: Optional[bool] = None
+    priority: Optional[int] = None  # Lower is tried first
 
 
 class UpdateTelegramRequest(BaseModel):
@@ -166,7 +168,7 @@ async def list_data_sources(
     query = db.query(AvailableDataSource)
     if enabled_only:
         query = query.filter(AvailableDataSource.is_enabled == True)
-    sources = query.order_by(AvailableDataSource.display_name).all()
+    sources = query.order_by(AvailableDataSource.priority, AvailableDataSource.display_name).all()
     return sources
 
 
@@ -177,17 +179,33 @@ async def update_data_source(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_admin_user_dependency)
 ):
-    """Enable/disable a data source (admin only)."""
+    """Enable/disable a data source or change its failover priority (admin only)."""
     source = db.query(AvailableDataSource).filter(AvailableDataSource.id == source_id).first()
     if not source:
         raise HTTPException(status_code=404, detail="Data source not found")
     
-    source.is_enabled = request.is_enabled
+    if request.is_enabled is not None:
+        source.is_enabled = request.is_enabled
+    if request.priority is not None:
+        source.priority = request.priority
     db.commit()
     db.refresh(source)
+    
+    # Apply to routing in this process right away (other processes within a minute)
+    from app.services.data.routing import get_provider_router
+    get_provider_router().invalidate_preferences()
     return source
 
 
+@router.get("/data-sources/health")
+async def get_data_sources_health(
+    current_user: User = Depends(get_current_admin_user_dependency)
+):
+    """Per-source latency, error rate and circuit breaker state in this process (admin only)."""
+    from app.services.data.routing import get_provider_router
+    return get_provider_router().snapshot()
+
+
 # Credentials endpoints
 @router.get("/telegram")
 async def get_telegram_settings(
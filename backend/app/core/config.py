@@ -35,6 +35,172 @@ except ImportError:
     ENABLE_TELEGRAM_AUTO_SEND: bool = False
     ENABLE_BACKTESTING: bool = False
 
+# Optional performance tuning (can be overridden in config_local.py)
+try:
+    from app.config_local import PIPELINE_MAX_PARALLEL_STEPS
+except ImportError:
+    PIPELINE_MAX_PARALLEL_STEPS: int = 4  # Max independent pipeline steps executed concurrently per run
+
+try:
+    from app.config_local import LLM_MAX_CONCURRENT_CALLS_PER_MODEL, LLM_HTTP_MAX_CONNECTIONS
+except ImportError:
+    LLM_MAX_CONCURRENT_CALLS_PER_MODEL: int = 8  # Max in-flight LLM calls per model (per process, pipeline steps included)
+    LLM_HTTP_MAX_CONNECTIONS: int = 20  # Pooled connections shared by LLM clients (per process)
+
+try:
+    from app.config_local import LLM_CACHE_MAX_ENTRIES, LLM_CACHE_DEFAULT_TTL_SECONDS
+except ImportError:
+    LLM_CACHE_MAX_ENTRIES: int = 1000  # In-memory LLM response cache entries (LRU)
+    LLM_CACHE_DEFAULT_TTL_SECONDS: int = 3600  # LLM response cache TTL when not derived from timeframe
+
+try:
+    from app.config_local import DATA_CACHE_COMPRESSION
+except ImportError:
+    DATA_CACHE_COMPRESSION: bool = True  # zlib-compress columnar market data cache payloads
+
+try:
+    from app.config_local import DATA_INCREMENTAL_FETCH, DATA_RETENTION_CANDLES
+except ImportError:
+    DATA_INCREMENTAL_FETCH: bool = True  # Refresh expired market data by fetching only candles after the cached tail
+    DATA_RETENTION_CANDLES: int = 500  # Candles kept per (instrument, timeframe) series
+
+try:
+    from app.config_local import DATA_CANDLE_STORE
+except ImportError:
+    DATA_CANDLE_STORE: bool = True  # Persist fetched candles in the candles table and use it as the refresh base
+
+try:
+    from app.config_local import DATA_RESAMPLE_FROM_STORE
+except ImportError:
+    DATA_RESAMPLE_FROM_STORE: bool = True  # Serve higher timeframes from stored lower-timeframe candles when coverage allows
+
+try:
+    from app.config_local import DATA_FETCH_LOCK_TIMEOUT_SECONDS
+except ImportError:
+    DATA_FETCH_LOCK_TIMEOUT_SECONDS: int = 30  # Max wait for another process fetching the same instrument/timeframe
+
+try:
+    from app.config_local import DATA_MEMORY_CACHE_MAX_BYTES
+except ImportError:
+    DATA_MEMORY_CACHE_MAX_BYTES: int = 64 * 1024 * 1024  # In-process market data cache budget (0 disables it)
+
+try:
+    from app.config_local import UNIVERSE_BACKGROUND_REFRESH, UNIVERSE_REFRESH_INTERVAL_SECONDS, UNIVERSE_HTTP_TIMEOUT_SECONDS
+except ImportError:
+    UNIVERSE_BACKGROUND_REFRESH: bool = True  # Refresh MOEX/Binance instrument listings in a background thread
+    UNIVERSE_REFRESH_INTERVAL_SECONDS: int = 6 * 60 * 60  # Max age of an instrument listing snapshot
+    UNIVERSE_HTTP_TIMEOUT_SECONDS: int = 30  # Timeout for MOEX ISS listing requests
+
+try:
+    from app.config_local import CCXT_MARKETS_REFRESH_SECONDS, CCXT_HTTP_POOL_SIZE
+except ImportError:
+    CCXT_MARKETS_REFRESH_SECONDS: int = 60 * 60  # Reload markets of shared CCXT exchange clients after this age
+    CCXT_HTTP_POOL_SIZE: int = 10  # Keep-alive connections per shared CCXT exchange client
+
+try:
+    from app.config_local import CCXT_ASYNC_MAX_CONCURRENCY
+except ImportError:
+    CCXT_ASYNC_MAX_CONCURRENCY: int = 10  # Max in-flight requests of AsyncCCXTAdapter.fetch_many (pacing by the shared limiter)
+
+try:
+    from app.config_local import DATA_RANGE_FETCH_CONCURRENCY
+except ImportError:
+    DATA_RANGE_FETCH_CONCURRENCY: int = 4  # Pages in flight when fetching deep history (DataAdapter.fetch_range)
+
+try:
+    from app.config_local import TINKOFF_CHANNEL_POOL_SIZE, TINKOFF_LISTING_REFRESH_SECONDS
+except ImportError:
+    TINKOFF_CHANNEL_POOL_SIZE: int = 2  # Long-lived Tinkoff gRPC channels per API token
+    TINKOFF_LISTING_REFRESH_SECONDS: int = 6 * 60 * 60  # Max age of the shares()/futures() listing used for FIGI lookups
+
+try:
+    from app.config_local import MOEX_CANDLE_STREAM, MOEX_STREAM_TIMEFRAMES, CANDLE_STREAM_FLUSH_SECONDS
+except ImportError:
+    MOEX_CANDLE_STREAM: bool = True  # Stream candles of enabled MOEX instruments from Tinkoff (needs a Tinkoff token; runs in one python -m app.worker process)
+    MOEX_STREAM_TIMEFRAMES: tuple = ("M1", "M5", "M15", "H1")  # Timeframes subscribed per enabled MOEX instrument
+    CANDLE_STREAM_FLUSH_SECONDS: int = 5  # How often streamed candles are written to the candle store
+
+try:
+    from app.config_local import BINANCE_KLINE_STREAM, BINANCE_STREAM_TIMEFRAMES, BINANCE_WS_URL
+except ImportError:
+    BINANCE_KLINE_STREAM: bool = False  # Stream klines of enabled Binance instruments over websocket (runs in one python -m app.worker process)
+    BINANCE_STREAM_TIMEFRAMES: tuple = ("M1", "M5", "M15", "H1")  # Timeframes subscribed per enabled Binance instrument
+    BINANCE_WS_URL: str = "wss://stream.binance.com:9443"  # Binance spot websocket base URL
+
+try:
+    from app.config_local import DATA_PROVIDER_RETRIES, DATA_PROVIDER_RETRY_BACKOFF_SECONDS
+except ImportError:
+    DATA_PROVIDER_RETRIES: int = 1  # Retries of a transient provider error before failing over to the next source
+    DATA_PROVIDER_RETRY_BACKOFF_SECONDS: float = 0.5  # First retry delay (doubles per retry, plus jitter)
+
+try:
+    from app.config_local import DATA_CIRCUIT_FAILURE_THRESHOLD, DATA_CIRCUIT_RESET_SECONDS
+except ImportError:
+    DATA_CIRCUIT_FAILURE_THRESHOLD: int = 5  # Consecutive transient failures that open a source's circuit breaker
+    DATA_CIRCUIT_RESET_SECONDS: int = 30  # Open breaker duration before a probe request is let through
+
+try:
+    from app.config_local import DATA_CRYPTO_FALLBACK_EXCHANGE
+except ImportError:
+    DATA_CRYPTO_FALLBACK_EXCHANGE: Optional[str] = "bybit"  # CCXT exchange used when Binance fails (None disables)
+
+try:
+    from app.config_local import RUN_QUEUE_EMBEDDED_WORKERS, RUN_WORKER_CONCURRENCY
+except ImportError:
+    RUN_QUEUE_EMBEDDED_WORKERS: int = 2  # Runs executed inside each API process while no dedicated worker (python -m app.worker) is alive (0 = never)
+    RUN_WORKER_CONCURRENCY: int = 4  # Runs executed at a time by a dedicated worker process
+
+try:
+    from app.config_local import RUN_QUEUE_POLL_SECONDS, RUN_QUEUE_LEASE_SECONDS, RUN_QUEUE_HEARTBEAT_SECONDS, RUN_QUEUE_MAX_ATTEMPTS
+except ImportError:
+    RUN_QUEUE_POLL_SECONDS: float = 2  # How often idle workers check the queue
+    RUN_QUEUE_LEASE_SECONDS: int = 120  # A claimed run is re-queued if its worker stops heartbeating for this long
+    RUN_QUEUE_HEARTBEAT_SECONDS: int = 20  # Lease extension interval
+    RUN_QUEUE_MAX_ATTEMPTS: int = 2  # Claims per run before a lost run is marked failed
+
+try:
+    from app.config_local import SCHEDULER_ENABLED, SCHEDULER_TIMEZONE, SCHEDULER_RELOAD_SECONDS
+except ImportError:
+    SCHEDULER_ENABLED: bool = True  # Fire analysis_schedules from the API processes (one process fans out each tick)
+    SCHEDULER_TIMEZONE: Optional[str] = None  # Timezone of schedules without one (None = server local time)
+    SCHEDULER_RELOAD_SECONDS: int = 60  # How often schedule changes made by other processes are picked up
+
+try:
+    from app.config_local import PREFETCH_CONCURRENCY_PER_PROVIDER
+except ImportError:
+    PREFETCH_CONCURRENCY_PER_PROVIDER: int = 4  # Concurrent market data fetches per provider when prefetching for many runs
+
+try:
+    from app.config_local import STEP_MEMO_ENABLED, STEP_MEMO_LOCK_TIMEOUT_SECONDS
+except ImportError:
+    STEP_MEMO_ENABLED: bool = True  # Reuse outputs of identical steps (same candles, prompts, model) across runs
+    STEP_MEMO_LOCK_TIMEOUT_SECONDS: int = 300  # How long an identical step waits for the one already running
+
+try:
+    from app.config_local import LLM_STREAMING_ENABLED
+except ImportError:
+    LLM_STREAMING_ENABLED: bool = True  # Stream LLM output of running steps to GET /api/runs/{id}/stream
+
+try:
+    from app.config_local import RUN_STREAM_POLL_SECONDS
+except ImportError:
+    RUN_STREAM_POLL_SECONDS: int = 15  # Run streams re-check the run in the DB this often (events that never arrive)
+
+try:
+    from app.config_local import RUN_EVENTS_FLUSH_SECONDS
+except ImportError:
+    RUN_EVENTS_FLUSH_SECONDS: float = 0.25  # Run events are written to the run_events table in batches this often
+
+try:
+    from app.config_local import RUN_EVENTS_TAIL_SECONDS
+except ImportError:
+    RUN_EVENTS_TAIL_SECONDS: float = 0.5  # API processes with open run streams read new run events this often
+
+try:
+    from app.config_local import RUN_EVENTS_RETENTION_SECONDS
+except ImportError:
+    RUN_EVENTS_RETENTION_SECONDS: int = 900  # Stored run events are deleted after this long
+
 
 def get_settings():
     """Return settings object (for FastAPI dependency injection if needed)."""
@@ -50,5 +216,54 @@ def get_settings():
         "session_secret": SESSION_SECRET,
         "enable_telegram_auto_send": ENABLE_TELEGRAM_AUTO_SEND,
         "enable_backtesting": ENABLE_BACKTESTING,
+        "pipeline_max_parallel_steps": PIPELINE_MAX_PARALLEL_STEPS,
+        "llm_max_concurrent_calls_per_model": LLM_MAX_CONCURRENT_CALLS_PER_MODEL,
+        "llm_http_max_connections": LLM_HTTP_MAX_CONNECTIONS,
+        "llm_cache_max_entries": LLM_CACHE_MAX_ENTRIES,
+        "llm_cache_default_ttl_seconds": LLM_CACHE_DEFAULT_TTL_SECONDS,
+        "data_cache_compression": DATA_CACHE_COMPRESSION,
+        "data_incremental_fetch": DATA_INCREMENTAL_FETCH,
+        "data_retention_candles": DATA_RETENTION_CANDLES,
+        "data_candle_store": DATA_CANDLE_STORE,
+        "data_resample_from_store": DATA_RESAMPLE_FROM_STORE,
+        "data_fetch_lock_timeout_seconds": DATA_FETCH_LOCK_TIMEOUT_SECONDS,
+        "data_memory_cache_max_bytes": DATA_MEMORY_CACHE_MAX_BYTES,
+        "universe_background_refresh": UNIVERSE_BACKGROUND_REFRESH,
+        "universe_refresh_interval_seconds": UNIVERSE_REFRESH_INTERVAL_SECONDS,
+        "universe_http_timeout_seconds": UNIVERSE_HTTP_TIMEOUT_SECONDS,
+        "ccxt_markets_refresh_seconds": CCXT_MARKETS_REFRESH_SECONDS,
+        "ccxt_http_pool_size": CCXT_HTTP_POOL_SIZE,
+        "ccxt_async_max_concurrency": CCXT_ASYNC_MAX_CONCURRENCY,
+        "data_range_fetch_concurrency": DATA_RANGE_FETCH_CONCURRENCY,
+        "tinkoff_channel_pool_size": TINKOFF_CHANNEL_POOL_SIZE,
+        "tinkoff_listing_refresh_seconds": TINKOFF_LISTING_REFRESH_SECONDS,
+        "moex_candle_stream": MOEX_CANDLE_STREAM,
+        "moex_stream_timeframes": MOEX_STREAM_TIMEFRAMES,
+        "candle_stream_flush_seconds": CANDLE_STREAM_FLUSH_SECONDS,
+        "binance_kline_stream": BINANCE_KLINE_STREAM,
+        "binance_stream_timeframes": BINANCE_STREAM_TIMEFRAMES,
+        "binance_ws_url": BINANCE_WS_URL,
+        "data_provider_retries": DATA_PROVIDER_RETRIES,
+        "data_provider_retry_backoff_seconds": DATA_PROVIDER_RETRY_BACKOFF_SECONDS,
+        "data_circuit_failure_threshold": DATA_CIRCUIT_FAILURE_THRESHOLD,
+        "data_circuit_reset_seconds": DATA_CIRCUIT_RESET_SECONDS,
+        "data_crypto_fallback_exchange": DATA_CRYPTO_FALLBACK_EXCHANGE,
+        "run_queue_embedded_workers": RUN_QUEUE_EMBEDDED_WORKERS,
+        "run_worker_concurrency": RUN_WORKER_CONCURRENCY,
+        "run_queue_poll_seconds": RUN_QUEUE_POLL_SECONDS,
+        "run_queue_lease_seconds": RUN_QUEUE_LEASE_SECONDS,
+        "run_queue_heartbeat_seconds": RUN_QUEUE_HEARTBEAT_SECONDS,
+        "run_queue_max_attempts": RUN_QUEUE_MAX_ATTEMPTS,
+        "scheduler_enabled": SCHEDULER_ENABLED,
+        "scheduler_timezone": SCHEDULER_TIMEZONE,
+        "scheduler_reload_seconds": SCHEDULER_RELOAD_SECONDS,
+        "prefetch_concurrency_per_provider": PREFETCH_CONCURRENCY_PER_PROVIDER,
+        "step_memo_enabled": STEP_MEMO_ENABLED,
+        "step_memo_lock_timeout_seconds": STEP_MEMO_LOCK_TIMEOUT_SECONDS,
+        "llm_streaming_enabled": LLM_STREAMING_ENABLED,
+        "run_stream_poll_seconds": RUN_STREAM_POLL_SECONDS,
+        "run_events_flush_seconds": RUN_EVENTS_FLUSH_SECONDS,
+        "run_events_tail_seconds": RUN_EVENTS_TAIL_SECONDS,
+        "run_events_retention_seconds": RUN_EVENTS_RETENTION_SECONDS,
     })()
 
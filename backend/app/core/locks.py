@@ -0,0 +1,176 @@
+"""
+Request coalescing and cross-process locks.
+
+- SingleFlight: concurrent calls with the same key in one process share a
+  single execution (followers wait for the leader's result).
+- db_advisory_lock: named MySQL lock (GET_LOCK) held on a dedicated
+  connection, so API and worker processes can coordinate.
+- hold_db_leadership: keeps such a lock for as long as possible, so exactly
+  one process of the deployment runs a service (e.g. the candle streams).
+"""
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Hashable, Iterator, Optional
+import threading
+import logging
+
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+
+class _Call:
+    """In-flight call shared by the leader and its followers."""
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """Coalesce concurrent calls with the same key into one execution. Thread-safe."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """Run fn() unless a call with the same key is already running, then wait for it.
+
+        Args:
+            key: Call key (e.g. (instrument, timeframe))
+            fn: Function to execute by the first caller
+
+        Returns:
+            Result of fn() (the same object for all coalesced callers)
+
+        Raises:
+            Whatever fn() raised, in the leader and in every follower
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def in_flight(self) -> int:
+        """Number of keys currently being executed."""
+        with self._lock:
+            return len(self._calls)
+
+
+@contextmanager
+def db_advisory_lock(name: str, timeout: int = 30) -> Iterator[bool]:
+    """Hold a named database lock for the duration of the block.
+
+    Uses MySQL GET_LOCK/RELEASE_LOCK on a dedicated pooled connection. On other
+    databases (e.g. SQLite for local checks) no lock is taken.
+
+    Args:
+        name: Lock name (max 64 characters in MySQL)
+        timeout: Seconds to wait for the lock
+
+    Yields:
+        True if the lock was acquired, False on timeout (the block still runs)
+    """
+    from app.core.database import engine
+
+    if engine.dialect.name != "mysql":
+        yield True
+        return
+
+    conn = engine.connect()
+    acquired = False
+    try:
+        acquired = conn.execute(
+            text("SELECT GET_LOCK(:name, :timeout)"), {"name": name, "timeout": timeout}
+        ).scalar() == 1
+        if not acquired:
+            logger.warning(f"db_lock_timeout: name={name}, timeout={timeout}")
+        yield acquired
+    finally:
+        if acquired:
+            try:
+                conn.execute(text("SELECT RELEASE_LOCK(:name)"), {"name": name})
+            except Exception as e:
+                # Don't return a connection still holding the lock to the pool
+                logger.warning(f"db_lock_release_failed: name={name}, error={e}")
+                conn.invalidate()
+        conn.close()
+
+
+def hold_db_leadership(
+    name: str,
+    stop: threading.Event,
+    on_elected: Callable[[], None],
+    on_deposed: Callable[[], None],
+    check_seconds: float = 30,
+):
+    """Run a service in the one process holding a named database lock.
+
+    Blocks until `stop` is set (run it in a thread). Takes the MySQL lock
+    without waiting; while another process holds it, retries every
+    `check_seconds`. A held lock is re-checked at the same interval (which also
+    keeps its connection alive); if the connection drops, the lock is gone too
+    and `on_deposed` runs before the next attempt. On other databases (e.g.
+    SQLite for local checks) this process is always elected.
+
+    Args:
+        name: Lock name (max 64 characters in MySQL)
+        stop: Set to step down and return
+        on_elected: Starts the service (lock acquired)
+        on_deposed: Stops the service (lock released or lost, or stopping)
+        check_seconds: Retry/re-check interval
+    """
+    from app.core.database import engine
+
+    if engine.dialect.name != "mysql":
+        on_elected()
+        stop.wait()
+        on_deposed()
+        return
+
+    while not stop.is_set():
+        try:
+            with engine.connect() as conn:
+                acquired = conn.execute(text("SELECT GET_LOCK(:name, 0)"), {"name": name}).scalar() == 1
+                if acquired:
+                    logger.info(f"db_leadership_acquired: name={name}")
+                    try:
+                        on_elected()
+                        while not stop.wait(check_seconds):
+                            held = conn.execute(
+                                text("SELECT IS_USED_LOCK(:name) = CONNECTION_ID()"), {"name": name}
+                            ).scalar()
+                            if held != 1:
+                                logger.warning(f"db_leadership_lost: name={name}")
+                                break
+                    finally:
+                        on_deposed()
+                        try:
+                            conn.execute(text("SELECT RELEASE_LOCK(:name)"), {"name": name})
+                        except Exception:
+                            # Don't return a connection still holding the lock to the pool
+                            conn.invalidate()
+        except Exception as e:
+            logger.warning(f"db_leadership_failed: name={name}, error={e}")
+        stop.wait(check_seconds)
@@ -3,7 +3,8 @@ FastAPI application entry point.
 """
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.api import health, runs, auth, instruments, analyses, settings
+from fastapi.middleware.gzip import GZipMiddleware
+from app.api import health, runs, auth, instruments, analyses, settings, schedules
 from app.core.config import get_settings
 from app.core.database import SessionLocal
 from app.services.telegram.bot_handler import start_bot_polling, stop_bot_polling
@@ -29,6 +30,22 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+class _GZipExceptEventStreams(GZipMiddleware):
+    """GZip that leaves server-sent events alone (compression buffers the stream)."""
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            accept = dict(scope.get("headers") or []).get(b"accept", b"")
+            if b"text/event-stream" in accept:
+                await self.app(scope, receive, send)
+                return
+        await super().__call__(scope, receive, send)
+
+
+# Compress larger JSON responses (instrument pages, run details)
+app.add_middleware(_GZipExceptEventStreams, minimum_size=1000)
+
 # Include routers
 app.include_router(health.router, tags=["health"])
 app.include_router(auth.router, prefix="/api/auth", tags=["auth"])
@@ -36,6 +53,7 @@ app.include_router(instruments.router, prefix="/api/instruments", tags=["instrum
 app.include_router(analyses.router, prefix="/api/analyses", tags=["analyses"])
 app.include_router(runs.router, prefix="/api/runs", tags=["runs"])
 app.include_router(settings.router, prefix="/api/settings", tags=["settings"])
+app.include_router(schedules.router, prefix="/api/schedules", tags=["schedules"])
 
 
 def _acquire_polling_lock() -> tuple[bool, object]:
@@ -153,6 +171,36 @@ async def startup_event():
     import atexit
     logger = logging.getLogger(__name__)
     
+    # Load instrument listings (MOEX/Binance) and keep them fresh off the request path
+    if app_settings.universe_background_refresh:
+        from app.services.data.universe import get_instrument_universe
+        get_instrument_universe().start_background_refresh()
+    
+    # Execute queued runs in this process while no dedicated worker (python -m app.worker) is alive
+    if app_settings.run_queue_embedded_workers > 0:
+        from app.services.analysis.run_queue import RunWorker
+        import app.main as main_module
+        main_module._run_worker = RunWorker(app_settings.run_queue_embedded_workers, standby=True)
+        main_module._run_worker.start()
+    else:
+        from app.services.analysis.run_queue import count_dedicated_workers
+        db = SessionLocal()
+        try:
+            if not count_dedicated_workers(db):
+                logger.warning("run_queue_no_workers: RUN_QUEUE_EMBEDDED_WORKERS is 0 and no python -m app.worker is alive; queued runs wait for one")
+        except Exception as e:
+            logger.warning(f"run_queue_worker_check_failed: error={e}")
+        finally:
+            db.close()
+    
+    # Fire analysis schedules (each tick is fanned out by one process)
+    if app_settings.scheduler_enabled:
+        from app.services.analysis.scheduler import get_run_scheduler
+        try:
+            get_run_scheduler().start()
+        except Exception as e:
+            logger.warning(f"run_scheduler_start_failed: error={e}")
+    
     # Try to acquire lock
     lock_acquired, lock_file = _acquire_polling_lock()
     
@@ -190,6 +238,32 @@ async def shutdown_event():
     """Cleanup on shutdown."""
     await stop_bot_polling()
     
+    # Stop firing schedules
+    from app.services.analysis.scheduler import get_run_scheduler
+    get_run_scheduler().stop()
+    
+    # Stop claiming runs; unfinished ones are re-queued when their lease expires
+    import app.main as main_module
+    if getattr(main_module, '_run_worker', None):
+        main_module._run_worker.stop(wait=False)
+        main_module._run_worker = None
+    from app.services.analysis.run_events import get_run_event_broker
+    get_run_event_broker().flush()
+    
+    # Stop instrument listing refresh
+    from app.services.data.universe import get_instrument_universe
+    get_instrument_universe().stop_background_refresh()
+    
+    # Close pooled Tinkoff gRPC channels
+    from app.services.data.tinkoff_client import close_tinkoff_client_pools
+    close_tinkoff_client_pools()
+    
+    # Close pooled LLM HTTP connections
+    from fastapi.concurrency import run_in_threadpool
+    from app.services.llm.client import close_shared_async_http_client, close_llm_event_loop
+    await close_shared_async_http_client()
+    await run_in_threadpool(close_llm_event_loop)
+    
     # Release lock file if we have it
     try:
         import app.main as main_module
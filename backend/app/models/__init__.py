@@ -10,6 +10,14 @@ from app.models.telegram_post import TelegramPost
 from app.models.telegram_user import TelegramUser
 from app.models.data_cache import DataCache
 from app.models.settings import AvailableModel, AvailableDataSource, AppSettings
+from app.models.llm_response_cache import LLMResponseCacheEntry
+from app.models.candle import Candle
+from app.models.instrument_universe import InstrumentUniverseSnapshot
+from app.models.analysis_schedule import AnalysisSchedule
+from app.models.run_batch import RunBatch
+from app.models.step_memo import StepMemo
+from app.models.run_worker import RunWorkerHeartbeat
+from app.models.run_event import RunEvent
 
 __all__ = [
     "User",
@@ -23,5 +31,13 @@ __all__ = [
     "AvailableModel",
     "AvailableDataSource",
     "AppSettings",
+    "LLMResponseCacheEntry",
+    "Candle",
+    "InstrumentUniverseSnapshot",
+    "AnalysisSchedule",
+    "RunBatch",
+    "StepMemo",
+    "RunWorkerHeartbeat",
+    "RunEvent",
 ]
 
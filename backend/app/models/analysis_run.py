@@ -1,7 +1,7 @@
 """
 Analysis run model.
 """
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Float, Enum as SQLEnum
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Float, JSON, Index, Enum as SQLEnum
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
@@ -28,15 +28,30 @@ class AnalysisRun(Base):
     trigger_type = Column(SQLEnum(TriggerType), nullable=False)
     instrument_id = Column(Integer, ForeignKey("instruments.id"), nullable=False)
     analysis_type_id = Column(Integer, ForeignKey("analysis_types.id"), nullable=True)  # NULL for legacy runs
+    batch_id = Column(Integer, ForeignKey("run_batches.id"), nullable=True, index=True)  # Set for batch/scheduled runs
     timeframe = Column(String(10), nullable=False)  # e.g., "M15", "H1", "D1"
     status = Column(SQLEnum(RunStatus, values_callable=lambda x: [e.value for e in x]), default=RunStatus.QUEUED, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     finished_at = Column(DateTime(timezone=True), nullable=True)
     cost_est_total = Column(Float, default=0.0)  # Estimated total cost in USD
 
+    # Run queue (see services/analysis/run_queue.py)
+    priority = Column(Integer, default=0, server_default="0", nullable=False)  # Lane: lower is claimed first
+    custom_config = Column(JSON, nullable=True)  # Config override passed to the pipeline
+    claimed_by = Column(String(100), nullable=True)  # Worker id holding the run
+    heartbeat_at = Column(DateTime(timezone=True), nullable=True)
+    lease_expires_at = Column(DateTime(timezone=True), nullable=True)  # Re-queued by any worker after this
+    attempts = Column(Integer, default=0, server_default="0", nullable=False)
+    scheduled_for = Column(DateTime(timezone=True), nullable=True)  # Not claimed before this time (jittered scheduled runs)
+
+    __table_args__ = (
+        Index("ix_analysis_runs_queue", "status", "priority", "id"),
+    )
+
     # Relationships
     instrument = relationship("Instrument", backref="runs")
     analysis_type = relationship("AnalysisType", back_populates="runs")
+    batch = relationship("RunBatch", back_populates="runs")
     steps = relationship("AnalysisStep", back_populates="run", cascade="all, delete-orphan")
     telegram_posts = relationship("TelegramPost", back_populates="run", cascade="all, delete-orphan")
 
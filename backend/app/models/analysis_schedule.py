@@ -0,0 +1,37 @@
+"""
+Analysis schedule model - periodic runs of an analysis type over many instruments.
+"""
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+
+class AnalysisSchedule(Base):
+    """Cron schedule that fans each tick out into one queued run per matching instrument."""
+
+    __tablename__ = "analysis_schedules"
+
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String(100), nullable=False, unique=True)  # e.g., "daystart_morning"
+    analysis_type_id = Column(Integer, ForeignKey("analysis_types.id"), nullable=False)
+    timeframe = Column(String(10), nullable=True)  # NULL = analysis type's default_timeframe
+    cron = Column(String(100), nullable=False)  # crontab expression, e.g. "0 8 * * 1-5"
+    timezone = Column(String(50), nullable=True)  # e.g. "Europe/Moscow"; NULL = SCHEDULER_TIMEZONE
+
+    # Instruments: enabled instruments matching the filters (NULL = any)
+    exchange = Column(String(50), nullable=True)  # e.g. "MOEX", "binance"
+    instrument_type = Column(String(20), nullable=True)  # "crypto" or "equity"
+
+    jitter_seconds = Column(Integer, default=60, nullable=False)  # Run start times are spread over this window
+    is_enabled = Column(Boolean, default=True, nullable=False)
+
+    # Last tick fanned out (claimed by one API process with a conditional update)
+    last_fired_at = Column(DateTime(timezone=True), nullable=True)
+    last_run_count = Column(Integer, default=0, nullable=False)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    # Relationships
+    analysis_type = relationship("AnalysisType")
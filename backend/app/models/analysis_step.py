@@ -1,7 +1,7 @@
 """
 Analysis step model (intrastep outputs).
 """
-from sqlalchemy import Column, Integer, String, ForeignKey, Text, DateTime, Float, JSON
+from sqlalchemy import Column, Integer, String, ForeignKey, Text, DateTime, Float, JSON, Boolean
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.core.database import Base
@@ -18,6 +18,8 @@ class AnalysisStep(Base):
     llm_model = Column(String(100), nullable=True)  # Model used, e.g., "openai/gpt-4o-mini"
     tokens_used = Column(Integer, default=0)
     cost_est = Column(Float, default=0.0)  # Estimated cost in USD
+    cache_hit = Column(Boolean, default=False, nullable=False)  # Output served from LLM response cache or a step memo (no tokens spent)
+    reused_from_step_id = Column(Integer, ForeignKey("analysis_steps.id", ondelete="SET NULL"), nullable=True)  # Identical step whose output was reused
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     # Relationships
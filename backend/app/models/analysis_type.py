@@ -33,6 +33,8 @@ class AnalysisType(Base):
     #       "data_sources": ["market_data"],
     #       "num_candles": 20,
     #       "publish_to_telegram": false,
+    #       "use_cache": false,  # optional: reuse identical LLM responses (also settable at pipeline level)
+    #       "cache_ttl_seconds": 3600,  # optional: defaults to one candle period
     #       "include_context": {
     #         "steps": ["wyckoff", "smc"],
     #         "placement": "before",
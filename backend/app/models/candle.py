@@ -0,0 +1,18 @@
+"""
+Candle model (persistent OHLCV history).
+"""
+from sqlalchemy import Column, Integer, String, BigInteger, Float, ForeignKey
+from app.core.database import Base
+
+
+class Candle(Base):
+    __tablename__ = "candles"
+
+    instrument_id = Column(Integer, ForeignKey("instruments.id"), primary_key=True)
+    timeframe = Column(String(10), primary_key=True)  # M1, M5, M15, M30, H1, H4, D1, W1
+    ts = Column(BigInteger, primary_key=True)  # Candle open time, epoch milliseconds (UTC)
+    open = Column(Float(precision=53), nullable=False)  # DOUBLE in MySQL
+    high = Column(Float(precision=53), nullable=False)
+    low = Column(Float(precision=53), nullable=False)
+    close = Column(Float(precision=53), nullable=False)
+    volume = Column(Float(precision=53), nullable=False)
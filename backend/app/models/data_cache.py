@@ -1,7 +1,7 @@
 """
 Data cache model for market data.
 """
-from sqlalchemy import Column, Integer, String, Text, DateTime
+from sqlalchemy import Column, Integer, String, Text, DateTime, LargeBinary
 from sqlalchemy.sql import func
 from app.core.database import Base
 
@@ -11,7 +11,8 @@ class DataCache(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     key = Column(String(255), unique=True, index=True, nullable=False)  # Cache key
-    payload = Column(Text, nullable=False)  # JSON string
+    payload = Column(Text, nullable=True)  # Legacy JSON string (pre columnar format)
+    payload_bin = Column(LargeBinary(length=16777215), nullable=True)  # MEDIUMBLOB - columnar candles (see services/data/codec.py)
     fetched_at = Column(DateTime(timezone=True), server_default=func.now())
     ttl_seconds = Column(Integer, nullable=False, default=3600)  # Time to live
 
@@ -0,0 +1,18 @@
+"""
+Instrument universe snapshot model (tradable symbols per provider listing).
+"""
+from sqlalchemy import Column, Integer, String, DateTime, JSON
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+
+class InstrumentUniverseSnapshot(Base):
+    __tablename__ = "instrument_universe"
+
+    id = Column(Integer, primary_key=True, index=True)
+    source = Column(String(50), unique=True, index=True, nullable=False)  # e.g., "moex_shares", "moex_futures", "binance_spot"
+    symbols = Column(JSON, nullable=False)  # Sorted list of symbols
+    etag = Column(String(255), nullable=True)  # ETag of the last listing response (conditional refresh)
+    last_modified = Column(String(100), nullable=True)  # Last-Modified of the last listing response
+    fetched_at = Column(DateTime(timezone=True), nullable=False)  # Last successful refresh (incl. 304 Not Modified)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
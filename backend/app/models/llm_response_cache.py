@@ -0,0 +1,20 @@
+"""
+LLM response cache model (persistent tier of the prompt-hash response cache).
+"""
+from sqlalchemy import Column, Integer, String, Text, DateTime, Float
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+
+class LLMResponseCacheEntry(Base):
+    __tablename__ = "llm_response_cache"
+
+    id = Column(Integer, primary_key=True, index=True)
+    key = Column(String(64), unique=True, index=True, nullable=False)  # sha256 of (model, temperature, max_tokens, prompts)
+    model = Column(String(200), nullable=False)  # Model that produced the response
+    content = Column(Text(length=16777215), nullable=False)  # MEDIUMTEXT in MySQL - LLM output
+    tokens_used = Column(Integer, default=0)  # Tokens spent on the original call
+    cost_est = Column(Float, default=0.0)  # Estimated cost of the original call in USD
+    hit_count = Column(Integer, default=0, nullable=False)  # How many times the entry was served
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
@@ -0,0 +1,25 @@
+"""
+Run batch model - runs of one analysis type queued together over many instruments.
+"""
+from sqlalchemy import Column, Integer, DateTime, ForeignKey, Enum as SQLEnum
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+from app.core.database import Base
+from app.models.analysis_run import TriggerType
+
+
+class RunBatch(Base):
+    """Group of runs created by POST /api/runs/batch or a schedule tick; progress is aggregated from its runs."""
+
+    __tablename__ = "run_batches"
+
+    id = Column(Integer, primary_key=True, index=True)
+    trigger_type = Column(SQLEnum(TriggerType), nullable=False)
+    analysis_type_id = Column(Integer, ForeignKey("analysis_types.id"), nullable=True)
+    schedule_id = Column(Integer, ForeignKey("analysis_schedules.id", ondelete="SET NULL"), nullable=True)  # Set for schedule ticks
+    run_count = Column(Integer, default=0, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    # Relationships
+    analysis_type = relationship("AnalysisType")
+    runs = relationship("AnalysisRun", back_populates="batch")
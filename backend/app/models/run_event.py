@@ -0,0 +1,19 @@
+"""
+Run event model - live run progress passed from the executing process to the run streams.
+"""
+from sqlalchemy import Column, Integer, String, DateTime, JSON
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+
+class RunEvent(Base):
+    """A published run event (short-lived: purged after RUN_EVENTS_RETENTION_SECONDS)."""
+
+    __tablename__ = "run_events"
+
+    id = Column(Integer, primary_key=True)  # Streams tail events in id order
+    run_id = Column(Integer, nullable=False, index=True)
+    origin = Column(String(100), nullable=False)  # Publishing process (hostname:pid)
+    event = Column(String(30), nullable=False)  # run_started, step_started, delta, step_completed, ...
+    data = Column(JSON, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
@@ -0,0 +1,17 @@
+"""
+Run worker model - dedicated run queue workers (python -m app.worker) and their heartbeats.
+"""
+from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+
+class RunWorkerHeartbeat(Base):
+    """A live dedicated worker; API processes only execute runs while none is alive."""
+
+    __tablename__ = "run_worker_heartbeats"
+
+    worker_id = Column(String(100), primary_key=True)  # hostname:pid (or --name)
+    concurrency = Column(Integer, nullable=False)
+    started_at = Column(DateTime(timezone=True), server_default=func.now())
+    heartbeat_at = Column(DateTime(timezone=True), nullable=False, index=True)
@@ -35,6 +35,7 @@ class AvailableDataSource(Base):
     supports_stocks = Column(Boolean, default=False)
     supports_forex = Column(Boolean, default=False)
     is_enabled = Column(Boolean, default=True, nullable=False)
+    priority = Column(Integer, default=100, server_default="100", nullable=False)  # Lower is tried first (provider failover order)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
@@ -0,0 +1,20 @@
+"""
+Step memo model - finished step outputs reusable by identical steps of other runs.
+"""
+from sqlalchemy import Column, Integer, String, DateTime, BigInteger, ForeignKey
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+
+class StepMemo(Base):
+    __tablename__ = "step_memos"
+
+    id = Column(Integer, primary_key=True, index=True)
+    key = Column(String(64), unique=True, index=True, nullable=False)  # sha256 of (instrument, timeframe, last candle, resolved LLM call)
+    instrument = Column(String(50), nullable=False)
+    timeframe = Column(String(10), nullable=False)
+    candle_ts = Column(BigInteger, nullable=False)  # Last candle open time (epoch ms) of the analyzed window
+    step_id = Column(Integer, ForeignKey("analysis_steps.id", ondelete="CASCADE"), nullable=True)  # Step holding the output (NULL while being computed)
+    hit_count = Column(Integer, default=0, nullable=False)  # Steps that reused it
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
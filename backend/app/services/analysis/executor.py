@@ -0,0 +1,147 @@
+"""
+Dependency-graph executor for analysis pipeline steps.
+Independent steps (e.g. wyckoff/smc/vsa) run concurrently, dependent steps
+(e.g. merge) start as soon as the steps they need have finished.
+"""
+from concurrent.futures import ThreadPoolExecutor, Future, wait, FIRST_COMPLETED
+from typing import Dict, Any, List, Set, Tuple, Callable, Optional
+import re
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Matches {step_name_output} placeholders in user prompt templates (step names
+# are free-form, e.g. "smc-v2")
+_OUTPUT_PLACEHOLDER_RE = re.compile(r"\{([^{}]+)_output\}")
+
+
+def get_referenced_step_names(analyzer: Any, step_config: Optional[Dict[str, Any]]) -> Set[str]:
+    """Collect names of steps whose outputs a step reads.
+
+    Sources of dependencies:
+    - include_context.steps
+    - {step_name_output} placeholders in user_prompt_template
+    - hardcoded context steps of built-in analyzers (used when no template is configured)
+
+    Args:
+        analyzer: Analyzer instance for the step
+        step_config: Step configuration dict
+
+    Returns:
+        Set of referenced step names
+    """
+    referenced: Set[str] = set()
+    step_config = step_config or {}
+
+    include_context = step_config.get("include_context") or {}
+    referenced.update(include_context.get("steps", []) or [])
+
+    template = step_config.get("user_prompt_template")
+    if template:
+        referenced.update(_OUTPUT_PLACEHOLDER_RE.findall(template))
+    else:
+        # Built-in prompt builders read previous_steps directly (e.g. ICT, merge)
+        referenced.update(getattr(analyzer, "context_steps", ()))
+
+    return referenced
+
+
+def build_step_dependencies(steps: List[Tuple[str, Any, Dict[str, Any]]]) -> Dict[int, Set[int]]:
+    """Build the dependency graph for ordered pipeline steps.
+
+    A step can only depend on steps that come before it in pipeline order
+    (the `order` field), which keeps the graph acyclic and preserves the
+    sequential semantics: references to later steps resolve to "not available".
+    If several earlier steps share a name, the closest one wins.
+
+    Args:
+        steps: Ordered list of (step_name, analyzer, step_config) tuples
+
+    Returns:
+        Dict mapping step index to the set of step indices it depends on
+    """
+    dependencies: Dict[int, Set[int]] = {}
+    latest_index_by_name: Dict[str, int] = {}
+
+    for index, (step_name, analyzer, step_config) in enumerate(steps):
+        referenced = get_referenced_step_names(analyzer, step_config)
+        dependencies[index] = {
+            latest_index_by_name[name]
+            for name in referenced
+            if name in latest_index_by_name
+        }
+        latest_index_by_name[step_name] = index
+
+    return dependencies
+
+
+class StepGraphExecutor:
+    """Runs pipeline steps on a bounded thread pool following their dependencies."""
+
+    def __init__(self, dependencies: Dict[int, Set[int]], max_workers: int = 4):
+        """Initialize executor.
+
+        Args:
+            dependencies: Dict mapping step index to indices it depends on
+            max_workers: Maximum number of steps running at the same time
+        """
+        self.dependencies = dependencies
+        self.max_workers = max(1, min(max_workers, len(dependencies) or 1))
+
+    def execute(
+        self,
+        run_step: Callable[[int], Any],
+        on_step_done: Callable[[int, Any, Optional[BaseException]], bool],
+        cancel: Optional[threading.Event] = None,
+    ) -> bool:
+        """Execute all steps.
+
+        `run_step` is called in a worker thread. `on_step_done` is always called
+        in the calling thread (so it can safely use the caller's DB session) with
+        either the step result or the raised exception. If it returns False, no
+        new steps are started; steps already in flight are still reported.
+
+        A step starts once all its dependencies are done, whether they
+        succeeded or failed (failed outputs are simply unavailable downstream).
+
+        Args:
+            run_step: Callable executing a step by index and returning its result
+            on_step_done: Callback receiving (index, result, error); returns whether to continue
+            cancel: When set, no new steps are started (in-flight steps are still reported)
+
+        Returns:
+            True if all steps were executed, False if execution was stopped early
+        """
+        pending = set(self.dependencies.keys())
+        done: Set[int] = set()
+        running: Dict[Future, int] = {}
+        stopped = False
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="pipeline-step") as pool:
+            while pending or running:
+                if not stopped and cancel is not None and cancel.is_set():
+                    stopped = True
+                    logger.info(f"step_graph_cancelled: skipped={len(pending)}")
+                if not stopped:
+                    # Start every step whose dependencies are satisfied, in pipeline order
+                    ready = sorted(i for i in pending if self.dependencies[i] <= done)
+                    for index in ready:
+                        pending.discard(index)
+                        running[pool.submit(run_step, index)] = index
+
+                if not running:
+                    break
+
+                finished, _ = wait(running.keys(), return_when=FIRST_COMPLETED)
+                # Report completions in pipeline order for deterministic bookkeeping
+                for future in sorted(finished, key=lambda f: running[f]):
+                    index = running.pop(future)
+                    error = future.exception()
+                    result = None if error else future.result()
+                    done.add(index)
+                    if not on_step_done(index, result, error) and not stopped:
+                        stopped = True
+                        logger.info(f"step_graph_stopped: step_index={index}, skipped={len(pending)}")
+
+        return not stopped and not pending
@@ -4,11 +4,16 @@ Dynamically builds and executes analysis steps from configuration.
 """
 from datetime import datetime, timezone
 from typing import Dict, Any, List, Optional, Tuple
+import threading
 from sqlalchemy.orm import Session
 from app.models.analysis_run import AnalysisRun, RunStatus
 from app.models.analysis_step import AnalysisStep
 from app.services.data.adapters import DataService
 from app.services.llm.client import LLMClient
+from app.core.config import PIPELINE_MAX_PARALLEL_STEPS, STEP_MEMO_ENABLED, LLM_STREAMING_ENABLED
+from app.services.analysis.executor import build_step_dependencies, StepGraphExecutor
+from app.services.analysis.run_events import get_run_event_broker, step_event
+from app.services.analysis.run_queue import finish_run
 from app.services.analysis.steps import (
     BaseAnalyzer,
     WyckoffAnalyzer,
@@ -86,6 +91,13 @@ class AnalysisPipeline:
                 logger.warning(f"Step config missing step_name, skipping: {step_config}")
                 continue
             
+            # Pipeline-level "use_cache" applies to steps that don't set it themselves
+            if "use_cache" in config and "use_cache" not in step_config:
+                step_config = {**step_config, "use_cache": config["use_cache"]}
+            # Same for "memoize" (cross-run reuse of identical steps)
+            if "memoize" in config and "memoize" not in step_config:
+                step_config = {**step_config, "memoize": config["memoize"]}
+            
             # Get analyzer class from map, or use generic analyzer
             analyzer_class = STEP_ANALYZER_MAP.get(step_name, GenericLLMAnalyzer)
             analyzer_instance = analyzer_class()
@@ -198,16 +210,30 @@ class AnalysisPipeline:
         run: AnalysisRun,
         db: Session,
         custom_config: Optional[Dict[str, Any]] = None,
+        worker_id: Optional[str] = None,
+        cancel: Optional[threading.Event] = None,
     ) -> AnalysisRun:
         """Execute the complete analysis pipeline.
         
+        Steps run as a dependency graph: steps that only need market data run
+        concurrently, steps reading other steps' outputs (include_context,
+        {step_output} placeholders, merge) wait for those steps.
+        
         Args:
             run: AnalysisRun database record
             db: Database session
+            custom_config: Config override (default: the analysis type's config)
+            worker_id: Run queue worker holding the run; the final status is only
+                written while the run is still claimed by it
+            cancel: Set when the worker lost the run (lease expired, run re-queued):
+                no new steps start and nothing more is written
             
         Returns:
             Updated AnalysisRun with all steps completed
         """
+        def cancelled() -> bool:
+            return cancel is not None and cancel.is_set()
+        
         try:
             # Initialize LLM client with db session to read API key from Settings
             if not self.llm_client:
@@ -221,6 +247,8 @@ class AnalysisPipeline:
             # Update status to running
             run.status = RunStatus.RUNNING
             db.commit()
+            events = get_run_event_broker()
+            events.publish(run.id, "run_started")
             
             # Fetch market data
             logger.info(f"fetching_market_data: run_id={run.id}, instrument={run.instrument.symbol}")
@@ -246,134 +274,211 @@ class AnalysisPipeline:
                 "previous_steps": {},
             }
             
-            total_cost = 0.0
-            model_failures = []  # Track model-related failures
-            
             # Build steps dynamically from config
             steps = self._build_steps_from_config(config)
+            dependencies = build_step_dependencies(steps)
+            
+            # Long lookbacks (num_candles beyond the cached window) need deep history
+            needed_candles = max((step_config or {}).get("num_candles") or 0 for _, _, step_config in steps) if steps else 0
+            if needed_candles > len(market_data.frame):
+                try:
+                    market_data = self.data_service.fetch_lookback(run.instrument.symbol, run.timeframe, needed_candles)
+                    context["market_data"] = market_data
+                except ValueError as e:
+                    logger.warning(f"history_fetch_failed: run_id={run.id}, candles={needed_candles}, error={e}")
             logger.info(f"built_steps_from_config: run_id={run.id}, step_count={len(steps)}")
             
-            # Run each analysis step
-            for step_name, analyzer, step_config in steps:
-                logger.info(f"running_step: run_id={run.id}, step={step_name}")
+            # Step results by index. Only written from this thread (on_step_done),
+            # read by workers for steps whose dependencies have completed.
+            step_results: Dict[int, Dict[str, Any]] = {}
+            run_id = run.id  # ORM attributes must not be lazy-loaded from worker threads
+            total_cost = 0.0
+            model_failures = []  # Track model-related failures
+            
+            def run_step(index: int) -> Dict[str, Any]:
+                """Run a single step in a worker thread (no DB access here)."""
+                step_name, analyzer, step_config = steps[index]
+                if cancelled():
+                    raise ValueError("Run lease lost")
+                logger.info(f"running_step: run_id={run_id}, step={step_name}")
                 
-                try:
-                    # Build context section if include_context is configured
-                    enhanced_context = self._build_context_for_step(context, step_config, steps)
-                    
-                    # Run the step (sync call) with step configuration
-                    step_result = analyzer.analyze(
-                        context=enhanced_context,
-                        llm_client=self.llm_client,
-                        step_config=step_config,
-                    )
-                    
-                    # Save step to database
-                    step_record = AnalysisStep(
-                        run_id=run.id,
-                        step_name=step_name,
-                        input_blob=step_result.get("input"),
-                        output_blob=step_result.get("output"),
-                        llm_model=step_result.get("model"),
-                        tokens_used=step_result.get("tokens_used", 0),
-                        cost_est=step_result.get("cost_est", 0.0),
-                    )
-                    db.add(step_record)
-                    db.commit()
-                    db.refresh(step_record)
+                # Expose outputs of the steps this one depends on
+                step_context = dict(context)
+                step_context["previous_steps"] = {
+                    steps[dep][0]: step_results[dep]
+                    for dep in sorted(dependencies[index])
+                    if dep in step_results
+                }
+                
+                # Build context section if include_context is configured
+                enhanced_context = self._build_context_for_step(step_context, step_config, steps)
+                
+                # Run the step (sync call) with step configuration, streaming
+                # its output to live subscribers of the run
+                call = analyzer.prepare_call(enhanced_context, step_config)
+                events.publish(run_id, "step_started", {"step": step_name})
+                on_delta = None
+                if LLM_STREAMING_ENABLED:
+                    on_delta = lambda text: events.publish(run_id, "delta", {"step": step_name, "text": text})
+                frame = context["market_data"].frame
+                if not STEP_MEMO_ENABLED or not (step_config or {}).get("memoize", True) or not len(frame):
+                    return analyzer.complete(call, self.llm_client, on_delta)
+                
+                # Identical step (same candles, prompts, model) of another run: reuse its output
+                from app.services.analysis.step_memo import make_step_memo_key, run_memoized
+                
+                candle_ts = int(frame.timestamp_ms[-1])
+                key = make_step_memo_key(
+                    context["instrument"], context["timeframe"], candle_ts,
+                    {**call, "model": call["model"] or self.llm_client.default_model},
+                )
+                return run_memoized(
+                    key, run_id, step_name,
+                    lambda: analyzer.complete(call, self.llm_client, on_delta),
+                    instrument=context["instrument"],
+                    timeframe=context["timeframe"],
+                    candle_ts=candle_ts,
+                )
+            
+            def on_step_done(index: int, step_result: Optional[Dict[str, Any]], error: Optional[BaseException]) -> bool:
+                """Persist a finished step. Returns False to stop starting new steps."""
+                nonlocal total_cost
+                step_name, _, step_config = steps[index]
+                
+                if cancelled():
+                    # Run re-queued for another worker: its steps belong to the next attempt
+                    if step_result and step_result.get("step_id"):
+                        db.query(AnalysisStep).filter(AnalysisStep.id == step_result["step_id"]).delete(synchronize_session=False)
+                        db.commit()
+                    return False
+                
+                if error is None:
+                    # Save step to database (memoized steps were saved by run_memoized)
+                    if not step_result.get("step_id"):
+                        step_record = AnalysisStep(
+                            run_id=run_id,
+                            step_name=step_name,
+                            input_blob=step_result.get("input"),
+                            output_blob=step_result.get("output"),
+                            llm_model=step_result.get("model"),
+                            tokens_used=step_result.get("tokens_used", 0),
+                            cost_est=step_result.get("cost_est", 0.0),
+                            cache_hit=step_result.get("cache_hit", False),
+                            reused_from_step_id=step_result.get("reused_from_step_id"),
+                        )
+                        db.add(step_record)
+                        db.commit()
+                    else:
+                        step_record = db.get(AnalysisStep, step_result["step_id"])
+                    if step_record is not None:
+                        events.publish(run_id, *step_event(step_record))
                     
-                    # Update context with step result for next steps
-                    context["previous_steps"][step_name] = step_result
+                    # Make step result available to dependent steps
+                    step_results[index] = step_result
                     total_cost += step_result.get("cost_est", 0.0)
                     
                     logger.info(
-                        f"step_completed: run_id={run.id}, step={step_name}, "
-                        f"tokens={step_result.get('tokens_used', 0)}, cost={step_result.get('cost_est', 0.0)}"
-                    )
-                except Exception as e:
-                    error_msg = str(e)
-                    error_type = type(e).__name__
-                    logger.error(f"step_failed: run_id={run.id}, step={step_name}, error={error_msg}")
-                    
-                    # Check if this is a model-related error
-                    is_model_error = (
-                        "429" in error_msg or  # Rate limit
-                        "404" in error_msg or  # Model not found
-                        "model" in error_msg.lower() and ("not found" in error_msg.lower() or "invalid" in error_msg.lower()) or
-                        "rate" in error_msg.lower() and "limit" in error_msg.lower() or
-                        "RateLimitError" in error_type
+                        f"step_completed: run_id={run_id}, step={step_name}, "
+                        f"tokens={step_result.get('tokens_used', 0)}, cost={step_result.get('cost_est', 0.0)}, "
+                        f"cache_hit={step_result.get('cache_hit', False)}"
                     )
+                    return True
+                
+                error_msg = str(error)
+                error_type = type(error).__name__
+                logger.error(f"step_failed: run_id={run_id}, step={step_name}, error={error_msg}")
+                
+                # Check if this is a model-related error
+                is_model_error = (
+                    "429" in error_msg or  # Rate limit
+                    "404" in error_msg or  # Model not found
+                    "model" in error_msg.lower() and ("not found" in error_msg.lower() or "invalid" in error_msg.lower()) or
+                    "rate" in error_msg.lower() and "limit" in error_msg.lower() or
+                    "RateLimitError" in error_type
+                )
+                
+                if is_model_error:
+                    model_name = step_config.get("model") if step_config else "unknown"
+                    model_failures.append({
+                        "step": step_name,
+                        "model": model_name,
+                        "error": error_msg,
+                        "error_type": error_type
+                    })
                     
-                    if is_model_error:
-                        model_name = step_config.get("model") if step_config else "unknown"
-                        model_failures.append({
-                            "step": step_name,
-                            "model": model_name,
-                            "error": error_msg,
-                            "error_type": error_type
-                        })
-                        
-                        # Mark model as having failures in database
-                        from app.models.settings import AvailableModel
-                        failed_model = db.query(AvailableModel).filter(
-                            AvailableModel.name == model_name
-                        ).first()
-                        if failed_model:
-                            failed_model.has_failures = True
-                            logger.info(f"marked_model_as_failing: model={model_name}, run_id={run.id}")
-                        
-                        # Save error step
-                        error_step = AnalysisStep(
-                            run_id=run.id,
-                            step_name=step_name,
-                            input_blob={"error": error_msg, "error_type": error_type, "is_model_error": True},
-                            output_blob=f"Error: {error_msg}",
-                        )
-                        db.add(error_step)
-                        
-                        # Store failure details in a special step for easy retrieval
-                        failure_step = AnalysisStep(
-                            run_id=run.id,
-                            step_name="model_failures",
-                            input_blob={"failures": model_failures},
-                            output_blob=f"Model failures detected: {len(model_failures)} step(s) failed due to model errors",
-                        )
-                        db.add(failure_step)
-                        
-                        # Stop execution immediately on model error
-                        run.status = RunStatus.MODEL_FAILURE
-                        run.finished_at = datetime.now(timezone.utc)
-                        run.cost_est_total = total_cost
-                        db.commit()
-                        
-                        logger.error(f"pipeline_stopped_due_to_model_error: run_id={run.id}, step={step_name}, model={model_name}")
-                        return run
-                    
-                    # For non-model errors, save error step and continue
-                    error_step = AnalysisStep(
-                        run_id=run.id,
-                        step_name=step_name,
-                        input_blob={"error": error_msg, "error_type": error_type, "is_model_error": False},
-                        output_blob=f"Error: {error_msg}",
-                    )
-                    db.add(error_step)
+                    # Mark model as having failures in database
+                    from app.models.settings import AvailableModel
+                    failed_model = db.query(AvailableModel).filter(
+                        AvailableModel.name == model_name
+                    ).first()
+                    if failed_model:
+                        failed_model.has_failures = True
+                        logger.info(f"marked_model_as_failing: model={model_name}, run_id={run_id}")
+                
+                # Save error step; for non-model errors dependent steps still run
+                # (the failed output is simply not available to them)
+                error_step = AnalysisStep(
+                    run_id=run_id,
+                    step_name=step_name,
+                    input_blob={"error": error_msg, "error_type": error_type, "is_model_error": is_model_error},
+                    output_blob=f"Error: {error_msg}",
+                )
+                db.add(error_step)
+                db.commit()
+                events.publish(run_id, *step_event(error_step))
+                
+                # Stop starting new steps on model error (in-flight steps are still recorded)
+                return not is_model_error
+            
+            # Run steps concurrently following their dependencies
+            executor = StepGraphExecutor(dependencies, max_workers=PIPELINE_MAX_PARALLEL_STEPS)
+            executor.execute(run_step, on_step_done, cancel=cancel)
+            
+            if cancelled():
+                logger.warning(f"pipeline_aborted: run_id={run_id}, worker={worker_id}, reason=lease_lost")
+                return run
+            
+            if model_failures:
+                # Store failure details in a special step for easy retrieval
+                failure_step = AnalysisStep(
+                    run_id=run_id,
+                    step_name="model_failures",
+                    input_blob={"failures": model_failures},
+                    output_blob=f"Model failures detected: {len(model_failures)} step(s) failed due to model errors",
+                )
+                if finish_run(
+                    db, run_id, worker_id,
+                    status=RunStatus.MODEL_FAILURE, finished_at=datetime.now(timezone.utc), cost_est_total=total_cost,
+                ):
+                    db.add(failure_step)
                     db.commit()
-                    # Continue with next step for non-model errors
-                    continue
+                    events.publish(run_id, "run_finished", {"status": RunStatus.MODEL_FAILURE.value, "cost_est_total": total_cost})
+                db.refresh(run)
+                
+                logger.error(
+                    f"pipeline_stopped_due_to_model_error: run_id={run_id}, "
+                    f"steps={[f['step'] for f in model_failures]}, models={[f['model'] for f in model_failures]}"
+                )
+                return run
             
             # All steps completed successfully
-            run.status = RunStatus.SUCCEEDED
-            run.finished_at = datetime.now(timezone.utc)
-            run.cost_est_total = total_cost
-            db.commit()
+            if not finish_run(
+                db, run_id, worker_id,
+                status=RunStatus.SUCCEEDED, finished_at=datetime.now(timezone.utc), cost_est_total=total_cost,
+            ):
+                logger.warning(f"pipeline_result_discarded: run_id={run_id}, worker={worker_id}, reason=run_not_held")
+                db.refresh(run)
+                return run
+            events.publish(run_id, "run_finished", {"status": RunStatus.SUCCEEDED.value, "cost_est_total": total_cost})
+            db.refresh(run)
             
             logger.info(f"pipeline_completed: run_id={run.id}, total_cost={total_cost}")
             return run
             
         except Exception as e:
             logger.error(f"pipeline_failed: run_id={run.id}, error={str(e)}")
-            run.status = RunStatus.FAILED
-            run.finished_at = datetime.now(timezone.utc)
-            db.commit()
+            db.rollback()
+            if not cancelled() and finish_run(db, run.id, worker_id, status=RunStatus.FAILED, finished_at=datetime.now(timezone.utc)):
+                get_run_event_broker().publish(run.id, "run_finished", {"status": RunStatus.FAILED.value, "cost_est_total": run.cost_est_total or 0.0})
             raise
 
@@ -0,0 +1,422 @@
+"""
+Live run progress: run events across processes and the SSE stream of a run.
+
+Pipelines publish events from their worker threads (RunEventBroker.publish);
+GET /api/runs/{id}/stream subscribers receive them on the event loop:
+- run_started
+- step_started {step}
+- delta {step, text}: partial LLM output (LLM_STREAMING_ENABLED)
+- step_completed / step_failed {step_id, step, output, ...}: step persisted
+- run_finished {status, cost_est_total}
+
+Runs mostly execute in another process (python -m app.worker) than the API
+process serving the stream, so events also go through the run_events table:
+the publishing process batches them (every RUN_EVENTS_FLUSH_SECONDS, deltas
+of a step merged) and each API process with open streams tails the table with
+a single query every RUN_EVENTS_TAIL_SECONDS. Streams additionally re-check
+the run every RUN_STREAM_POLL_SECONDS for events that never arrive (e.g. runs
+failed by queue recovery). Steps are persisted as before, so GET
+/api/runs/{id} keeps working.
+"""
+from datetime import datetime, timedelta, timezone
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+import asyncio
+import json
+import os
+import socket
+import threading
+import time
+import logging
+
+from sqlalchemy import func, insert, or_
+
+from app.core.config import (
+    RUN_STREAM_POLL_SECONDS,
+    RUN_EVENTS_FLUSH_SECONDS,
+    RUN_EVENTS_TAIL_SECONDS,
+    RUN_EVENTS_RETENTION_SECONDS,
+)
+from app.core.database import SessionLocal
+from app.models.analysis_run import AnalysisRun, RunStatus
+from app.models.analysis_step import AnalysisStep
+from app.models.run_event import RunEvent
+
+logger = logging.getLogger(__name__)
+
+# Undelivered events per subscriber before deltas are dropped (slow client;
+# the step_completed event still carries the full output)
+MAX_PENDING_EVENTS = 2000
+
+# Events read per tail query
+TAIL_BATCH_SIZE = 500
+
+# How long the tail waits for skipped ids (inserts committed out of id order)
+TAIL_GAP_WAIT_SECONDS = 5
+
+# How often publishing processes delete expired events
+PURGE_INTERVAL_SECONDS = 60
+
+FINISHED_STATUSES = (RunStatus.SUCCEEDED, RunStatus.FAILED, RunStatus.MODEL_FAILURE)
+
+
+def _process_id() -> str:
+    """Origin of the events published by this process."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def coalesce_events(events: List[Tuple[int, str, Dict[str, Any]]]) -> List[Tuple[int, str, Dict[str, Any]]]:
+    """Merge the deltas of each step of a run up to the run's next other event.
+
+    Args:
+        events: (run_id, event, data) in publishing order
+
+    Returns:
+        Events to store, in order (fewer rows for the tails to read)
+    """
+    merged: List[Tuple[int, str, Dict[str, Any]]] = []
+    open_deltas: Dict[Tuple[int, Any], int] = {}
+    for run_id, event, data in events:
+        if event == "delta":
+            key = (run_id, data.get("step"))
+            index = open_deltas.get(key)
+            if index is not None:
+                merged[index][2]["text"] += data.get("text", "")
+                continue
+            open_deltas[key] = len(merged)
+            merged.append((run_id, event, dict(data, text=data.get("text", ""))))
+            continue
+        # Deltas after e.g. step_completed must not move before it
+        for key in [key for key in open_deltas if key[0] == run_id]:
+            del open_deltas[key]
+        merged.append((run_id, event, data))
+    return merged
+
+
+class RunSubscription:
+    """Events of one run for one stream (read on the subscriber's event loop)."""
+
+    def __init__(self, run_id: int, loop: asyncio.AbstractEventLoop):
+        self.run_id = run_id
+        self.loop = loop
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.dropped = 0
+
+    def _offer(self, event: Tuple[str, Dict[str, Any]]):
+        """Queue an event (runs on the subscriber's loop)."""
+        if event[0] == "delta" and self.queue.qsize() >= MAX_PENDING_EVENTS:
+            self.dropped += 1
+            return
+        self.queue.put_nowait(event)
+
+    async def get(self, timeout: float) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """Next (event, data), or None if nothing arrived within `timeout` seconds."""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class RunEventBroker:
+    """Fans run events out to the stream subscribers of all processes.
+
+    publish() delivers to this process's subscribers right away and queues the
+    event for the run_events table (flushed by a background thread). While this
+    process has subscribers, a tail thread delivers the events other processes
+    stored.
+    """
+
+    def __init__(self):
+        self._subscriptions: Dict[int, List[RunSubscription]] = {}
+        self._lock = threading.Lock()
+        self._outbox: List[Tuple[int, str, Dict[str, Any]]] = []
+        self._outbox_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._flusher: Optional[threading.Thread] = None
+        self._tailer: Optional[threading.Thread] = None
+
+    def subscribe(self, run_id: int) -> RunSubscription:
+        """Subscribe to a run's events (call from the event loop)."""
+        subscription = RunSubscription(run_id, asyncio.get_running_loop())
+        with self._lock:
+            self._subscriptions.setdefault(run_id, []).append(subscription)
+            if self._tailer is None:
+                self._tailer = threading.Thread(target=self._run_tailer, name="run-events-tail", daemon=True)
+                self._tailer.start()
+        return subscription
+
+    def unsubscribe(self, subscription: RunSubscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.run_id, [])
+            if subscription in subscriptions:
+                subscriptions.remove(subscription)
+            if not subscriptions:
+                self._subscriptions.pop(subscription.run_id, None)
+        if subscription.dropped:
+            logger.info(f"run_stream_deltas_dropped: run_id={subscription.run_id}, dropped={subscription.dropped}")
+
+    def has_subscribers(self, run_id: int) -> bool:
+        """Whether this process streams the run (subscribers elsewhere are unknown)."""
+        return bool(self._subscriptions.get(run_id))
+
+    def publish(self, run_id: int, event: str, data: Optional[Dict[str, Any]] = None):
+        """Send an event to the run's subscribers in all processes (thread-safe, never raises)."""
+        data = data or {}
+        self._deliver(run_id, event, data)
+        with self._outbox_lock:
+            self._outbox.append((run_id, event, data))
+            if self._flusher is None:
+                self._flusher = threading.Thread(target=self._run_flusher, name="run-events-flush", daemon=True)
+                self._flusher.start()
+
+    def flush(self):
+        """Store the queued events now (e.g. before the process exits)."""
+        with self._flush_lock:
+            with self._outbox_lock:
+                events, self._outbox = self._outbox, []
+            if not events:
+                return
+            origin = _process_id()
+            created_at = _now()
+            rows = [
+                {"run_id": run_id, "origin": origin, "event": event, "data": data, "created_at": created_at}
+                for run_id, event, data in coalesce_events(events)
+            ]
+            db = SessionLocal()
+            try:
+                db.execute(insert(RunEvent), rows)
+                db.commit()
+            except Exception as e:
+                db.rollback()
+                # Streams elsewhere catch up on persisted steps when they re-check the run
+                logger.warning(f"run_events_flush_failed: events={len(rows)}, error={e}")
+            finally:
+                db.close()
+
+    def _deliver(self, run_id: int, event: str, data: Dict[str, Any]):
+        """Send an event to this process's subscribers of the run."""
+        if not self._subscriptions.get(run_id):
+            return
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(run_id, []))
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription._offer, (event, data))
+            except RuntimeError:
+                # Subscriber's loop closed (shutdown)
+                pass
+
+    def _run_flusher(self):
+        """Flush queued events every RUN_EVENTS_FLUSH_SECONDS; delete expired ones now and then."""
+        last_purge = 0.0
+        while True:
+            time.sleep(RUN_EVENTS_FLUSH_SECONDS)
+            self.flush()
+            if time.monotonic() - last_purge >= PURGE_INTERVAL_SECONDS:
+                last_purge = time.monotonic()
+                self._purge()
+
+    def _purge(self):
+        db = SessionLocal()
+        try:
+            cutoff = _now() - timedelta(seconds=RUN_EVENTS_RETENTION_SECONDS)
+            deleted = db.query(RunEvent).filter(RunEvent.created_at < cutoff).delete(synchronize_session=False)
+            db.commit()
+            if deleted:
+                logger.debug(f"run_events_purged: deleted={deleted}")
+        except Exception as e:
+            db.rollback()
+            logger.warning(f"run_events_purge_failed: error={e}")
+        finally:
+            db.close()
+
+    def _run_tailer(self):
+        """Deliver other processes' stored events while this process has subscribers."""
+        last_id: Optional[int] = None
+        gaps: Dict[int, float] = {}
+        while True:
+            with self._lock:
+                if not self._subscriptions:
+                    self._tailer = None
+                    return
+            try:
+                last_id = self._tail(last_id, gaps)
+            except Exception as e:
+                logger.warning(f"run_events_tail_failed: error={e}")
+            time.sleep(RUN_EVENTS_TAIL_SECONDS)
+
+    def _tail(self, last_id: Optional[int], gaps: Dict[int, float]) -> int:
+        """Deliver the events stored after `last_id` (and late ones in `gaps`).
+
+        Ids are assigned on insert but become visible on commit, so a skipped id
+        may still show up; it is re-read for TAIL_GAP_WAIT_SECONDS.
+
+        Args:
+            last_id: Highest event id read so far (None: start at the newest event)
+            gaps: Skipped ids -> when they were noticed (updated in place)
+
+        Returns:
+            New last_id
+        """
+        db = SessionLocal()
+        try:
+            if last_id is None:
+                return db.query(func.max(RunEvent.id)).scalar() or 0
+            now = time.monotonic()
+            for event_id in [event_id for event_id, since in gaps.items() if now - since > TAIL_GAP_WAIT_SECONDS]:
+                del gaps[event_id]
+            condition = RunEvent.id > last_id
+            if gaps:
+                condition = or_(condition, RunEvent.id.in_(list(gaps)))
+            rows = (
+                db.query(RunEvent.id, RunEvent.run_id, RunEvent.origin, RunEvent.event, RunEvent.data)
+                .filter(condition)
+                .order_by(RunEvent.id)
+                .limit(TAIL_BATCH_SIZE)
+                .all()
+            )
+        finally:
+            db.close()
+
+        origin = _process_id()
+        for row in rows:
+            gaps.pop(row.id, None)
+            if row.id > last_id:
+                if row.id - last_id <= TAIL_BATCH_SIZE:
+                    gaps.update((event_id, now) for event_id in range(last_id + 1, row.id))
+                last_id = row.id
+            if row.origin != origin:
+                # This process's own events were delivered on publish
+                self._deliver(row.run_id, row.event, row.data or {})
+        return last_id
+
+
+_run_event_broker: Optional[RunEventBroker] = None
+_run_event_broker_lock = threading.Lock()
+
+
+def get_run_event_broker() -> RunEventBroker:
+    """Get the process-wide run event broker."""
+    global _run_event_broker
+    if _run_event_broker is None:
+        with _run_event_broker_lock:
+            if _run_event_broker is None:
+                _run_event_broker = RunEventBroker()
+    return _run_event_broker
+
+
+def step_event(step: AnalysisStep) -> Tuple[str, Dict[str, Any]]:
+    """step_completed/step_failed event of a persisted step."""
+    failed = isinstance(step.input_blob, dict) and "error" in step.input_blob
+    return ("step_failed" if failed else "step_completed"), {
+        "step_id": step.id,
+        "step": step.step_name,
+        "output": step.output_blob,
+        "llm_model": step.llm_model,
+        "tokens_used": step.tokens_used or 0,
+        "cost_est": step.cost_est or 0.0,
+        "cache_hit": bool(step.cache_hit),
+        "reused_from_step_id": step.reused_from_step_id,
+    }
+
+
+def load_run_progress(run_id: int, exclude_step_ids: Set[int]) -> Optional[Dict[str, Any]]:
+    """Status, cost and steps (except `exclude_step_ids`) of a run; None if not found."""
+    db = SessionLocal()
+    try:
+        run = db.query(AnalysisRun.status, AnalysisRun.cost_est_total).filter(AnalysisRun.id == run_id).first()
+        if not run:
+            return None
+        query = db.query(AnalysisStep).filter(AnalysisStep.run_id == run_id)
+        if exclude_step_ids:
+            query = query.filter(AnalysisStep.id.notin_(exclude_step_ids))
+        return {
+            "status": run.status,
+            "cost_est_total": run.cost_est_total or 0.0,
+            "steps": [step_event(step) for step in query.order_by(AnalysisStep.id).all()],
+        }
+    finally:
+        db.close()
+
+
+def format_sse(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+async def stream_run_events(run_id: int, is_disconnected: Callable[[], Awaitable[bool]]) -> AsyncIterator[str]:
+    """Server-sent events of a run until it finishes or the client disconnects.
+
+    Starts with a 'snapshot' event (status and the steps persisted so far),
+    then relays broker events, re-checking the run in the database every
+    RUN_STREAM_POLL_SECONDS.
+
+    Args:
+        run_id: Run ID
+        is_disconnected: Request.is_disconnected of the streaming request
+
+    Yields:
+        SSE-formatted events (and keep-alive comments)
+    """
+    from fastapi.concurrency import run_in_threadpool
+
+    broker = get_run_event_broker()
+    # Subscribe before the snapshot so no event falls in between
+    subscription = broker.subscribe(run_id)
+    seen_step_ids: Set[int] = set()
+    try:
+        progress = await run_in_threadpool(load_run_progress, run_id, seen_step_ids)
+        if progress is None:
+            yield format_sse("error", {"detail": "Run not found"})
+            return
+        status = progress["status"]
+        seen_step_ids.update(data["step_id"] for _, data in progress["steps"])
+        yield format_sse("snapshot", {
+            "status": status.value,
+            "cost_est_total": progress["cost_est_total"],
+            "steps": [dict(data, event=event) for event, data in progress["steps"]],
+        })
+        if status in FINISHED_STATUSES:
+            yield format_sse("run_finished", {"status": status.value, "cost_est_total": progress["cost_est_total"]})
+            return
+
+        next_check = time.monotonic() + RUN_STREAM_POLL_SECONDS
+        while True:
+            item = await subscription.get(timeout=max(next_check - time.monotonic(), 0.05))
+            if await is_disconnected():
+                return
+            if item is not None:
+                event, data = item
+                if event in ("step_completed", "step_failed"):
+                    if data["step_id"] in seen_step_ids:
+                        continue
+                    seen_step_ids.add(data["step_id"])
+                elif event == "run_started":
+                    status = RunStatus.RUNNING
+                yield format_sse(event, data)
+                if event == "run_finished":
+                    return
+                if time.monotonic() < next_check:
+                    continue
+
+            # Catch up on what no event reported (lost or expired events, runs
+            # failed by queue recovery)
+            next_check = time.monotonic() + RUN_STREAM_POLL_SECONDS
+            progress = await run_in_threadpool(load_run_progress, run_id, seen_step_ids)
+            if progress is None:
+                return
+            if progress["status"] != status:
+                status = progress["status"]
+                if status == RunStatus.RUNNING:
+                    yield format_sse("run_started", {})
+            for event, data in progress["steps"]:
+                seen_step_ids.add(data["step_id"])
+                yield format_sse(event, data)
+            if status in FINISHED_STATUSES:
+                yield format_sse("run_finished", {"status": status.value, "cost_est_total": progress["cost_est_total"]})
+                return
+            yield ": keep-alive\n\n"
+    finally:
+        broker.unsubscribe(subscription)
@@ -0,0 +1,647 @@
+"""
+DB-backed analysis run queue.
+
+Runs are queued rows of analysis_runs (status 'queued'). Workers claim them
+in lane order (priority, then id) with SELECT ... FOR UPDATE SKIP LOCKED plus
+a conditional status update, so any number of worker processes can share the
+queue. A claimed run holds a lease that the worker extends with heartbeats;
+when a worker dies its runs' leases expire and any worker re-queues them
+(up to RUN_QUEUE_MAX_ATTEMPTS attempts, then they fail).
+
+Workers run as a separate process (python -m app.worker) and embedded in the
+API processes (RUN_QUEUE_EMBEDDED_WORKERS). Dedicated workers record
+heartbeats (run_worker_heartbeats); embedded workers stand by while one is
+alive, so runs keep executing when no dedicated worker is deployed.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple, Any
+import os
+import socket
+import threading
+import time
+import traceback
+import logging
+
+from sqlalchemy import func, or_, update
+from sqlalchemy.orm import Session
+
+from app.core.config import (
+    RUN_QUEUE_POLL_SECONDS,
+    RUN_QUEUE_LEASE_SECONDS,
+    RUN_QUEUE_HEARTBEAT_SECONDS,
+    RUN_QUEUE_MAX_ATTEMPTS,
+)
+from app.core.database import SessionLocal
+from app.models.analysis_run import AnalysisRun, RunStatus, TriggerType
+from app.models.run_batch import RunBatch
+from app.models.run_worker import RunWorkerHeartbeat
+
+logger = logging.getLogger(__name__)
+
+# Lanes: manual runs (someone is waiting in the UI) before scheduled ones
+RUN_PRIORITY = {
+    TriggerType.MANUAL: 0,
+    TriggerType.SCHEDULED: 10,
+}
+
+# How often a worker looks for runs with expired leases
+RECOVERY_INTERVAL_SECONDS = 30
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def enqueue_run(
+    db: Session,
+    instrument_id: int,
+    timeframe: str,
+    trigger_type: TriggerType = TriggerType.MANUAL,
+    analysis_type_id: Optional[int] = None,
+    custom_config: Optional[Dict[str, Any]] = None,
+    priority: Optional[int] = None,
+) -> AnalysisRun:
+    """Create a queued run (commits) and wake in-process workers.
+
+    Args:
+        db: Database session
+        instrument_id: Instrument ID
+        timeframe: Timeframe (M1, H1, D1, ...)
+        trigger_type: Manual or scheduled (selects the lane)
+        analysis_type_id: Analysis type (None for legacy runs)
+        custom_config: Pipeline config override
+        priority: Explicit lane (default: by trigger type)
+
+    Returns:
+        The queued run
+    """
+    run = AnalysisRun(
+        trigger_type=trigger_type,
+        instrument_id=instrument_id,
+        analysis_type_id=analysis_type_id,
+        timeframe=timeframe,
+        status=RunStatus.QUEUED,
+        priority=RUN_PRIORITY.get(trigger_type, 0) if priority is None else priority,
+        custom_config=custom_config,
+    )
+    db.add(run)
+    db.commit()
+    db.refresh(run)
+    logger.info(f"run_enqueued: run_id={run.id}, trigger={trigger_type.value}, priority={run.priority}")
+    wake_workers()
+    return run
+
+
+def enqueue_runs(
+    db: Session,
+    targets: List[Tuple[int, str]],
+    trigger_type: TriggerType = TriggerType.MANUAL,
+    analysis_type_id: Optional[int] = None,
+    custom_config: Optional[Dict[str, Any]] = None,
+    priority: Optional[int] = None,
+    start_times: Optional[List[Optional[datetime]]] = None,
+    batch_id: Optional[int] = None,
+) -> List[AnalysisRun]:
+    """Create queued runs for several instruments in one transaction and wake in-process workers.
+
+    Args:
+        db: Database session
+        targets: (instrument ID, timeframe) per run
+        trigger_type: Manual or scheduled (selects the lane)
+        analysis_type_id: Analysis type shared by all runs
+        custom_config: Pipeline config override shared by all runs
+        priority: Explicit lane (default: by trigger type)
+        start_times: Earliest start per run (None = claimable immediately)
+        batch_id: Run batch the runs belong to
+
+    Returns:
+        The queued runs, in target order
+    """
+    lane = RUN_PRIORITY.get(trigger_type, 0) if priority is None else priority
+    runs = [
+        AnalysisRun(
+            trigger_type=trigger_type,
+            instrument_id=instrument_id,
+            analysis_type_id=analysis_type_id,
+            timeframe=timeframe,
+            status=RunStatus.QUEUED,
+            priority=lane,
+            custom_config=custom_config,
+            scheduled_for=start_times[index] if start_times else None,
+            batch_id=batch_id,
+        )
+        for index, (instrument_id, timeframe) in enumerate(targets)
+    ]
+    db.add_all(runs)
+    db.commit()
+    for run in runs:
+        db.refresh(run)
+    logger.info(f"runs_enqueued: count={len(runs)}, trigger={trigger_type.value}, priority={lane}")
+    wake_workers()
+    return runs
+
+
+def enqueue_batch(
+    db: Session,
+    targets: List[Tuple[int, str]],
+    trigger_type: TriggerType = TriggerType.MANUAL,
+    analysis_type_id: Optional[int] = None,
+    custom_config: Optional[Dict[str, Any]] = None,
+    start_times: Optional[List[Optional[datetime]]] = None,
+    schedule_id: Optional[int] = None,
+) -> Tuple[RunBatch, List[AnalysisRun]]:
+    """Create a run batch and its queued runs in one transaction.
+
+    Args:
+        db: Database session
+        targets: (instrument ID, timeframe) per run
+        trigger_type: Manual or scheduled (selects the lane)
+        analysis_type_id: Analysis type shared by all runs
+        custom_config: Pipeline config override shared by all runs
+        start_times: Earliest start per run (None = claimable immediately)
+        schedule_id: Schedule whose tick created the batch
+
+    Returns:
+        Tuple of (batch, queued runs in target order)
+    """
+    batch = RunBatch(
+        trigger_type=trigger_type,
+        analysis_type_id=analysis_type_id,
+        schedule_id=schedule_id,
+        run_count=len(targets),
+    )
+    db.add(batch)
+    db.flush()
+    runs = enqueue_runs(
+        db,
+        targets,
+        trigger_type=trigger_type,
+        analysis_type_id=analysis_type_id,
+        custom_config=custom_config,
+        start_times=start_times,
+        batch_id=batch.id,
+    )
+    db.refresh(batch)
+    return batch, runs
+
+
+def batch_progress(db: Session, batch_id: int) -> Dict[str, Any]:
+    """Aggregated status of a batch's runs (one grouped query).
+
+    Returns:
+        Dict with run counts per status, finished count, progress (0..1),
+        overall status and total estimated cost
+    """
+    rows = (
+        db.query(AnalysisRun.status, func.count(AnalysisRun.id), func.coalesce(func.sum(AnalysisRun.cost_est_total), 0.0))
+        .filter(AnalysisRun.batch_id == batch_id)
+        .group_by(AnalysisRun.status)
+        .all()
+    )
+    counts = {status.value: 0 for status in RunStatus}
+    cost = 0.0
+    for status, count, status_cost in rows:
+        counts[status.value] = count
+        cost += float(status_cost or 0.0)
+    total = sum(counts.values())
+    active = counts[RunStatus.QUEUED.value] + counts[RunStatus.RUNNING.value]
+    finished = total - active
+    if active == 0:
+        status = "completed" if counts[RunStatus.SUCCEEDED.value] == total else "completed_with_errors"
+    else:
+        status = "queued" if finished == 0 and counts[RunStatus.RUNNING.value] == 0 else "running"
+    return {
+        "status": status,
+        "total": total,
+        "finished": finished,
+        "progress": round(finished / total, 3) if total else 1.0,
+        "counts": counts,
+        "cost_est_total": cost,
+    }
+
+
+def claim_next_run(db: Session, worker_id: str, lease_seconds: int = RUN_QUEUE_LEASE_SECONDS) -> Optional[int]:
+    """Claim the next queued run for a worker (runs with a future scheduled_for wait).
+
+    Returns:
+        Run ID or None if the queue is empty
+    """
+    while True:
+        run_id = (
+            db.query(AnalysisRun.id)
+            .filter(
+                AnalysisRun.status == RunStatus.QUEUED,
+                or_(AnalysisRun.scheduled_for.is_(None), AnalysisRun.scheduled_for <= _now()),
+            )
+            .order_by(AnalysisRun.priority, AnalysisRun.id)
+            .with_for_update(skip_locked=True)
+            .limit(1)
+            .scalar()
+        )
+        if run_id is None:
+            db.rollback()
+            return None
+        now = _now()
+        # Conditional update: correct even where SKIP LOCKED isn't available (SQLite)
+        claimed = db.execute(
+            update(AnalysisRun)
+            .where(AnalysisRun.id == run_id, AnalysisRun.status == RunStatus.QUEUED)
+            .values(
+                status=RunStatus.RUNNING,
+                claimed_by=worker_id,
+                heartbeat_at=now,
+                lease_expires_at=now + timedelta(seconds=lease_seconds),
+                attempts=AnalysisRun.attempts + 1,
+            )
+        ).rowcount
+        db.commit()
+        if claimed:
+            return run_id
+
+
+def heartbeat_runs(db: Session, worker_id: str, run_ids: List[int], lease_seconds: int = RUN_QUEUE_LEASE_SECONDS) -> List[int]:
+    """Extend the leases of runs held by a worker.
+
+    Returns:
+        IDs of the runs still held (a run re-queued after lease expiry is lost to this worker)
+    """
+    if not run_ids:
+        return []
+    now = _now()
+    held = (
+        AnalysisRun.id.in_(run_ids),
+        AnalysisRun.claimed_by == worker_id,
+        AnalysisRun.status == RunStatus.RUNNING,
+    )
+    db.execute(
+        update(AnalysisRun)
+        .where(*held)
+        .values(heartbeat_at=now, lease_expires_at=now + timedelta(seconds=lease_seconds))
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return [run_id for (run_id,) in db.query(AnalysisRun.id).filter(*held).all()]
+
+
+def finish_run(db: Session, run_id: int, worker_id: Optional[str], **values) -> bool:
+    """Set a running run's final status (commits), unless it is no longer this worker's.
+
+    A run whose lease expired may have been re-queued and claimed by another
+    worker; the worker that lost it must not overwrite its state.
+
+    Args:
+        db: Database session
+        run_id: Run ID
+        worker_id: Worker holding the run (None when executed outside the queue)
+        **values: Columns to set (status, finished_at, cost_est_total)
+
+    Returns:
+        True if the run was updated
+    """
+    query = update(AnalysisRun).where(AnalysisRun.id == run_id, AnalysisRun.status == RunStatus.RUNNING)
+    if worker_id is not None:
+        query = query.where(AnalysisRun.claimed_by == worker_id)
+    updated = db.execute(query.values(**values).execution_options(synchronize_session=False)).rowcount
+    db.commit()
+    return bool(updated)
+
+
+def recover_expired_runs(db: Session, max_attempts: int = RUN_QUEUE_MAX_ATTEMPTS) -> int:
+    """Re-queue (or fail, after max_attempts) running runs whose lease expired.
+
+    Returns:
+        Number of runs recovered
+    """
+    now = _now()
+    expired = (
+        db.query(AnalysisRun.id, AnalysisRun.attempts, AnalysisRun.claimed_by)
+        .filter(AnalysisRun.status == RunStatus.RUNNING, AnalysisRun.lease_expires_at < now)
+        .all()
+    )
+    recovered = 0
+    for run_id, attempts, claimed_by in expired:
+        values = {"claimed_by": None, "lease_expires_at": None}
+        if attempts < max_attempts:
+            values["status"] = RunStatus.QUEUED
+        else:
+            values.update(status=RunStatus.FAILED, finished_at=now)
+        # Only if nobody extended or finished it in the meantime
+        changed = db.execute(
+            update(AnalysisRun)
+            .where(
+                AnalysisRun.id == run_id,
+                AnalysisRun.status == RunStatus.RUNNING,
+                AnalysisRun.lease_expires_at < now,
+            )
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        if changed:
+            recovered += 1
+            logger.warning(
+                f"run_lease_expired: run_id={run_id}, worker={claimed_by}, attempts={attempts}, "
+                f"action={'requeued' if attempts < max_attempts else 'failed'}"
+            )
+            if attempts >= max_attempts:
+                _add_error_step(db, run_id, "Run lease expired (worker stopped)", f"worker={claimed_by}, attempts={attempts}")
+    db.commit()
+    return recovered
+
+
+def record_worker_heartbeat(db: Session, worker_id: str, concurrency: int):
+    """Mark a dedicated worker as alive (API processes stand by while one is)."""
+    db.merge(RunWorkerHeartbeat(worker_id=worker_id, concurrency=concurrency, heartbeat_at=_now()))
+    db.commit()
+
+
+def remove_worker_heartbeat(db: Session, worker_id: str):
+    """Forget a stopped dedicated worker."""
+    db.query(RunWorkerHeartbeat).filter(RunWorkerHeartbeat.worker_id == worker_id).delete(synchronize_session=False)
+    db.commit()
+
+
+def count_dedicated_workers(db: Session) -> int:
+    """Dedicated workers that sent a heartbeat within the lease period."""
+    return db.query(func.count(RunWorkerHeartbeat.worker_id)).filter(
+        RunWorkerHeartbeat.heartbeat_at > _now() - timedelta(seconds=RUN_QUEUE_LEASE_SECONDS)
+    ).scalar() or 0
+
+
+def _add_error_step(db: Session, run_id: int, error_msg: str, error_traceback: str):
+    from app.models.analysis_step import AnalysisStep
+
+    db.add(AnalysisStep(
+        run_id=run_id,
+        step_name="pipeline_error",
+        input_blob={"error": error_msg, "traceback": error_traceback},
+        output_blob=f"Pipeline failed: {error_msg}",
+    ))
+
+
+def execute_run(run_id: int, worker_id: Optional[str] = None, cancel: Optional[threading.Event] = None):
+    """Run the analysis pipeline for a claimed run (own DB session).
+
+    Args:
+        run_id: Run ID
+        worker_id: Worker that claimed the run (final status is only written while it holds it)
+        cancel: Set when the worker lost the run's lease (the pipeline stops and writes nothing more)
+    """
+    from app.models.analysis_step import AnalysisStep
+    from app.services.analysis.pipeline import AnalysisPipeline
+
+    db = SessionLocal()
+    run = None
+    try:
+        run = db.query(AnalysisRun).filter(AnalysisRun.id == run_id).first()
+        if not run:
+            logger.error(f"Run {run_id} not found in database")
+            return
+        if run.attempts > 1:
+            # Retry after a lost worker: start over
+            db.query(AnalysisStep).filter(AnalysisStep.run_id == run_id).delete(synchronize_session=False)
+            db.commit()
+
+        # Initialize pipeline (this will read API key from Settings)
+        pipeline = AnalysisPipeline()
+        pipeline.run(run, db, custom_config=run.custom_config, worker_id=worker_id, cancel=cancel)
+
+    except Exception as e:
+        error_msg = str(e)
+        error_traceback = traceback.format_exc()
+        logger.error(f"Pipeline execution failed for run {run_id}: {error_msg}\n{error_traceback}")
+
+        # Update run status to FAILED (unless the run was lost to another worker)
+        if run and not (cancel is not None and cancel.is_set()):
+            try:
+                db.rollback()
+                # No-op if the pipeline already marked it failed
+                finish_run(db, run_id, worker_id, status=RunStatus.FAILED, finished_at=_now())
+                claimed_by = db.query(AnalysisRun.claimed_by).filter(AnalysisRun.id == run_id).scalar()
+                if worker_id is None or claimed_by == worker_id:
+                    _add_error_step(db, run_id, error_msg, error_traceback)
+                    db.commit()
+            except Exception as db_error:
+                logger.error(f"Failed to update run status to FAILED: {db_error}")
+    finally:
+        db.close()
+
+
+class RunWorker:
+    """Claims queued runs and executes up to `concurrency` of them at a time."""
+
+    def __init__(self, concurrency: int, name: Optional[str] = None, standby: bool = False):
+        """Initialize worker.
+
+        Args:
+            concurrency: Max runs executed at a time
+            name: Worker id prefix (default: hostname:pid)
+            standby: Only claim runs while no dedicated worker is alive (workers
+                embedded in the API processes); dedicated workers record heartbeats
+        """
+        self.concurrency = max(1, concurrency)
+        self.worker_id = name or f"{socket.gethostname()}:{os.getpid()}"
+        self.standby = standby
+        self._standing_by = False
+        self._next_standby_check = 0.0
+        # Run ID -> cancel flag (set when the run's lease is lost)
+        self._active: Dict[int, threading.Event] = {}
+        self._active_lock = threading.Lock()
+        self._slots = threading.Semaphore(self.concurrency)
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._threads: List[threading.Thread] = []
+
+    @property
+    def active_runs(self) -> List[int]:
+        with self._active_lock:
+            return list(self._active)
+
+    def start(self):
+        """Start the claim loop and the heartbeat thread."""
+        if self._threads:
+            return
+        self._stop.clear()
+        if not self.standby:
+            # Announce before the first claim so standby workers step back
+            self._record_heartbeat()
+        self._executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="run-worker")
+        self._threads = [
+            threading.Thread(target=self._claim_loop, name="run-queue-claim", daemon=True),
+            threading.Thread(target=self._heartbeat_loop, name="run-queue-heartbeat", daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+        _register_worker(self)
+        logger.info(f"run_worker_started: worker={self.worker_id}, concurrency={self.concurrency}, standby={self.standby}")
+
+    def stop(self, wait: bool = True, timeout: Optional[float] = None):
+        """Stop claiming runs.
+
+        Args:
+            wait: Wait for in-flight runs to finish (unfinished ones are
+                recovered by other workers once their lease expires)
+            timeout: Max seconds to wait
+        """
+        self._stop.set()
+        self._wake.set()
+        _unregister_worker(self)
+        if wait:
+            deadline = None if timeout is None else time.monotonic() + timeout
+            while self.active_runs and (deadline is None or time.monotonic() < deadline):
+                time.sleep(0.2)
+        if self._executor:
+            self._executor.shutdown(wait=False)
+        if not self.standby and not self.active_runs:
+            # Otherwise removed by the heartbeat thread once in-flight runs finish
+            self._remove_heartbeat()
+        logger.info(f"run_worker_stopped: worker={self.worker_id}, unfinished={len(self.active_runs)}")
+
+    def wake(self):
+        """Check the queue now (a run was enqueued in this process)."""
+        self._wake.set()
+
+    def _claim_loop(self):
+        next_recovery = 0.0
+        while not self._stop.is_set():
+            try:
+                if time.monotonic() >= next_recovery:
+                    next_recovery = time.monotonic() + RECOVERY_INTERVAL_SECONDS
+                    db = SessionLocal()
+                    try:
+                        recover_expired_runs(db)
+                    finally:
+                        db.close()
+
+                # Claim while there are free slots
+                while not self._stop.is_set() and not self._should_stand_by() and self._slots.acquire(blocking=False):
+                    db = SessionLocal()
+                    try:
+                        run_id = claim_next_run(db, self.worker_id)
+                    except Exception:
+                        self._slots.release()
+                        raise
+                    finally:
+                        db.close()
+                    if run_id is None:
+                        self._slots.release()
+                        break
+                    self._submit(run_id)
+            except Exception as e:
+                logger.warning(f"run_queue_poll_failed: worker={self.worker_id}, error={e}")
+
+            self._wake.wait(RUN_QUEUE_POLL_SECONDS)
+            self._wake.clear()
+
+    def _should_stand_by(self) -> bool:
+        """Whether a standby worker leaves the queue to dedicated workers (checked every heartbeat interval)."""
+        if not self.standby:
+            return False
+        if time.monotonic() < self._next_standby_check:
+            return self._standing_by
+        self._next_standby_check = time.monotonic() + RUN_QUEUE_HEARTBEAT_SECONDS
+        db = SessionLocal()
+        try:
+            dedicated = count_dedicated_workers(db)
+        finally:
+            db.close()
+        if bool(dedicated) != self._standing_by:
+            self._standing_by = bool(dedicated)
+            logger.info(
+                f"run_worker_{'standing_by' if dedicated else 'resumed'}: worker={self.worker_id}, "
+                f"dedicated_workers={dedicated}"
+            )
+        return self._standing_by
+
+    def _record_heartbeat(self):
+        db = SessionLocal()
+        try:
+            record_worker_heartbeat(db, self.worker_id, self.concurrency)
+        except Exception as e:
+            logger.warning(f"run_worker_heartbeat_failed: worker={self.worker_id}, error={e}")
+        finally:
+            db.close()
+
+    def _remove_heartbeat(self):
+        db = SessionLocal()
+        try:
+            remove_worker_heartbeat(db, self.worker_id)
+        except Exception as e:
+            logger.warning(f"run_worker_heartbeat_remove_failed: worker={self.worker_id}, error={e}")
+        finally:
+            db.close()
+
+    def _submit(self, run_id: int):
+        with self._active_lock:
+            cancel = self._active[run_id] = threading.Event()
+        logger.info(f"run_claimed: run_id={run_id}, worker={self.worker_id}")
+
+        def work():
+            try:
+                execute_run(run_id, worker_id=self.worker_id, cancel=cancel)
+            finally:
+                with self._active_lock:
+                    self._active.pop(run_id, None)
+                self._slots.release()
+                # A slot is free: look at the queue again
+                self._wake.set()
+
+        self._executor.submit(work)
+
+    def _heartbeat_loop(self):
+        while True:
+            if self._stop.is_set():
+                # Draining after stop(): keep leases alive until in-flight runs finish
+                if not self.active_runs:
+                    if not self.standby:
+                        self._remove_heartbeat()
+                    return
+                time.sleep(RUN_QUEUE_HEARTBEAT_SECONDS)
+            else:
+                self._stop.wait(RUN_QUEUE_HEARTBEAT_SECONDS)
+                if not self.standby and not self._stop.is_set():
+                    self._record_heartbeat()
+            run_ids = self.active_runs
+            if not run_ids:
+                continue
+            db = SessionLocal()
+            try:
+                held = set(heartbeat_runs(db, self.worker_id, run_ids))
+                lost = [run_id for run_id in run_ids if run_id not in held]
+                if lost:
+                    # Re-queued (or finished) by another worker: stop executing them
+                    logger.warning(f"run_lease_lost: worker={self.worker_id}, run_ids={lost}")
+                    with self._active_lock:
+                        for run_id in lost:
+                            if run_id in self._active:
+                                self._active[run_id].set()
+            except Exception as e:
+                logger.warning(f"run_heartbeat_failed: worker={self.worker_id}, error={e}")
+            finally:
+                db.close()
+
+
+# Workers running in this process (woken by enqueue_run)
+_workers: List[RunWorker] = []
+_workers_lock = threading.Lock()
+
+
+def _register_worker(worker: RunWorker):
+    with _workers_lock:
+        _workers.append(worker)
+
+
+def _unregister_worker(worker: RunWorker):
+    with _workers_lock:
+        if worker in _workers:
+            _workers.remove(worker)
+
+
+def wake_workers():
+    """Wake the workers of this process (others pick runs up on their next poll)."""
+    with _workers_lock:
+        workers = list(_workers)
+    for worker in workers:
+        worker.wake()
+
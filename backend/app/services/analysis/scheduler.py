@@ -0,0 +1,280 @@
+"""
+Analysis schedules: cron ticks fanned out into queued runs.
+
+Every API process runs a RunScheduler (APScheduler BackgroundScheduler) with
+one cron job per enabled analysis_schedules row. On a tick one process claims
+it (conditional update of last_fired_at), then:
+1. selects the enabled instruments matching the schedule's filters
+2. prefetches their market data in bulk, grouped by provider
+   (DataService.prefetch), so the runs find it in the cache
+3. queues a run batch with one run per instrument in the scheduled lane,
+   start times spread over the schedule's jitter window to smooth provider
+   and LLM load
+
+Run queue workers then execute the runs concurrently.
+"""
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+import random
+import threading
+import time
+import logging
+
+from sqlalchemy import or_, update
+from sqlalchemy.orm import Session
+
+from app.core.config import SCHEDULER_TIMEZONE, SCHEDULER_RELOAD_SECONDS
+from app.core.database import SessionLocal
+from app.models.analysis_run import TriggerType
+from app.models.analysis_schedule import AnalysisSchedule
+from app.models.instrument import Instrument
+from app.services.analysis.run_queue import enqueue_batch
+
+logger = logging.getLogger(__name__)
+
+# A tick still fires this long after its time (process busy or restarting)
+MISFIRE_GRACE_SECONDS = 300
+# Timeframe of schedules whose analysis type has no default_timeframe
+DEFAULT_TIMEFRAME = "H1"
+
+
+def parse_cron(expression: str, tz: Optional[str] = None):
+    """Build the APScheduler trigger of a crontab expression.
+
+    Args:
+        expression: Crontab expression (minute hour day month day_of_week)
+        tz: Timezone name (default SCHEDULER_TIMEZONE, then server local time)
+
+    Returns:
+        CronTrigger
+
+    Raises:
+        ValueError: If the expression or timezone is invalid
+    """
+    from apscheduler.triggers.cron import CronTrigger
+
+    try:
+        return CronTrigger.from_crontab(expression, timezone=tz or SCHEDULER_TIMEZONE)
+    except Exception as e:
+        raise ValueError(f"Invalid schedule '{expression}' ({tz or SCHEDULER_TIMEZONE or 'local time'}): {e}")
+
+
+def next_fire_time(schedule: AnalysisSchedule) -> Optional[datetime]:
+    """Next tick of a schedule (None if disabled or the cron is invalid)."""
+    if not schedule.is_enabled:
+        return None
+    try:
+        trigger = parse_cron(schedule.cron, schedule.timezone)
+    except ValueError:
+        return None
+    return trigger.get_next_fire_time(None, datetime.now(timezone.utc))
+
+
+def _current_tick(schedule: AnalysisSchedule, now: datetime) -> datetime:
+    """The schedule's latest tick at or before `now` (within the misfire grace time).
+
+    Every process computes the same tick for the same fire, whatever its delay,
+    which is what the last_fired_at claim compares.
+    """
+    try:
+        trigger = parse_cron(schedule.cron, schedule.timezone)
+    except ValueError:
+        return now.replace(microsecond=0)
+    tick = None
+    fire = trigger.get_next_fire_time(None, now - timedelta(seconds=MISFIRE_GRACE_SECONDS))
+    while fire is not None and fire <= now:
+        tick = fire
+        fire = trigger.get_next_fire_time(fire, fire + timedelta(seconds=1))
+    return (tick or now.replace(microsecond=0)).astimezone(timezone.utc)
+
+
+def schedule_instruments(db: Session, schedule: AnalysisSchedule) -> List[Instrument]:
+    """Enabled instruments matching a schedule's exchange/type filters."""
+    query = db.query(Instrument).filter(Instrument.is_enabled == True)
+    if schedule.exchange:
+        query = query.filter(Instrument.exchange == schedule.exchange)
+    if schedule.instrument_type:
+        query = query.filter(Instrument.type == schedule.instrument_type)
+    return query.order_by(Instrument.symbol).all()
+
+
+def schedule_timeframe(schedule: AnalysisSchedule) -> str:
+    """Timeframe of a schedule's runs (its own, else the analysis type's default)."""
+    if schedule.timeframe:
+        return schedule.timeframe
+    config = schedule.analysis_type.config if schedule.analysis_type else None
+    return (config or {}).get("default_timeframe") or DEFAULT_TIMEFRAME
+
+
+def fire_schedule(schedule_id: int, force: bool = False) -> int:
+    """Fan a schedule's current tick out into queued runs.
+
+    Args:
+        schedule_id: Schedule ID
+        force: Fire now even if disabled or the tick was already fired ("Run now")
+
+    Returns:
+        Number of runs queued (0 if another process fired this tick)
+    """
+    started = time.monotonic()
+    db = SessionLocal()
+    try:
+        schedule = db.query(AnalysisSchedule).filter(AnalysisSchedule.id == schedule_id).first()
+        if not schedule or (not schedule.is_enabled and not force):
+            return 0
+
+        # Claim the tick: every API process runs the job, one of them fans it out
+        now = datetime.now(timezone.utc)
+        tick = now if force else _current_tick(schedule, now)
+        claim = update(AnalysisSchedule).where(AnalysisSchedule.id == schedule_id)
+        if not force:
+            claim = claim.where(or_(AnalysisSchedule.last_fired_at.is_(None), AnalysisSchedule.last_fired_at < tick))
+        claimed = db.execute(
+            claim.values(last_fired_at=tick).execution_options(synchronize_session=False)
+        ).rowcount
+        db.commit()
+        if not claimed:
+            logger.info(f"schedule_tick_skipped: schedule={schedule.name}, tick={tick.isoformat()}, reason=already_fired")
+            return 0
+
+        analysis_type = schedule.analysis_type
+        if not analysis_type or not analysis_type.is_active:
+            logger.warning(f"schedule_tick_skipped: schedule={schedule.name}, reason=analysis_type_inactive")
+            return 0
+        instruments = schedule_instruments(db, schedule)
+        if not instruments:
+            logger.info(f"schedule_tick_skipped: schedule={schedule.name}, reason=no_enabled_instruments")
+            return 0
+        timeframe = schedule_timeframe(schedule)
+
+        # Market data for all runs up front, grouped by provider; runs whose
+        # prefetch failed still run (their data step retries and reports the error)
+        from app.services.data.adapters import DataService
+
+        errors = DataService(db=db).prefetch([(instrument.symbol, timeframe) for instrument in instruments])
+        prefetch_failed = sum(1 for error in errors.values() if error)
+        prefetch_ms = int((time.monotonic() - started) * 1000)
+
+        # Spread start times over the jitter window
+        start = datetime.now(timezone.utc)
+        jitter = max(0, schedule.jitter_seconds or 0)
+        start_times = sorted(start + timedelta(seconds=random.uniform(0, jitter)) for _ in instruments)
+        batch, runs = enqueue_batch(
+            db,
+            [(instrument.id, timeframe) for instrument in instruments],
+            trigger_type=TriggerType.SCHEDULED,
+            analysis_type_id=analysis_type.id,
+            start_times=start_times,
+            schedule_id=schedule.id,
+        )
+        schedule.last_run_count = len(runs)
+        db.commit()
+        logger.info(
+            f"schedule_fired: schedule={schedule.name}, tick={tick.isoformat()}, batch_id={batch.id}, runs={len(runs)}, "
+            f"timeframe={timeframe}, prefetch_failed={prefetch_failed}, prefetch_ms={prefetch_ms}, jitter_seconds={jitter}"
+        )
+        return len(runs)
+    except Exception as e:
+        logger.error(f"schedule_fire_failed: schedule_id={schedule_id}, error={e}")
+        raise
+    finally:
+        db.close()
+
+
+def _fire_job(schedule_id: int):
+    """APScheduler job (errors are logged by fire_schedule)."""
+    try:
+        fire_schedule(schedule_id)
+    except Exception:
+        pass
+
+
+class RunScheduler:
+    """Keeps one APScheduler cron job per enabled schedule in this process."""
+
+    def __init__(self):
+        self._scheduler = None
+        # Schedule ID -> (cron, timezone) of its current job
+        self._jobs: Dict[int, Tuple[str, Optional[str]]] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._scheduler is not None
+
+    def start(self):
+        """Start the scheduler and load the enabled schedules."""
+        from apscheduler.schedulers.background import BackgroundScheduler
+
+        with self._lock:
+            if self._scheduler is not None:
+                return
+            self._scheduler = BackgroundScheduler(
+                job_defaults={"coalesce": True, "max_instances": 1, "misfire_grace_time": MISFIRE_GRACE_SECONDS},
+                timezone=SCHEDULER_TIMEZONE or None,
+            )
+            self._scheduler.start()
+            # Pick up schedules changed through other processes
+            self._scheduler.add_job(
+                self.reload, "interval", seconds=SCHEDULER_RELOAD_SECONDS, id="schedules:reload"
+            )
+        self.reload()
+        logger.info(f"run_scheduler_started: schedules={len(self._jobs)}")
+
+    def stop(self):
+        with self._lock:
+            if self._scheduler is None:
+                return
+            self._scheduler.shutdown(wait=False)
+            self._scheduler = None
+            self._jobs = {}
+        logger.info("run_scheduler_stopped")
+
+    def reload(self):
+        """Sync jobs with the enabled schedules in the database."""
+        db = SessionLocal()
+        try:
+            rows = db.query(AnalysisSchedule.id, AnalysisSchedule.name, AnalysisSchedule.cron, AnalysisSchedule.timezone).filter(
+                AnalysisSchedule.is_enabled == True
+            ).all()
+        except Exception as e:
+            logger.warning(f"schedule_reload_failed: error={e}")
+            return
+        finally:
+            db.close()
+
+        with self._lock:
+            if self._scheduler is None:
+                return
+            wanted = {schedule_id: (name, cron, tz) for schedule_id, name, cron, tz in rows}
+            for schedule_id in list(self._jobs):
+                if schedule_id not in wanted:
+                    self._scheduler.remove_job(f"schedule:{schedule_id}")
+                    del self._jobs[schedule_id]
+            for schedule_id, (name, cron, tz) in wanted.items():
+                if self._jobs.get(schedule_id) == (cron, tz):
+                    continue
+                try:
+                    trigger = parse_cron(cron, tz)
+                except ValueError as e:
+                    logger.warning(f"schedule_invalid: schedule={name}, error={e}")
+                    continue
+                self._scheduler.add_job(
+                    _fire_job, trigger, args=[schedule_id], id=f"schedule:{schedule_id}",
+                    name=name, replace_existing=True,
+                )
+                self._jobs[schedule_id] = (cron, tz)
+
+
+_run_scheduler: Optional[RunScheduler] = None
+_run_scheduler_lock = threading.Lock()
+
+
+def get_run_scheduler() -> RunScheduler:
+    """Get the process-wide run scheduler."""
+    global _run_scheduler
+    if _run_scheduler is None:
+        with _run_scheduler_lock:
+            if _run_scheduler is None:
+                _run_scheduler = RunScheduler()
+    return _run_scheduler
@@ -0,0 +1,279 @@
+"""
+Cross-run step deduplication.
+
+Analysis types often share steps (same model and prompts, or pipelines copied
+with duplicate_analysis_type), so runs over the same instrument and candle
+window repeat identical LLM calls. A step memo maps
+(instrument, timeframe, last candle, resolved LLM call) to the AnalysisStep
+that produced the output; identical steps copy that output and link to it
+(reused_from_step_id) instead of calling the LLM again.
+
+Identical steps running at the same time wait for the first one: in-process
+through SingleFlight, across API/worker processes through a claim (a memo
+without a step, inserted under the unique key) that the others poll until the
+output is memoized. No DB connection is held while the LLM runs. Memos live
+for one candle period.
+"""
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Optional, Tuple
+import hashlib
+import json
+import logging
+import time
+
+from sqlalchemy.exc import IntegrityError
+
+from app.core.config import STEP_MEMO_LOCK_TIMEOUT_SECONDS
+from app.core.database import SessionLocal
+from app.core.locks import SingleFlight
+from app.models.analysis_step import AnalysisStep
+from app.models.step_memo import StepMemo
+
+logger = logging.getLogger(__name__)
+
+# Memo lifetime when the timeframe is unknown
+DEFAULT_MEMO_TTL_SECONDS = 3600
+# Purge expired memos every N writes
+PURGE_EVERY_WRITES = 100
+# Seconds between checks of a step claimed by another process
+CLAIM_POLL_SECONDS = 1.0
+
+_step_flight = SingleFlight()
+_writes = 0
+
+
+def make_step_memo_key(instrument: str, timeframe: str, candle_ts: int, call: Dict[str, Any]) -> str:
+    """Build the memo key of a step.
+
+    Args:
+        instrument: Symbol
+        timeframe: Timeframe
+        candle_ts: Open time (epoch ms) of the last candle of the analyzed window
+        call: Resolved LLM call (BaseAnalyzer.prepare_call, model resolved to the default)
+
+    Returns:
+        sha256 hex digest
+    """
+    payload = json.dumps([
+        instrument,
+        timeframe.upper(),
+        int(candle_ts),
+        call.get("model"),
+        call.get("temperature"),
+        call.get("max_tokens"),
+        hashlib.sha256(call["system_prompt"].encode("utf-8")).hexdigest(),
+        hashlib.sha256(call["user_prompt"].encode("utf-8")).hexdigest(),
+    ])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _step_output(db, memo: StepMemo) -> Optional[Dict[str, Any]]:
+    """Output of a memo's step, counting the hit (None if the step is gone)."""
+    step = db.query(AnalysisStep).filter(AnalysisStep.id == memo.step_id).first()
+    if not step:
+        return None
+    memo.hit_count = (memo.hit_count or 0) + 1
+    db.commit()
+    return {
+        "step_id": step.id,
+        "input": step.input_blob,
+        "output": step.output_blob,
+        "model": step.llm_model,
+    }
+
+
+def _claim(key: str, instrument: str, timeframe: str, candle_ts: int) -> Tuple[Optional[Dict[str, Any]], bool]:
+    """Reuse a memoized step, or claim its key for computing it.
+
+    A claim is a memo without a step; it expires after
+    STEP_MEMO_LOCK_TIMEOUT_SECONDS so a lost process doesn't block the key.
+
+    Returns:
+        (memoized output or None, whether the caller should compute the step).
+        (None, False) means another process is computing it.
+    """
+    db = SessionLocal()
+    try:
+        now = datetime.now(timezone.utc)
+        memo = db.query(StepMemo).filter(StepMemo.key == key, StepMemo.expires_at > now).first()
+        if memo:
+            if memo.step_id is None:
+                return None, False
+            memoized = _step_output(db, memo)
+            if memoized:
+                return memoized, False
+            # Step deleted (aborted run): drop the memo and claim the key
+            db.delete(memo)
+        db.query(StepMemo).filter(StepMemo.key == key, StepMemo.expires_at <= now).delete(synchronize_session=False)
+        db.add(StepMemo(
+            key=key,
+            instrument=instrument,
+            timeframe=timeframe,
+            candle_ts=int(candle_ts),
+            step_id=None,
+            expires_at=now + timedelta(seconds=STEP_MEMO_LOCK_TIMEOUT_SECONDS),
+        ))
+        try:
+            db.commit()
+        except IntegrityError:
+            # Claimed concurrently by another process
+            db.rollback()
+            return None, False
+        return None, True
+    except Exception as e:
+        logger.warning(f"step_memo_read_failed: key={key[:12]}, error={e}")
+        return None, True
+    finally:
+        db.close()
+
+
+def _wait_for_claim(key: str, instrument: str, timeframe: str, candle_ts: int) -> Tuple[Optional[Dict[str, Any]], bool]:
+    """Poll a key claimed by another process until its step is memoized.
+
+    Returns:
+        Same as _claim; (None, True) once the claim was released, expired or
+        STEP_MEMO_LOCK_TIMEOUT_SECONDS passed
+    """
+    deadline = time.monotonic() + STEP_MEMO_LOCK_TIMEOUT_SECONDS
+    while time.monotonic() < deadline:
+        time.sleep(CLAIM_POLL_SECONDS)
+        memoized, compute_here = _claim(key, instrument, timeframe, candle_ts)
+        if memoized or compute_here:
+            return memoized, compute_here
+    logger.warning(f"step_memo_wait_timeout: key={key[:12]}, timeout={STEP_MEMO_LOCK_TIMEOUT_SECONDS}")
+    return None, True
+
+
+def _release(key: str):
+    """Drop a claim whose step failed (waiting processes compute it themselves)."""
+    db = SessionLocal()
+    try:
+        db.query(StepMemo).filter(StepMemo.key == key, StepMemo.step_id.is_(None)).delete(synchronize_session=False)
+        db.commit()
+    except Exception as e:
+        logger.warning(f"step_memo_release_failed: key={key[:12]}, error={e}")
+    finally:
+        db.close()
+
+
+def _persist(key: str, run_id: int, step_name: str, result: Dict[str, Any],
+             instrument: str, timeframe: str, candle_ts: int, ttl_seconds: int) -> int:
+    """Save a computed step for its run and memoize it. Returns the step ID."""
+    global _writes
+    db = SessionLocal()
+    try:
+        step = AnalysisStep(
+            run_id=run_id,
+            step_name=step_name,
+            input_blob=result.get("input"),
+            output_blob=result.get("output"),
+            llm_model=result.get("model"),
+            tokens_used=result.get("tokens_used", 0),
+            cost_est=result.get("cost_est", 0.0),
+            cache_hit=result.get("cache_hit", False),
+        )
+        db.add(step)
+        db.commit()
+
+        # Fill the claim
+        now = datetime.now(timezone.utc)
+        expires_at = now + timedelta(seconds=ttl_seconds)
+        filled = db.query(StepMemo).filter(
+            StepMemo.key == key,
+            StepMemo.step_id.is_(None),
+        ).update({"step_id": step.id, "expires_at": expires_at}, synchronize_session=False)
+        if not filled:
+            # Claim expired meanwhile (or was never taken): replace an expired memo
+            db.query(StepMemo).filter(StepMemo.key == key, StepMemo.expires_at <= now).delete(synchronize_session=False)
+            db.add(StepMemo(
+                key=key,
+                instrument=instrument,
+                timeframe=timeframe,
+                candle_ts=int(candle_ts),
+                step_id=step.id,
+                expires_at=expires_at,
+            ))
+        _writes += 1
+        if _writes % PURGE_EVERY_WRITES == 0:
+            deleted = db.query(StepMemo).filter(
+                StepMemo.expires_at < now
+            ).delete(synchronize_session=False)
+            logger.info(f"step_memo_purged_expired: deleted={deleted}")
+        try:
+            db.commit()
+        except IntegrityError:
+            # Memoized concurrently by another process
+            db.rollback()
+        return step.id
+    finally:
+        db.close()
+
+
+def run_memoized(
+    key: str,
+    run_id: int,
+    step_name: str,
+    compute: Callable[[], Dict[str, Any]],
+    instrument: str,
+    timeframe: str,
+    candle_ts: int,
+    ttl_seconds: Optional[int] = None,
+) -> Dict[str, Any]:
+    """Run a step unless an identical one ran or is running, then reuse its output.
+
+    Called from pipeline worker threads. A computed step is saved here (for
+    its run) so that identical steps can link to it right away; the returned
+    result then carries its 'step_id'. A reused result carries
+    'reused_from_step_id' and reports no tokens or cost.
+
+    Args:
+        key: Memo key (make_step_memo_key)
+        run_id: Run the step belongs to
+        step_name: Step name
+        compute: Runs the step (BaseAnalyzer.complete)
+        instrument: Symbol (stored with the memo)
+        timeframe: Timeframe (stored with the memo)
+        candle_ts: Last candle open time in epoch ms (stored with the memo)
+        ttl_seconds: Memo lifetime (default one candle period)
+
+    Returns:
+        Step result dict ('input', 'output', 'model', 'tokens_used', 'cost_est',
+        'cache_hit' plus 'step_id' or 'reused_from_step_id')
+    """
+    from app.services.data.normalized import timeframe_to_seconds
+
+    ttl_seconds = ttl_seconds or timeframe_to_seconds(timeframe) or DEFAULT_MEMO_TTL_SECONDS
+    leader = object()
+
+    def lead() -> Dict[str, Any]:
+        memoized, compute_here = _claim(key, instrument, timeframe, candle_ts)
+        if not memoized and not compute_here:
+            # Another process is running the same step
+            memoized, compute_here = _wait_for_claim(key, instrument, timeframe, candle_ts)
+        if memoized:
+            return memoized
+        # No DB connection is held while the LLM runs
+        try:
+            result = compute()
+        except Exception:
+            _release(key)
+            raise
+        step_id = _persist(key, run_id, step_name, result, instrument, timeframe, candle_ts, ttl_seconds)
+        return dict(result, step_id=step_id, leader=leader)
+
+    shared = _step_flight.do(key, lead)
+    if shared.get("leader") is leader:
+        result = dict(shared)
+        del result["leader"]
+        return result
+
+    logger.info(f"step_memo_hit: run_id={run_id}, step={step_name}, source_step_id={shared['step_id']}")
+    return {
+        "input": shared.get("input"),
+        "output": shared.get("output"),
+        "model": shared.get("model"),
+        "tokens_used": 0,
+        "cost_est": 0.0,
+        "cache_hit": True,
+        "reused_from_step_id": shared["step_id"],
+    }
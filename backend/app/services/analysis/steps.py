@@ -1,9 +1,9 @@
 """
 Base class and individual step analyzers for the Daystart analysis pipeline.
 """
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Callable
 from app.services.llm.client import LLMClient
-from app.services.data.normalized import MarketData
+from app.services.data.normalized import MarketData, timeframe_to_seconds
 
 
 def format_user_prompt_template(template: str, context: Dict[str, Any], step_config: Optional[Dict[str, Any]] = None) -> str:
@@ -40,9 +40,8 @@ def format_user_prompt_template(template: str, context: Dict[str, Any], step_con
     # Build market data summary
     market_data_summary = ""
     if market_data:
-        # Ensure candles are sorted by timestamp (oldest first) before taking last N
-        sorted_candles = sorted(market_data.candles, key=lambda c: c.timestamp)
-        candles_to_show = sorted_candles[-num_candles:] if len(sorted_candles) > num_candles else sorted_candles
+        # Candles are kept sorted oldest first; tail() is a view over the last N
+        candles_to_show = market_data.candles.tail(num_candles)
         for candle in candles_to_show:
             market_data_summary += f"- {candle.timestamp.strftime('%Y-%m-%d %H:%M')}: O={candle.open:.2f} H={candle.high:.2f} L={candle.low:.2f} C={candle.close:.2f} V={candle.volume:.2f}\n"
     
@@ -120,6 +119,9 @@ def format_user_prompt_template(template: str, context: Dict[str, Any], step_con
 class BaseAnalyzer:
     """Base class for analysis steps."""
     
+    # Steps whose outputs build_user_prompt() reads from previous_steps
+    context_steps: tuple = ()
+    
     def get_system_prompt(self) -> str:
         """Get the system prompt for this step."""
         raise NotImplementedError
@@ -133,22 +135,21 @@ class BaseAnalyzer:
         """
         raise NotImplementedError
     
-    def analyze(
+    def prepare_call(
         self,
         context: Dict[str, Any],
-        llm_client: LLMClient,
         step_config: Optional[Dict[str, Any]] = None,
     ) -> Dict[str, Any]:
-        """Run the analysis step.
+        """Resolve the LLM call of this step (prompts and model parameters).
         
         Args:
             context: Context dictionary with instrument, timeframe, market_data, previous_steps
-            llm_client: LLM client instance
             step_config: Optional step configuration dict with model, temperature, max_tokens, 
-                        system_prompt, user_prompt_template
+                        system_prompt, user_prompt_template, use_cache, cache_ttl_seconds
         
         Returns:
-            Dict with 'input', 'output', 'model', 'tokens_used', 'cost_est'
+            Dict with 'system_prompt', 'user_prompt', 'model', 'temperature', 'max_tokens',
+            'use_cache', 'cache_ttl' (keyword arguments of LLMClient.call)
         """
         # Use step_config if provided, otherwise fall back to hardcoded methods
         if step_config:
@@ -178,6 +179,10 @@ class BaseAnalyzer:
             model = step_config.get("model")
             temperature = step_config.get("temperature", 0.7)
             max_tokens = step_config.get("max_tokens")
+            
+            # Opt-in response cache; by default an entry lives for one candle period
+            use_cache = bool(step_config.get("use_cache", False))
+            cache_ttl = step_config.get("cache_ttl_seconds") or timeframe_to_seconds(context.get("timeframe", ""))
         else:
             # Fall back to hardcoded prompts (backward compatibility)
             system_prompt = self.get_system_prompt()
@@ -197,26 +202,66 @@ class BaseAnalyzer:
             model = None
             temperature = 0.7
             max_tokens = None
+            use_cache = False
+            cache_ttl = None
         
-        # Make LLM call with configuration
-        result = llm_client.call(
-            system_prompt=system_prompt,
-            user_prompt=user_prompt,
-            model=model,
-            temperature=temperature,
-            max_tokens=max_tokens,
-        )
+        return {
+            "system_prompt": system_prompt,
+            "user_prompt": user_prompt,
+            "model": model,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            "use_cache": use_cache,
+            "cache_ttl": cache_ttl,
+        }
+    
+    def complete(
+        self,
+        call: Dict[str, Any],
+        llm_client: LLMClient,
+        on_delta: Optional[Callable[[str], None]] = None,
+    ) -> Dict[str, Any]:
+        """Make the LLM call prepared by prepare_call().
+        
+        Args:
+            call: Resolved call (prepare_call)
+            llm_client: LLM client instance
+            on_delta: Optional callback streaming the output as it is generated
+        
+        Returns:
+            Dict with 'input', 'output', 'model', 'tokens_used', 'cost_est', 'cache_hit'
+        """
+        result = llm_client.call(**call, on_delta=on_delta) if on_delta else llm_client.call(**call)
         
         return {
             "input": {
-                "system_prompt": system_prompt,
-                "user_prompt": user_prompt,
+                "system_prompt": call["system_prompt"],
+                "user_prompt": call["user_prompt"],
             },
             "output": result["content"],
             "model": result["model"],
             "tokens_used": result["tokens_used"],
             "cost_est": result["cost_est"],
+            "cache_hit": result.get("cache_hit", False),
         }
+    
+    def analyze(
+        self,
+        context: Dict[str, Any],
+        llm_client: LLMClient,
+        step_config: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        """Run the analysis step.
+        
+        Args:
+            context: Context dictionary with instrument, timeframe, market_data, previous_steps
+            llm_client: LLM client instance
+            step_config: Optional step configuration dict (see prepare_call)
+        
+        Returns:
+            Dict with 'input', 'output', 'model', 'tokens_used', 'cost_est', 'cache_hit'
+        """
+        return self.complete(self.prepare_call(context, step_config), llm_client)
 
 
 class WyckoffAnalyzer(BaseAnalyzer):
@@ -236,13 +281,13 @@ class WyckoffAnalyzer(BaseAnalyzer):
         num_candles = step_config.get("num_candles", 20) if step_config else 20
         
         # Build prompt with market data summary
-        # Ensure candles are sorted by timestamp (oldest first) before taking last N
-        sorted_candles = sorted(market_data.candles, key=lambda c: c.timestamp)
+        # Candles are kept sorted oldest first; tail() is a view over the last N
+        recent_candles = market_data.candles.tail(num_candles)
         prompt = f"""Analyze {instrument} on {timeframe} timeframe using Wyckoff Method.
 
 Recent price action (last {num_candles} candle{"s" if num_candles != 1 else ""}):
 """
-        for candle in sorted_candles[-num_candles:]:
+        for candle in recent_candles:
             prompt += f"- {candle.timestamp.strftime('%Y-%m-%d %H:%M')}: O={candle.open:.2f} H={candle.high:.2f} L={candle.low:.2f} C={candle.close:.2f} V={candle.volume:.2f}\n"
         
         prompt += """
@@ -273,13 +318,13 @@ class SMCAnalyzer(BaseAnalyzer):
         # Get number of candles from step_config if available, otherwise default to 50
         num_candles = step_config.get("num_candles", 50) if step_config else 50
         
-        # Ensure candles are sorted by timestamp (oldest first) before taking last N
-        sorted_candles = sorted(market_data.candles, key=lambda c: c.timestamp)
+        # Candles are kept sorted oldest first; tail() is a view over the last N
+        recent_candles = market_data.candles.tail(num_candles)
         prompt = f"""Analyze {instrument} on {timeframe} using Smart Money Concepts.
 
 Price structure (last {num_candles} candle{"s" if num_candles != 1 else ""}):
 """
-        for candle in sorted_candles[-num_candles:]:
+        for candle in recent_candles:
             prompt += f"- {candle.timestamp.strftime('%Y-%m-%d %H:%M')}: O={candle.open:.2f} H={candle.high:.2f} L={candle.low:.2f} C={candle.close:.2f}\n"
         
         prompt += """
@@ -311,13 +356,13 @@ class VSAAnalyzer(BaseAnalyzer):
         # Get number of candles from step_config if available, otherwise default to 30
         num_candles = step_config.get("num_candles", 30) if step_config else 30
         
-        # Ensure candles are sorted by timestamp (oldest first) before taking last N
-        sorted_candles = sorted(market_data.candles, key=lambda c: c.timestamp)
+        # Candles are kept sorted oldest first; tail() is a view over the last N
+        recent_candles = market_data.candles.tail(num_candles)
         prompt = f"""Analyze {instrument} on {timeframe} using Volume Spread Analysis.
 
 OHLCV data (last {num_candles} candle{"s" if num_candles != 1 else ""}):
 """
-        for candle in sorted_candles[-num_candles:]:
+        for candle in recent_candles:
             spread = candle.high - candle.low
             prompt += f"- {candle.timestamp.strftime('%Y-%m-%d %H:%M')}: Spread={spread:.2f} Volume={candle.volume:.2f} Close={candle.close:.2f}\n"
         
@@ -358,9 +403,9 @@ Note: Full delta requires order flow data. Analyze buying/selling pressure from
 
 Price and volume data (last {num_candles} candle{"s" if num_candles != 1 else ""}):
 """
-        # Ensure candles are sorted by timestamp (oldest first) before taking last N
-        sorted_candles = sorted(market_data.candles, key=lambda c: c.timestamp)
-        for candle in sorted_candles[-num_candles:]:
+        # Candles are kept sorted oldest first; tail() is a view over the last N
+        recent_candles = market_data.candles.tail(num_candles)
+        for candle in recent_candles:
             body = abs(candle.close - candle.open)
             is_bullish = candle.close > candle.open
             prompt += f"- {candle.timestamp.strftime('%Y-%m-%d %H:%M')}: {'Bullish' if is_bullish else 'Bearish'} Body={body:.2f} Volume={candle.volume:.2f}\n"
@@ -381,6 +426,8 @@ Provide delta-based insights."""
 class ICTAnalyzer(BaseAnalyzer):
     """ICT (Inner Circle Trader) analysis step."""
     
+    context_steps = ("wyckoff", "smc")
+    
     def get_system_prompt(self) -> str:
         return """You are an expert in ICT (Inner Circle Trader) methodology. Analyze 
         liquidity manipulation, PD Arrays (Premium/Discount), Fair Value Gaps, and optimal 
@@ -396,13 +443,13 @@ class ICTAnalyzer(BaseAnalyzer):
         # Get number of candles from step_config if available, otherwise default to 50
         num_candles = step_config.get("num_candles", 50) if step_config else 50
         
-        # Ensure candles are sorted by timestamp (oldest first) before taking last N
-        sorted_candles = sorted(market_data.candles, key=lambda c: c.timestamp)
+        # Candles are kept sorted oldest first; tail() is a view over the last N
+        recent_candles = market_data.candles.tail(num_candles)
         prompt = f"""Analyze {instrument} on {timeframe} using ICT methodology.
 
 Price action (last {num_candles} candle{"s" if num_candles != 1 else ""}):
 """
-        for candle in sorted_candles[-num_candles:]:
+        for candle in recent_candles:
             prompt += f"- {candle.timestamp.strftime('%Y-%m-%d %H:%M')}: H={candle.high:.2f} L={candle.low:.2f} C={candle.close:.2f}\n"
         
         prompt += f"""
@@ -439,13 +486,13 @@ class PriceActionAnalyzer(BaseAnalyzer):
         # Get number of candles from step_config if available, otherwise default to 50
         num_candles = step_config.get("num_candles", 50) if step_config else 50
         
-        # Ensure candles are sorted by timestamp (oldest first) before taking last N
-        sorted_candles = sorted(market_data.candles, key=lambda c: c.timestamp)
+        # Candles are kept sorted oldest first; tail() is a view over the last N
+        recent_candles = market_data.candles.tail(num_candles)
         prompt = f"""Analyze {instrument} on {timeframe} using Price Action and Pattern Analysis.
 
 Price action (last {num_candles} candle{"s" if num_candles != 1 else ""}):
 """
-        for candle in sorted_candles[-num_candles:]:
+        for candle in recent_candles:
             body = abs(candle.close - candle.open)
             is_bullish = candle.close > candle.open
             upper_wick = candle.high - max(candle.open, candle.close)
@@ -468,6 +515,8 @@ Provide specific price levels for entries, stops, and targets."""
 class MergeAnalyzer(BaseAnalyzer):
     """Merge step - combines all analyses into final Telegram post."""
     
+    context_steps = ("wyckoff", "smc", "vsa", "delta", "ict")
+    
     def get_system_prompt(self) -> str:
         return """You are a professional trading analyst. Combine multiple analysis methods 
         into a cohesive, actionable Telegram post. Follow the exact format and style specified 
@@ -2,21 +2,49 @@
 Data adapters for fetching market data from various sources.
 """
 from datetime import datetime, timedelta, timezone
-from typing import Optional, List
-import ccxt
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Optional, List, Tuple, Callable, Dict
+import numpy as np
 import yfinance as yf
-import pandas as pd
 from app.core.database import SessionLocal
 from app.models.data_cache import DataCache
 from app.models.instrument import Instrument
 from app.models.settings import AppSettings
-from app.services.data.normalized import MarketData, OHLCVCandle
+from app.services.data.normalized import MarketData, CandleFrame, timeframe_to_seconds
+from app.services.data.codec import encode_market_data, decode_market_data
+from app.services.data import candle_store
+from app.services.data.resample import resample, can_resample
+from app.services.data.memory_cache import get_market_data_memory_cache
+from app.services.data.exchanges import get_exchange_registry
+from app.services.data.tinkoff_client import get_tinkoff_client_pool, get_tinkoff_figi_map
+from app.services.data.streams import get_candle_stream_hub
+from app.services.data.routing import get_provider_router, ROUTE_MOEX, ROUTE_CRYPTO, ROUTE_EQUITY
+from app.core.locks import SingleFlight, db_advisory_lock
+from app.core.config import (
+    DATA_CACHE_COMPRESSION,
+    DATA_INCREMENTAL_FETCH,
+    DATA_RETENTION_CANDLES,
+    DATA_CANDLE_STORE,
+    DATA_RESAMPLE_FROM_STORE,
+    DATA_FETCH_LOCK_TIMEOUT_SECONDS,
+    CCXT_ASYNC_MAX_CONCURRENCY,
+    DATA_RANGE_FETCH_CONCURRENCY,
+    DATA_CRYPTO_FALLBACK_EXCHANGE,
+    PREFETCH_CONCURRENCY_PER_PROVIDER,
+)
+import asyncio
 import json
 import hashlib
 import logging
+import threading
+import time
 
 logger = logging.getLogger(__name__)
 
+# Shared by all DataService instances (one per request/run)
+_market_data_flight = SingleFlight()
+
 
 def get_tinkoff_token(db: Optional[SessionLocal] = None) -> Optional[str]:
     """Get Tinkoff API token from Settings.
@@ -45,6 +73,14 @@ def get_tinkoff_token(db: Optional[SessionLocal] = None) -> Optional[str]:
 class DataAdapter:
     """Base class for data adapters."""
     
+    # Timeframes served by the provider directly
+    native_timeframes: tuple = ('M1', 'M5', 'M15', 'M30', 'H1', 'H4', 'D1', 'W1')
+    # Timeframes built by resampling a native one: target -> source
+    derived_timeframes: dict = {}
+    # Bucket alignment for resampling: (timezone, session anchor in minutes after local midnight).
+    # Timezone None means the candles' own timezone (not known for stored UTC candles).
+    session_alignment: tuple = ("UTC", 0)
+    
     def fetch_ohlcv(
         self,
         instrument: str,
@@ -54,6 +90,163 @@ class DataAdapter:
     ) -> MarketData:
         """Fetch OHLCV data. Must be implemented by subclasses."""
         raise NotImplementedError
+    
+    # Deep history (fetch_range): subclasses implement the page primitives below
+    
+    # Exchange name set on MarketData returned by fetch_range
+    exchange_name: Optional[str] = None
+    
+    @property
+    def store_exchange(self) -> Optional[str]:
+        """Exchange whose candles may be written to the candle store."""
+        return self.exchange_name
+    
+    @property
+    def store_source(self) -> Optional[str]:
+        """Data source whose candles may be written to the candle store (routed adapters)."""
+        return None
+    
+    def is_store_data(self, data: MarketData) -> bool:
+        """Whether candles fetched through this adapter may be written to the candle store."""
+        return data.exchange == self.exchange_name
+    
+    def _range_context(self, instrument: str, timeframe: str):
+        """Per-range state shared by all pages (provider symbol, interval, ...)."""
+        raise NotImplementedError
+    
+    def _page_span_ms(self, timeframe: str) -> int:
+        """Time span covered by one provider request."""
+        raise NotImplementedError
+    
+    def _fetch_page(self, context, start_ms: int, end_ms: int) -> CandleFrame:
+        """Fetch candles with start_ms <= timestamp < end_ms (one provider request)."""
+        raise NotImplementedError
+    
+    def _clip_range_start(self, timeframe: str, start_ms: int, end_ms: int) -> int:
+        """Earliest start the provider can serve (default: unlimited)."""
+        return start_ms
+    
+    def fetch_range(
+        self,
+        instrument: str,
+        timeframe: str,
+        start: datetime,
+        end: Optional[datetime] = None,
+        on_page: Optional[Callable[[str, CandleFrame], None]] = None,
+        max_workers: int = DATA_RANGE_FETCH_CONCURRENCY,
+    ) -> MarketData:
+        """Fetch all candles in [start, end), paging through the provider's per-request limits.
+        
+        Pages are fetched concurrently and deduplicated at page boundaries.
+        Derived timeframes are resampled from their source timeframe's range.
+        
+        Args:
+            instrument: Symbol
+            timeframe: Timeframe
+            start: Range start (inclusive)
+            end: Range end (exclusive, default now)
+            on_page: Called with (timeframe, page) as each page arrives, e.g. to
+                stream candles into the candle store (called from the calling thread)
+            max_workers: Pages in flight at a time
+        
+        Returns:
+            Market data sorted oldest first
+        
+        Raises:
+            ValueError: If a page fails
+        """
+        end = end or datetime.now(timezone.utc)
+        start_ms = int(start.timestamp() * 1000)
+        end_ms = int(end.timestamp() * 1000)
+        
+        source_timeframe = self.derived_timeframes.get(timeframe.upper())
+        if source_timeframe:
+            source = self.fetch_range(instrument, source_timeframe, start, end, on_page, max_workers)
+            tz, anchor_minutes = self.session_alignment
+            frame = resample(source.frame, timeframe, tz if tz is not None else source.frame.tz, anchor_minutes)
+            return MarketData(
+                instrument=instrument,
+                timeframe=timeframe,
+                exchange=source.exchange,
+                frame=frame,
+                fetched_at=source.fetched_at,
+            )
+        
+        clipped_ms = self._clip_range_start(timeframe, start_ms, end_ms)
+        if clipped_ms > start_ms:
+            logger.info(
+                f"range_start_clipped: instrument={instrument}, timeframe={timeframe}, "
+                f"requested={start_ms}, start={clipped_ms}"
+            )
+            start_ms = clipped_ms
+        
+        context = self._range_context(instrument, timeframe)
+        span_ms = self._page_span_ms(timeframe)
+        windows = [(s, min(s + span_ms, end_ms)) for s in range(start_ms, end_ms, span_ms)]
+        
+        started = time.monotonic()
+        pages: List[Tuple[int, CandleFrame]] = []
+        if len(windows) == 1 or max_workers <= 1:
+            for i, (s, e) in enumerate(windows):
+                page = self._fetch_range_page(context, instrument, s, e)
+                pages.append((i, page))
+                if on_page:
+                    on_page(timeframe, page)
+        else:
+            with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="range-fetch") as pool:
+                futures = {
+                    pool.submit(self._fetch_range_page, context, instrument, s, e): i
+                    for i, (s, e) in enumerate(windows)
+                }
+                try:
+                    for future in as_completed(futures):
+                        page = future.result()
+                        pages.append((futures[future], page))
+                        if on_page:
+                            on_page(timeframe, page)
+                except Exception:
+                    for future in futures:
+                        future.cancel()
+                    raise
+        
+        # Page order, so overlapping boundary candles resolve deterministically
+        pages.sort(key=lambda item: item[0])
+        frame = CandleFrame.concat([page for _, page in pages])
+        if len(frame):
+            frame = frame[int(np.searchsorted(frame.timestamp_ms, start_ms)):int(np.searchsorted(frame.timestamp_ms, end_ms))]
+        
+        logger.info(
+            f"range_fetched: instrument={instrument}, timeframe={timeframe}, pages={len(windows)}, "
+            f"candles={len(frame)}, duration_ms={int((time.monotonic() - started) * 1000)}"
+        )
+        return MarketData(
+            instrument=instrument,
+            timeframe=timeframe,
+            exchange=self.exchange_name,
+            frame=frame,
+            fetched_at=datetime.now(timezone.utc),
+        )
+    
+    def _fetch_range_page(self, context, instrument: str, start_ms: int, end_ms: int) -> CandleFrame:
+        try:
+            page = self._fetch_page(context, start_ms, end_ms)
+        except ValueError:
+            raise
+        except Exception as e:
+            raise ValueError(f"Failed to fetch {instrument} candles from {self.exchange_name} ({start_ms}-{end_ms}): {str(e)}")
+        if len(page):
+            # Providers may return the bar containing start_ms or bars past end_ms
+            page = page[int(np.searchsorted(page.timestamp_ms, start_ms)):int(np.searchsorted(page.timestamp_ms, end_ms))]
+        return page
+
+
+# Max candles per fetch_ohlcv request (Binance klines limit)
+CCXT_PAGE_CANDLES = 1000
+
+# yf.Ticker objects kept for reuse
+YFINANCE_TICKER_CACHE_SIZE = 256
+
+DAY_MS = 24 * 60 * 60 * 1000
 
 
 class CCXTAdapter(DataAdapter):
@@ -65,14 +258,13 @@ class CCXTAdapter(DataAdapter):
         Args:
             exchange_name: Exchange name (binance, coinbase, etc.)
         """
-        exchange_class = getattr(ccxt, exchange_name)
-        self.exchange = exchange_class({
-            'enableRateLimit': True,
-            'options': {
-                'defaultType': 'spot',  # or 'future'
-            }
-        })
         self.exchange_name = exchange_name
+        self.market_type = 'spot'  # or 'future'
+    
+    @property
+    def exchange(self):
+        """Shared client from the exchange registry (markets loaded, shared rate limiter)."""
+        return get_exchange_registry().get(self.exchange_name, self.market_type)
     
     def _normalize_timeframe(self, timeframe: str) -> str:
         """Convert our timeframe to CCXT format."""
@@ -84,9 +276,18 @@ class CCXTAdapter(DataAdapter):
             'H1': '1h',
             'H4': '4h',
             'D1': '1d',
+            'W1': '1w',
         }
         return mapping.get(timeframe.upper(), timeframe.lower())
     
+    def _normalize_symbol(self, instrument: str) -> str:
+        """Normalize symbol format (ensure it matches exchange format)."""
+        symbol = instrument.upper()
+        if '/' not in symbol:
+            # Try to add /USDT if not present
+            symbol = f"{symbol}/USDT"
+        return symbol
+    
     def fetch_ohlcv(
         self,
         instrument: str,
@@ -95,12 +296,7 @@ class CCXTAdapter(DataAdapter):
         since: Optional[datetime] = None
     ) -> MarketData:
         """Fetch OHLCV data from crypto exchange."""
-        # Normalize symbol format (ensure it matches exchange format)
-        symbol = instrument.upper()
-        if '/' not in symbol:
-            # Try to add /USDT if not present
-            symbol = f"{symbol}/USDT"
-        
+        symbol = self._normalize_symbol(instrument)
         ccxt_timeframe = self._normalize_timeframe(timeframe)
         since_timestamp = int(since.timestamp() * 1000) if since else None
         
@@ -113,37 +309,181 @@ class CCXTAdapter(DataAdapter):
                 limit=limit
             )
             
-            # Convert to normalized format
-            candles = []
-            for candle in ohlcv:
-                candles.append(OHLCVCandle(
-                    timestamp=datetime.fromtimestamp(candle[0] / 1000, tz=timezone.utc),
-                    open=candle[1],
-                    high=candle[2],
-                    low=candle[3],
-                    close=candle[4],
-                    volume=candle[5]
-                ))
+            # Convert to normalized columnar format (sorted oldest first), keep last N candles
+            frame = CandleFrame.from_ccxt(ohlcv).tail(limit)
             
-            # Sort by timestamp (oldest first) to ensure correct order
-            candles.sort(key=lambda c: c.timestamp)
-            # Take last N candles (most recent)
-            candles = candles[-limit:] if len(candles) > limit else candles
+            return MarketData(
+                instrument=instrument,
+                timeframe=timeframe,
+                exchange=self.exchange_name,
+                frame=frame,
+                fetched_at=datetime.now(timezone.utc)
+            )
+        except Exception as e:
+            raise ValueError(f"Failed to fetch data from {self.exchange_name}: {str(e)}")
+    
+    def _range_context(self, instrument: str, timeframe: str):
+        bar_ms = (timeframe_to_seconds(timeframe) or 0) * 1000
+        if not bar_ms:
+            raise ValueError(f"Unsupported timeframe for {self.exchange_name}: {timeframe}")
+        return self._normalize_symbol(instrument), self._normalize_timeframe(timeframe), bar_ms
+    
+    def _page_span_ms(self, timeframe: str) -> int:
+        return CCXT_PAGE_CANDLES * (timeframe_to_seconds(timeframe) or 60) * 1000
+    
+    def _fetch_page(self, context, start_ms: int, end_ms: int) -> CandleFrame:
+        symbol, ccxt_timeframe, bar_ms = context
+        limit = min(CCXT_PAGE_CANDLES, -(-(end_ms - start_ms) // bar_ms))
+        # Paced by the exchange's shared rate limiter
+        ohlcv = self.exchange.fetch_ohlcv(symbol, ccxt_timeframe, since=start_ms, limit=limit)
+        return CandleFrame.from_ccxt(ohlcv)
+
+
+class AsyncCCXTAdapter(CCXTAdapter):
+    """CCXT adapter on ccxt.async_support for concurrent multi-symbol fetches.
+    
+    Requests of all concurrent fetches go through the exchange's shared rate
+    limiter, so a sweep over N pairs takes about max(latency) plus the
+    exchange's pacing instead of the sum of latencies. The async client is
+    bound to the event loop it was created in; use one adapter per loop and
+    close it (or use `async with`).
+    """
+    
+    def __init__(self, exchange_name: str = "binance", max_concurrency: int = CCXT_ASYNC_MAX_CONCURRENCY):
+        """Initialize async CCXT adapter.
+        
+        Args:
+            exchange_name: Exchange name (binance, coinbase, etc.)
+            max_concurrency: Max requests in flight (pacing is still up to the rate limiter)
+        """
+        super().__init__(exchange_name)
+        self.max_concurrency = max_concurrency
+        self._client = None
+        self._client_lock: Optional[asyncio.Lock] = None
+    
+    async def _get_client(self):
+        if self._client is None:
+            if self._client_lock is None:
+                self._client_lock = asyncio.Lock()
+            async with self._client_lock:
+                if self._client is None:
+                    self._client = await get_exchange_registry().create_async_client(
+                        self.exchange_name, self.market_type
+                    )
+        return self._client
+    
+    async def fetch_ohlcv_async(
+        self,
+        instrument: str,
+        timeframe: str,
+        limit: int = 500,
+        since: Optional[datetime] = None
+    ) -> MarketData:
+        """Fetch OHLCV data from crypto exchange without blocking the event loop."""
+        symbol = self._normalize_symbol(instrument)
+        ccxt_timeframe = self._normalize_timeframe(timeframe)
+        since_timestamp = int(since.timestamp() * 1000) if since else None
+        
+        try:
+            client = await self._get_client()
+            ohlcv = await client.fetch_ohlcv(
+                symbol,
+                ccxt_timeframe,
+                since=since_timestamp,
+                limit=limit
+            )
+            frame = CandleFrame.from_ccxt(ohlcv).tail(limit)
             
             return MarketData(
                 instrument=instrument,
                 timeframe=timeframe,
                 exchange=self.exchange_name,
-                candles=candles,
+                frame=frame,
                 fetched_at=datetime.now(timezone.utc)
             )
         except Exception as e:
             raise ValueError(f"Failed to fetch data from {self.exchange_name}: {str(e)}")
+    
+    async def fetch_many(
+        self,
+        requests: List[Tuple[str, str]],
+        limit: int = 500,
+        since: Optional[datetime] = None,
+        return_exceptions: bool = False
+    ) -> List:
+        """Fetch several (instrument, timeframe) series concurrently.
+        
+        Args:
+            requests: List of (instrument, timeframe) pairs
+            limit: Candles per series
+            since: Optional start time for every series
+            return_exceptions: Put the ValueError of a failed series in its slot
+                instead of raising the first failure
+        
+        Returns:
+            MarketData per request, in request order
+        """
+        semaphore = asyncio.Semaphore(max(1, self.max_concurrency))
+        
+        async def fetch_one(instrument: str, timeframe: str) -> MarketData:
+            async with semaphore:
+                return await self.fetch_ohlcv_async(instrument, timeframe, limit=limit, since=since)
+        
+        started = time.monotonic()
+        results = await asyncio.gather(
+            *(fetch_one(instrument, timeframe) for instrument, timeframe in requests),
+            return_exceptions=return_exceptions
+        )
+        failed = sum(1 for r in results if isinstance(r, Exception))
+        logger.info(
+            f"ccxt_fetch_many: exchange={self.exchange_name}, series={len(requests)}, failed={failed}, "
+            f"duration_ms={int((time.monotonic() - started) * 1000)}"
+        )
+        return results
+    
+    async def close(self):
+        """Close the async client (HTTP session)."""
+        if self._client is not None:
+            client, self._client = self._client, None
+            await client.close()
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
 
 
 class YFinanceAdapter(DataAdapter):
     """yfinance adapter for equities."""
     
+    native_timeframes = ('M1', 'M5', 'M15', 'M30', 'H1', 'D1', 'W1')
+    # Yahoo has no 4h interval
+    derived_timeframes = {'H4': 'H1'}
+    # Exchange-local time (from the data), buckets anchored at the US cash session open
+    session_alignment = (None, 9 * 60 + 30)
+    exchange_name = 'yfinance'
+    # Yahoo intraday limits: max span per request and max lookback from now (days)
+    _page_days = {'M1': 7, 'M5': 60, 'M15': 60, 'M30': 60, 'H1': 730}
+    _lookback_days = {'M1': 30, 'M5': 60, 'M15': 60, 'M30': 60, 'H1': 730}
+    
+    # yf.Ticker objects shared by all adapter instances (symbol -> Ticker, LRU)
+    _tickers: "OrderedDict[str, yf.Ticker]" = OrderedDict()
+    _tickers_lock = threading.Lock()
+    
+    def _get_ticker(self, symbol: str) -> "yf.Ticker":
+        """Get a reused yf.Ticker (keeps its session and resolved metadata between calls)."""
+        with self._tickers_lock:
+            ticker = self._tickers.get(symbol)
+            if ticker is None:
+                ticker = yf.Ticker(symbol)
+                self._tickers[symbol] = ticker
+                if len(self._tickers) > YFINANCE_TICKER_CACHE_SIZE:
+                    self._tickers.popitem(last=False)
+            else:
+                self._tickers.move_to_end(symbol)
+            return ticker
+    
     def _normalize_futures_ticker(self, symbol: str) -> str:
         """Convert Bloomberg-style futures tickers to Yahoo Finance format.
         
@@ -194,8 +534,12 @@ class YFinanceAdapter(DataAdapter):
             'M30': '30m',
             'H1': '1h',
             'D1': '1d',
+            'W1': '1wk',
         }
-        return mapping.get(timeframe.upper(), '1d')
+        interval = mapping.get(timeframe.upper())
+        if not interval:
+            raise ValueError(f"Unsupported timeframe for yfinance: {timeframe}")
+        return interval
     
     def fetch_ohlcv(
         self,
@@ -207,7 +551,7 @@ class YFinanceAdapter(DataAdapter):
         """Fetch OHLCV data from yfinance."""
         # Normalize Bloomberg-style futures tickers to Yahoo Finance format
         normalized_instrument = self._normalize_futures_ticker(instrument)
-        ticker = yf.Ticker(normalized_instrument)
+        ticker = self._get_ticker(normalized_instrument)
         interval = self._normalize_timeframe(timeframe)
         
         # Calculate period
@@ -218,6 +562,8 @@ class YFinanceAdapter(DataAdapter):
             # Default period based on timeframe
             if timeframe in ['M1', 'M5', 'M15', 'M30', 'H1']:
                 period = '5d'  # Intraday data
+            elif timeframe == 'W1':
+                period = '2y'  # Weekly data
             else:
                 period = '1mo'  # Daily data
         
@@ -235,40 +581,55 @@ class YFinanceAdapter(DataAdapter):
             if df.empty:
                 raise ValueError(f"No data available for {instrument} (tried {normalized_instrument})")
             
-            # Limit results (tail gets last N, which should be most recent)
-            df = df.tail(limit)
-            
-            # Convert to normalized format
-            candles = []
-            for idx, row in df.iterrows():
-                candles.append(OHLCVCandle(
-                    timestamp=idx.to_pydatetime() if isinstance(idx, pd.Timestamp) else idx,
-                    open=float(row['Open']),
-                    high=float(row['High']),
-                    low=float(row['Low']),
-                    close=float(row['Close']),
-                    volume=float(row['Volume'])
-                ))
-            
-            # Sort by timestamp (oldest first) to ensure correct order
-            candles.sort(key=lambda c: c.timestamp)
-            # Take last N candles (most recent) - safety check in case tail didn't work as expected
-            candles = candles[-limit:] if len(candles) > limit else candles
+            # Convert column arrays directly (sorted oldest first), keep last N candles
+            frame = CandleFrame.from_dataframe(df).tail(limit)
             
             return MarketData(
                 instrument=instrument,  # Keep original symbol for display
                 timeframe=timeframe,
                 exchange='yfinance',
-                candles=candles,
+                frame=frame,
                 fetched_at=datetime.now(timezone.utc)
             )
         except Exception as e:
             raise ValueError(f"Failed to fetch data from yfinance for {instrument} (tried {normalized_instrument}): {str(e)}")
+    
+    def _range_context(self, instrument: str, timeframe: str):
+        return self._get_ticker(self._normalize_futures_ticker(instrument)), self._normalize_timeframe(timeframe)
+    
+    def _page_span_ms(self, timeframe: str) -> int:
+        # Daily/weekly history has no span limit: one request
+        return self._page_days.get(timeframe.upper(), 365 * 100) * DAY_MS
+    
+    def _clip_range_start(self, timeframe: str, start_ms: int, end_ms: int) -> int:
+        lookback_days = self._lookback_days.get(timeframe.upper())
+        if lookback_days is None:
+            return start_ms
+        # One day of margin: Yahoo rejects requests touching the lookback boundary
+        earliest_ms = int(datetime.now(timezone.utc).timestamp() * 1000) - (lookback_days - 1) * DAY_MS
+        return max(start_ms, earliest_ms)
+    
+    def _fetch_page(self, context, start_ms: int, end_ms: int) -> CandleFrame:
+        ticker, interval = context
+        df = ticker.history(
+            start=datetime.fromtimestamp(start_ms / 1000, tz=timezone.utc),
+            end=datetime.fromtimestamp(end_ms / 1000, tz=timezone.utc),
+            interval=interval
+        )
+        return CandleFrame.from_dataframe(df)
 
 
 class TinkoffAdapter(DataAdapter):
     """Tinkoff Invest API adapter for MOEX instruments."""
     
+    native_timeframes = ('M1', 'M5', 'M15', 'H1', 'D1')
+    derived_timeframes = {'M30': 'M15', 'H4': 'H1', 'W1': 'D1'}
+    # Moscow time, intraday buckets anchored at the 10:00 MSK main session open
+    session_alignment = ("Europe/Moscow", 10 * 60)
+    exchange_name = 'MOEX'
+    # GetCandles max period per request (days)
+    _page_days = {'M1': 1, 'M5': 1, 'M15': 1, 'H1': 7, 'D1': 365}
+    
     def __init__(self, api_token: str):
         """Initialize Tinkoff adapter.
         
@@ -284,7 +645,8 @@ class TinkoffAdapter(DataAdapter):
             raise ImportError("tinkoff-investments package not installed. Install with: pip install tinkoff-investments")
         
         self.api_token = api_token
-        self.client = None  # Will be created per request (not kept open)
+        # Long-lived channels shared by all adapters using this token
+        self.pool = get_tinkoff_client_pool(api_token)
     
     def _normalize_timeframe(self, timeframe: str):
         """Convert our timeframe to Tinkoff CandleInterval."""
@@ -292,124 +654,25 @@ class TinkoffAdapter(DataAdapter):
             'M1': self.CandleInterval.CANDLE_INTERVAL_1_MIN,
             'M5': self.CandleInterval.CANDLE_INTERVAL_5_MIN,
             'M15': self.CandleInterval.CANDLE_INTERVAL_15_MIN,
-            'M30': self.CandleInterval.CANDLE_INTERVAL_15_MIN,  # Tinkoff doesn't have M30, use M15
             'H1': self.CandleInterval.CANDLE_INTERVAL_HOUR,
             'D1': self.CandleInterval.CANDLE_INTERVAL_DAY,
         }
-        return mapping.get(timeframe.upper(), self.CandleInterval.CANDLE_INTERVAL_DAY)
+        interval = mapping.get(timeframe.upper())
+        if interval is None:
+            # M30/H4/W1 are resampled by DataService (see derived_timeframes)
+            raise ValueError(f"Unsupported timeframe for Tinkoff: {timeframe}")
+        return interval
     
-    def _get_figi_for_ticker(self, ticker: str, db: SessionLocal) -> Optional[str]:
-        """Get FIGI for a ticker from database or Tinkoff API.
+    def _get_figi_for_ticker(self, ticker: str) -> Optional[str]:
+        """Get FIGI for a ticker (shared in-memory map, batch listing lookup on a miss).
         
         Args:
             ticker: Instrument ticker (e.g., 'SBER')
-            db: Database session
             
         Returns:
             FIGI string or None if not found
         """
-        # Check database first
-        instrument = db.query(Instrument).filter(Instrument.symbol == ticker).first()
-        if instrument and instrument.figi:
-            return instrument.figi
-        
-        # If not in DB, search Tinkoff API
-        try:
-            with self.Client(self.api_token) as client:
-                from tinkoff.invest.schemas import InstrumentIdType
-                
-                # Search for instrument
-                search_result = client.instruments.find_instrument(query=ticker)
-                
-                if not search_result.instruments:
-                    logger.warning(f"No instruments found for ticker: {ticker}")
-                    return None
-                
-                # Find MOEX instruments (shares OR futures) with matching ticker
-                # Prefer BBG FIGI (Bloomberg) over TCS (Tinkoff internal)
-                # Note: Tinkoff API uses "futures" (plural) not "future" (singular)
-                found_instruments = []
-                for inst in search_result.instruments:
-                    # Check for both shares and futures (note: Tinkoff uses "futures" plural)
-                    if inst.ticker == ticker and inst.instrument_type in ["share", "future", "futures"]:
-                        found_instruments.append(inst)
-                
-                # Sort: prefer BBG FIGI
-                found_instruments.sort(key=lambda x: (not x.figi.startswith("BBG"), x.figi))
-                
-                for inst in found_instruments:
-                    # Verify it's MOEX by getting full details
-                    try:
-                        if inst.instrument_type == "share":
-                            full_inst = client.instruments.share_by(
-                                id_type=InstrumentIdType.INSTRUMENT_ID_TYPE_FIGI,
-                                id=inst.figi
-                            )
-                            exchange = full_inst.instrument.exchange
-                        elif inst.instrument_type in ["future", "futures"]:
-                            # Tinkoff API uses "futures" (plural) for futures contracts
-                            full_inst = client.instruments.future_by(
-                                id_type=InstrumentIdType.INSTRUMENT_ID_TYPE_FIGI,
-                                id=inst.figi
-                            )
-                            exchange = full_inst.instrument.exchange
-                        else:
-                            continue
-                        
-                        # MOEX futures can have exchange "forts_futures_weekend" or "MOEX"
-                        # Both are valid MOEX exchanges
-                        if exchange == "MOEX" or "forts" in exchange.lower() or "moex" in exchange.lower():
-                            figi = inst.figi
-                            # Cache FIGI in database
-                            if instrument:
-                                instrument.figi = figi
-                                instrument.exchange = "MOEX"  # Normalize to MOEX
-                                db.commit()
-                            else:
-                                # Create instrument record if it doesn't exist
-                                instrument = Instrument(
-                                    symbol=ticker,
-                                    type="equity",  # Keep as equity for now (futures are also equity-like)
-                                    exchange="MOEX",
-                                    figi=figi,
-                                    is_enabled=False
-                                )
-                                db.add(instrument)
-                                db.commit()
-                            
-                            logger.info(f"Cached FIGI {figi} for ticker {ticker} (type: {inst.instrument_type}, exchange: {exchange})")
-                            return figi
-                    except Exception as e:
-                        logger.warning(f"Could not verify exchange for {ticker} (FIGI: {inst.figi}, type: {inst.instrument_type}): {e}")
-                        continue
-                
-                # If we found instruments but couldn't verify exchange, try using first one anyway
-                # This handles cases where exchange name might be different (e.g., "forts_futures_weekend")
-                if found_instruments:
-                    logger.info(f"Using first found instrument for {ticker}: {found_instruments[0].figi} (type: {found_instruments[0].instrument_type})")
-                    figi = found_instruments[0].figi
-                    if instrument:
-                        instrument.figi = figi
-                        instrument.exchange = "MOEX"  # Normalize to MOEX
-                        db.commit()
-                    else:
-                        instrument = Instrument(
-                            symbol=ticker,
-                            type="equity",
-                            exchange="MOEX",
-                            figi=figi,
-                            is_enabled=False
-                        )
-                        db.add(instrument)
-                        db.commit()
-                    return figi
-                
-                logger.warning(f"Could not find MOEX instrument (share or future) for ticker: {ticker}")
-                return None
-                
-        except Exception as e:
-            logger.error(f"Failed to get FIGI for {ticker}: {e}")
-            return None
+        return get_tinkoff_figi_map().resolve(ticker, self.pool)
     
     def fetch_ohlcv(
         self,
@@ -426,10 +689,9 @@ class TinkoffAdapter(DataAdapter):
             limit: Maximum number of candles
             since: Start datetime (optional)
         """
-        db = SessionLocal()
         try:
             # Get FIGI for ticker
-            figi = self._get_figi_for_ticker(instrument, db)
+            figi = self._get_figi_for_ticker(instrument)
             if not figi:
                 raise ValueError(f"Could not find FIGI for instrument: {instrument}")
             
@@ -452,53 +714,289 @@ class TinkoffAdapter(DataAdapter):
             # Get candle interval
             candle_interval = self._normalize_timeframe(timeframe)
             
-            # Fetch candles from Tinkoff
-            with self.Client(self.api_token) as client:
+            # Fetch candles from Tinkoff (pooled channel, no TLS handshake per request)
+            with self.pool.client() as client:
                 candles_response = client.market_data.get_candles(
                     figi=figi,
                     from_=from_date,
                     to=to_date,
                     interval=candle_interval
                 )
-                
-                if not candles_response.candles:
-                    raise ValueError(f"No candles returned for {instrument} (FIGI: {figi})")
-                
-                # Convert to normalized format
-                candles = []
-                for candle in candles_response.candles:
-                    # Tinkoff uses units.nano format for prices
-                    def convert_price(price_obj):
-                        if hasattr(price_obj, 'units') and hasattr(price_obj, 'nano'):
-                            return float(price_obj.units) + float(price_obj.nano) / 1e9
-                        return float(price_obj)
-                    
-                    candles.append(OHLCVCandle(
-                        timestamp=candle.time.replace(tzinfo=timezone.utc) if candle.time.tzinfo is None else candle.time,
-                        open=convert_price(candle.open),
-                        high=convert_price(candle.high),
-                        low=convert_price(candle.low),
-                        close=convert_price(candle.close),
-                        volume=candle.volume
-                    ))
-                
-                # Sort by timestamp (oldest first) to ensure correct order
-                candles.sort(key=lambda c: c.timestamp)
-                # Take last N candles (most recent)
-                candles = candles[-limit:] if len(candles) > limit else candles
-                
-                return MarketData(
-                    instrument=instrument,
-                    timeframe=timeframe,
-                    exchange="MOEX",
-                    candles=candles,
-                    fetched_at=datetime.now(timezone.utc)
-                )
-                
+            
+            if not candles_response.candles:
+                raise ValueError(f"No candles returned for {instrument} (FIGI: {figi})")
+            
+            # Convert to normalized columnar format (sorted oldest first), keep last N candles
+            frame = CandleFrame.from_tinkoff(candles_response.candles).tail(limit)
+            
+            return MarketData(
+                instrument=instrument,
+                timeframe=timeframe,
+                exchange="MOEX",
+                frame=frame,
+                fetched_at=datetime.now(timezone.utc)
+            )
         except Exception as e:
             raise ValueError(f"Failed to fetch data from Tinkoff: {str(e)}")
-        finally:
-            db.close()
+    
+    def _range_context(self, instrument: str, timeframe: str):
+        candle_interval = self._normalize_timeframe(timeframe)
+        figi = self._get_figi_for_ticker(instrument)
+        if not figi:
+            raise ValueError(f"Could not find FIGI for instrument: {instrument}")
+        return figi, candle_interval
+    
+    def _page_span_ms(self, timeframe: str) -> int:
+        return self._page_days[timeframe.upper()] * DAY_MS
+    
+    def _fetch_page(self, context, start_ms: int, end_ms: int) -> CandleFrame:
+        figi, candle_interval = context
+        with self.pool.client() as client:
+            candles_response = client.market_data.get_candles(
+                figi=figi,
+                from_=datetime.fromtimestamp(start_ms / 1000, tz=timezone.utc),
+                to=datetime.fromtimestamp(end_ms / 1000, tz=timezone.utc),
+                interval=candle_interval
+            )
+        return CandleFrame.from_tinkoff(candles_response.candles)
+
+
+# MOEX ISS candles: rows per response (the `start` offset pages through the rest)
+MOEX_ISS_PAGE_ROWS = 500
+MOEX_ISS_TIMEOUT_SECONDS = 15
+MOEX_ISS_URL = "https://iss.moex.com/iss"
+# ISS timestamps are Moscow time (UTC+3, no DST)
+MSK = timezone(timedelta(hours=3))
+
+
+class MoexISSAdapter(DataAdapter):
+    """MOEX ISS candles (public API, no token): alternate source for MOEX instruments.
+    
+    Volumes are converted to lots to match Tinkoff candles. Without an ISS
+    market data subscription intraday candles are delayed by 15 minutes.
+    """
+    
+    native_timeframes = ('M1', 'H1', 'D1', 'W1')
+    # ISS intervals are 1/10/60 minutes, day, week: the rest is resampled
+    derived_timeframes = {'M5': 'M1', 'M15': 'M1', 'M30': 'M1', 'H4': 'H1'}
+    session_alignment = ("Europe/Moscow", 10 * 60)
+    exchange_name = 'MOEX'
+    _intervals = {'M1': 1, 'H1': 60, 'D1': 24, 'W1': 7}
+    # Window per page (a page may need several ISS requests)
+    _page_days = {'M1': 1, 'H1': 30, 'D1': 365, 'W1': 365 * 5}
+    # fetch_ohlcv lookback (same depth as TinkoffAdapter)
+    _window_days = {'M1': 1, 'M5': 1, 'M15': 3, 'M30': 7, 'H1': 7, 'H4': 30, 'D1': 365, 'W1': 365 * 5}
+    
+    # Shared by all instances: keep-alive session and share lot sizes
+    _session = None
+    _lot_sizes: Dict[str, int] = {}
+    _lock = threading.Lock()
+    
+    def _get(self, path: str, params: dict) -> dict:
+        import requests
+        
+        if MoexISSAdapter._session is None:
+            with self._lock:
+                if MoexISSAdapter._session is None:
+                    MoexISSAdapter._session = requests.Session()
+        response = self._session.get(f"{MOEX_ISS_URL}{path}", params=params, timeout=MOEX_ISS_TIMEOUT_SECONDS)
+        response.raise_for_status()
+        return response.json()
+    
+    def _security_path(self, instrument: str) -> Tuple[str, bool]:
+        """ISS path of a security and whether it's a futures contract."""
+        from app.services.data.universe import get_instrument_universe, MOEX_FUTURES
+        
+        secid = instrument.upper()
+        if get_instrument_universe().contains(MOEX_FUTURES, secid):
+            return f"/engines/futures/markets/forts/securities/{secid}", True
+        # TQBR: main equity board (Tinkoff candles are for the same board)
+        return f"/engines/stock/markets/shares/boards/TQBR/securities/{secid}", False
+    
+    def _lot_size(self, path: str, secid: str) -> int:
+        lot = self._lot_sizes.get(secid)
+        if lot is None:
+            data = self._get(f"{path}.json", {"iss.meta": "off", "iss.only": "securities", "securities.columns": "LOTSIZE"})
+            rows = data.get("securities", {}).get("data", [])
+            if not rows:
+                raise ValueError(f"Unknown MOEX security: {secid}")
+            lot = int(rows[0][0] or 1)
+            self._lot_sizes[secid] = lot
+        return lot
+    
+    def fetch_ohlcv(
+        self,
+        instrument: str,
+        timeframe: str,
+        limit: int = 500,
+        since: Optional[datetime] = None
+    ) -> MarketData:
+        """Fetch OHLCV data from MOEX ISS.
+        
+        Args:
+            instrument: Ticker symbol (e.g., 'SBER', 'NGX5')
+            timeframe: Timeframe (M1, M5, M15, M30, H1, H4, D1, W1)
+            limit: Maximum number of candles
+            since: Start datetime (optional)
+        """
+        to_date = datetime.now(timezone.utc)
+        from_date = since or to_date - timedelta(days=self._window_days.get(timeframe.upper(), 30))
+        try:
+            data = self.fetch_range(instrument, timeframe, from_date, to_date)
+        except Exception as e:
+            raise ValueError(f"Failed to fetch data from MOEX ISS: {str(e)}")
+        if len(data.frame) == 0:
+            raise ValueError(f"No candles returned for {instrument} from MOEX ISS")
+        
+        return MarketData(
+            instrument=instrument,
+            timeframe=timeframe,
+            exchange=self.exchange_name,
+            frame=data.frame[:limit] if since else data.frame.tail(limit),
+            fetched_at=data.fetched_at,
+        )
+    
+    def _range_context(self, instrument: str, timeframe: str):
+        interval = self._intervals.get(timeframe.upper())
+        if interval is None:
+            raise ValueError(f"Unsupported timeframe for MOEX ISS: {timeframe}")
+        path, is_futures = self._security_path(instrument)
+        # Futures volumes are in contracts already
+        lot = 1 if is_futures else self._lot_size(path, instrument.upper())
+        return path, interval, lot
+    
+    def _page_span_ms(self, timeframe: str) -> int:
+        return self._page_days[timeframe.upper()] * DAY_MS
+    
+    def _fetch_page(self, context, start_ms: int, end_ms: int) -> CandleFrame:
+        path, interval, lot = context
+        params = {
+            "interval": interval,
+            "from": datetime.fromtimestamp(start_ms / 1000, tz=MSK).strftime("%Y-%m-%d %H:%M:%S"),
+            "till": datetime.fromtimestamp((end_ms - 1) / 1000, tz=MSK).strftime("%Y-%m-%d %H:%M:%S"),
+            "iss.meta": "off",
+            "iss.only": "candles",
+            "candles.columns": "begin,open,high,low,close,volume",
+        }
+        rows = []
+        while True:
+            params["start"] = len(rows)
+            batch = self._get(f"{path}/candles.json", params).get("candles", {}).get("data", [])
+            rows.extend(batch)
+            if len(batch) < MOEX_ISS_PAGE_ROWS:
+                break
+        if not rows:
+            return CandleFrame.empty()
+        columns = list(zip(*rows))
+        begin_ms = np.array(columns[0], dtype="datetime64[s]").astype(np.int64) * 1000
+        return CandleFrame(
+            begin_ms - 3 * 60 * 60 * 1000,
+            columns[1], columns[2], columns[3], columns[4],
+            np.asarray(columns[5], dtype=np.float64) / lot,
+        )
+
+
+class RoutedAdapter(DataAdapter):
+    """Adapter over the data sources of one asset class with failover (see routing.ProviderRouter).
+    
+    Timeframe handling (native/derived timeframes, session alignment) follows
+    the currently preferred source.
+    """
+    
+    def __init__(self, route: str, sources: Dict[str, DataAdapter]):
+        """Initialize routed adapter.
+        
+        Args:
+            route: Asset class route (moex, crypto, equity)
+            sources: Source name -> adapter for the sources configured in this service
+        """
+        self.route = route
+        self.sources = sources
+        self.router = get_provider_router()
+    
+    @property
+    def primary(self) -> DataAdapter:
+        """Source tried first for the next request."""
+        order = self.router.order(self.route, self.sources)
+        if not order:
+            raise ValueError(
+                f"No data source enabled for {self.route} instruments "
+                f"(check Settings → Data Sources and provider credentials)"
+            )
+        return self.sources[order[0]]
+    
+    @property
+    def native_timeframes(self) -> tuple:
+        return self.primary.native_timeframes
+    
+    @property
+    def derived_timeframes(self) -> dict:
+        return self.primary.derived_timeframes
+    
+    @property
+    def session_alignment(self) -> tuple:
+        return self.primary.session_alignment
+    
+    @property
+    def exchange_name(self) -> Optional[str]:
+        return self.primary.exchange_name
+    
+    @property
+    def store_source(self) -> Optional[str]:
+        """Configured first-choice source, even while failed over.
+        
+        Stored series hold one source's candles; data served by a fallback
+        source (another exchange, or delayed MOEX ISS data instead of Tinkoff)
+        is returned and cached but not stored.
+        """
+        return self.router.preferred(self.route, self.sources)
+    
+    @property
+    def store_exchange(self) -> Optional[str]:
+        """Exchange of the store source (label of stored candles)."""
+        name = self.store_source
+        return self.sources[name].exchange_name if name else None
+    
+    def is_store_data(self, data: MarketData) -> bool:
+        return data.source is not None and data.source == self.store_source
+    
+    def fetch_ohlcv(
+        self,
+        instrument: str,
+        timeframe: str,
+        limit: int = 500,
+        since: Optional[datetime] = None
+    ) -> MarketData:
+        """Fetch OHLCV data from the best available source."""
+        name, data = self.router.call(
+            self.route, self.sources, "fetch_ohlcv",
+            lambda adapter: adapter.fetch_ohlcv(instrument, timeframe, limit=limit, since=since),
+        )
+        data.source = name
+        return data
+    
+    def fetch_range(
+        self,
+        instrument: str,
+        timeframe: str,
+        start: datetime,
+        end: Optional[datetime] = None,
+        on_page: Optional[Callable[[str, CandleFrame], None]] = None,
+        max_workers: int = DATA_RANGE_FETCH_CONCURRENCY,
+    ) -> MarketData:
+        """Fetch a candle range from the best available source (whole range per attempt).
+        
+        Pages go to `on_page` only when they come from the store source.
+        """
+        store_adapter = self.sources.get(self.store_source)
+        
+        def attempt(adapter: DataAdapter) -> MarketData:
+            pages = on_page if adapter is store_adapter else None
+            return adapter.fetch_range(instrument, timeframe, start, end, pages, max_workers)
+        
+        name, data = self.router.call(self.route, self.sources, "fetch_range", attempt)
+        data.source = name
+        return data
 
 
 class DataService:
@@ -527,64 +1025,93 @@ class DataService:
                 self.tinkoff_adapter = None
         else:
             self.tinkoff_adapter = None
+        
+        # Sources by available_data_sources name; routes fail over between them
+        self.moex_iss_adapter = MoexISSAdapter()
+        self.sources: Dict[str, DataAdapter] = {
+            "ccxt": self.ccxt_adapter,
+            "yfinance": self.yfinance_adapter,
+            "moex_iss": self.moex_iss_adapter,
+        }
+        if DATA_CRYPTO_FALLBACK_EXCHANGE:
+            self.sources[f"ccxt_{DATA_CRYPTO_FALLBACK_EXCHANGE}"] = CCXTAdapter(DATA_CRYPTO_FALLBACK_EXCHANGE)
+        if self.tinkoff_adapter:
+            self.sources["tinkoff"] = self.tinkoff_adapter
+        self._routed = {route: RoutedAdapter(route, self.sources) for route in (ROUTE_MOEX, ROUTE_CRYPTO, ROUTE_EQUITY)}
     
     def _get_cache_key(self, instrument: str, timeframe: str) -> str:
         """Generate cache key."""
         key = f"{instrument}:{timeframe}"
         return hashlib.md5(key.encode()).hexdigest()
     
-    def _get_cached_data(self, cache_key: str, ttl_seconds: int = 300) -> Optional[MarketData]:
-        """Get cached data if still valid."""
+    def _read_cache_entry(self, cache_key: str) -> Optional[Tuple[MarketData, float, int]]:
+        """Read a cache entry (L1 memory tier, then DB) regardless of its age.
+        
+        The memory tier only holds unexpired entries; expired ones are read from
+        the DB, where another process may have stored a newer copy.
+        
+        Returns:
+            Tuple of (data, age in seconds, entry ttl in seconds) or None if missing/unreadable
+        """
+        # L1: decoded data held in this process
+        memory_cache = get_market_data_memory_cache()
+        entry = memory_cache.get(cache_key)
+        if entry:
+            return entry
+        
         db = SessionLocal()
         try:
             cache_entry = db.query(DataCache).filter(DataCache.key == cache_key).first()
-            if cache_entry:
-                age = (datetime.now(timezone.utc) - cache_entry.fetched_at.replace(tzinfo=timezone.utc)).total_seconds()
-                if age < min(cache_entry.ttl_seconds, ttl_seconds):
-                    # Return cached data
-                    data_dict = json.loads(cache_entry.payload)
-                    # Convert datetime strings back to datetime objects
-                    data_dict['fetched_at'] = datetime.fromisoformat(data_dict['fetched_at'])
-                    for candle in data_dict['candles']:
-                        candle['timestamp'] = datetime.fromisoformat(candle['timestamp'])
-                    return MarketData(**data_dict)
+            if not cache_entry:
+                return None
+            age = (datetime.now(timezone.utc) - cache_entry.fetched_at.replace(tzinfo=timezone.utc)).total_seconds()
+            if cache_entry.payload_bin:
+                # Columnar binary payload - decodes straight into arrays
+                data = decode_market_data(cache_entry.payload_bin)
+            else:
+                # Legacy JSON payload (written before the columnar format)
+                data_dict = json.loads(cache_entry.payload)
+                # Convert datetime strings back to datetime objects
+                data_dict['fetched_at'] = datetime.fromisoformat(data_dict['fetched_at'])
+                for candle in data_dict['candles']:
+                    candle['timestamp'] = datetime.fromisoformat(candle['timestamp'])
+                data = MarketData(**data_dict)
+            
+            if age < cache_entry.ttl_seconds:
+                memory_cache.set(cache_key, data, cache_entry.ttl_seconds, age=age)
+            return data, age, cache_entry.ttl_seconds
+        except ValueError as e:
+            logger.warning(f"data_cache_decode_failed: key={cache_key}, error={e}")
             return None
         finally:
             db.close()
     
+    def _get_cached_data(self, cache_key: str, ttl_seconds: int = 300) -> Optional[MarketData]:
+        """Get cached data if still valid."""
+        entry = self._read_cache_entry(cache_key)
+        if entry:
+            data, age, entry_ttl = entry
+            if age < min(entry_ttl, ttl_seconds):
+                return data
+        return None
+    
     def _cache_data(self, cache_key: str, data: MarketData, ttl_seconds: int = 300):
         """Cache market data."""
         db = SessionLocal()
         try:
-            # Convert to JSON-serializable format
-            data_dict = {
-                'instrument': data.instrument,
-                'timeframe': data.timeframe,
-                'exchange': data.exchange,
-                'candles': [
-                    {
-                        'timestamp': c.timestamp.isoformat(),
-                        'open': c.open,
-                        'high': c.high,
-                        'low': c.low,
-                        'close': c.close,
-                        'volume': c.volume
-                    }
-                    for c in data.candles
-                ],
-                'fetched_at': data.fetched_at.isoformat()
-            }
+            payload_bin = encode_market_data(data, compress=DATA_CACHE_COMPRESSION)
             
             # Update or create cache entry
             cache_entry = db.query(DataCache).filter(DataCache.key == cache_key).first()
             if cache_entry:
-                cache_entry.payload = json.dumps(data_dict)
+                cache_entry.payload = None
+                cache_entry.payload_bin = payload_bin
                 cache_entry.fetched_at = datetime.now(timezone.utc)
                 cache_entry.ttl_seconds = ttl_seconds
             else:
                 cache_entry = DataCache(
                     key=cache_key,
-                    payload=json.dumps(data_dict),
+                    payload_bin=payload_bin,
                     ttl_seconds=ttl_seconds
                 )
                 db.add(cache_entry)
@@ -592,6 +1119,486 @@ class DataService:
             db.commit()
         finally:
             db.close()
+        
+        # Write-through to L1
+        get_market_data_memory_cache().set(cache_key, data, ttl_seconds)
+    
+    def _fetch_incremental(self, adapter: DataAdapter, stale: MarketData) -> Optional[MarketData]:
+        """Refresh expired data by fetching only candles from the cached tail onwards.
+        
+        Re-fetches the last cached candle too (it may have been incomplete), merges
+        the new candles into the cached series and trims it to the retention window.
+        
+        Args:
+            adapter: Adapter selected for the instrument
+            stale: Expired cached data for the same instrument and timeframe
+            
+        Returns:
+            Merged market data, or None if a full fetch is needed instead
+            (empty cache, unknown timeframe, gap larger than the retention window,
+            different data source or a failed fetch)
+        """
+        bar_seconds = timeframe_to_seconds(stale.timeframe)
+        if not bar_seconds or len(stale.frame) == 0:
+            return None
+        
+        bar_ms = bar_seconds * 1000
+        last_ts = int(stale.frame.timestamp_ms[-1])
+        now_ms = int(datetime.now(timezone.utc).timestamp() * 1000)
+        missing = max(0, (now_ms - last_ts) // bar_ms) + 1
+        if missing >= DATA_RETENTION_CANDLES:
+            return None
+        
+        since = datetime.fromtimestamp((last_ts - bar_ms) / 1000, tz=timezone.utc)
+        try:
+            fresh = adapter.fetch_ohlcv(stale.instrument, stale.timeframe, limit=missing + 2, since=since)
+        except ValueError as e:
+            logger.warning(f"incremental_fetch_failed: instrument={stale.instrument}, timeframe={stale.timeframe}, error={e}")
+            return None
+        
+        if stale.exchange and fresh.exchange != stale.exchange:
+            return None
+        if stale.source and fresh.source and fresh.source != stale.source:
+            return None
+        
+        frame = stale.frame.merge(fresh.frame).tail(DATA_RETENTION_CANDLES)
+        logger.info(
+            f"incremental_fetch: instrument={stale.instrument}, timeframe={stale.timeframe}, "
+            f"fetched={len(fresh.frame)}, total={len(frame)}"
+        )
+        return MarketData(
+            instrument=stale.instrument,
+            timeframe=stale.timeframe,
+            exchange=fresh.exchange,
+            source=fresh.source,
+            frame=frame,
+            fetched_at=fresh.fetched_at,
+        )
+    
+    def _read_stored_candles(
+        self,
+        instrument_id: int,
+        instrument: str,
+        timeframe: str,
+        exchange: Optional[str] = None,
+        start_ms: Optional[int] = None,
+        end_ms: Optional[int] = None,
+        source: Optional[str] = None,
+    ) -> Optional[MarketData]:
+        """Read stored candles from the candle store.
+        
+        Args:
+            instrument_id: Instrument ID
+            instrument: Symbol
+            timeframe: Timeframe
+            exchange: Exchange to set on the result
+            start_ms: Read everything from this time (epoch ms); by default the last
+                DATA_RETENTION_CANDLES candles
+            end_ms: Exclusive upper bound (epoch ms) when start_ms is set
+            source: Data source to set on the result
+        
+        Returns:
+            Market data (UTC timestamps) or None if nothing is stored
+        """
+        db = SessionLocal()
+        try:
+            if start_ms is None:
+                frame = candle_store.read_range(db, instrument_id, timeframe, limit=DATA_RETENTION_CANDLES)
+            else:
+                frame = candle_store.read_range(db, instrument_id, timeframe, start_ms=start_ms, end_ms=end_ms)
+        except Exception as e:
+            logger.warning(f"candle_store_read_failed: instrument={instrument}, timeframe={timeframe}, error={e}")
+            return None
+        finally:
+            db.close()
+        
+        if len(frame) == 0:
+            return None
+        return MarketData(
+            instrument=instrument,
+            timeframe=timeframe,
+            exchange=exchange,
+            source=source,
+            frame=frame,
+            fetched_at=datetime.fromtimestamp(0, tz=timezone.utc),
+        )
+    
+    def _store_candles(self, instrument_id: int, timeframe: str, frame: CandleFrame):
+        """Write candles to the candle store. Failures are logged, not raised."""
+        if len(frame) == 0:
+            return
+        db = SessionLocal()
+        try:
+            written = candle_store.upsert_candles(db, instrument_id, timeframe, frame)
+            db.commit()
+            logger.debug(f"candle_store_written: instrument_id={instrument_id}, timeframe={timeframe}, candles={written}")
+        except Exception as e:
+            db.rollback()
+            logger.warning(f"candle_store_write_failed: instrument_id={instrument_id}, timeframe={timeframe}, error={e}")
+        finally:
+            db.close()
+    
+    def _fetch_resampled(
+        self,
+        adapter: DataAdapter,
+        instrument: str,
+        instrument_id: Optional[int],
+        timeframe: str,
+        source_timeframe: str,
+        use_cache: bool,
+        cache_ttl: int,
+    ) -> MarketData:
+        """Build a timeframe the provider doesn't serve from a lower native timeframe.
+        
+        The source timeframe goes through the normal fetch path (cache, candle store,
+        incremental refresh); stored source history extends the window when available.
+        """
+        source = self.fetch_market_data(instrument, source_timeframe, use_cache=use_cache, cache_ttl=cache_ttl)
+        frame = source.frame
+        
+        if instrument_id is not None and DATA_CANDLE_STORE and len(frame) > 0:
+            window_ms = (DATA_RETENTION_CANDLES + 1) * timeframe_to_seconds(timeframe) * 1000
+            stored = self._read_stored_candles(
+                instrument_id, instrument, source_timeframe,
+                start_ms=int(frame.timestamp_ms[-1]) - window_ms,
+            )
+            if stored is not None and len(stored.frame) > len(frame):
+                frame = stored.frame.merge(frame)
+        
+        tz, anchor_minutes = adapter.session_alignment
+        derived = resample(frame, timeframe, tz if tz is not None else frame.tz, anchor_minutes)
+        # The first bucket may be cut by the start of the source window
+        if len(derived) > 1:
+            derived = derived[1:]
+        
+        logger.info(
+            f"market_data_resampled: instrument={instrument}, timeframe={timeframe}, "
+            f"source={source_timeframe}, source_candles={len(frame)}, candles={len(derived)}"
+        )
+        return MarketData(
+            instrument=instrument,
+            timeframe=timeframe,
+            exchange=source.exchange,
+            frame=derived.tail(DATA_RETENTION_CANDLES),
+            fetched_at=source.fetched_at,
+        )
+    
+    def _resample_from_store(
+        self,
+        adapter: DataAdapter,
+        instrument: str,
+        instrument_id: int,
+        timeframe: str,
+        cache_ttl: int,
+    ) -> Optional[MarketData]:
+        """Serve a native timeframe from stored lower-timeframe candles without a provider call.
+        
+        Only used when a lower timeframe was refreshed within the cache TTL and the
+        store holds enough of it for a full retention window.
+        
+        Returns:
+            Resampled market data or None if no lower timeframe has enough coverage
+        """
+        tz, anchor_minutes = adapter.session_alignment
+        if tz is None:
+            # Stored candles are UTC; the exchange-local session clock is unknown
+            return None
+        
+        target_seconds = timeframe_to_seconds(timeframe)
+        if not target_seconds:
+            return None
+        target_ms = target_seconds * 1000
+        
+        # Highest lower timeframe first (fewest rows to read)
+        sources = sorted(
+            (tf for tf in adapter.native_timeframes if can_resample(tf, timeframe, anchor_minutes)),
+            key=timeframe_to_seconds,
+            reverse=True,
+        )
+        for source_timeframe in sources:
+            entry = self._read_cache_entry(self._get_cache_key(instrument, source_timeframe))
+            if not entry:
+                continue
+            cached, age, entry_ttl = entry
+            if age >= min(entry_ttl, cache_ttl) or len(cached.frame) == 0:
+                continue
+            
+            stored = self._read_stored_candles(
+                instrument_id, instrument, source_timeframe,
+                exchange=cached.exchange,
+                start_ms=int(cached.frame.timestamp_ms[-1]) - (DATA_RETENTION_CANDLES + 1) * target_ms,
+            )
+            if stored is None:
+                continue
+            
+            # Drop the first bucket, it may be cut by the start of the window
+            derived = resample(stored.frame, timeframe, tz, anchor_minutes)[1:]
+            if len(derived) < DATA_RETENTION_CANDLES:
+                continue
+            
+            logger.info(
+                f"market_data_resampled_from_store: instrument={instrument}, timeframe={timeframe}, "
+                f"source={source_timeframe}, candles={len(derived)}"
+            )
+            return MarketData(
+                instrument=instrument,
+                timeframe=timeframe,
+                exchange=cached.exchange,
+                frame=derived.tail(DATA_RETENTION_CANDLES),
+                fetched_at=cached.fetched_at,
+            )
+        return None
+    
+    def _resolve_adapter(self, instrument: str) -> Tuple[DataAdapter, Optional[int]]:
+        """Pick the adapter for an instrument (routed over the sources of its asset class).
+        
+        Returns:
+            Tuple of (adapter, instrument ID or None if the instrument isn't in the DB)
+        """
+        # Check database to determine adapter based on exchange field
+        db = SessionLocal()
+        try:
+            from app.models.instrument import Instrument
+            db_instrument = db.query(Instrument).filter(Instrument.symbol == instrument).first()
+            instrument_id = db_instrument.id if db_instrument else None
+            route = self._route_for(instrument, db_instrument.exchange if db_instrument else None)
+        finally:
+            db.close()
+        return self._routed[route], instrument_id
+    
+    @staticmethod
+    def _route_for(instrument: str, exchange: Optional[str]) -> str:
+        """Asset class route of an instrument (exchange from the instruments table, if known)."""
+        if exchange == "MOEX":
+            # MOEX instrument - Tinkoff (needs the API token from Settings), MOEX ISS as alternate
+            return ROUTE_MOEX
+        if '/' in instrument.upper() or instrument.upper().endswith('USDT'):
+            # Crypto - CCXT (Binance), another CCXT exchange as alternate
+            return ROUTE_CRYPTO
+        # Equity (default to yfinance)
+        return ROUTE_EQUITY
+    
+    def prefetch(
+        self,
+        requests: List[Tuple[str, str]],
+        cache_ttl: int = 300,
+        max_workers: int = PREFETCH_CONCURRENCY_PER_PROVIDER,
+    ) -> Dict[Tuple[str, str], Optional[str]]:
+        """Warm the data cache for many (instrument, timeframe) series before their runs start.
+        
+        Series are grouped by provider route and each group is fetched
+        concurrently. Crypto series served by the primary CCXT exchange go out as
+        one async sweep (AsyncCCXTAdapter.fetch_many); everything else, and
+        series the sweep failed on, goes through fetch_market_data (candle
+        store, incremental refresh, failover). Blocking: call from a worker
+        thread, not from an event loop.
+        
+        Args:
+            requests: (instrument, timeframe) pairs
+            cache_ttl: Cache TTL in seconds (what fetch_market_data will be called with)
+            max_workers: Concurrent fetches per provider route
+        
+        Returns:
+            Error message per requested pair (None if the data is cached)
+        """
+        started = time.monotonic()
+        pending = []
+        results: Dict[Tuple[str, str], Optional[str]] = {}
+        for instrument, timeframe in dict.fromkeys(requests):
+            if get_candle_stream_hub().latest(instrument, timeframe) is not None or self._get_cached_data(
+                self._get_cache_key(instrument, timeframe), cache_ttl
+            ):
+                results[(instrument, timeframe)] = None
+            else:
+                pending.append((instrument, timeframe))
+        cached = len(results)
+        
+        db = SessionLocal()
+        try:
+            rows = db.query(Instrument.symbol, Instrument.id, Instrument.exchange).filter(
+                Instrument.symbol.in_({instrument for instrument, _ in pending})
+            ).all() if pending else []
+        finally:
+            db.close()
+        known = {symbol: (instrument_id, exchange) for symbol, instrument_id, exchange in rows}
+        
+        groups: Dict[str, List[Tuple[str, str]]] = {}
+        for instrument, timeframe in pending:
+            route = self._route_for(instrument, known.get(instrument, (None, None))[1])
+            groups.setdefault(route, []).append((instrument, timeframe))
+        
+        # Crypto: one concurrent sweep on the primary exchange (shared rate limiter)
+        swept = 0
+        crypto = groups.get(ROUTE_CRYPTO, [])
+        if crypto and get_provider_router().order(ROUTE_CRYPTO, self.sources)[:1] == ["ccxt"]:
+            store_sweep = self._routed[ROUTE_CRYPTO].store_source == "ccxt"
+            bulk = [(instrument, timeframe) for instrument, timeframe in crypto
+                    if timeframe.upper() not in self.ccxt_adapter.derived_timeframes]
+            
+            async def sweep():
+                async with AsyncCCXTAdapter(self.ccxt_adapter.exchange_name) as adapter:
+                    return await adapter.fetch_many(bulk, limit=DATA_RETENTION_CANDLES, return_exceptions=True)
+            
+            fetched = asyncio.run(sweep()) if bulk else []
+            for (instrument, timeframe), data in zip(bulk, fetched):
+                if isinstance(data, Exception):
+                    continue
+                data.source = "ccxt"
+                instrument_id = known.get(instrument, (None, None))[0]
+                try:
+                    if instrument_id is not None and DATA_CANDLE_STORE and store_sweep:
+                        self._store_candles(instrument_id, timeframe, data.frame)
+                    self._cache_data(self._get_cache_key(instrument, timeframe), data, cache_ttl)
+                except Exception as e:
+                    logger.warning(f"prefetch_cache_write_failed: instrument={instrument}, timeframe={timeframe}, error={e}")
+                    continue
+                results[(instrument, timeframe)] = None
+                swept += 1
+            # Leftovers (failed in the sweep, derived timeframes) go the regular way
+            groups[ROUTE_CRYPTO] = [pair for pair in crypto if pair not in results]
+        
+        def fetch_one(instrument: str, timeframe: str) -> Optional[str]:
+            try:
+                self.fetch_market_data(instrument, timeframe, use_cache=True, cache_ttl=cache_ttl)
+                return None
+            except Exception as e:
+                return str(e)
+        
+        executors = [
+            (ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix=f"prefetch-{route}"), pairs)
+            for route, pairs in groups.items() if pairs
+        ]
+        try:
+            futures = {
+                executor.submit(fetch_one, instrument, timeframe): (instrument, timeframe)
+                for executor, pairs in executors
+                for instrument, timeframe in pairs
+            }
+            for future in as_completed(futures):
+                results[futures[future]] = future.result()
+        finally:
+            for executor, _ in executors:
+                executor.shutdown(wait=False)
+        
+        failed = sum(1 for error in results.values() if error)
+        logger.info(
+            f"market_data_prefetch: series={len(results)}, cached={cached}, swept={swept}, failed={failed}, "
+            f"routes={','.join(sorted(groups))}, duration_ms={int((time.monotonic() - started) * 1000)}"
+        )
+        return {pair: results.get(pair) for pair in requests}
+    
+    def fetch_history(
+        self,
+        instrument: str,
+        timeframe: str,
+        start: datetime,
+        end: Optional[datetime] = None,
+    ) -> MarketData:
+        """Fetch a long candle range (thousands of bars) for backtests and long lookbacks.
+        
+        Stored candles cover what they can; only the missing head/tail of the range
+        is paged from the provider (concurrently) and streamed into the candle store
+        page by page. Not cached in data_cache (ranges are open-ended).
+        
+        Args:
+            instrument: Symbol
+            timeframe: Timeframe
+            start: Range start (inclusive)
+            end: Range end (exclusive, default now)
+        
+        Returns:
+            Market data for [start, end), oldest first
+        """
+        end = end or datetime.now(timezone.utc)
+        adapter, instrument_id = self._resolve_adapter(instrument)
+        
+        source_timeframe = adapter.derived_timeframes.get(timeframe.upper())
+        if source_timeframe:
+            source = self.fetch_history(instrument, source_timeframe, start, end)
+            tz, anchor_minutes = adapter.session_alignment
+            return MarketData(
+                instrument=instrument,
+                timeframe=timeframe,
+                exchange=source.exchange,
+                frame=resample(source.frame, timeframe, tz if tz is not None else source.frame.tz, anchor_minutes),
+                fetched_at=source.fetched_at,
+            )
+        
+        if instrument_id is None or not DATA_CANDLE_STORE:
+            return adapter.fetch_range(instrument, timeframe, start, end)
+        
+        start_ms = int(start.timestamp() * 1000)
+        end_ms = int(end.timestamp() * 1000)
+        bar_ms = (timeframe_to_seconds(timeframe) or 0) * 1000
+        stored = self._read_stored_candles(instrument_id, instrument, timeframe, exchange=adapter.store_exchange, start_ms=start_ms, end_ms=end_ms)
+        
+        # Missing parts of the range: everything, or the head before / tail after the stored candles
+        if stored is None:
+            missing = [(start_ms, end_ms)]
+        else:
+            first_ms = int(stored.frame.timestamp_ms[0])
+            last_ms = int(stored.frame.timestamp_ms[-1])
+            missing = []
+            if first_ms - bar_ms >= start_ms:
+                missing.append((start_ms, first_ms))
+            if last_ms + bar_ms < end_ms:
+                # Re-fetch the last stored bar, it may have been stored unfinished
+                missing.append((last_ms, end_ms))
+        
+        def store_page(page_timeframe: str, page: CandleFrame):
+            self._store_candles(instrument_id, page_timeframe, page)
+        
+        frames = [stored.frame] if stored is not None else []
+        exchange = stored.exchange if stored is not None else None
+        for window_start, window_end in missing:
+            fetched = adapter.fetch_range(
+                instrument, timeframe,
+                datetime.fromtimestamp(window_start / 1000, tz=timezone.utc),
+                datetime.fromtimestamp(window_end / 1000, tz=timezone.utc),
+                on_page=store_page,
+            )
+            frames.append(fetched.frame)
+            exchange = fetched.exchange
+        
+        frame = CandleFrame.concat(frames)
+        logger.info(
+            f"market_data_history: instrument={instrument}, timeframe={timeframe}, candles={len(frame)}, "
+            f"stored={len(stored.frame) if stored is not None else 0}, fetched_windows={len(missing)}"
+        )
+        return MarketData(
+            instrument=instrument,
+            timeframe=timeframe,
+            exchange=exchange or adapter.exchange_name,
+            frame=frame,
+            fetched_at=datetime.now(timezone.utc),
+        )
+    
+    def fetch_lookback(self, instrument: str, timeframe: str, candles: int) -> MarketData:
+        """Fetch at least the last `candles` candles via fetch_history.
+        
+        The time span is widened when sessions are closed part of the time
+        (equities, MOEX), up to three attempts.
+        
+        Args:
+            instrument: Symbol
+            timeframe: Timeframe
+            candles: Number of most recent candles needed
+        
+        Returns:
+            Market data with up to `candles` most recent candles
+        """
+        bar_seconds = timeframe_to_seconds(timeframe)
+        if not bar_seconds:
+            raise ValueError(f"Unknown timeframe: {timeframe}")
+        span = timedelta(seconds=bar_seconds * (candles + 1))
+        history = None
+        for _ in range(3):
+            history = self.fetch_history(instrument, timeframe, start=datetime.now(timezone.utc) - span)
+            if len(history.frame) >= candles:
+                break
+            span *= 3
+        history.frame = history.frame.tail(candles)
+        return history
     
     def fetch_market_data(
         self,
@@ -608,6 +1615,11 @@ class DataService:
             use_cache: Whether to use cache
             cache_ttl: Cache TTL in seconds (default 5 minutes)
         """
+        # Live candle streams keep the latest bars of subscribed series in memory
+        streamed = get_candle_stream_hub().latest(instrument, timeframe)
+        if streamed is not None:
+            return streamed
+        
         cache_key = self._get_cache_key(instrument, timeframe)
         
         # Try cache first
@@ -616,28 +1628,98 @@ class DataService:
             if cached:
                 return cached
         
-        # Check database to determine adapter based on exchange field
-        db = SessionLocal()
-        try:
-            from app.models.instrument import Instrument
-            db_instrument = db.query(Instrument).filter(Instrument.symbol == instrument).first()
+        # Concurrent misses for the same key share one provider fetch (in-process),
+        # the DB lock serializes fetches across API/worker processes
+        return _market_data_flight.do(
+            (cache_key, use_cache),
+            lambda: self._fetch_coalesced(instrument, timeframe, cache_key, use_cache, cache_ttl),
+        )
+    
+    def _fetch_coalesced(
+        self,
+        instrument: str,
+        timeframe: str,
+        cache_key: str,
+        use_cache: bool,
+        cache_ttl: int,
+    ) -> MarketData:
+        """Fetch market data while holding the cross-process lock for the cache key."""
+        with db_advisory_lock(f"market_data:{cache_key}", timeout=DATA_FETCH_LOCK_TIMEOUT_SECONDS):
+            # Re-check: another process may have refreshed the entry while we waited.
+            # An expired entry is kept as the base for an incremental refresh.
+            stale: Optional[MarketData] = None
+            if use_cache:
+                entry = self._read_cache_entry(cache_key)
+                if entry:
+                    cached, age, entry_ttl = entry
+                    if age < min(entry_ttl, cache_ttl):
+                        return cached
+                    stale = cached
             
-            if db_instrument and db_instrument.exchange == "MOEX":
-                # MOEX instrument - use Tinkoff adapter
-                if not hasattr(self, 'tinkoff_adapter') or self.tinkoff_adapter is None:
-                    raise ValueError("Tinkoff adapter not initialized. Please configure Tinkoff API token in Settings → Tinkoff Invest API Configuration.")
-                adapter = self.tinkoff_adapter
-            elif '/' in instrument.upper() or instrument.upper().endswith('USDT'):
-                # Crypto
-                adapter = self.ccxt_adapter
-            else:
-                # Equity (default to yfinance)
-                adapter = self.yfinance_adapter
-        finally:
-            db.close()
+            return self._fetch_from_provider(instrument, timeframe, cache_key, stale, use_cache, cache_ttl)
+    
+    def _fetch_from_provider(
+        self,
+        instrument: str,
+        timeframe: str,
+        cache_key: str,
+        stale: Optional[MarketData],
+        use_cache: bool,
+        cache_ttl: int,
+    ) -> MarketData:
+        """Fetch market data from the provider (or derive it), write it to the store and cache.
+        
+        Args:
+            instrument: Symbol
+            timeframe: Timeframe
+            cache_key: DataCache key for (instrument, timeframe)
+            stale: Expired cached data for an incremental refresh (None if missing)
+            use_cache: Whether to use cache
+            cache_ttl: Cache TTL in seconds
+        """
+        adapter, instrument_id = self._resolve_adapter(instrument)
+        
+        # Timeframes the provider lacks are resampled from a lower native one;
+        # native ones are served from stored lower-timeframe candles when coverage allows
+        data = None
+        derived_from = adapter.derived_timeframes.get(timeframe.upper())
+        if derived_from:
+            data = self._fetch_resampled(adapter, instrument, instrument_id, timeframe, derived_from, use_cache, cache_ttl)
+        elif use_cache and instrument_id is not None and DATA_CANDLE_STORE and DATA_RESAMPLE_FROM_STORE:
+            data = self._resample_from_store(adapter, instrument, instrument_id, timeframe, cache_ttl)
+        if data is not None:
+            if use_cache:
+                self._cache_data(cache_key, data, cache_ttl)
+            return data
+        
+        # Prefer the candle store as the base (survives cache eviction, shared by all keys)
+        base = stale
+        write_from_ms = None
+        if use_cache and instrument_id is not None and DATA_CANDLE_STORE:
+            # Stored candles are the store source's: an incremental fetch from
+            # another source (failover) falls back to a full fetch
+            stored = self._read_stored_candles(
+                instrument_id, instrument, timeframe,
+                exchange=adapter.store_exchange, source=adapter.store_source,
+            )
+            if stored is not None:
+                base = stored
+                # Incremental fetch re-requests the last bar before the stored tail
+                write_from_ms = int(stored.frame.timestamp_ms[-1]) - (timeframe_to_seconds(timeframe) or 0) * 1000
+        
+        # Fetch only candles after the cached tail when possible, otherwise the full window
+        if base is not None and DATA_INCREMENTAL_FETCH:
+            data = self._fetch_incremental(adapter, base)
+        if data is None:
+            data = adapter.fetch_ohlcv(instrument, timeframe, limit=DATA_RETENTION_CANDLES)
         
-        # Fetch data
-        data = adapter.fetch_ohlcv(instrument, timeframe, limit=500)
+        # Write through to the candle store (only re-fetched/new candles when the base was the store,
+        # and only the store source's candles)
+        if instrument_id is not None and DATA_CANDLE_STORE and adapter.is_store_data(data):
+            frame = data.frame
+            if write_from_ms is not None:
+                frame = frame[int(np.searchsorted(frame.timestamp_ms, write_from_ms)):]
+            self._store_candles(instrument_id, timeframe, frame)
         
         # Cache it
         if use_cache:
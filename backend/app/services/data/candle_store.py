@@ -0,0 +1,131 @@
+"""
+Persistent candle store (candles table).
+
+One row per (instrument_id, timeframe, ts). Writes are bulk upserts, so
+re-writing an overlapping window (e.g. the still-forming last candle) is
+idempotent. Reads return CandleFrame arrays sorted oldest first.
+"""
+from typing import Optional
+import numpy as np
+from sqlalchemy import select, func
+from sqlalchemy.orm import Session
+
+from app.models.candle import Candle
+from app.services.data.normalized import CandleFrame
+
+# Rows per INSERT statement
+UPSERT_BATCH_SIZE = 1000
+
+_PRICE_COLUMNS = ("open", "high", "low", "close", "volume")
+
+
+def _upsert_statement(db: Session, rows: list):
+    """Build a dialect-specific bulk upsert (MySQL in production, SQLite for local checks)."""
+    dialect = db.get_bind().dialect.name
+    if dialect == "mysql":
+        from sqlalchemy.dialects.mysql import insert
+        stmt = insert(Candle).values(rows)
+        return stmt.on_duplicate_key_update({name: stmt.inserted[name] for name in _PRICE_COLUMNS})
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+        stmt = insert(Candle).values(rows)
+        return stmt.on_conflict_do_update(
+            index_elements=["instrument_id", "timeframe", "ts"],
+            set_={name: stmt.excluded[name] for name in _PRICE_COLUMNS},
+        )
+    raise ValueError(f"Candle store upsert not supported for database dialect: {dialect}")
+
+
+def upsert_candles(db: Session, instrument_id: int, timeframe: str, frame: CandleFrame) -> int:
+    """Insert or update candles. Does not commit.
+
+    Args:
+        db: Database session
+        instrument_id: Instrument ID
+        timeframe: Timeframe (M1, H1, D1, ...)
+        frame: Candles to store
+
+    Returns:
+        Number of candles written
+    """
+    n = len(frame)
+    if n == 0:
+        return 0
+
+    timestamps = frame.timestamp_ms.tolist()
+    columns = [getattr(frame, name).tolist() for name in _PRICE_COLUMNS]
+    for start in range(0, n, UPSERT_BATCH_SIZE):
+        end = min(start + UPSERT_BATCH_SIZE, n)
+        rows = [
+            {
+                "instrument_id": instrument_id,
+                "timeframe": timeframe,
+                "ts": timestamps[i],
+                "open": columns[0][i],
+                "high": columns[1][i],
+                "low": columns[2][i],
+                "close": columns[3][i],
+                "volume": columns[4][i],
+            }
+            for i in range(start, end)
+        ]
+        db.execute(_upsert_statement(db, rows))
+    return n
+
+
+def read_range(
+    db: Session,
+    instrument_id: int,
+    timeframe: str,
+    start_ms: Optional[int] = None,
+    end_ms: Optional[int] = None,
+    limit: Optional[int] = None,
+) -> CandleFrame:
+    """Read candles in [start_ms, end_ms).
+
+    Args:
+        db: Database session
+        instrument_id: Instrument ID
+        timeframe: Timeframe (M1, H1, D1, ...)
+        start_ms: Inclusive lower bound, epoch milliseconds (None = from the beginning)
+        end_ms: Exclusive upper bound, epoch milliseconds (None = up to the latest candle)
+        limit: Return only the last N candles of the range
+
+    Returns:
+        CandleFrame sorted oldest first (UTC)
+    """
+    query = select(Candle.ts, Candle.open, Candle.high, Candle.low, Candle.close, Candle.volume).where(
+        Candle.instrument_id == instrument_id,
+        Candle.timeframe == timeframe,
+    )
+    if start_ms is not None:
+        query = query.where(Candle.ts >= start_ms)
+    if end_ms is not None:
+        query = query.where(Candle.ts < end_ms)
+
+    if limit is not None:
+        # Newest first to take the last N, the frame re-sorts them
+        query = query.order_by(Candle.ts.desc()).limit(limit)
+    else:
+        query = query.order_by(Candle.ts)
+
+    rows = db.execute(query).all()
+    if not rows:
+        return CandleFrame.empty()
+
+    data = np.asarray(rows, dtype=np.float64)
+    return CandleFrame(
+        data[:, 0].astype(np.int64),
+        data[:, 1], data[:, 2], data[:, 3], data[:, 4], data[:, 5],
+        assume_sorted=limit is None,
+    )
+
+
+def last_timestamp(db: Session, instrument_id: int, timeframe: str) -> Optional[int]:
+    """Get open time (epoch ms) of the latest stored candle, or None if nothing is stored."""
+    return db.execute(
+        select(func.max(Candle.ts)).where(
+            Candle.instrument_id == instrument_id,
+            Candle.timeframe == timeframe,
+        )
+    ).scalar()
@@ -0,0 +1,159 @@
+"""
+Compact columnar binary encoding for cached market data.
+
+Layout (little-endian):
+    byte 0      format version (CANDLE_CODEC_VERSION)
+    byte 1      flags (FLAG_ZLIB: body is zlib-compressed)
+    body:
+        uint32      header length
+        bytes       header JSON: instrument, timeframe, exchange, source, fetched_at_ms, tz
+        uint32      candle count N
+        int64[N]    timestamps (epoch milliseconds, UTC)
+        float64[N]  open, high, low, close, volume (one array each)
+"""
+from datetime import datetime, timezone, tzinfo
+from typing import Dict, Any, Tuple, Optional
+from zoneinfo import ZoneInfo
+import json
+import struct
+import zlib
+import numpy as np
+
+from app.services.data.normalized import MarketData, CandleFrame
+
+CANDLE_CODEC_VERSION = 1
+FLAG_ZLIB = 0x01
+
+_PRICE_COLUMNS = ("open", "high", "low", "close", "volume")
+_UINT32 = struct.Struct("<I")
+
+
+def _tz_name(tz: Optional[tzinfo]) -> Optional[str]:
+    """Get IANA name of a candle timezone (None for UTC/unknown)."""
+    name = getattr(tz, "key", None) or getattr(tz, "zone", None)
+    return name if name and name != "UTC" else None
+
+
+def _tz_from_name(name: Optional[str]) -> tzinfo:
+    if not name:
+        return timezone.utc
+    try:
+        return ZoneInfo(name)
+    except Exception:
+        return timezone.utc
+
+
+def encode_market_data(data: MarketData, compress: bool = True) -> bytes:
+    """Encode market data into the columnar binary format.
+
+    Args:
+        data: Market data to encode
+        compress: Whether to zlib-compress the body
+
+    Returns:
+        Encoded bytes (version byte + flags byte + body)
+    """
+    frame = data.frame
+    n = len(frame)
+
+    header = json.dumps({
+        "instrument": data.instrument,
+        "timeframe": data.timeframe,
+        "exchange": data.exchange,
+        "source": data.source,
+        "fetched_at_ms": int(data.fetched_at.timestamp() * 1000),
+        # Exchange-local timezone (e.g. yfinance equities) so prompts show the same times
+        "tz": _tz_name(frame.tz),
+    }).encode("utf-8")
+
+    body = b"".join([
+        _UINT32.pack(len(header)),
+        header,
+        _UINT32.pack(n),
+        frame.timestamp_ms.astype("<i8", copy=False).tobytes(),
+        *(getattr(frame, name).astype("<f8", copy=False).tobytes() for name in _PRICE_COLUMNS),
+    ])
+
+    flags = 0
+    if compress:
+        body = zlib.compress(body, 1)
+        flags |= FLAG_ZLIB
+
+    return bytes([CANDLE_CODEC_VERSION, flags]) + body
+
+
+def decode_columns(payload: bytes) -> Tuple[Dict[str, Any], Dict[str, np.ndarray]]:
+    """Decode the binary format into header metadata and column arrays.
+
+    Arrays are read-only views over the decoded buffer (no per-candle parsing).
+
+    Returns:
+        Tuple of (header dict, dict of arrays: timestamp_ms, open, high, low, close, volume)
+
+    Raises:
+        ValueError: If the payload is malformed or uses an unsupported version
+    """
+    if len(payload) < 2:
+        raise ValueError("Candle payload too short")
+
+    version, flags = payload[0], payload[1]
+    if version != CANDLE_CODEC_VERSION:
+        raise ValueError(f"Unsupported candle payload version: {version}")
+
+    body = payload[2:]
+    try:
+        if flags & FLAG_ZLIB:
+            body = zlib.decompress(body)
+
+        offset = 0
+        (header_len,) = _UINT32.unpack_from(body, offset)
+        offset += _UINT32.size
+        header = json.loads(body[offset:offset + header_len].decode("utf-8"))
+        offset += header_len
+        (n,) = _UINT32.unpack_from(body, offset)
+        offset += _UINT32.size
+    except (zlib.error, struct.error) as e:
+        # Truncated or corrupt payload
+        raise ValueError(f"Corrupt candle payload: {e}")
+    if not isinstance(header, dict):
+        raise ValueError("Corrupt candle payload: header is not an object")
+
+    expected = offset + n * 8 * (1 + len(_PRICE_COLUMNS))
+    if len(body) != expected:
+        raise ValueError(f"Corrupt candle payload: expected {expected} bytes, got {len(body)}")
+
+    columns = {"timestamp_ms": np.frombuffer(body, dtype="<i8", count=n, offset=offset)}
+    offset += n * 8
+    for name in _PRICE_COLUMNS:
+        columns[name] = np.frombuffer(body, dtype="<f8", count=n, offset=offset)
+        offset += n * 8
+
+    return header, columns
+
+
+def decode_market_data(payload: bytes) -> MarketData:
+    """Decode the binary format into MarketData backed by the decoded arrays (no per-candle work).
+
+    Raises:
+        ValueError: If the payload is malformed or uses an unsupported version
+    """
+    header, columns = decode_columns(payload)
+    missing = [key for key in ("instrument", "timeframe", "fetched_at_ms") if key not in header]
+    if missing:
+        raise ValueError(f"Corrupt candle payload: header misses {', '.join(missing)}")
+
+    frame = CandleFrame(
+        columns["timestamp_ms"],
+        *(columns[name] for name in _PRICE_COLUMNS),
+        tz=_tz_from_name(header.get("tz")),
+        assume_sorted=True,
+    )
+
+    return MarketData.model_construct(
+        instrument=header["instrument"],
+        timeframe=header["timeframe"],
+        exchange=header.get("exchange"),
+        source=header.get("source"),
+        frame=frame,
+        fetched_at=datetime.fromtimestamp(header["fetched_at_ms"] / 1000, tz=timezone.utc),
+    )
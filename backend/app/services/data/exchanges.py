@@ -0,0 +1,253 @@
+"""
+Process-wide registry of CCXT exchange clients.
+
+Creating a ccxt exchange is cheap, but a fresh instance starts with no markets
+(the first call downloads the full market list), a new HTTP session and its own
+rate-limit bookkeeping. The registry keeps one client per (exchange id, market
+type) for the lifetime of the process:
+- markets are loaded once and reloaded after CCXT_MARKETS_REFRESH_SECONDS
+- all clients of an exchange share one thread-safe rate limiter
+- the requests session (keep-alive connection pool) is reused
+
+Async clients (ccxt.async_support) are bound to an event loop, so they are
+created by their owner via create_async_client(); they still share the rate
+limiter and the markets loaded by the sync client.
+"""
+from typing import Dict, Optional, Tuple, Any
+import asyncio
+import threading
+import time
+import logging
+
+from app.core.config import CCXT_MARKETS_REFRESH_SECONDS, CCXT_HTTP_POOL_SIZE
+
+logger = logging.getLogger(__name__)
+
+
+class ExchangeRateLimiter:
+    """Shared request pacing for one exchange. Thread-safe.
+
+    Uses the exchange's own rateLimit (milliseconds between weight-1 requests)
+    and ccxt request costs, but reserves slots under a lock so concurrent
+    threads (and async tasks) can't send in the same slot.
+    """
+
+    def __init__(self, rate_limit_ms: float):
+        """Initialize limiter.
+
+        Args:
+            rate_limit_ms: Minimum milliseconds between requests of cost 1
+        """
+        self.rate_limit_ms = rate_limit_ms
+        self._next_at = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self, cost: Optional[float] = None) -> float:
+        """Reserve the next request slot.
+
+        Args:
+            cost: Request weight (ccxt cost, default 1)
+
+        Returns:
+            Seconds to wait before sending the request
+        """
+        cost = 1 if cost is None else cost
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_at)
+            self._next_at = start + self.rate_limit_ms * cost / 1000.0
+            return start - now
+
+    def throttle(self, cost: Optional[float] = None):
+        """Block until the request may be sent (drop-in for Exchange.throttle)."""
+        delay = self.reserve(cost)
+        if delay > 0:
+            time.sleep(delay)
+
+    async def athrottle(self, cost: Optional[float] = None):
+        """Async variant for ccxt.async_support clients (same slot timeline as throttle)."""
+        delay = self.reserve(cost)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+class _ExchangeEntry:
+    """Registry slot: client plus market loading state."""
+    __slots__ = ("exchange", "markets_loaded_at", "lock")
+
+    def __init__(self, exchange):
+        self.exchange = exchange
+        self.markets_loaded_at = 0.0
+        self.lock = threading.Lock()
+
+
+class ExchangeRegistry:
+    """Shared CCXT clients keyed by (exchange id, market type). Thread-safe."""
+
+    def __init__(
+        self,
+        markets_refresh_seconds: int = CCXT_MARKETS_REFRESH_SECONDS,
+        http_pool_size: int = CCXT_HTTP_POOL_SIZE,
+    ):
+        """Initialize registry.
+
+        Args:
+            markets_refresh_seconds: Reload markets when older than this
+            http_pool_size: Keep-alive connections per exchange client
+        """
+        self.markets_refresh_seconds = markets_refresh_seconds
+        self.http_pool_size = http_pool_size
+        self._entries: Dict[Tuple[str, str], _ExchangeEntry] = {}
+        self._limiters: Dict[str, ExchangeRateLimiter] = {}
+        self._lock = threading.Lock()
+
+    def get(self, exchange_id: str = "binance", market_type: str = "spot", load_markets: bool = True):
+        """Get the shared client for an exchange.
+
+        Args:
+            exchange_id: CCXT exchange id (binance, bybit, ...)
+            market_type: ccxt defaultType ('spot', 'future', ...)
+            load_markets: Make sure markets are loaded (and not older than the refresh interval)
+
+        Returns:
+            ccxt Exchange instance (shared, don't mutate its options)
+
+        Raises:
+            ValueError: If the exchange id is unknown to ccxt
+        """
+        entry = self._entry(exchange_id, market_type)
+        if load_markets:
+            self._ensure_markets(entry, exchange_id, force=False)
+        return entry.exchange
+
+    def markets(self, exchange_id: str = "binance", market_type: str = "spot", reload: bool = False) -> Dict[str, Any]:
+        """Get the markets of an exchange (loaded once, refreshed by interval).
+
+        Args:
+            exchange_id: CCXT exchange id
+            market_type: ccxt defaultType
+            reload: Reload now regardless of age
+
+        Returns:
+            ccxt markets dict (symbol -> market)
+        """
+        entry = self._entry(exchange_id, market_type)
+        self._ensure_markets(entry, exchange_id, force=reload)
+        return entry.exchange.markets
+
+    def limiter(self, exchange_id: str) -> ExchangeRateLimiter:
+        """Get the rate limiter shared by all clients of an exchange."""
+        limiter = self._limiters.get(exchange_id)
+        if limiter is None:
+            # Created together with the exchange's first client
+            self._entry(exchange_id, "spot")
+            limiter = self._limiters[exchange_id]
+        return limiter
+
+    async def create_async_client(self, exchange_id: str = "binance", market_type: str = "spot"):
+        """Create a ccxt.async_support client for the running event loop.
+
+        The client paces requests through the exchange's shared limiter and gets
+        markets from the registry (no separate load_markets download). The caller
+        owns it and must `await client.close()`.
+
+        Args:
+            exchange_id: CCXT exchange id
+            market_type: ccxt defaultType
+
+        Raises:
+            ValueError: If the exchange id is unknown to ccxt
+        """
+        import ccxt.async_support as ccxt_async
+
+        exchange_class = getattr(ccxt_async, exchange_id, None)
+        if exchange_class is None or not isinstance(exchange_class, type):
+            raise ValueError(f"Unknown exchange: {exchange_id}")
+        # Markets come from the shared sync client (loaded once per refresh interval)
+        markets = await asyncio.to_thread(self.markets, exchange_id, market_type)
+        client = exchange_class({
+            'enableRateLimit': True,
+            'options': {
+                'defaultType': market_type,
+            }
+        })
+        client.throttle = self.limiter(exchange_id).athrottle
+        client.set_markets(markets)
+        return client
+
+    def clear(self):
+        """Drop all clients (next get() creates new ones)."""
+        with self._lock:
+            self._entries.clear()
+
+    def _entry(self, exchange_id: str, market_type: str) -> _ExchangeEntry:
+        key = (exchange_id, market_type)
+        entry = self._entries.get(key)
+        if entry is None:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is None:
+                    entry = _ExchangeEntry(self._create(exchange_id, market_type))
+                    self._entries[key] = entry
+        return entry
+
+    @staticmethod
+    def _exchange_class(exchange_id: str):
+        import ccxt
+
+        exchange_class = getattr(ccxt, exchange_id, None)
+        if exchange_class is None or not isinstance(exchange_class, type):
+            raise ValueError(f"Unknown exchange: {exchange_id}")
+        return exchange_class
+
+    def _create(self, exchange_id: str, market_type: str):
+        """Create a client (caller holds the registry lock)."""
+        from requests.adapters import HTTPAdapter
+
+        exchange = self._exchange_class(exchange_id)({
+            'enableRateLimit': True,
+            'options': {
+                'defaultType': market_type,
+            }
+        })
+        limiter = self._limiters.get(exchange_id)
+        if limiter is None:
+            limiter = ExchangeRateLimiter(exchange.rateLimit)
+            self._limiters[exchange_id] = limiter
+        # Pace through the shared limiter instead of per-instance bookkeeping
+        exchange.throttle = limiter.throttle
+        # Keep-alive pool sized for concurrent runs using this client
+        http_adapter = HTTPAdapter(pool_connections=self.http_pool_size, pool_maxsize=self.http_pool_size)
+        exchange.session.mount("https://", http_adapter)
+        exchange.session.mount("http://", http_adapter)
+        logger.info(f"ccxt_exchange_created: exchange={exchange_id}, type={market_type}")
+        return exchange
+
+    def _ensure_markets(self, entry: _ExchangeEntry, exchange_id: str, force: bool):
+        if not force and entry.exchange.markets and time.time() - entry.markets_loaded_at < self.markets_refresh_seconds:
+            return
+        with entry.lock:
+            # Another thread may have loaded them while we waited
+            if not force and entry.exchange.markets and time.time() - entry.markets_loaded_at < self.markets_refresh_seconds:
+                return
+            started = time.time()
+            entry.exchange.load_markets(reload=True)
+            entry.markets_loaded_at = time.time()
+            logger.info(
+                f"ccxt_markets_loaded: exchange={exchange_id}, markets={len(entry.exchange.markets or {})}, "
+                f"duration_ms={int((entry.markets_loaded_at - started) * 1000)}"
+            )
+
+
+_exchange_registry: Optional[ExchangeRegistry] = None
+_exchange_registry_lock = threading.Lock()
+
+
+def get_exchange_registry() -> ExchangeRegistry:
+    """Get the process-wide CCXT exchange registry."""
+    global _exchange_registry
+    if _exchange_registry is None:
+        with _exchange_registry_lock:
+            if _exchange_registry is None:
+                _exchange_registry = ExchangeRegistry()
+    return _exchange_registry
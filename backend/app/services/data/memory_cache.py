@@ -0,0 +1,125 @@
+"""
+In-process L1 cache of decoded market data.
+
+Sits in front of the DB cache (data_cache table): reads served here skip the
+DB round trip and payload decoding. Bounded by a memory budget (bytes of
+candle arrays), least recently used entries are evicted first.
+"""
+from collections import OrderedDict
+from typing import Optional, Dict, Any, Tuple
+import threading
+import time
+
+from app.core.config import DATA_MEMORY_CACHE_MAX_BYTES
+from app.services.data.normalized import MarketData
+
+# Approximate per-entry overhead (MarketData object, key, bookkeeping)
+ENTRY_OVERHEAD_BYTES = 1024
+
+
+class MarketDataMemoryCache:
+    """Memory-budgeted, TTL-aware LRU of MarketData. Thread-safe."""
+
+    def __init__(self, max_bytes: int = DATA_MEMORY_CACHE_MAX_BYTES):
+        """Initialize cache.
+
+        Args:
+            max_bytes: Memory budget for cached entries (0 disables the cache)
+        """
+        self.max_bytes = max_bytes
+        # key -> (data, stored_at wall time, ttl seconds, size bytes)
+        self._entries: "OrderedDict[str, Tuple[MarketData, float, int, int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def get(self, key: str) -> Optional[Tuple[MarketData, float, int]]:
+        """Get an unexpired entry.
+
+        Returns:
+            Tuple of (data, age in seconds, ttl in seconds) or None if missing/expired
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry:
+                data, stored_at, ttl, size = entry
+                age = time.time() - stored_at
+                if age < ttl:
+                    self._entries.move_to_end(key)
+                    self._hits += 1
+                    return data, age, ttl
+                # Expired: the DB tier may hold a newer copy written by another process
+                self._remove(key)
+            self._misses += 1
+            return None
+
+    def set(self, key: str, data: MarketData, ttl_seconds: int, age: float = 0.0):
+        """Store an entry (write-through from the DB tier).
+
+        Args:
+            key: Cache key
+            data: Market data
+            ttl_seconds: Time to live in seconds
+            age: Age of the data when stored (e.g. entries loaded from the DB tier)
+        """
+        if self.max_bytes <= 0:
+            return
+        size = data.frame.nbytes + ENTRY_OVERHEAD_BYTES
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (data, time.time() - age, ttl_seconds, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self._evictions += 1
+
+    def invalidate(self, key: str):
+        """Remove an entry."""
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def clear(self):
+        """Remove all entries."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Get cache statistics (hits, misses, evictions, bytes, entries)."""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+                "evictions": self._evictions,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+    def _remove(self, key: str):
+        """Remove entry (caller holds the lock)."""
+        _, _, _, size = self._entries.pop(key)
+        self._bytes -= size
+
+
+_market_data_memory_cache: Optional[MarketDataMemoryCache] = None
+_market_data_memory_cache_lock = threading.Lock()
+
+
+def get_market_data_memory_cache() -> MarketDataMemoryCache:
+    """Get the process-wide market data L1 cache."""
+    global _market_data_memory_cache
+    if _market_data_memory_cache is None:
+        with _market_data_memory_cache_lock:
+            if _market_data_memory_cache is None:
+                _market_data_memory_cache = MarketDataMemoryCache()
+    return _market_data_memory_cache
@@ -1,9 +1,28 @@
 """
 Normalized data structures for market data.
 """
-from datetime import datetime
-from typing import List, Optional
-from pydantic import BaseModel
+from datetime import datetime, timezone, tzinfo
+from typing import Any, Iterable, Iterator, List, Optional, Union
+import numpy as np
+from pydantic import BaseModel, ConfigDict, model_validator
+
+
+# Candle duration per timeframe in seconds
+TIMEFRAME_SECONDS = {
+    'M1': 60,
+    'M5': 5 * 60,
+    'M15': 15 * 60,
+    'M30': 30 * 60,
+    'H1': 60 * 60,
+    'H4': 4 * 60 * 60,
+    'D1': 24 * 60 * 60,
+    'W1': 7 * 24 * 60 * 60,
+}
+
+
+def timeframe_to_seconds(timeframe: str) -> Optional[int]:
+    """Get candle duration in seconds for a timeframe (e.g. 'H1' -> 3600), None if unknown."""
+    return TIMEFRAME_SECONDS.get(timeframe.upper()) if timeframe else None
 
 
 class OHLCVCandle(BaseModel):
@@ -16,11 +35,292 @@ class OHLCVCandle(BaseModel):
     volume: float
 
 
+class CandleFrame:
+    """Columnar OHLCV candles backed by NumPy arrays.
+
+    Candles are always sorted by timestamp (oldest first). Timestamps are int64
+    epoch milliseconds (UTC); `tz` is only used when presenting candles as
+    datetimes (e.g. exchange-local time for yfinance equities).
+    Slicing (tail, [a:b]) returns views without copying the arrays.
+    """
+
+    COLUMNS = ("open", "high", "low", "close", "volume")
+    __slots__ = ("timestamp_ms", "open", "high", "low", "close", "volume", "tz")
+
+    def __init__(
+        self,
+        timestamp_ms: Any,
+        open: Any,
+        high: Any,
+        low: Any,
+        close: Any,
+        volume: Any,
+        tz: Optional[tzinfo] = None,
+        assume_sorted: bool = False,
+    ):
+        """Create frame from column arrays.
+
+        Args:
+            timestamp_ms: Epoch milliseconds (UTC)
+            open, high, low, close, volume: Price/volume columns
+            tz: Timezone for datetime views (defaults to UTC)
+            assume_sorted: Skip the sortedness check (caller guarantees ascending timestamps)
+        """
+        self.timestamp_ms = np.asarray(timestamp_ms, dtype=np.int64)
+        self.open = np.asarray(open, dtype=np.float64)
+        self.high = np.asarray(high, dtype=np.float64)
+        self.low = np.asarray(low, dtype=np.float64)
+        self.close = np.asarray(close, dtype=np.float64)
+        self.volume = np.asarray(volume, dtype=np.float64)
+        self.tz = tz or timezone.utc
+
+        n = len(self.timestamp_ms)
+        if any(len(getattr(self, name)) != n for name in self.COLUMNS):
+            raise ValueError("CandleFrame columns must have equal length")
+
+        if not assume_sorted and n > 1 and np.any(np.diff(self.timestamp_ms) < 0):
+            order = np.argsort(self.timestamp_ms, kind="stable")
+            self.timestamp_ms = self.timestamp_ms[order]
+            for name in self.COLUMNS:
+                setattr(self, name, getattr(self, name)[order])
+
+    # Constructors
+
+    @classmethod
+    def empty(cls, tz: Optional[tzinfo] = None) -> "CandleFrame":
+        """Create an empty frame."""
+        return cls(*([np.empty(0)] * 6), tz=tz, assume_sorted=True)
+
+    @classmethod
+    def from_ccxt(cls, ohlcv: List[List[float]]) -> "CandleFrame":
+        """Create frame from ccxt fetch_ohlcv() rows: [ts_ms, open, high, low, close, volume]."""
+        if not ohlcv:
+            return cls.empty()
+        rows = np.asarray(ohlcv, dtype=np.float64)
+        return cls(rows[:, 0].astype(np.int64), rows[:, 1], rows[:, 2], rows[:, 3], rows[:, 4], rows[:, 5])
+
+    @classmethod
+    def from_dataframe(cls, df: Any) -> "CandleFrame":
+        """Create frame from a pandas DataFrame indexed by timestamp.
+
+        Accepts yfinance-style (Open/High/Low/Close/Volume) or lowercase column names.
+        Tz-aware indexes keep their timezone for datetime views.
+        """
+        import pandas as pd
+
+        if df is None or len(df) == 0:
+            return cls.empty()
+
+        index = df.index if isinstance(df.index, pd.DatetimeIndex) else pd.DatetimeIndex(df.index)
+        # Naive indexes are taken as UTC; asi8 is epoch-based (UTC) either way, no conversion needed
+        tz = index.tz
+        # int64 milliseconds since epoch, whatever the index resolution (ns, us, s)
+        timestamp_ms = index.as_unit("ms").asi8
+
+        columns = {}
+        for name in cls.COLUMNS:
+            column = name.capitalize() if name.capitalize() in df.columns else name
+            columns[name] = df[column].to_numpy(dtype=np.float64, na_value=np.nan)
+
+        return cls(
+            timestamp_ms,
+            columns["open"], columns["high"], columns["low"], columns["close"], columns["volume"],
+            tz=tz,
+            assume_sorted=index.is_monotonic_increasing,
+        )
+
+    @classmethod
+    def from_tinkoff(cls, candles: List[Any]) -> "CandleFrame":
+        """Create frame from Tinkoff HistoricCandle objects (Quotation prices: units + nano)."""
+        if not candles:
+            return cls.empty()
+
+        n = len(candles)
+
+        def price_column(field: str) -> np.ndarray:
+            values = [getattr(c, field) for c in candles]
+            if not hasattr(values[0], "units"):
+                return np.asarray(values, dtype=np.float64)
+            units = np.fromiter((v.units for v in values), dtype=np.float64, count=n)
+            nano = np.fromiter((v.nano for v in values), dtype=np.float64, count=n)
+            return units + nano / 1e9
+
+        timestamp_ms = np.fromiter(
+            (
+                int((c.time if c.time.tzinfo else c.time.replace(tzinfo=timezone.utc)).timestamp() * 1000)
+                for c in candles
+            ),
+            dtype=np.int64,
+            count=n,
+        )
+        volume = np.fromiter((c.volume for c in candles), dtype=np.float64, count=n)
+        return cls(
+            timestamp_ms,
+            price_column("open"), price_column("high"), price_column("low"), price_column("close"),
+            volume,
+        )
+
+    @classmethod
+    def from_candles(cls, candles: Iterable[Union[OHLCVCandle, dict]]) -> "CandleFrame":
+        """Create frame from OHLCVCandle objects or candle dicts (backward compatibility)."""
+        candles = list(candles)
+        if not candles:
+            return cls.empty()
+
+        def get(candle, name):
+            return candle[name] if isinstance(candle, dict) else getattr(candle, name)
+
+        first_ts = get(candles[0], "timestamp")
+        tz = first_ts.tzinfo if isinstance(first_ts, datetime) else None
+
+        def to_ms(value) -> int:
+            if isinstance(value, str):
+                value = datetime.fromisoformat(value)
+            if value.tzinfo is None:
+                value = value.replace(tzinfo=timezone.utc)
+            return int(value.timestamp() * 1000)
+
+        n = len(candles)
+        timestamp_ms = np.fromiter((to_ms(get(c, "timestamp")) for c in candles), dtype=np.int64, count=n)
+        columns = [
+            np.fromiter((float(get(c, name)) for c in candles), dtype=np.float64, count=n)
+            for name in cls.COLUMNS
+        ]
+        return cls(timestamp_ms, *columns, tz=tz)
+
+    # Access
+
+    def __len__(self) -> int:
+        return len(self.timestamp_ms)
+
+    def __getitem__(self, key: Union[int, slice]) -> Union[OHLCVCandle, "CandleFrame"]:
+        """Int index -> OHLCVCandle view, slice -> CandleFrame view."""
+        if isinstance(key, slice):
+            if key.step not in (None, 1):
+                raise ValueError("CandleFrame slices must be contiguous")
+            return CandleFrame(
+                self.timestamp_ms[key],
+                self.open[key], self.high[key], self.low[key], self.close[key], self.volume[key],
+                tz=self.tz,
+                assume_sorted=True,
+            )
+        return self.candle(key)
+
+    def __iter__(self) -> Iterator[OHLCVCandle]:
+        """Iterate candles as OHLCVCandle objects (created lazily, without validation)."""
+        tz = self.tz
+        for ts, o, h, l, c, v in zip(
+            self.timestamp_ms.tolist(),
+            self.open.tolist(), self.high.tolist(), self.low.tolist(), self.close.tolist(), self.volume.tolist(),
+        ):
+            yield OHLCVCandle.model_construct(
+                timestamp=datetime.fromtimestamp(ts / 1000, tz=tz),
+                open=o, high=h, low=l, close=c, volume=v,
+            )
+
+    def candle(self, index: int) -> OHLCVCandle:
+        """Get a single candle as OHLCVCandle."""
+        return OHLCVCandle.model_construct(
+            timestamp=datetime.fromtimestamp(int(self.timestamp_ms[index]) / 1000, tz=self.tz),
+            open=float(self.open[index]),
+            high=float(self.high[index]),
+            low=float(self.low[index]),
+            close=float(self.close[index]),
+            volume=float(self.volume[index]),
+        )
+
+    def tail(self, n: int) -> "CandleFrame":
+        """Last n candles (most recent) as a view."""
+        if n <= 0:
+            return self[0:0]
+        return self[-n:] if n < len(self) else self
+
+    def merge(self, other: "CandleFrame") -> "CandleFrame":
+        """Merge with another frame, deduplicating by timestamp.
+
+        Candles from `other` win on equal timestamps (e.g. a re-fetched,
+        now closed version of the last candle).
+
+        Args:
+            other: Frame with newer data
+
+        Returns:
+            New sorted frame (uses the timezone of `other`)
+        """
+        if len(other) == 0:
+            return self
+        if len(self) == 0:
+            return other
+        return CandleFrame.concat([self, other])
+
+    @classmethod
+    def concat(cls, frames: List["CandleFrame"]) -> "CandleFrame":
+        """Combine frames into one sorted frame, deduplicating by timestamp.
+
+        Later frames in the list win on equal timestamps (e.g. overlapping pages
+        of a paged fetch).
+
+        Args:
+            frames: Frames in priority order (lowest first)
+
+        Returns:
+            New sorted frame (uses the timezone of the last non-empty frame)
+        """
+        frames = [frame for frame in frames if len(frame)]
+        if not frames:
+            return cls.empty()
+        if len(frames) == 1:
+            return frames[0]
+
+        timestamp_ms = np.concatenate([frame.timestamp_ms for frame in frames])
+        # Stable sort keeps later frames after earlier ones for equal timestamps
+        order = np.argsort(timestamp_ms, kind="stable")
+        timestamp_ms = timestamp_ms[order]
+        # Keep the last candle of each timestamp group
+        keep = np.append(timestamp_ms[1:] != timestamp_ms[:-1], True)
+
+        columns = [
+            np.concatenate([getattr(frame, name) for frame in frames])[order][keep]
+            for name in cls.COLUMNS
+        ]
+        return cls(timestamp_ms[keep], *columns, tz=frames[-1].tz, assume_sorted=True)
+
+    @property
+    def nbytes(self) -> int:
+        """Memory used by the column arrays."""
+        return self.timestamp_ms.nbytes + sum(getattr(self, name).nbytes for name in self.COLUMNS)
+
+    def __repr__(self) -> str:
+        return f"CandleFrame(n={len(self)}, tz={self.tz})"
+
+
 class MarketData(BaseModel):
-    """Normalized market data response."""
+    """Normalized market data response.
+
+    Candles are stored in a CandleFrame (`frame`). `candles` is a lazy,
+    backward-compatible per-candle view of the same data.
+    """
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
     instrument: str
     timeframe: str
     exchange: Optional[str] = None
-    candles: List[OHLCVCandle]
+    frame: CandleFrame
     fetched_at: datetime
+    # Data source (available_data_sources name) that served the candles; set by
+    # routed fetches (sources of one exchange, e.g. Tinkoff and MOEX ISS, differ here)
+    source: Optional[str] = None
+
+    @model_validator(mode="before")
+    @classmethod
+    def _candles_to_frame(cls, values: Any) -> Any:
+        """Accept legacy `candles=[...]` (OHLCVCandle objects or dicts)."""
+        if isinstance(values, dict) and "frame" not in values and "candles" in values:
+            values = dict(values)
+            values["frame"] = CandleFrame.from_candles(values.pop("candles"))
+        return values
 
+    @property
+    def candles(self) -> CandleFrame:
+        """Candles sorted oldest first (supports len(), indexing and iteration)."""
+        return self.frame
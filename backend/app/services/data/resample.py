@@ -0,0 +1,114 @@
+"""
+Vectorised OHLCV resampling (lower timeframe -> higher timeframe).
+
+Buckets are aligned on the local clock of the trading session:
+- days start at local midnight, weeks on Monday
+- intraday buckets are anchored at the session open (e.g. MOEX H4 buckets
+  start at 10:00 MSK, not at 00:00 UTC)
+
+Each bucket aggregates open=first, high=max, low=min, close=last, volume=sum.
+"""
+from datetime import tzinfo
+from typing import Union
+import numpy as np
+
+from app.services.data.normalized import CandleFrame, timeframe_to_seconds
+
+DAY_MS = 24 * 60 * 60 * 1000
+WEEK_MS = 7 * DAY_MS
+# 1970-01-01 was a Thursday; weeks start on Monday
+_WEEK_OFFSET_MS = 4 * DAY_MS
+
+
+def _timeframe_ms(timeframe: str) -> int:
+    seconds = timeframe_to_seconds(timeframe)
+    if not seconds:
+        raise ValueError(f"Unknown timeframe: {timeframe}")
+    return seconds * 1000
+
+
+def _grid_offset_ms(size_ms: int, anchor_minutes: int) -> int:
+    """Offset of the bucket grid from local midnight (epoch-aligned)."""
+    if size_ms >= WEEK_MS:
+        return _WEEK_OFFSET_MS
+    if size_ms >= DAY_MS:
+        return 0
+    return (anchor_minutes * 60 * 1000) % size_ms
+
+
+def _local_ms(timestamp_ms: np.ndarray, tz: Union[str, tzinfo, None]) -> np.ndarray:
+    """Convert UTC epoch milliseconds to local wall-clock milliseconds."""
+    if tz is None or str(tz) == "UTC":
+        return timestamp_ms
+    import pandas as pd
+
+    index = pd.to_datetime(timestamp_ms, unit="ms", utc=True).tz_convert(tz).tz_localize(None)
+    return index.asi8 // 1_000_000
+
+
+def can_resample(source_timeframe: str, target_timeframe: str, anchor_minutes: int = 0) -> bool:
+    """Check whether every target bucket is made of whole source buckets.
+
+    Args:
+        source_timeframe: Lower timeframe (e.g. 'H1')
+        target_timeframe: Higher timeframe (e.g. 'H4')
+        anchor_minutes: Session anchor used for intraday buckets
+
+    Returns:
+        True if target candles can be built from source candles
+    """
+    source_s = timeframe_to_seconds(source_timeframe)
+    target_s = timeframe_to_seconds(target_timeframe)
+    if not source_s or not target_s or target_s <= source_s or target_s % source_s:
+        return False
+    source_ms, target_ms = source_s * 1000, target_s * 1000
+    source_offset = _grid_offset_ms(source_ms, anchor_minutes)
+    target_offset = _grid_offset_ms(target_ms, anchor_minutes)
+    return (target_offset - source_offset) % source_ms == 0
+
+
+def resample(
+    frame: CandleFrame,
+    timeframe: str,
+    tz: Union[str, tzinfo, None] = None,
+    anchor_minutes: int = 0,
+) -> CandleFrame:
+    """Aggregate candles into higher-timeframe buckets.
+
+    Args:
+        frame: Source candles (any lower timeframe that nests into `timeframe`)
+        timeframe: Target timeframe (M30, H1, H4, D1, W1, ...)
+        tz: Session timezone for bucket alignment (None = UTC)
+        anchor_minutes: Intraday bucket anchor in minutes after local midnight
+
+    Returns:
+        Resampled frame; each candle is labelled with its bucket start (UTC ms).
+        The first and last buckets may be partial if the source window cuts them.
+    """
+    n = len(frame)
+    if n == 0:
+        return CandleFrame.empty(tz=frame.tz)
+
+    size_ms = _timeframe_ms(timeframe)
+    offset_ms = _grid_offset_ms(size_ms, anchor_minutes)
+
+    local = _local_ms(frame.timestamp_ms, tz)
+    bucket_local = (local - offset_ms) // size_ms * size_ms + offset_ms
+
+    # Index of the first candle in every bucket (input is sorted)
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(bucket_local)) + 1))
+    ends = np.append(starts[1:] - 1, n - 1)
+
+    # Bucket start in UTC: shift the first candle's timestamp back to the local bucket boundary
+    timestamp_ms = frame.timestamp_ms[starts] - (local[starts] - bucket_local[starts])
+
+    return CandleFrame(
+        timestamp_ms,
+        frame.open[starts],
+        np.fmax.reduceat(frame.high, starts),
+        np.fmin.reduceat(frame.low, starts),
+        frame.close[ends],
+        np.add.reduceat(np.nan_to_num(frame.volume), starts),
+        tz=frame.tz,
+        assume_sorted=True,
+    )
@@ -0,0 +1,352 @@
+"""
+Provider routing: health tracking, circuit breakers, retries and failover.
+
+Each data source (tinkoff, moex_iss, ccxt, ccxt_<exchange>, yfinance) has a
+ProviderHealth with EWMA latency and error rate and a circuit breaker:
+- transient errors (network, timeouts, provider unavailable) are retried with
+  exponential backoff, then the next source of the route is tried
+- DATA_CIRCUIT_FAILURE_THRESHOLD consecutive transient failures open the
+  breaker; the source is skipped for DATA_CIRCUIT_RESET_SECONDS, then one
+  probe request is let through (half-open)
+- permanent errors (unknown symbol, unsupported timeframe) fail over without
+  counting against the source's health
+
+Routes list the sources of an asset class; available_data_sources
+(is_enabled, priority) decides which are used and in what order. Health is
+per process.
+"""
+from typing import Callable, Dict, List, Optional, Tuple, TypeVar, Any
+import random
+import threading
+import time
+import logging
+
+from app.core.config import (
+    DATA_PROVIDER_RETRIES,
+    DATA_PROVIDER_RETRY_BACKOFF_SECONDS,
+    DATA_CIRCUIT_FAILURE_THRESHOLD,
+    DATA_CIRCUIT_RESET_SECONDS,
+    DATA_CRYPTO_FALLBACK_EXCHANGE,
+)
+from app.core.database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# EWMA smoothing factor (weight of the newest sample)
+EWMA_ALPHA = 0.2
+# Re-read available_data_sources at most this often
+SOURCE_PREFERENCES_TTL_SECONDS = 60
+# Priority of sources without an available_data_sources row (after route order)
+DEFAULT_PRIORITY = 100
+
+ROUTE_MOEX = "moex"
+ROUTE_CRYPTO = "crypto"
+ROUTE_EQUITY = "equity"
+
+
+def route_sources(route: str) -> List[str]:
+    """Source names that can serve an asset class, in default order."""
+    if route == ROUTE_MOEX:
+        return ["tinkoff", "moex_iss"]
+    if route == ROUTE_CRYPTO:
+        sources = ["ccxt"]
+        if DATA_CRYPTO_FALLBACK_EXCHANGE:
+            sources.append(f"ccxt_{DATA_CRYPTO_FALLBACK_EXCHANGE}")
+        return sources
+    return ["yfinance"]
+
+
+def is_transient_error(error: BaseException) -> bool:
+    """Whether an error (or an error it was raised from) is a network/availability failure.
+
+    Adapters wrap provider errors in ValueError, so the whole cause/context
+    chain is inspected.
+    """
+    import requests
+
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        if isinstance(error, (TimeoutError, ConnectionError, requests.ConnectionError, requests.Timeout)):
+            return True
+        if isinstance(error, requests.HTTPError) and error.response is not None and (
+            error.response.status_code == 429 or error.response.status_code >= 500
+        ):
+            return True
+        try:
+            import ccxt
+
+            if isinstance(error, (ccxt.NetworkError, ccxt.RateLimitExceeded)):
+                return True
+        except ImportError:
+            pass
+        try:
+            import grpc
+
+            if isinstance(error, grpc.RpcError) and error.code() in (
+                grpc.StatusCode.UNAVAILABLE,
+                grpc.StatusCode.DEADLINE_EXCEEDED,
+                grpc.StatusCode.RESOURCE_EXHAUSTED,
+                grpc.StatusCode.INTERNAL,
+            ):
+                return True
+        except ImportError:
+            pass
+        error = error.__cause__ or error.__context__
+    return False
+
+
+class ProviderHealth:
+    """Latency/error statistics and circuit breaker of one source. Thread-safe."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = DATA_CIRCUIT_FAILURE_THRESHOLD,
+        reset_seconds: float = DATA_CIRCUIT_RESET_SECONDS,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.latency_ms: Optional[float] = None
+        self.error_rate = 0.0
+        self.requests = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.state = self.CLOSED
+        self.opened_at = 0.0
+        self.last_error: Optional[str] = None
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Whether a request may be sent (open breakers let one probe through after the reset time)."""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_seconds:
+                self.state = self.HALF_OPEN
+                self._probe_in_flight = False
+            if self.state == self.HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            return False
+
+    def record_success(self, latency_ms: float):
+        with self._lock:
+            self.requests += 1
+            self.latency_ms = latency_ms if self.latency_ms is None else (
+                EWMA_ALPHA * latency_ms + (1 - EWMA_ALPHA) * self.latency_ms
+            )
+            self.error_rate = (1 - EWMA_ALPHA) * self.error_rate
+            self.consecutive_failures = 0
+            if self.state != self.CLOSED:
+                logger.info(f"provider_circuit_closed: source={self.name}")
+            self.state = self.CLOSED
+            self._probe_in_flight = False
+
+    def record_failure(self, error: BaseException):
+        with self._lock:
+            self.requests += 1
+            self.failures += 1
+            self.error_rate = EWMA_ALPHA + (1 - EWMA_ALPHA) * self.error_rate
+            self.consecutive_failures += 1
+            self.last_error = str(error)[:200]
+            self._probe_in_flight = False
+            if self.state == self.HALF_OPEN or (
+                self.state == self.CLOSED and self.consecutive_failures >= self.failure_threshold
+            ):
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+                logger.warning(
+                    f"provider_circuit_opened: source={self.name}, "
+                    f"consecutive_failures={self.consecutive_failures}, error={self.last_error}"
+                )
+
+    def release_probe(self):
+        """Give back a half-open probe slot that wasn't used to judge the source."""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "latency_ms": round(self.latency_ms, 1) if self.latency_ms is not None else None,
+            "error_rate": round(self.error_rate, 3),
+            "requests": self.requests,
+            "failures": self.failures,
+            "consecutive_failures": self.consecutive_failures,
+            "last_error": self.last_error,
+        }
+
+
+class ProviderRouter:
+    """Orders sources by preference and health and runs calls with retries and failover."""
+
+    def __init__(self):
+        self._health: Dict[str, ProviderHealth] = {}
+        self._health_lock = threading.Lock()
+        self._preferences: Dict[str, Tuple[bool, int]] = {}
+        self._preferences_loaded_at = 0.0
+
+    def health(self, source: str) -> ProviderHealth:
+        health = self._health.get(source)
+        if health is None:
+            with self._health_lock:
+                health = self._health.setdefault(source, ProviderHealth(source))
+        return health
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Health of every source used so far in this process."""
+        return {name: health.snapshot() for name, health in list(self._health.items())}
+
+    def invalidate_preferences(self):
+        """Re-read available_data_sources on the next call (after Settings changes)."""
+        self._preferences_loaded_at = 0.0
+
+    def _load_preferences(self) -> Dict[str, Tuple[bool, int]]:
+        if time.monotonic() - self._preferences_loaded_at < SOURCE_PREFERENCES_TTL_SECONDS:
+            return self._preferences
+        from app.models.settings import AvailableDataSource
+
+        db = SessionLocal()
+        try:
+            rows = db.query(AvailableDataSource.name, AvailableDataSource.is_enabled, AvailableDataSource.priority).all()
+            self._preferences = {name: (bool(enabled), priority) for name, enabled, priority in rows}
+        except Exception as e:
+            # Keep the previous preferences (route order if none)
+            logger.warning(f"data_source_preferences_load_failed: error={e}")
+        finally:
+            db.close()
+        self._preferences_loaded_at = time.monotonic()
+        return self._preferences
+
+    def order(self, route: str, available: Dict[str, Any]) -> List[str]:
+        """Sources of a route to try, best first.
+
+        Args:
+            route: Asset class route (moex, crypto, equity)
+            available: Source name -> adapter for the sources configured in this process
+
+        Returns:
+            Enabled, available source names ordered by (open breaker last, priority,
+            EWMA latency)
+        """
+        preferences = self._load_preferences()
+        candidates = []
+        for index, name in enumerate(route_sources(route)):
+            if name not in available:
+                continue
+            enabled, priority = preferences.get(name, (True, DEFAULT_PRIORITY + index))
+            if not enabled:
+                continue
+            health = self.health(name)
+            latency = health.latency_ms if health.latency_ms is not None else 0.0
+            candidates.append((health.state == ProviderHealth.OPEN, priority, latency, name))
+        return [name for *_, name in sorted(candidates)]
+
+    def preferred(self, route: str, available: Dict[str, Any]) -> Optional[str]:
+        """Configured first choice of a route, regardless of health.
+
+        The candle store keeps one series per instrument and timeframe, written
+        only from this source so failover data from another exchange never
+        mixes into it.
+
+        Args:
+            route: Asset class route
+            available: Source name -> adapter
+
+        Returns:
+            Enabled, available source name with the best priority (None if none)
+        """
+        preferences = self._load_preferences()
+        candidates = []
+        for index, name in enumerate(route_sources(route)):
+            if name not in available:
+                continue
+            enabled, priority = preferences.get(name, (True, DEFAULT_PRIORITY + index))
+            if enabled:
+                candidates.append((priority, index, name))
+        return min(candidates)[-1] if candidates else None
+
+    def call(self, route: str, available: Dict[str, Any], operation: str, fn: Callable[[Any], T]) -> Tuple[str, T]:
+        """Run `fn(adapter)` on the best healthy source, failing over on errors.
+
+        Args:
+            route: Asset class route
+            available: Source name -> adapter
+            operation: Operation name for logs (fetch_ohlcv, fetch_range)
+            fn: Provider call
+
+        Returns:
+            Tuple of (source name, result)
+
+        Raises:
+            ValueError: If every source failed or is unavailable (last error's message)
+        """
+        sources = self.order(route, available)
+        if not sources:
+            raise ValueError(
+                f"No data source enabled for {route} instruments "
+                f"(check Settings → Data Sources and provider credentials)"
+            )
+
+        last_error: Optional[BaseException] = None
+        skipped = []
+        for position, name in enumerate(sources):
+            health = self.health(name)
+            if not health.allow():
+                skipped.append(name)
+                continue
+            adapter = available[name]
+            for attempt in range(DATA_PROVIDER_RETRIES + 1):
+                started = time.monotonic()
+                try:
+                    result = fn(adapter)
+                except Exception as e:
+                    last_error = e
+                    if not is_transient_error(e):
+                        # Symbol/timeframe problem: the source is healthy, try the next one
+                        health.release_probe()
+                        logger.info(f"provider_request_rejected: source={name}, operation={operation}, error={e}")
+                        break
+                    health.record_failure(e)
+                    logger.warning(
+                        f"provider_request_failed: source={name}, operation={operation}, "
+                        f"attempt={attempt + 1}, error={e}"
+                    )
+                    if attempt == DATA_PROVIDER_RETRIES or not health.allow():
+                        break
+                    backoff = DATA_PROVIDER_RETRY_BACKOFF_SECONDS * (2 ** attempt)
+                    time.sleep(backoff + random.uniform(0, backoff / 2))
+                    continue
+                health.record_success((time.monotonic() - started) * 1000)
+                if position > 0:
+                    logger.info(f"provider_failover: route={route}, operation={operation}, source={name}")
+                return name, result
+
+        if last_error is None:
+            raise ValueError(f"All {route} data sources are unavailable (circuit open: {', '.join(skipped)})")
+        if isinstance(last_error, ValueError):
+            raise last_error
+        raise ValueError(str(last_error)) from last_error
+
+
+_provider_router: Optional[ProviderRouter] = None
+_provider_router_lock = threading.Lock()
+
+
+def get_provider_router() -> ProviderRouter:
+    """Get the process-wide provider router."""
+    global _provider_router
+    if _provider_router is None:
+        with _provider_router_lock:
+            if _provider_router is None:
+                _provider_router = ProviderRouter()
+    return _provider_router
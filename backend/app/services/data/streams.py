@@ -0,0 +1,649 @@
+"""
+Live candle streams feeding in-memory buffers and the candle store.
+
+A CandleStreamIngestor runs one provider stream in a background thread:
+- keeps the latest DATA_RETENTION_CANDLES bars per (instrument, timeframe)
+  in memory, so DataService.fetch_market_data can answer without a
+  provider call while the stream is connected
+- flushes received bars to the candle store every few seconds
+- on (re)connect backfills every series over REST, reconnects with
+  exponential backoff, and (optionally) backfills gaps between bars
+- picks up subscription changes (e.g. instruments enabled in Settings)
+
+Streams run in one python -m app.worker process of the deployment (see
+app.worker.run_candle_streams), so each provider stream is opened once.
+
+Sources: TinkoffCandleStreamSource (MOEX, MarketDataStream candles),
+BinanceKlineStreamSource (Binance spot kline websocket) and
+FakeCandleStreamSource (in-process, for tests).
+"""
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, Union, Any
+import queue
+import threading
+import time
+import logging
+
+from app.core.config import DATA_RETENTION_CANDLES, DATA_CANDLE_STORE, CANDLE_STREAM_FLUSH_SECONDS, BINANCE_WS_URL
+from app.core.database import SessionLocal
+from app.services.data import candle_store
+from app.services.data.normalized import CandleFrame, MarketData, timeframe_to_seconds
+
+logger = logging.getLogger(__name__)
+
+# How often subscriptions are re-read (instruments enabled/disabled in Settings)
+SUBSCRIPTION_CHECK_SECONDS = 60
+# Reconnect backoff bounds
+RECONNECT_MIN_SECONDS = 1
+RECONNECT_MAX_SECONDS = 60
+
+# Stream event: (instrument, timeframe, one-candle frame); None is a keep-alive,
+# STREAM_CONNECTED marks the connection as open and subscribed
+STREAM_CONNECTED = "connected"
+StreamEvent = Union[None, str, Tuple[str, str, CandleFrame]]
+SeriesKey = Tuple[str, str]
+
+
+class CandleBuffer:
+    """Rolling window of the latest candles of one series. Thread-safe.
+
+    Frames are immutable: every update builds a new frame, so readers can keep
+    the frame they got without copying.
+    """
+
+    def __init__(self, max_candles: int = DATA_RETENTION_CANDLES):
+        self.max_candles = max_candles
+        self._frame = CandleFrame.empty()
+        self._lock = threading.Lock()
+
+    @property
+    def frame(self) -> CandleFrame:
+        return self._frame
+
+    @property
+    def last_ts(self) -> Optional[int]:
+        frame = self._frame
+        return int(frame.timestamp_ms[-1]) if len(frame) else None
+
+    def merge(self, frame: CandleFrame):
+        """Merge candles (newer data wins on equal timestamps)."""
+        if len(frame) == 0:
+            return
+        with self._lock:
+            self._frame = self._frame.merge(frame).tail(self.max_candles)
+
+
+class CandleStreamSource:
+    """Provider stream interface."""
+
+    # Exchange name set on MarketData served from the stream
+    exchange_name: Optional[str] = None
+
+    def stream(self, subscriptions: List[SeriesKey], stop: threading.Event) -> Iterator[StreamEvent]:
+        """Yield candle updates for the subscribed series until `stop` is set.
+
+        Yields STREAM_CONNECTED once the connection is open and the
+        subscriptions are sent (buffers are only served from then on). Raises
+        on disconnect (the ingestor reconnects). Should yield None periodically
+        (keep-alives) so the caller can check timers.
+        """
+        raise NotImplementedError
+
+
+class CandleStreamIngestor:
+    """Runs a candle stream in a background thread and keeps series buffers warm."""
+
+    def __init__(
+        self,
+        name: str,
+        source: CandleStreamSource,
+        backfill_adapter,
+        subscriptions: Callable[[], Dict[SeriesKey, Optional[int]]],
+        detect_gaps: bool = False,
+        max_candles: int = DATA_RETENTION_CANDLES,
+        flush_seconds: float = CANDLE_STREAM_FLUSH_SECONDS,
+    ):
+        """Initialize ingestor.
+
+        Args:
+            name: Stream name (logs, stats)
+            source: Stream source
+            backfill_adapter: DataAdapter used for REST backfills (fetch_ohlcv / fetch_range)
+            subscriptions: Returns {(instrument, timeframe): instrument_id or None}
+            detect_gaps: Backfill over REST when a bar arrives more than one bar after
+                the previous one (for markets that trade every bar, e.g. crypto)
+            max_candles: Candles kept per series
+            flush_seconds: Candle store write interval
+        """
+        self.name = name
+        self.source = source
+        self.backfill_adapter = backfill_adapter
+        self._subscriptions_fn = subscriptions
+        self.detect_gaps = detect_gaps
+        self.max_candles = max_candles
+        self.flush_seconds = flush_seconds
+
+        self._subscriptions: Dict[SeriesKey, Optional[int]] = {}
+        self._buffers: Dict[SeriesKey, CandleBuffer] = {}
+        self._warm: set = set()
+        self._pending: Dict[SeriesKey, CandleFrame] = {}
+        self._pending_lock = threading.Lock()
+        self._connected = False
+        self._connected_at: Optional[float] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._stats = {"connects": 0, "disconnects": 0, "events": 0, "backfills": 0, "gap_backfills": 0, "stored": 0}
+
+    # Reads
+
+    def is_live(self) -> bool:
+        """Whether the stream is connected (buffers are current)."""
+        return self._connected
+
+    def latest(self, instrument: str, timeframe: str) -> Optional[MarketData]:
+        """Latest candles of a series, or None if not subscribed/warm or the stream is down."""
+        key = (instrument, timeframe.upper())
+        if not self._connected or key not in self._warm:
+            return None
+        buffer = self._buffers.get(key)
+        if buffer is None or len(buffer.frame) == 0:
+            return None
+        return MarketData(
+            instrument=instrument,
+            timeframe=timeframe,
+            exchange=self.source.exchange_name,
+            frame=buffer.frame,
+            fetched_at=datetime.now(timezone.utc),
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        """Connection state and counters."""
+        return {
+            "live": self._connected,
+            "series": len(self._subscriptions),
+            "warm_series": len(self._warm),
+            **self._stats,
+        }
+
+    # Lifecycle
+
+    def start(self):
+        """Start the background thread."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=f"candle-stream-{self.name}", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        """Stop the stream and flush pending candles."""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def _run(self):
+        backoff = RECONNECT_MIN_SECONDS
+        while not self._stop.is_set():
+            self._connected_at = None
+            try:
+                self._refresh_subscriptions()
+                if not self._subscriptions:
+                    # Nothing to stream yet; check again later
+                    self._stop.wait(SUBSCRIPTION_CHECK_SECONDS)
+                    continue
+                self._backfill_all()
+                self._consume()
+            except Exception as e:
+                self._stats["disconnects"] += 1
+                logger.warning(f"candle_stream_disconnected: stream={self.name}, error={e}")
+            finally:
+                self._connected = False
+                self._flush()
+
+            if self._stop.is_set():
+                break
+            # Reset the backoff after a connection that lasted a while
+            if self._connected_at is not None and time.monotonic() - self._connected_at > RECONNECT_MAX_SECONDS:
+                backoff = RECONNECT_MIN_SECONDS
+            if self._stop.wait(backoff):
+                break
+            backoff = min(backoff * 2, RECONNECT_MAX_SECONDS)
+        logger.info(f"candle_stream_stopped: stream={self.name}")
+
+    def _consume(self):
+        """Read the stream until stop, disconnect (raises) or a subscription change (returns)."""
+        next_flush = time.monotonic() + self.flush_seconds
+        next_check = time.monotonic() + SUBSCRIPTION_CHECK_SECONDS
+        for event in self.source.stream(list(self._subscriptions), self._stop):
+            if self._stop.is_set():
+                return
+            if event == STREAM_CONNECTED:
+                self._connected_at = time.monotonic()
+                self._connected = True
+                self._stats["connects"] += 1
+                logger.info(f"candle_stream_connected: stream={self.name}, series={len(self._subscriptions)}")
+            elif event is not None:
+                self._on_candle(*event)
+            now = time.monotonic()
+            if now >= next_flush:
+                self._flush()
+                next_flush = now + self.flush_seconds
+            if now >= next_check:
+                next_check = now + SUBSCRIPTION_CHECK_SECONDS
+                if set(self._load_subscriptions()) != set(self._subscriptions):
+                    logger.info(f"candle_stream_resubscribe: stream={self.name}")
+                    return
+        if not self._stop.is_set():
+            raise ConnectionError("stream ended")
+
+    # Subscriptions and backfill
+
+    def _load_subscriptions(self) -> Dict[SeriesKey, Optional[int]]:
+        return {(instrument, timeframe.upper()): instrument_id
+                for (instrument, timeframe), instrument_id in self._subscriptions_fn().items()}
+
+    def _refresh_subscriptions(self):
+        subscriptions = self._load_subscriptions()
+        for key in subscriptions:
+            if key not in self._buffers:
+                self._buffers[key] = CandleBuffer(self.max_candles)
+        for key in list(self._buffers):
+            if key not in subscriptions:
+                del self._buffers[key]
+                self._warm.discard(key)
+        self._subscriptions = subscriptions
+
+    def _backfill_all(self):
+        for key in list(self._subscriptions):
+            if self._stop.is_set():
+                return
+            try:
+                self._backfill(key)
+                self._warm.add(key)
+            except Exception as e:
+                # Series stays cold (not served) until the next reconnect backfills it
+                self._warm.discard(key)
+                logger.warning(f"candle_stream_backfill_failed: stream={self.name}, series={key}, error={e}")
+
+    def _backfill(self, key: SeriesKey, gap: bool = False):
+        instrument, timeframe = key
+        buffer = self._buffers[key]
+        last_ts = buffer.last_ts
+        if last_ts is None:
+            data = self.backfill_adapter.fetch_ohlcv(instrument, timeframe, limit=self.max_candles)
+        else:
+            # From the last buffered bar (it may have been updated since)
+            data = self.backfill_adapter.fetch_range(
+                instrument, timeframe, datetime.fromtimestamp(last_ts / 1000, tz=timezone.utc)
+            )
+        buffer.merge(data.frame)
+        self._queue_store(key, data.frame)
+        self._stats["gap_backfills" if gap else "backfills"] += 1
+
+    # Events
+
+    def _on_candle(self, instrument: str, timeframe: str, frame: CandleFrame):
+        key = (instrument, timeframe.upper())
+        buffer = self._buffers.get(key)
+        if buffer is None or len(frame) == 0:
+            return
+        self._stats["events"] += 1
+
+        last_ts = buffer.last_ts
+        bar_ms = (timeframe_to_seconds(timeframe) or 0) * 1000
+        if self.detect_gaps and last_ts is not None and bar_ms and int(frame.timestamp_ms[0]) > last_ts + bar_ms:
+            logger.info(
+                f"candle_stream_gap: stream={self.name}, series={key}, "
+                f"missing_bars={(int(frame.timestamp_ms[0]) - last_ts) // bar_ms - 1}"
+            )
+            try:
+                self._backfill(key, gap=True)
+            except Exception as e:
+                logger.warning(f"candle_stream_gap_backfill_failed: stream={self.name}, series={key}, error={e}")
+
+        buffer.merge(frame)
+        self._queue_store(key, frame)
+
+    # Candle store
+
+    def _queue_store(self, key: SeriesKey, frame: CandleFrame):
+        if not DATA_CANDLE_STORE or self._subscriptions.get(key) is None or len(frame) == 0:
+            return
+        with self._pending_lock:
+            pending = self._pending.get(key)
+            self._pending[key] = pending.merge(frame) if pending is not None else frame
+
+    def _flush(self):
+        with self._pending_lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return
+        db = SessionLocal()
+        try:
+            for (instrument, timeframe), frame in pending.items():
+                instrument_id = self._subscriptions.get((instrument, timeframe))
+                if instrument_id is not None:
+                    self._stats["stored"] += candle_store.upsert_candles(db, instrument_id, timeframe, frame)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.warning(f"candle_stream_store_failed: stream={self.name}, error={e}")
+        finally:
+            db.close()
+
+
+class TinkoffCandleStreamSource(CandleStreamSource):
+    """Tinkoff MarketDataStream candle subscription (MOEX)."""
+
+    exchange_name = "MOEX"
+    # Our timeframe -> SubscriptionInterval member (members missing in older SDKs are skipped)
+    INTERVALS = {
+        'M1': 'SUBSCRIPTION_INTERVAL_ONE_MINUTE',
+        'M5': 'SUBSCRIPTION_INTERVAL_FIVE_MINUTES',
+        'M15': 'SUBSCRIPTION_INTERVAL_FIFTEEN_MINUTES',
+        'H1': 'SUBSCRIPTION_INTERVAL_ONE_HOUR',
+        'D1': 'SUBSCRIPTION_INTERVAL_ONE_DAY',
+    }
+
+    def __init__(self, api_token: str):
+        self.api_token = api_token
+
+    def stream(self, subscriptions: List[SeriesKey], stop: threading.Event) -> Iterator[StreamEvent]:
+        from tinkoff.invest import (
+            Client, CandleInstrument, MarketDataRequest, SubscribeCandlesRequest,
+            SubscriptionAction, SubscriptionInterval,
+        )
+        from app.services.data.tinkoff_client import get_tinkoff_client_pool, get_tinkoff_figi_map
+
+        pool = get_tinkoff_client_pool(self.api_token)
+        figi_map = get_tinkoff_figi_map()
+        instruments = []
+        series_by_subscription: Dict[tuple, SeriesKey] = {}
+        for instrument, timeframe in subscriptions:
+            interval = getattr(SubscriptionInterval, self.INTERVALS.get(timeframe, ""), None)
+            if interval is None:
+                logger.warning(f"candle_stream_unsupported_timeframe: instrument={instrument}, timeframe={timeframe}")
+                continue
+            figi = figi_map.resolve(instrument, pool)
+            if not figi:
+                continue
+            instruments.append(CandleInstrument(figi=figi, interval=interval))
+            series_by_subscription[(figi, interval)] = (instrument, timeframe)
+        if not instruments:
+            raise ValueError("No streamable instruments")
+
+        closed = threading.Event()
+
+        def requests():
+            yield MarketDataRequest(subscribe_candles_request=SubscribeCandlesRequest(
+                subscription_action=SubscriptionAction.SUBSCRIPTION_ACTION_SUBSCRIBE,
+                instruments=instruments,
+                waiting_close=False,
+            ))
+            # Keep the request side open until the stream is closed
+            while not closed.wait(1) and not stop.is_set():
+                pass
+
+        try:
+            # Dedicated channel: the stream holds it for as long as it runs
+            with Client(self.api_token) as client:
+                connected = False
+                for response in client.market_data_stream.market_data_stream(requests()):
+                    if not connected:
+                        # First response (the subscription ack): the stream is open
+                        connected = True
+                        yield STREAM_CONNECTED
+                    candle = getattr(response, "candle", None)
+                    if candle is None:
+                        # Pings and subscription acks
+                        yield None
+                        continue
+                    series = series_by_subscription.get((candle.figi, candle.interval))
+                    if series:
+                        yield series[0], series[1], CandleFrame.from_tinkoff([candle])
+        finally:
+            closed.set()
+
+
+def _binance_market_id(symbol: str) -> str:
+    """Binance market id of a ccxt symbol ('BTC/USDT' -> 'BTCUSDT')."""
+    try:
+        from app.services.data.exchanges import get_exchange_registry
+
+        market = get_exchange_registry().markets("binance", "spot").get(symbol)
+        if market:
+            return market["id"]
+    except Exception as e:
+        logger.warning(f"binance_markets_unavailable: error={e}")
+    return symbol.replace("/", "").upper()
+
+
+class BinanceKlineStreamSource(CandleStreamSource):
+    """Binance spot kline websocket (combined stream, SUBSCRIBE messages)."""
+
+    exchange_name = "binance"
+    # Our timeframe -> Binance kline interval
+    INTERVALS = {'M1': '1m', 'M5': '5m', 'M15': '15m', 'H1': '1h', 'H4': '4h', 'D1': '1d'}
+    # Binance limits: 1024 streams per connection, 5 incoming messages per second
+    MAX_STREAMS = 1024
+    SUBSCRIBE_BATCH = 200
+    SUBSCRIBE_INTERVAL_SECONDS = 0.25
+
+    def __init__(self, url: str = BINANCE_WS_URL, market_id: Optional[Callable[[str], str]] = None):
+        """Initialize source.
+
+        Args:
+            url: Websocket base URL (the combined stream endpoint is `<url>/stream`)
+            market_id: Maps a ccxt symbol to the Binance market id (default: shared ccxt markets)
+        """
+        self.url = url.rstrip("/")
+        self._market_id = market_id or _binance_market_id
+
+    def stream(self, subscriptions: List[SeriesKey], stop: threading.Event) -> Iterator[StreamEvent]:
+        import json
+        from websockets.sync.client import connect
+
+        streams: Dict[str, SeriesKey] = {}
+        for instrument, timeframe in subscriptions:
+            interval = self.INTERVALS.get(timeframe)
+            if not interval:
+                logger.warning(f"candle_stream_unsupported_timeframe: instrument={instrument}, timeframe={timeframe}")
+                continue
+            streams[f"{self._market_id(instrument).lower()}@kline_{interval}"] = (instrument, timeframe)
+        if not streams:
+            raise ValueError("No streamable instruments")
+        names = list(streams)
+        if len(names) > self.MAX_STREAMS:
+            logger.warning(f"binance_kline_streams_truncated: requested={len(names)}, limit={self.MAX_STREAMS}")
+            names = names[:self.MAX_STREAMS]
+
+        with connect(f"{self.url}/stream", open_timeout=10) as ws:
+            for i in range(0, len(names), self.SUBSCRIBE_BATCH):
+                if i:
+                    time.sleep(self.SUBSCRIBE_INTERVAL_SECONDS)
+                ws.send(json.dumps({
+                    "method": "SUBSCRIBE",
+                    "params": names[i:i + self.SUBSCRIBE_BATCH],
+                    "id": i // self.SUBSCRIBE_BATCH + 1,
+                }))
+            yield STREAM_CONNECTED
+            while not stop.is_set():
+                try:
+                    message = ws.recv(timeout=1)
+                except TimeoutError:
+                    yield None
+                    continue
+                payload = json.loads(message)
+                if payload.get("error"):
+                    raise ValueError(f"Binance stream error: {payload['error']}")
+                data = payload.get("data")
+                series = streams.get(payload.get("stream"))
+                if not data or data.get("e") != "kline" or series is None:
+                    # Subscription acks and unknown streams
+                    yield None
+                    continue
+                kline = data["k"]
+                yield series[0], series[1], CandleFrame(
+                    [kline["t"]], [float(kline["o"])], [float(kline["h"])], [float(kline["l"])],
+                    [float(kline["c"])], [float(kline["v"])], assume_sorted=True,
+                )
+
+
+class FakeCandleStreamSource(CandleStreamSource):
+    """In-process stream for tests: push candles and inject disconnects."""
+
+    exchange_name = "fake"
+    _DISCONNECT = object()
+
+    def __init__(self, exchange_name: str = "fake"):
+        self.exchange_name = exchange_name
+        self.connections = 0
+        self.subscriptions: List[SeriesKey] = []
+        # Clear to hold connection attempts before they connect
+        self.connectable = threading.Event()
+        self.connectable.set()
+        self._queue: "queue.Queue" = queue.Queue()
+
+    def push(self, instrument: str, timeframe: str, ts_ms: int, open: float, high: float,
+             low: float, close: float, volume: float = 0.0):
+        """Queue a candle update (delivered on the current or next connection)."""
+        frame = CandleFrame([ts_ms], [open], [high], [low], [close], [volume], assume_sorted=True)
+        self._queue.put((instrument, timeframe.upper(), frame))
+
+    def disconnect(self):
+        """Make the current connection fail."""
+        self._queue.put(self._DISCONNECT)
+
+    def stream(self, subscriptions: List[SeriesKey], stop: threading.Event) -> Iterator[StreamEvent]:
+        self.connections += 1
+        self.subscriptions = list(subscriptions)
+        while not self.connectable.wait(0.1):
+            if stop.is_set():
+                return
+            yield None
+        yield STREAM_CONNECTED
+        while not stop.is_set():
+            try:
+                item = self._queue.get(timeout=0.1)
+            except queue.Empty:
+                yield None
+                continue
+            if item is self._DISCONNECT:
+                raise ConnectionError("fake stream disconnected")
+            yield item
+
+
+class CandleStreamHub:
+    """Registry of running candle streams. Thread-safe."""
+
+    def __init__(self):
+        self._ingestors: Dict[str, CandleStreamIngestor] = {}
+        self._lock = threading.Lock()
+
+    def register(self, ingestor: CandleStreamIngestor, start: bool = True):
+        """Add a stream (replaces and stops one with the same name)."""
+        with self._lock:
+            previous = self._ingestors.get(ingestor.name)
+            self._ingestors[ingestor.name] = ingestor
+        if previous:
+            previous.stop()
+        if start:
+            ingestor.start()
+
+    def latest(self, instrument: str, timeframe: str) -> Optional[MarketData]:
+        """Latest candles of a series from any live stream, or None."""
+        for ingestor in list(self._ingestors.values()):
+            data = ingestor.latest(instrument, timeframe)
+            if data is not None:
+                return data
+        return None
+
+    def stop_all(self):
+        """Stop all streams."""
+        with self._lock:
+            ingestors = list(self._ingestors.values())
+            self._ingestors.clear()
+        for ingestor in ingestors:
+            ingestor.stop()
+
+    def stats(self) -> Dict[str, Any]:
+        """Per-stream stats."""
+        return {name: ingestor.stats() for name, ingestor in list(self._ingestors.items())}
+
+
+_candle_stream_hub: Optional[CandleStreamHub] = None
+_candle_stream_hub_lock = threading.Lock()
+
+
+def get_candle_stream_hub() -> CandleStreamHub:
+    """Get the process-wide candle stream hub."""
+    global _candle_stream_hub
+    if _candle_stream_hub is None:
+        with _candle_stream_hub_lock:
+            if _candle_stream_hub is None:
+                _candle_stream_hub = CandleStreamHub()
+    return _candle_stream_hub
+
+
+def _enabled_instrument_subscriptions(exchange_filter, timeframes) -> Dict[SeriesKey, Optional[int]]:
+    from app.models.instrument import Instrument
+
+    db = SessionLocal()
+    try:
+        rows = db.query(Instrument.symbol, Instrument.id).filter(
+            Instrument.is_enabled == True,  # noqa: E712
+            exchange_filter(Instrument),
+        ).all()
+    finally:
+        db.close()
+    return {(symbol, timeframe): instrument_id for symbol, instrument_id in rows for timeframe in timeframes}
+
+
+def start_moex_candle_stream() -> bool:
+    """Start the Tinkoff candle stream for enabled MOEX instruments.
+
+    Returns:
+        True if started (False when no Tinkoff token is configured)
+    """
+    from app.core.config import MOEX_STREAM_TIMEFRAMES
+    from app.services.data.adapters import TinkoffAdapter, get_tinkoff_token
+
+    token = get_tinkoff_token()
+    if not token:
+        logger.info("moex_candle_stream_skipped: reason=no_tinkoff_token")
+        return False
+
+    ingestor = CandleStreamIngestor(
+        name="moex",
+        source=TinkoffCandleStreamSource(token),
+        backfill_adapter=TinkoffAdapter(token),
+        subscriptions=lambda: _enabled_instrument_subscriptions(
+            lambda Instrument: Instrument.exchange == "MOEX", MOEX_STREAM_TIMEFRAMES
+        ),
+    )
+    get_candle_stream_hub().register(ingestor)
+    return True
+
+
+def start_binance_kline_stream() -> bool:
+    """Start the Binance kline stream for enabled crypto instruments.
+
+    Returns:
+        True if started
+    """
+    from sqlalchemy import func
+    from app.core.config import BINANCE_STREAM_TIMEFRAMES
+    from app.services.data.adapters import CCXTAdapter
+
+    ingestor = CandleStreamIngestor(
+        name="binance",
+        source=BinanceKlineStreamSource(),
+        backfill_adapter=CCXTAdapter("binance"),
+        subscriptions=lambda: _enabled_instrument_subscriptions(
+            lambda Instrument: func.lower(Instrument.exchange) == "binance", BINANCE_STREAM_TIMEFRAMES
+        ),
+        # Crypto trades around the clock: a missing bar means missed messages
+        detect_gaps=True,
+    )
+    get_candle_stream_hub().register(ingestor)
+    return True
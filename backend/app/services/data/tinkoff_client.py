@@ -0,0 +1,321 @@
+"""
+Shared Tinkoff Invest API clients and ticker -> FIGI resolution.
+
+- TinkoffClientPool: long-lived gRPC channels (tinkoff.invest Client) reused
+  by all requests for a token. Channels are thread-safe, so callers share
+  them round-robin instead of checking them out.
+- TinkoffFigiMap: in-memory ticker -> FIGI map, loaded in bulk from
+  instruments.figi. Misses are resolved in batch from the shares()/futures()
+  listings (one pair of calls per refresh interval), not per candidate.
+"""
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Any
+import hashlib
+import threading
+import time
+import logging
+
+from app.core.config import TINKOFF_CHANNEL_POOL_SIZE, TINKOFF_LISTING_REFRESH_SECONDS
+from app.core.database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+# Re-read instruments.figi at most this often (picks up FIGIs stored by other processes)
+FIGI_DB_RELOAD_SECONDS = 600
+# Don't re-query Tinkoff for an unknown ticker more often than this
+FIGI_MISS_TTL_SECONDS = 300
+# Preferred boards: TQBR (main equity board), SPBFUT (FORTS futures)
+PREFERRED_CLASS_CODES = ("TQBR", "SPBFUT")
+
+
+def _is_moex_exchange(exchange: str) -> bool:
+    # MOEX futures can have exchange "forts_futures_weekend" or "MOEX"
+    exchange = (exchange or "").lower()
+    return "moex" in exchange or "forts" in exchange
+
+
+class TinkoffClientPool:
+    """Long-lived Tinkoff gRPC channels for one API token. Thread-safe."""
+
+    def __init__(self, api_token: str, size: int = TINKOFF_CHANNEL_POOL_SIZE):
+        """Initialize pool (channels are opened on first use).
+
+        Args:
+            api_token: Tinkoff Invest API token
+            size: Number of channels (requests are spread round-robin)
+        """
+        self.api_token = api_token
+        self.size = max(1, size)
+        # Slot -> (Client context manager, Services) or None if not open
+        self._slots: List[Optional[tuple]] = [None] * self.size
+        self._next = 0
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def client(self) -> Iterator[Any]:
+        """Use a pooled client (tinkoff.invest Services) for one or more calls.
+
+        Channels failing with UNAVAILABLE are closed, the next call reopens them.
+        """
+        slot, services = self._acquire()
+        try:
+            yield services
+        except Exception as e:
+            if _is_unavailable(e):
+                logger.warning(f"tinkoff_channel_reset: slot={slot}, error={e}")
+                self._close_slot(slot, services)
+            raise
+
+    def close(self):
+        """Close all channels."""
+        with self._lock:
+            slots, self._slots = self._slots, [None] * self.size
+        for entry in slots:
+            if entry:
+                _close_client(entry[0])
+
+    def _acquire(self):
+        with self._lock:
+            slot = self._next
+            self._next = (self._next + 1) % self.size
+            entry = self._slots[slot]
+            if entry is None:
+                from tinkoff.invest import Client
+
+                client = Client(self.api_token)
+                entry = (client, client.__enter__())
+                self._slots[slot] = entry
+                logger.info(f"tinkoff_channel_opened: slot={slot}")
+            return slot, entry[1]
+
+    def _close_slot(self, slot: int, services: Any):
+        with self._lock:
+            entry = self._slots[slot]
+            # Another thread may already have replaced it
+            if entry is None or entry[1] is not services:
+                return
+            self._slots[slot] = None
+        _close_client(entry[0])
+
+
+def _close_client(client: Any):
+    try:
+        client.__exit__(None, None, None)
+    except Exception as e:
+        logger.warning(f"tinkoff_channel_close_failed: error={e}")
+
+
+def _is_unavailable(error: Exception) -> bool:
+    try:
+        import grpc
+
+        return isinstance(error, grpc.RpcError) and error.code() == grpc.StatusCode.UNAVAILABLE
+    except Exception:
+        return False
+
+
+class TinkoffFigiMap:
+    """Process-wide ticker -> FIGI map for MOEX instruments. Thread-safe."""
+
+    def __init__(self, listing_refresh_seconds: int = TINKOFF_LISTING_REFRESH_SECONDS):
+        """Initialize map (loaded on first use).
+
+        Args:
+            listing_refresh_seconds: Max age of the shares()/futures() listing used for misses
+        """
+        self.listing_refresh_seconds = listing_refresh_seconds
+        self._figis: Dict[str, str] = {}
+        self._db_loaded_at = 0.0
+        self._listing: Dict[str, tuple] = {}
+        self._listing_loaded_at = 0.0
+        self._misses: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        # One listing download at a time
+        self._listing_lock = threading.Lock()
+
+    def resolve(self, ticker: str, pool: TinkoffClientPool) -> Optional[str]:
+        """Get the FIGI of a MOEX ticker.
+
+        Order: in-memory map (bulk-loaded from instruments.figi), then the
+        shares()/futures() listings, then find_instrument. FIGIs found on Tinkoff
+        are stored in the instruments table.
+
+        Args:
+            ticker: Instrument ticker (e.g. 'SBER', 'NGX5')
+            pool: Client pool for Tinkoff calls on a miss
+
+        Returns:
+            FIGI or None if Tinkoff doesn't list the ticker
+        """
+        if time.time() - self._db_loaded_at > FIGI_DB_RELOAD_SECONDS:
+            self._load_from_db()
+        figi = self._figis.get(ticker)
+        if figi:
+            return figi
+
+        missed_at = self._misses.get(ticker)
+        if missed_at and time.time() - missed_at < FIGI_MISS_TTL_SECONDS:
+            return None
+
+        found = self._find_in_listing(ticker, pool) or self._find_instrument(ticker, pool)
+        if not found:
+            logger.warning(f"tinkoff_figi_not_found: ticker={ticker}")
+            with self._lock:
+                self._misses[ticker] = time.time()
+            return None
+
+        figi, instrument_type, exchange = found
+        with self._lock:
+            self._figis[ticker] = figi
+            self._misses.pop(ticker, None)
+        self._store(ticker, figi)
+        logger.info(f"Cached FIGI {figi} for ticker {ticker} (type: {instrument_type}, exchange: {exchange})")
+        return figi
+
+    def _load_from_db(self):
+        from app.models.instrument import Instrument
+
+        db = SessionLocal()
+        try:
+            rows = db.query(Instrument.symbol, Instrument.figi).filter(Instrument.figi.isnot(None)).all()
+        except Exception as e:
+            logger.warning(f"tinkoff_figi_db_load_failed: error={e}")
+            return
+        finally:
+            db.close()
+        with self._lock:
+            self._figis.update({symbol: figi for symbol, figi in rows if figi})
+            self._db_loaded_at = time.time()
+
+    def _find_in_listing(self, ticker: str, pool: TinkoffClientPool) -> Optional[tuple]:
+        if time.time() - self._listing_loaded_at > self.listing_refresh_seconds:
+            with self._listing_lock:
+                if time.time() - self._listing_loaded_at > self.listing_refresh_seconds:
+                    self._load_listing(pool)
+        return self._listing.get(ticker)
+
+    def _load_listing(self, pool: TinkoffClientPool):
+        """Build ticker -> (figi, type, exchange) from the shares() and futures() listings."""
+        started = time.time()
+        candidates: Dict[str, list] = {}
+        try:
+            with pool.client() as client:
+                listings = (
+                    ("share", client.instruments.shares().instruments),
+                    ("futures", client.instruments.futures().instruments),
+                )
+                for instrument_type, instruments in listings:
+                    for inst in instruments:
+                        if _is_moex_exchange(inst.exchange):
+                            candidates.setdefault(inst.ticker, []).append((inst, instrument_type))
+        except Exception as e:
+            # Keep the previous listing; find_instrument is the fallback
+            logger.warning(f"tinkoff_listing_load_failed: error={e}")
+            self._listing_loaded_at = time.time() - self.listing_refresh_seconds + FIGI_MISS_TTL_SECONDS
+            return
+
+        listing = {}
+        for ticker, matches in candidates.items():
+            # Prefer the main boards, then BBG FIGIs (Bloomberg) over TCS (Tinkoff internal)
+            inst, instrument_type = min(
+                matches,
+                key=lambda m: (m[0].class_code not in PREFERRED_CLASS_CODES, not m[0].figi.startswith("BBG"), m[0].figi),
+            )
+            listing[ticker] = (inst.figi, instrument_type, inst.exchange)
+        self._listing = listing
+        self._listing_loaded_at = time.time()
+        logger.info(
+            f"tinkoff_listing_loaded: instruments={len(listing)}, "
+            f"duration_ms={int((self._listing_loaded_at - started) * 1000)}"
+        )
+
+    def _find_instrument(self, ticker: str, pool: TinkoffClientPool) -> Optional[tuple]:
+        """Fallback for tickers missing from the listings (single search call, no per-candidate lookups)."""
+        try:
+            with pool.client() as client:
+                search_result = client.instruments.find_instrument(query=ticker)
+        except Exception as e:
+            logger.error(f"Failed to get FIGI for {ticker}: {e}")
+            return None
+
+        # Tinkoff API uses "futures" (plural) not "future" (singular)
+        matches = [
+            inst for inst in search_result.instruments
+            if inst.ticker == ticker and inst.instrument_type in ("share", "future", "futures")
+        ]
+        if not matches:
+            return None
+        inst = min(
+            matches,
+            key=lambda i: (i.class_code not in PREFERRED_CLASS_CODES, not i.figi.startswith("BBG"), i.figi),
+        )
+        return inst.figi, inst.instrument_type, getattr(inst, "class_code", None)
+
+    def _store(self, ticker: str, figi: str):
+        """Store a resolved FIGI on the instrument record (created disabled if missing)."""
+        from app.models.instrument import Instrument
+
+        db = SessionLocal()
+        try:
+            instrument = db.query(Instrument).filter(Instrument.symbol == ticker).first()
+            if instrument:
+                instrument.figi = figi
+                instrument.exchange = "MOEX"  # Normalize to MOEX
+            else:
+                db.add(Instrument(
+                    symbol=ticker,
+                    type="equity",  # Keep as equity for now (futures are also equity-like)
+                    exchange="MOEX",
+                    figi=figi,
+                    is_enabled=False
+                ))
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.warning(f"tinkoff_figi_store_failed: ticker={ticker}, error={e}")
+        finally:
+            db.close()
+
+
+_client_pools: Dict[str, TinkoffClientPool] = {}
+_client_pools_lock = threading.Lock()
+_figi_map: Optional[TinkoffFigiMap] = None
+_figi_map_lock = threading.Lock()
+
+
+def get_tinkoff_client_pool(api_token: str) -> TinkoffClientPool:
+    """Get the shared client pool for a token (a new token closes pools of old ones)."""
+    key = hashlib.sha256(api_token.encode()).hexdigest()
+    pool = _client_pools.get(key)
+    if pool is None:
+        stale = []
+        with _client_pools_lock:
+            pool = _client_pools.get(key)
+            if pool is None:
+                # Token changed in Settings: old channels are no longer needed
+                stale = list(_client_pools.values())
+                _client_pools.clear()
+                pool = TinkoffClientPool(api_token)
+                _client_pools[key] = pool
+        for old in stale:
+            old.close()
+    return pool
+
+
+def close_tinkoff_client_pools():
+    """Close all pooled channels (app shutdown)."""
+    with _client_pools_lock:
+        pools = list(_client_pools.values())
+        _client_pools.clear()
+    for pool in pools:
+        pool.close()
+
+
+def get_tinkoff_figi_map() -> TinkoffFigiMap:
+    """Get the process-wide ticker -> FIGI map."""
+    global _figi_map
+    if _figi_map is None:
+        with _figi_map_lock:
+            if _figi_map is None:
+                _figi_map = TinkoffFigiMap()
+    return _figi_map
@@ -0,0 +1,263 @@
+"""
+Instrument universe registry: tradable symbols per provider listing.
+
+Listings (MOEX ISS shares/futures boards, Binance spot markets) are kept in
+memory as sets for O(1) membership checks, persisted as snapshots in the
+instrument_universe table and refreshed periodically in a background thread.
+MOEX ISS requests are conditional (If-None-Match / If-Modified-Since), and
+only one process refreshes a listing at a time (DB advisory lock); the
+others pick the new snapshot up from the DB.
+"""
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple, Iterable, FrozenSet
+import threading
+import logging
+
+from app.core.config import UNIVERSE_REFRESH_INTERVAL_SECONDS, UNIVERSE_HTTP_TIMEOUT_SECONDS
+from app.core.database import SessionLocal
+from app.core.locks import db_advisory_lock
+
+logger = logging.getLogger(__name__)
+
+MOEX_SHARES = "moex_shares"
+MOEX_FUTURES = "moex_futures"
+BINANCE_SPOT = "binance_spot"
+
+# Direct MOEX ISS listing URLs (only the SECID column is requested)
+ISS_LISTING_URLS = {
+    # TQBR board: T+2 stocks (main equity board)
+    MOEX_SHARES: "https://iss.moex.com/iss/engines/stock/markets/shares/boards/TQBR/securities.json",
+    # Futures engine: all futures contracts
+    MOEX_FUTURES: "https://iss.moex.com/iss/engines/futures/markets/forts/boards/FUT/securities.json",
+}
+
+SOURCES = (MOEX_SHARES, MOEX_FUTURES, BINANCE_SPOT)
+
+# How often the background thread re-reads snapshots written by other processes
+SNAPSHOT_CHECK_INTERVAL_SECONDS = 600
+
+
+def _fetch_iss_listing(
+    url: str,
+    etag: Optional[str],
+    last_modified: Optional[str],
+) -> Tuple[Optional[List[str]], Optional[str], Optional[str]]:
+    """Fetch a MOEX ISS listing with a conditional request.
+
+    Returns:
+        Tuple of (symbols or None if not modified, etag, last_modified)
+    """
+    import requests
+
+    headers = {}
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
+
+    response = requests.get(
+        url,
+        params={"iss.meta": "off", "iss.only": "securities", "securities.columns": "SECID", "limit": 1000},
+        headers=headers,
+        timeout=UNIVERSE_HTTP_TIMEOUT_SECONDS,
+    )
+    if response.status_code == 304:
+        return None, etag, last_modified
+    response.raise_for_status()
+
+    securities = response.json().get("securities", {})
+    columns = securities.get("columns", [])
+    secid_idx = columns.index("SECID") if "SECID" in columns else 0
+    symbols = sorted({row[secid_idx] for row in securities.get("data", []) if len(row) > secid_idx and row[secid_idx]})
+    return symbols, response.headers.get("ETag"), response.headers.get("Last-Modified")
+
+
+def _fetch_binance_listing() -> List[str]:
+    """Fetch Binance spot USDT pairs (reloads markets of the shared CCXT client)."""
+    from app.services.data.exchanges import get_exchange_registry
+
+    markets = get_exchange_registry().markets("binance", "spot", reload=True)
+    return sorted(symbol for symbol in markets.keys() if symbol.endswith('/USDT'))
+
+
+class InstrumentUniverse:
+    """In-memory instrument listings backed by DB snapshots. Thread-safe."""
+
+    def __init__(self, refresh_interval: int = UNIVERSE_REFRESH_INTERVAL_SECONDS):
+        """Initialize registry (nothing is loaded until first use or refresh()).
+
+        Args:
+            refresh_interval: Max snapshot age in seconds before a listing is re-fetched
+        """
+        self.refresh_interval = refresh_interval
+        self._symbols: Dict[str, List[str]] = {}
+        self._sets: Dict[str, FrozenSet[str]] = {}
+        # Bumped whenever a listing changes (lets callers rebuild derived indexes)
+        self._version = 0
+        self._lock = threading.Lock()
+        # One listing refresh at a time in this process
+        self._refresh_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # Lookups
+
+    def symbols(self, source: str) -> List[str]:
+        """Sorted symbols of a listing (loaded from the snapshot on first use)."""
+        self._ensure_loaded(source)
+        return self._symbols.get(source, [])
+
+    def contains(self, source: str, symbol: str) -> bool:
+        """O(1) membership check."""
+        self._ensure_loaded(source)
+        return symbol.upper() in self._sets.get(source, frozenset())
+
+    @property
+    def version(self) -> int:
+        """Counter incremented every time a listing's contents change."""
+        return self._version
+
+    def moex_symbols(self) -> List[str]:
+        """All MOEX tickers (stocks + futures), sorted."""
+        return sorted(set(self.symbols(MOEX_SHARES)) | set(self.symbols(MOEX_FUTURES)))
+
+    def is_moex(self, symbol: str) -> bool:
+        """Check whether a symbol is a MOEX stock or futures contract."""
+        return self.contains(MOEX_SHARES, symbol) or self.contains(MOEX_FUTURES, symbol)
+
+    def crypto_symbols(self) -> List[str]:
+        """Binance spot USDT pairs, sorted."""
+        return self.symbols(BINANCE_SPOT)
+
+    # Refresh
+
+    def refresh(self, sources: Optional[Iterable[str]] = None, force: bool = False):
+        """Refresh listings whose snapshot is older than the refresh interval.
+
+        Args:
+            sources: Listings to refresh (default: all)
+            force: Re-fetch even if the snapshot is fresh
+        """
+        for source in sources or SOURCES:
+            try:
+                self._refresh_source(source, force)
+            except Exception as e:
+                logger.warning(f"universe_refresh_failed: source={source}, error={e}")
+
+    def start_background_refresh(self):
+        """Start the daemon thread that loads and refreshes listings off the request path."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="instrument-universe-refresh", daemon=True)
+        self._thread.start()
+
+    def stop_background_refresh(self):
+        """Stop the background thread."""
+        self._stop.set()
+
+    def _run(self):
+        interval = min(self.refresh_interval, SNAPSHOT_CHECK_INTERVAL_SECONDS)
+        while True:
+            self.refresh()
+            if self._stop.wait(interval):
+                return
+
+    def _ensure_loaded(self, source: str):
+        if source not in self._sets:
+            # First use before the background thread loaded it: load snapshot (or fetch if none)
+            self.refresh([source])
+            if source not in self._sets:
+                # Listing unavailable; the background refresh retries later
+                self._adopt(source, [])
+
+    def _adopt(self, source: str, symbols: List[str]):
+        with self._lock:
+            if self._symbols.get(source) == symbols and source in self._sets:
+                return
+            self._version += 1
+            self._symbols[source] = list(symbols)
+            self._sets[source] = frozenset(s.upper() for s in symbols)
+
+    def _refresh_source(self, source: str, force: bool):
+        from app.models.instrument_universe import InstrumentUniverseSnapshot
+
+        with self._refresh_lock:
+            db = SessionLocal()
+            try:
+                row = db.query(InstrumentUniverseSnapshot).filter(InstrumentUniverseSnapshot.source == source).first()
+                if row and not force:
+                    age = (datetime.now(timezone.utc) - row.fetched_at.replace(tzinfo=timezone.utc)).total_seconds()
+                    if age < self.refresh_interval:
+                        self._adopt(source, row.symbols)
+                        return
+
+                with db_advisory_lock(f"universe_refresh:{source}", timeout=0) as acquired:
+                    if not acquired:
+                        # Another process is refreshing; keep the current snapshot
+                        if row:
+                            self._adopt(source, row.symbols)
+                        return
+
+                    try:
+                        if source == BINANCE_SPOT:
+                            symbols, etag, last_modified = _fetch_binance_listing(), None, None
+                        else:
+                            symbols, etag, last_modified = _fetch_iss_listing(
+                                ISS_LISTING_URLS[source],
+                                row.etag if row else None,
+                                row.last_modified if row else None,
+                            )
+                    except Exception as e:
+                        logger.warning(f"universe_fetch_failed: source={source}, error={e}")
+                        if row:
+                            self._adopt(source, row.symbols)
+                        return
+
+                    now = datetime.now(timezone.utc)
+                    if symbols is None:
+                        # 304 Not Modified
+                        row.fetched_at = now
+                        db.commit()
+                        self._adopt(source, row.symbols)
+                        logger.info(f"universe_not_modified: source={source}, symbols={len(row.symbols)}")
+                        return
+
+                    if not symbols and row and row.symbols:
+                        # Don't replace a good snapshot with an empty listing
+                        logger.warning(f"universe_empty_listing: source={source}")
+                        self._adopt(source, row.symbols)
+                        return
+
+                    if row:
+                        row.symbols = symbols
+                        row.etag = etag
+                        row.last_modified = last_modified
+                        row.fetched_at = now
+                    else:
+                        db.add(InstrumentUniverseSnapshot(
+                            source=source,
+                            symbols=symbols,
+                            etag=etag,
+                            last_modified=last_modified,
+                            fetched_at=now,
+                        ))
+                    db.commit()
+                    self._adopt(source, symbols)
+                    logger.info(f"universe_refreshed: source={source}, symbols={len(symbols)}")
+            finally:
+                db.close()
+
+
+_instrument_universe: Optional[InstrumentUniverse] = None
+_instrument_universe_lock = threading.Lock()
+
+
+def get_instrument_universe() -> InstrumentUniverse:
+    """Get the process-wide instrument universe registry."""
+    global _instrument_universe
+    if _instrument_universe is None:
+        with _instrument_universe_lock:
+            if _instrument_universe is None:
+                _instrument_universe = InstrumentUniverse()
+    return _instrument_universe
@@ -0,0 +1,204 @@
+"""
+Content-addressed cache for LLM responses.
+
+Identical calls (same model, temperature, max_tokens, system and user prompt)
+return the stored response instead of calling OpenRouter again. Two tiers:
+- in-process LRU with TTL (bounded by entry count)
+- persistent DB tier (llm_response_cache table), shared by all workers
+"""
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Dict, Any
+import hashlib
+import json
+import threading
+import time
+import logging
+
+from app.core.config import LLM_CACHE_MAX_ENTRIES, LLM_CACHE_DEFAULT_TTL_SECONDS
+
+logger = logging.getLogger(__name__)
+
+
+def make_cache_key(
+    model: str,
+    temperature: float,
+    max_tokens: Optional[int],
+    system_prompt: str,
+    user_prompt: str,
+) -> str:
+    """Build cache key: sha256 over call parameters and prompt hashes."""
+    payload = json.dumps([
+        model,
+        temperature,
+        max_tokens,
+        hashlib.sha256(system_prompt.encode("utf-8")).hexdigest(),
+        hashlib.sha256(user_prompt.encode("utf-8")).hexdigest(),
+    ])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    """Two-tier (memory + DB) LLM response cache. Thread-safe."""
+
+    # Purge expired DB rows every N writes
+    PURGE_EVERY_WRITES = 100
+
+    def __init__(
+        self,
+        max_entries: int = LLM_CACHE_MAX_ENTRIES,
+        default_ttl: int = LLM_CACHE_DEFAULT_TTL_SECONDS,
+        persistent: bool = True,
+    ):
+        """Initialize cache.
+
+        Args:
+            max_entries: Max entries kept in memory (least recently used are evicted)
+            default_ttl: Default time to live in seconds
+            persistent: Whether to use the DB tier
+        """
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self.persistent = persistent
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (expires_at_monotonic, result)
+        self._lock = threading.Lock()
+        self._writes = 0
+        self.stats = {"memory_hits": 0, "db_hits": 0, "misses": 0, "evictions": 0}
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Get cached result dict ('content', 'model', 'tokens_used', 'cost_est') or None."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry:
+                expires_at, result = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.stats["memory_hits"] += 1
+                    return dict(result)
+                del self._entries[key]
+
+        if self.persistent:
+            result, ttl_left = self._get_from_db(key)
+            if result:
+                self._put_memory(key, result, ttl_left)
+                with self._lock:
+                    self.stats["db_hits"] += 1
+                return dict(result)
+
+        with self._lock:
+            self.stats["misses"] += 1
+        return None
+
+    def set(self, key: str, result: Dict[str, Any], ttl: Optional[int] = None):
+        """Store a call result.
+
+        Args:
+            key: Cache key from make_cache_key()
+            result: LLM client result dict
+            ttl: Time to live in seconds (defaults to default_ttl)
+        """
+        ttl = ttl or self.default_ttl
+        stored = {
+            "content": result["content"],
+            "model": result["model"],
+            "tokens_used": result.get("tokens_used", 0),
+            "cost_est": result.get("cost_est", 0.0),
+        }
+        self._put_memory(key, stored, ttl)
+        if self.persistent:
+            self._set_in_db(key, stored, ttl)
+
+    def clear(self):
+        """Clear the in-memory tier."""
+        with self._lock:
+            self._entries.clear()
+
+    def _put_memory(self, key: str, result: Dict[str, Any], ttl: float):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    def _get_from_db(self, key: str) -> tuple:
+        """Look up the DB tier. Returns (result, seconds_left) or (None, 0)."""
+        from app.core.database import SessionLocal
+        from app.models.llm_response_cache import LLMResponseCacheEntry
+
+        db = SessionLocal()
+        try:
+            entry = db.query(LLMResponseCacheEntry).filter(LLMResponseCacheEntry.key == key).first()
+            if not entry:
+                return None, 0
+            ttl_left = (entry.expires_at.replace(tzinfo=timezone.utc) - datetime.now(timezone.utc)).total_seconds()
+            if ttl_left <= 0:
+                return None, 0
+            entry.hit_count = (entry.hit_count or 0) + 1
+            db.commit()
+            return {
+                "content": entry.content,
+                "model": entry.model,
+                "tokens_used": entry.tokens_used or 0,
+                "cost_est": entry.cost_est or 0.0,
+            }, ttl_left
+        except Exception as e:
+            logger.warning(f"llm_cache_db_read_failed: error={e}")
+            return None, 0
+        finally:
+            db.close()
+
+    def _set_in_db(self, key: str, result: Dict[str, Any], ttl: int):
+        from app.core.database import SessionLocal
+        from app.models.llm_response_cache import LLMResponseCacheEntry
+
+        db = SessionLocal()
+        try:
+            expires_at = datetime.now(timezone.utc) + timedelta(seconds=ttl)
+            entry = db.query(LLMResponseCacheEntry).filter(LLMResponseCacheEntry.key == key).first()
+            if entry:
+                entry.content = result["content"]
+                entry.model = result["model"]
+                entry.tokens_used = result["tokens_used"]
+                entry.cost_est = result["cost_est"]
+                entry.expires_at = expires_at
+            else:
+                db.add(LLMResponseCacheEntry(
+                    key=key,
+                    model=result["model"],
+                    content=result["content"],
+                    tokens_used=result["tokens_used"],
+                    cost_est=result["cost_est"],
+                    expires_at=expires_at,
+                ))
+
+            with self._lock:
+                self._writes += 1
+                purge = self._writes % self.PURGE_EVERY_WRITES == 0
+            if purge:
+                deleted = db.query(LLMResponseCacheEntry).filter(
+                    LLMResponseCacheEntry.expires_at < datetime.now(timezone.utc)
+                ).delete(synchronize_session=False)
+                logger.info(f"llm_cache_purged_expired: deleted={deleted}")
+
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.warning(f"llm_cache_db_write_failed: error={e}")
+        finally:
+            db.close()
+
+
+_llm_response_cache: Optional[LLMResponseCache] = None
+_llm_response_cache_lock = threading.Lock()
+
+
+def get_llm_response_cache() -> LLMResponseCache:
+    """Get the process-wide LLM response cache."""
+    global _llm_response_cache
+    if _llm_response_cache is None:
+        with _llm_response_cache_lock:
+            if _llm_response_cache is None:
+                _llm_response_cache = LLMResponseCache()
+    return _llm_response_cache
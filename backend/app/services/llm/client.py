@@ -1,14 +1,32 @@
 """
 OpenRouter LLM client for making AI calls.
 """
-from openai import OpenAI
-from app.core.config import OPENROUTER_BASE_URL, DEFAULT_LLM_MODEL
-from typing import Optional, Dict, Any, List
+from openai import OpenAI, AsyncOpenAI
+from app.core.config import (
+    OPENROUTER_BASE_URL,
+    DEFAULT_LLM_MODEL,
+    LLM_MAX_CONCURRENT_CALLS_PER_MODEL,
+    LLM_HTTP_MAX_CONNECTIONS,
+)
+from typing import Optional, Dict, Any, List, Callable, Tuple
 from sqlalchemy.orm import Session
+import asyncio
+import threading
+import weakref
+import httpx
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Shared async HTTP clients and per-model concurrency limits, per event loop
+# (asyncio primitives and httpx connections are bound to the loop that uses them)
+_shared_async_http_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+_model_semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[Tuple[str, int], asyncio.Semaphore]]" = weakref.WeakKeyDictionary()
+
+# Event loop running the calls of LLMClient (one per process)
+_llm_event_loop: Optional[asyncio.AbstractEventLoop] = None
+_llm_event_loop_lock = threading.Lock()
+
 
 def get_openrouter_api_key(db: Optional[Session] = None) -> Optional[str]:
     """Get OpenRouter API key from Settings (AppSettings table).
@@ -37,7 +55,13 @@ def get_openrouter_api_key(db: Optional[Session] = None) -> Optional[str]:
 
 
 class LLMClient:
-    """Client for making LLM calls via OpenRouter."""
+    """Client for making LLM calls via OpenRouter from threads (analysis pipelines).
+    
+    Calls run as AsyncLLMClient calls on the process's LLM event loop (see
+    get_llm_event_loop), so all pipelines of a process share its pooled HTTP/2
+    connections and per-model concurrency limits; the calling thread waits for
+    the result.
+    """
     
     def __init__(self, api_key: Optional[str] = None, db: Optional[Session] = None):
         """Initialize OpenRouter client.
@@ -57,10 +81,7 @@ class LLMClient:
             )
         
         self.api_key = api_key
-        self.client = OpenAI(
-            api_key=api_key,
-            base_url=OPENROUTER_BASE_URL,
-        )
+        self.async_client = AsyncLLMClient(api_key=api_key)
         self.default_model = DEFAULT_LLM_MODEL
     
     def call(
@@ -70,6 +91,9 @@ class LLMClient:
         model: Optional[str] = None,
         temperature: float = 0.7,
         max_tokens: Optional[int] = None,
+        use_cache: bool = False,
+        cache_ttl: Optional[int] = None,
+        on_delta: Optional[Callable[[str], None]] = None,
     ) -> Dict[str, Any]:
         """Make an LLM call via OpenRouter.
         
@@ -79,70 +103,322 @@ class LLMClient:
             model: Model to use (defaults to DEFAULT_LLM_MODEL)
             temperature: Sampling temperature (0-2)
             max_tokens: Maximum tokens to generate
+            use_cache: Serve identical calls from the LLM response cache (opt-in)
+            cache_ttl: Cache time to live in seconds (defaults to LLM_CACHE_DEFAULT_TTL_SECONDS)
+            on_delta: Streams the completion, called with each chunk of text as it arrives
+                      (not called for cache hits)
             
         Returns:
-            Dict with 'content', 'model', 'tokens_used', 'cost_est'
+            Dict with 'content', 'model', 'tokens_used', 'cost_est', 'cache_hit'.
+            Cache hits report zero tokens and cost since nothing was spent.
         """
         model = model or self.default_model
         
-        try:
-            response = self.client.chat.completions.create(
+        cache = None
+        cache_key = None
+        if use_cache:
+            from app.services.llm.cache import get_llm_response_cache, make_cache_key
+            cache = get_llm_response_cache()
+            cache_key = make_cache_key(model, temperature, max_tokens, system_prompt, user_prompt)
+            cached = cache.get(cache_key)
+            if cached:
+                logger.info(f"llm_call_cache_hit: model={model}, key={cache_key[:12]}")
+                return {
+                    "content": cached["content"],
+                    "model": cached["model"],
+                    "tokens_used": 0,
+                    "cost_est": 0.0,
+                    "cache_hit": True,
+                }
+        
+        # Errors are raised as ValueError by AsyncLLMClient.call
+        result = asyncio.run_coroutine_threadsafe(
+            self.async_client.call(
+                system_prompt,
+                user_prompt,
                 model=model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt},
-                ],
                 temperature=temperature,
                 max_tokens=max_tokens,
+                on_delta=on_delta,
+            ),
+            get_llm_event_loop(),
+        ).result()
+        
+        if cache:
+            cache.set(cache_key, result, ttl=cache_ttl)
+        result["cache_hit"] = False
+        return result
+
+
+class AsyncLLMClient:
+    """Async client for making LLM calls via OpenRouter.
+    
+    All instances share one pooled HTTP/2 connection per event loop (see
+    get_shared_async_http_client), so many calls can run on a single event
+    loop without holding a thread per call (LLMClient runs the pipelines'
+    calls this way). Concurrent calls are limited per model (shared by
+    instances with the same limit on the same loop).
+    """
+    
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        db: Optional[Session] = None,
+        base_url: Optional[str] = None,
+        max_concurrency_per_model: Optional[int] = None,
+    ):
+        """Initialize async OpenRouter client.
+        
+        Args:
+            api_key: Optional API key. If not provided, will read from Settings (AppSettings table)
+            db: Database session (required if api_key not provided)
+            base_url: Optional API base URL (defaults to OPENROUTER_BASE_URL, override for local mock servers)
+            max_concurrency_per_model: Max in-flight calls per model (defaults to LLM_MAX_CONCURRENT_CALLS_PER_MODEL)
+        """
+        if not api_key:
+            api_key = get_openrouter_api_key(db)
+        
+        if not api_key:
+            raise ValueError(
+                "OpenRouter API key not configured. "
+                "Please set it in Settings → OpenRouter Configuration"
             )
+        
+        self.api_key = api_key
+        self.base_url = base_url or OPENROUTER_BASE_URL
+        # (shared HTTP client, OpenAI client wrapping it) per event loop
+        self._clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Tuple[httpx.AsyncClient, AsyncOpenAI]]" = weakref.WeakKeyDictionary()
+        self.default_model = DEFAULT_LLM_MODEL
+        self.max_concurrency_per_model = max_concurrency_per_model or LLM_MAX_CONCURRENT_CALLS_PER_MODEL
+    
+    @property
+    def client(self) -> AsyncOpenAI:
+        """OpenAI client for the running event loop."""
+        loop = asyncio.get_running_loop()
+        http_client = get_shared_async_http_client()
+        cached = self._clients.get(loop)
+        if cached is None or cached[0] is not http_client:
+            cached = (http_client, AsyncOpenAI(api_key=self.api_key, base_url=self.base_url, http_client=http_client))
+            self._clients[loop] = cached
+        return cached[1]
+    
+    def _get_model_semaphore(self, model: str) -> asyncio.Semaphore:
+        """Get the semaphore limiting concurrent calls to a model on the running loop."""
+        semaphores = _model_semaphores.setdefault(asyncio.get_running_loop(), {})
+        key = (model, self.max_concurrency_per_model)
+        semaphore = semaphores.get(key)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.max_concurrency_per_model)
+            semaphores[key] = semaphore
+        return semaphore
+    
+    async def call(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        model: Optional[str] = None,
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None,
+        on_delta: Optional[Callable[[str], None]] = None,
+    ) -> Dict[str, Any]:
+        """Make an LLM call via OpenRouter.
+        
+        Args:
+            system_prompt: System message/instructions
+            user_prompt: User message/content
+            model: Model to use (defaults to DEFAULT_LLM_MODEL)
+            temperature: Sampling temperature (0-2)
+            max_tokens: Maximum tokens to generate
+            on_delta: Streams the completion, called (on the event loop) with each
+                      chunk of text as it arrives
             
-            content = response.choices[0].message.content
-            tokens_used = response.usage.total_tokens if response.usage else 0
-            
-            # Estimate cost (rough approximation, varies by model)
-            # OpenRouter pricing: https://openrouter.ai/models
-            # Using conservative estimate of $0.01 per 1K tokens for most models
-            cost_est = (tokens_used / 1000) * 0.01
-            
-            logger.info(
-                f"llm_call_completed: model={model}, tokens={tokens_used}, cost_est={cost_est}"
-            )
-            
-            return {
-                "content": content,
-                "model": model,
-                "tokens_used": tokens_used,
-                "cost_est": cost_est,
-            }
-        except Exception as e:
-            error_msg = str(e)
-            error_type = type(e).__name__
-            
-            # Log detailed error information
-            logger.error(
-                f"llm_call_failed: model={repr(model)}, error_type={error_type}, error={error_msg}"
-            )
-            
-            # Check if it's an authentication error (invalid API key)
-            if "401" in error_msg or "unauthorized" in error_msg.lower() or "invalid" in error_msg.lower():
-                raise ValueError(
-                    f"OpenRouter API key is invalid or expired. "
-                    f"Please update it in Settings → OpenRouter Configuration. Error: {error_msg}"
-                )
-            
-            # Check if it's a model not found error
-            if "404" in error_msg or "not found" in error_msg.lower() or "model" in error_msg.lower() and "invalid" in error_msg.lower():
-                raise ValueError(
-                    f"Model '{model}' not found or invalid. "
-                    f"Please check the model name in your analysis configuration. "
-                    f"Error: {error_msg}"
+        Returns:
+            Dict with 'content', 'model', 'tokens_used', 'cost_est'
+        """
+        model = model or self.default_model
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt},
+        ]
+        
+        async with self._get_model_semaphore(model):
+            try:
+                if on_delta:
+                    return await self._stream(model, messages, temperature, max_tokens, on_delta)
+                response = await self.client.chat.completions.create(
+                    model=model,
+                    messages=messages,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
                 )
+                return _build_call_result(response, model)
+            except Exception as e:
+                _raise_llm_call_error(e, model)
+    
+    async def _stream(
+        self,
+        model: str,
+        messages: List[Dict[str, str]],
+        temperature: float,
+        max_tokens: Optional[int],
+        on_delta: Callable[[str], None],
+    ) -> Dict[str, Any]:
+        """Make a streaming chat completion, forwarding text chunks to on_delta."""
+        stream = await self.client.chat.completions.create(
+            model=model,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            stream=True,
+            # Token usage comes in the last chunk
+            extra_body={"stream_options": {"include_usage": True}},
+        )
+        parts = []
+        tokens_used = 0
+        async for chunk in stream:
+            if chunk.choices:
+                text = chunk.choices[0].delta.content
+                if text:
+                    parts.append(text)
+                    on_delta(text)
+            usage = getattr(chunk, "usage", None)
+            if usage:
+                tokens_used = usage.get("total_tokens", 0) if isinstance(usage, dict) else usage.total_tokens
+        return _make_call_result("".join(parts), model, tokens_used)
+    
+    async def call_many(
+        self,
+        calls: List[Dict[str, Any]],
+        return_exceptions: bool = False,
+    ) -> List[Any]:
+        """Make several LLM calls concurrently.
+        
+        Args:
+            calls: List of keyword argument dicts for call()
+                   (system_prompt, user_prompt, model, temperature, max_tokens)
+            return_exceptions: If True, failed calls return their exception instead of raising
             
-            # Generic error with model name
-            raise ValueError(
-                f"LLM call failed for model '{model}': {error_msg} "
-                f"(Error type: {error_type})"
-            )
+        Returns:
+            List of result dicts (or exceptions) in the same order as `calls`
+        """
+        return await asyncio.gather(
+            *(self.call(**call_kwargs) for call_kwargs in calls),
+            return_exceptions=return_exceptions,
+        )
+
+
+def get_shared_async_http_client() -> httpx.AsyncClient:
+    """Get the pooled HTTP/2 client used by AsyncLLMClient on the running event loop.
+    
+    Raises:
+        RuntimeError: If called outside a running event loop
+    """
+    loop = asyncio.get_running_loop()
+    http_client = _shared_async_http_clients.get(loop)
+    if http_client is None or http_client.is_closed:
+        http_client = httpx.AsyncClient(
+            http2=True,
+            limits=httpx.Limits(
+                max_connections=LLM_HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=LLM_HTTP_MAX_CONNECTIONS,
+            ),
+            timeout=httpx.Timeout(600.0, connect=10.0),
+        )
+        _shared_async_http_clients[loop] = http_client
+    return http_client
+
+
+async def close_shared_async_http_client():
+    """Close the running loop's shared HTTP client (call on application shutdown or before the loop ends)."""
+    loop = asyncio.get_running_loop()
+    http_client = _shared_async_http_clients.pop(loop, None)
+    if http_client is not None and not http_client.is_closed:
+        await http_client.aclose()
+    _model_semaphores.pop(loop, None)
+
+
+def get_llm_event_loop() -> asyncio.AbstractEventLoop:
+    """Get the process's event loop for LLMClient calls (started on first use in a daemon thread)."""
+    global _llm_event_loop
+    if _llm_event_loop is None:
+        with _llm_event_loop_lock:
+            if _llm_event_loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="llm-event-loop", daemon=True).start()
+                _llm_event_loop = loop
+    return _llm_event_loop
+
+
+def close_llm_event_loop(timeout: float = 10.0):
+    """Close the LLM event loop's shared HTTP client and stop the loop (call on process shutdown)."""
+    global _llm_event_loop
+    with _llm_event_loop_lock:
+        loop, _llm_event_loop = _llm_event_loop, None
+    if loop is None:
+        return
+    try:
+        asyncio.run_coroutine_threadsafe(close_shared_async_http_client(), loop).result(timeout)
+    except Exception as e:
+        logger.warning(f"llm_event_loop_close_failed: error={e}")
+    loop.call_soon_threadsafe(loop.stop)
+
+
+def _build_call_result(response: Any, model: str) -> Dict[str, Any]:
+    """Convert a chat completion response into the LLM client result dict."""
+    content = response.choices[0].message.content
+    tokens_used = response.usage.total_tokens if response.usage else 0
+    return _make_call_result(content, model, tokens_used)
+
+
+def _make_call_result(content: Optional[str], model: str, tokens_used: int) -> Dict[str, Any]:
+    """Build the LLM client result dict (content, model, tokens, estimated cost)."""
+    # Estimate cost (rough approximation, varies by model)
+    # OpenRouter pricing: https://openrouter.ai/models
+    # Using conservative estimate of $0.01 per 1K tokens for most models
+    cost_est = (tokens_used / 1000) * 0.01
+    
+    logger.info(
+        f"llm_call_completed: model={model}, tokens={tokens_used}, cost_est={cost_est}"
+    )
+    
+    return {
+        "content": content,
+        "model": model,
+        "tokens_used": tokens_used,
+        "cost_est": cost_est,
+    }
+
+
+def _raise_llm_call_error(e: Exception, model: str):
+    """Log a failed LLM call and re-raise it as a descriptive ValueError."""
+    error_msg = str(e)
+    error_type = type(e).__name__
+    
+    # Log detailed error information
+    logger.error(
+        f"llm_call_failed: model={repr(model)}, error_type={error_type}, error={error_msg}"
+    )
+    
+    # Check if it's an authentication error (invalid API key)
+    if "401" in error_msg or "unauthorized" in error_msg.lower() or "invalid" in error_msg.lower():
+        raise ValueError(
+            f"OpenRouter API key is invalid or expired. "
+            f"Please update it in Settings → OpenRouter Configuration. Error: {error_msg}"
+        )
+    
+    # Check if it's a model not found error
+    if "404" in error_msg or "not found" in error_msg.lower() or "model" in error_msg.lower() and "invalid" in error_msg.lower():
+        raise ValueError(
+            f"Model '{model}' not found or invalid. "
+            f"Please check the model name in your analysis configuration. "
+            f"Error: {error_msg}"
+        )
+    
+    # Generic error with model name
+    raise ValueError(
+        f"LLM call failed for model '{model}': {error_msg} "
+        f"(Error type: {error_type})"
+    )
 
 
 def fetch_available_models_from_openrouter(
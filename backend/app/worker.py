@@ -0,0 +1,95 @@
+"""
+Run queue worker process.
+
+Executes queued analysis runs outside the API processes. Start as many as
+needed (on one or several hosts); they share the queue in the database.
+One worker process of the deployment (holding the candle_streams DB lock)
+also runs the candle streams (MOEX_CANDLE_STREAM, BINANCE_KLINE_STREAM); another
+one takes over when it stops. Their in-memory buffers serve the runs executed
+in that process, streamed bars go to the candle store for all.
+
+Usage:
+    python -m app.worker --concurrency 4
+
+Stops claiming runs on SIGTERM/SIGINT and waits for in-flight runs.
+"""
+import argparse
+import logging
+import signal
+import threading
+
+from app.core.config import RUN_WORKER_CONCURRENCY, MOEX_CANDLE_STREAM, BINANCE_KLINE_STREAM
+from app.services.analysis.run_queue import RunWorker
+
+logger = logging.getLogger(__name__)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Max Signal run queue worker")
+    parser.add_argument("--concurrency", type=int, default=RUN_WORKER_CONCURRENCY, help="Runs executed at a time")
+    parser.add_argument("--name", default=None, help="Worker id (default: hostname:pid)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    # Register all models before the first query
+    import app.models  # noqa: F401
+
+    worker = RunWorker(args.concurrency, name=args.name)
+    stopped = threading.Event()
+
+    def handle_signal(signum, frame):
+        logger.info(f"run_worker_signal: signal={signum}")
+        stopped.set()
+
+    signal.signal(signal.SIGTERM, handle_signal)
+    signal.signal(signal.SIGINT, handle_signal)
+
+    streams = None
+    if MOEX_CANDLE_STREAM or BINANCE_KLINE_STREAM:
+        streams = threading.Thread(target=run_candle_streams, args=(stopped,), name="candle-streams-leader", daemon=True)
+        streams.start()
+    worker.start()
+    stopped.wait()
+    worker.stop(wait=True)
+    # Events of the last runs for the streams in the API processes
+    from app.services.analysis.run_events import get_run_event_broker
+
+    get_run_event_broker().flush()
+    if streams:
+        # Flushes pending candles to the store
+        streams.join(timeout=30)
+
+    from app.services.data.tinkoff_client import close_tinkoff_client_pools
+    from app.services.llm.client import close_llm_event_loop
+
+    close_tinkoff_client_pools()
+    close_llm_event_loop()
+
+
+def run_candle_streams(stop: threading.Event):
+    """Run the candle streams while this process holds the candle_streams lock (until `stop`)."""
+    from app.core.locks import hold_db_leadership
+    from app.services.data.streams import get_candle_stream_hub
+
+    hold_db_leadership("candle_streams", stop, start_candle_streams, get_candle_stream_hub().stop_all)
+
+
+def start_candle_streams():
+    """Start the enabled candle streams in this process."""
+    from app.services.data.streams import start_binance_kline_stream, start_moex_candle_stream
+
+    if MOEX_CANDLE_STREAM:
+        try:
+            start_moex_candle_stream()
+        except Exception as e:
+            logger.warning(f"moex_candle_stream_start_failed: error={e}")
+    if BINANCE_KLINE_STREAM:
+        try:
+            start_binance_kline_stream()
+        except Exception as e:
+            logger.warning(f"binance_kline_stream_start_failed: error={e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Local fake of the Binance spot kline websocket for testing candle streams.
+
+Implements the combined stream endpoint (`/stream`):
+- {"method": "SUBSCRIBE", "params": ["btcusdt@kline_1m", ...], "id": 1} -> ack
+- kline events wrapped as {"stream": "...", "data": {"e": "kline", "s": ..., "k": {...}}}
+
+Usage:
+    python scripts/fake_binance_ws_server.py --port 8767 --interval 1
+
+Standalone it emits a random-walk kline per subscribed stream every
+`--interval` seconds. Point the app at it with
+BINANCE_WS_URL = "ws://127.0.0.1:8767" in config_local.py.
+Tests drive it directly (push_kline / drop_connections).
+"""
+import argparse
+import asyncio
+import json
+import random
+import threading
+import time
+from typing import Dict, Optional, Set
+
+import websockets
+
+INTERVAL_MS = {'1m': 60_000, '5m': 300_000, '15m': 900_000, '1h': 3_600_000, '4h': 14_400_000, '1d': 86_400_000}
+
+
+class FakeBinanceWSServer:
+    """Fake kline websocket server running in a background thread."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 8767):
+        self.host = host
+        self.port = port
+        self.subscriptions: Set[str] = set()
+        self.connections_total = 0
+        self._connections: Set = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._started = threading.Event()
+        self._stopped: Optional[asyncio.Event] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        return f"ws://{self.host}:{self.port}"
+
+    def start(self):
+        """Start serving (returns once the port is bound)."""
+        self._thread = threading.Thread(target=lambda: asyncio.run(self._serve()), daemon=True)
+        self._thread.start()
+        self._started.wait(5)
+
+    def stop(self):
+        if self._loop and self._stopped:
+            self._loop.call_soon_threadsafe(self._stopped.set)
+
+    def push_kline(self, market_id: str, interval: str, open_time_ms: int, open: float, high: float,
+                   low: float, close: float, volume: float = 0.0, closed: bool = False):
+        """Send a kline event to connections subscribed to its stream."""
+        stream = f"{market_id.lower()}@kline_{interval}"
+        message = json.dumps({
+            "stream": stream,
+            "data": {
+                "e": "kline",
+                "E": int(time.time() * 1000),
+                "s": market_id.upper(),
+                "k": {
+                    "t": open_time_ms,
+                    "T": open_time_ms + INTERVAL_MS[interval] - 1,
+                    "s": market_id.upper(),
+                    "i": interval,
+                    "o": str(open), "h": str(high), "l": str(low), "c": str(close), "v": str(volume),
+                    "x": closed,
+                },
+            },
+        })
+        self._call(self._broadcast(stream, message))
+
+    def drop_connections(self):
+        """Close all client connections (clients should reconnect)."""
+        self._call(self._close_all())
+
+    def _call(self, coro):
+        asyncio.run_coroutine_threadsafe(coro, self._loop).result(5)
+
+    async def _serve(self):
+        self._loop = asyncio.get_running_loop()
+        self._stopped = asyncio.Event()
+        async with websockets.serve(self._handler, self.host, self.port):
+            self._started.set()
+            await self._stopped.wait()
+
+    async def _handler(self, ws):
+        ws.streams = set()
+        self._connections.add(ws)
+        self.connections_total += 1
+        try:
+            async for message in ws:
+                request = json.loads(message)
+                if request.get("method") == "SUBSCRIBE":
+                    ws.streams.update(request.get("params", []))
+                    self.subscriptions.update(request.get("params", []))
+                    await ws.send(json.dumps({"result": None, "id": request.get("id")}))
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            self._connections.discard(ws)
+
+    async def _broadcast(self, stream: str, message: str):
+        for ws in list(self._connections):
+            if stream in ws.streams:
+                try:
+                    await ws.send(message)
+                except websockets.ConnectionClosed:
+                    pass
+
+    async def _close_all(self):
+        for ws in list(self._connections):
+            await ws.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake Binance kline websocket")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8767)
+    parser.add_argument("--interval", type=float, default=1.0, help="Seconds between kline events per stream")
+    args = parser.parse_args()
+
+    server = FakeBinanceWSServer(args.host, args.port)
+    server.start()
+    print(f"Fake Binance websocket on {server.url}/stream")
+
+    prices: Dict[str, float] = {}
+    try:
+        while True:
+            time.sleep(args.interval)
+            now_ms = int(time.time() * 1000)
+            for stream in list(server.subscriptions):
+                market, interval = stream.split("@kline_")
+                step = INTERVAL_MS.get(interval)
+                if not step:
+                    continue
+                price = prices.get(stream, 100.0) * (1 + random.uniform(-0.001, 0.001))
+                prices[stream] = price
+                server.push_kline(market, interval, now_ms // step * step, price, price * 1.001, price * 0.999, price, 1.0)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
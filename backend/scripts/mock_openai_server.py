@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Local mock of the OpenAI-compatible (OpenRouter) API for testing LLM clients.
+
+Implements:
+- POST /chat/completions (echoes the user prompt, simulated latency, usage block;
+  "stream": true sends the response word by word as SSE chunks)
+- GET /models
+
+Special model names:
+- "mock/not-found" -> 404 error
+- "mock/rate-limited" -> 429 error
+
+Usage:
+    python scripts/mock_openai_server.py --port 8765 --latency 0.5
+
+Then point a client at it:
+    AsyncLLMClient(api_key="test", base_url="http://127.0.0.1:8765")
+"""
+import argparse
+import asyncio
+import json
+import time
+import uuid
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+import uvicorn
+
+
+def create_app(latency: float = 0.5) -> FastAPI:
+    """Create mock API app.
+
+    Args:
+        latency: Simulated completion latency in seconds
+    """
+    app = FastAPI(title="Mock OpenAI-compatible API")
+    app.state.latency = latency
+    app.state.in_flight = 0
+    app.state.max_in_flight = 0
+    app.state.total_requests = 0
+
+    @app.post("/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        model = body.get("model", "mock/model")
+
+        if model == "mock/not-found":
+            return JSONResponse(status_code=404, content={"error": {"message": f"Model {model} not found", "code": 404}})
+        if model == "mock/rate-limited":
+            return JSONResponse(status_code=429, content={"error": {"message": "Rate limit exceeded", "code": 429}})
+
+        app.state.total_requests += 1
+        app.state.in_flight += 1
+        app.state.max_in_flight = max(app.state.max_in_flight, app.state.in_flight)
+        try:
+            await asyncio.sleep(app.state.latency)
+        finally:
+            app.state.in_flight -= 1
+
+        user_messages = [m.get("content", "") for m in body.get("messages", []) if m.get("role") == "user"]
+        content = f"Mock response to: {user_messages[-1][:200] if user_messages else ''}"
+        prompt_tokens = sum(len(m.get("content", "").split()) for m in body.get("messages", []))
+        completion_tokens = len(content.split())
+
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        }
+        if body.get("stream"):
+            return StreamingResponse(stream_chunks(model, content, usage), media_type="text/event-stream")
+
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }],
+            "usage": usage,
+        }
+
+    async def stream_chunks(model: str, content: str, usage: dict):
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        words = content.split(" ")
+        for i, word in enumerate(words):
+            text = word if i == 0 else f" {word}"
+            chunk = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "delta": {"content": text}, "finish_reason": None}],
+            }
+            yield f"data: {json.dumps(chunk)}\n\n"
+        chunk = {
+            "id": completion_id,
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [],
+            "usage": usage,
+        }
+        yield f"data: {json.dumps(chunk)}\n\n"
+        yield "data: [DONE]\n\n"
+
+    @app.get("/models")
+    async def list_models():
+        return {
+            "object": "list",
+            "data": [
+                {"id": "openai/gpt-4o-mini", "object": "model", "created": 0, "owned_by": "openai"},
+                {"id": "mock/model", "object": "model", "created": 0, "owned_by": "mock"},
+            ],
+        }
+
+    @app.get("/stats")
+    async def stats():
+        return {
+            "total_requests": app.state.total_requests,
+            "in_flight": app.state.in_flight,
+            "max_in_flight": app.state.max_in_flight,
+        }
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock OpenAI-compatible API server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.5, help="Simulated completion latency (seconds)")
+    args = parser.parse_args()
+
+    uvicorn.run(create_app(args.latency), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -68,6 +68,7 @@ DATA_SOURCES = [
         "supports_stocks": False,
         "supports_forex": False,
         "is_enabled": True,
+        "priority": 10,
     },
     {
         "name": "yfinance",
@@ -77,6 +78,7 @@ DATA_SOURCES = [
         "supports_stocks": True,
         "supports_forex": True,
         "is_enabled": True,
+        "priority": 10,
     },
     {
         "name": "tinkoff",
@@ -86,6 +88,27 @@ DATA_SOURCES = [
         "supports_stocks": True,
         "supports_forex": False,
         "is_enabled": True,
+        "priority": 10,
+    },
+    {
+        "name": "moex_iss",
+        "display_name": "MOEX ISS",
+        "description": "Moscow Exchange public ISS API. Alternate source for MOEX stocks and futures when Tinkoff is unavailable (intraday candles may be delayed by 15 minutes).",
+        "supports_crypto": False,
+        "supports_stocks": True,
+        "supports_forex": False,
+        "is_enabled": True,
+        "priority": 20,  # Failover after Tinkoff
+    },
+    {
+        "name": "ccxt_bybit",
+        "display_name": "CCXT (Bybit)",
+        "description": "Bybit spot market via CCXT. Alternate source for crypto pairs when Binance is unavailable.",
+        "supports_crypto": True,
+        "supports_stocks": False,
+        "supports_forex": False,
+        "is_enabled": True,
+        "priority": 20,  # Failover after Binance
     },
     {
         "name": "alpha_vantage",
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Test script for AsyncLLMClient against the local mock OpenAI-compatible server.
+No API key or network access required.
+
+Usage:
+    python scripts/test_async_llm_client.py
+
+Checks:
+- Result dict shape matches LLMClient (content/model/tokens_used/cost_est)
+- call_many() runs calls concurrently (wall time ~ one latency, not the sum)
+- Per-model concurrency limit is respected
+- Model errors are translated into ValueError like LLMClient
+- One client works across consecutive event loops (asyncio.run) with its own
+  per-model limit
+- LLMClient calls from threads (pipeline steps) run on the shared LLM event
+  loop: per-model limit across threads, streamed deltas
+"""
+import sys
+import time
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# Add backend directory to path
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+import uvicorn
+
+from scripts.mock_openai_server import create_app
+from app.services.llm.client import AsyncLLMClient, LLMClient, close_shared_async_http_client, close_llm_event_loop
+
+HOST = "127.0.0.1"
+PORT = 8766
+LATENCY = 0.5
+
+
+def start_mock_server():
+    """Start mock server in a background thread."""
+    mock_app = create_app(latency=LATENCY)
+    server = uvicorn.Server(uvicorn.Config(mock_app, host=HOST, port=PORT, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    return mock_app, server
+
+
+async def run_checks(mock_app) -> bool:
+    ok = True
+    client = AsyncLLMClient(api_key="test", base_url=f"http://{HOST}:{PORT}", max_concurrency_per_model=4)
+
+    print("🧪 Test 1: single call result shape...")
+    result = await client.call("You are a test.", "Hello", model="mock/model")
+    if set(result.keys()) >= {"content", "model", "tokens_used", "cost_est"}:
+        print(f"   ✅ {result}")
+    else:
+        print(f"   ❌ Unexpected result: {result}")
+        ok = False
+
+    print("🧪 Test 2: call_many concurrency...")
+    calls = [{"system_prompt": "sys", "user_prompt": f"step {i}", "model": "mock/model"} for i in range(8)]
+    mock_app.state.max_in_flight = 0
+    started = time.perf_counter()
+    results = await client.call_many(calls)
+    elapsed = time.perf_counter() - started
+    # 8 calls with limit 4 -> two waves
+    if len(results) == 8 and elapsed < LATENCY * 3 and mock_app.state.max_in_flight <= 4:
+        print(f"   ✅ 8 calls in {elapsed:.2f}s (sequential would be {8 * LATENCY:.1f}s), max in flight: {mock_app.state.max_in_flight}")
+    else:
+        print(f"   ❌ elapsed={elapsed:.2f}s, max_in_flight={mock_app.state.max_in_flight}")
+        ok = False
+
+    print("🧪 Test 3: error translation...")
+    results = await client.call_many(
+        [
+            {"system_prompt": "sys", "user_prompt": "x", "model": "mock/not-found"},
+            {"system_prompt": "sys", "user_prompt": "x", "model": "mock/model"},
+        ],
+        return_exceptions=True,
+    )
+    if isinstance(results[0], ValueError) and "not found" in str(results[0]) and isinstance(results[1], dict):
+        print(f"   ✅ {results[0]}")
+    else:
+        print(f"   ❌ Unexpected results: {results}")
+        ok = False
+
+    await close_shared_async_http_client()
+    return ok
+
+
+def run_loop_checks(mock_app) -> bool:
+    """Test 4: the same client in two consecutive event loops, limit 1 per model."""
+    print("🧪 Test 4: consecutive event loops...")
+    ok = True
+    # Same model as tests 1-3 (limit 4 there): this client's own limit applies
+    client = AsyncLLMClient(api_key="test", base_url=f"http://{HOST}:{PORT}", max_concurrency_per_model=1)
+    calls = [{"system_prompt": "sys", "user_prompt": f"loop step {i}", "model": "mock/model"} for i in range(3)]
+    for loop_number in (1, 2):
+        mock_app.state.max_in_flight = 0
+        try:
+            # No close_shared_async_http_client() in between: each loop gets its own HTTP client
+            results = asyncio.run(client.call_many(calls))
+        except Exception as e:
+            print(f"   ❌ loop {loop_number}: {type(e).__name__}: {e}")
+            ok = False
+            continue
+        if len(results) == 3 and mock_app.state.max_in_flight <= 1:
+            print(f"   ✅ loop {loop_number}: 3 calls, max in flight: {mock_app.state.max_in_flight}")
+        else:
+            print(f"   ❌ loop {loop_number}: results={len(results)}, max_in_flight={mock_app.state.max_in_flight}")
+            ok = False
+    return ok
+
+
+def run_thread_checks(mock_app) -> bool:
+    """Test 5: LLMClient calls from pipeline-like worker threads."""
+    print("🧪 Test 5: LLMClient from threads (shared LLM event loop)...")
+    ok = True
+    client = LLMClient(api_key="test")
+    client.async_client = AsyncLLMClient(api_key="test", base_url=f"http://{HOST}:{PORT}", max_concurrency_per_model=2)
+    mock_app.state.max_in_flight = 0
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=6) as executor:
+        results = list(executor.map(lambda i: client.call("sys", f"thread step {i}", model="mock/model"), range(6)))
+    elapsed = time.perf_counter() - started
+    # 6 calls with limit 2 across threads -> three waves
+    if len(results) == 6 and mock_app.state.max_in_flight <= 2 and elapsed >= LATENCY * 3 * 0.9:
+        print(f"   ✅ 6 calls in {elapsed:.2f}s, max in flight: {mock_app.state.max_in_flight}")
+    else:
+        print(f"   ❌ elapsed={elapsed:.2f}s, max_in_flight={mock_app.state.max_in_flight}")
+        ok = False
+
+    deltas = []
+    result = client.call("sys", "stream these words", model="mock/model", on_delta=deltas.append)
+    if len(deltas) > 1 and "".join(deltas) == result["content"] and result["tokens_used"] > 0:
+        print(f"   ✅ streamed {len(deltas)} deltas, tokens: {result['tokens_used']}")
+    else:
+        print(f"   ❌ deltas={deltas}, result={result}")
+        ok = False
+
+    try:
+        client.call("sys", "x", model="mock/not-found")
+        print("   ❌ no error for unknown model")
+        ok = False
+    except ValueError as e:
+        print(f"   ✅ {e}")
+    close_llm_event_loop()
+    return ok
+
+
+def main():
+    print("=" * 60)
+    print("Async LLM client test (mock server)")
+    print("=" * 60)
+
+    mock_app, server = start_mock_server()
+    try:
+        ok = asyncio.run(run_checks(mock_app))
+        ok = run_loop_checks(mock_app) and ok
+        ok = run_thread_checks(mock_app) and ok
+    finally:
+        server.should_exit = True
+
+    print("\n" + "=" * 60)
+    print("✅ All tests passed!" if ok else "❌ Some tests failed")
+    print("=" * 60)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Test script for BinanceKlineStreamSource against the local fake websocket server.
+No network access required (REST backfills come from a synthetic adapter).
+
+Usage:
+    python scripts/test_binance_kline_stream.py
+
+Checks:
+- Subscriptions are sent as Binance stream names
+- Kline events reach the ingestor's buffers
+- Dropped connections reconnect and resubscribe
+- Missing bars after a reconnect are backfilled over REST
+"""
+import sys
+from pathlib import Path
+
+# Add backend directory to path
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from scripts.fake_binance_ws_server import FakeBinanceWSServer
+from scripts.test_candle_stream import SyntheticAdapter, START_MS, MINUTE_MS, wait_for
+from app.services.data.streams import CandleStreamIngestor, BinanceKlineStreamSource
+
+PORT = 8767
+
+
+def last_ts(ingestor, instrument="BTC/USDT"):
+    data = ingestor.latest(instrument, "M1")
+    return int(data.frame.timestamp_ms[-1]) if data else None
+
+
+def run_checks(server: FakeBinanceWSServer) -> bool:
+    ok = True
+    adapter = SyntheticAdapter(now_ms=START_MS + 99 * MINUTE_MS)
+    ingestor = CandleStreamIngestor(
+        name="binance-test",
+        source=BinanceKlineStreamSource(url=server.url, market_id=lambda symbol: symbol.replace("/", "")),
+        backfill_adapter=adapter,
+        subscriptions=lambda: {("BTC/USDT", "M1"): None, ("ETH/USDT", "M1"): None},
+        detect_gaps=True,
+        max_candles=50,
+    )
+    ingestor.start()
+
+    print("🧪 Test 1: subscribe...")
+    expected = {"btcusdt@kline_1m", "ethusdt@kline_1m"}
+    if wait_for(lambda: server.subscriptions == expected) and wait_for(ingestor.is_live):
+        print(f"   ✅ {sorted(server.subscriptions)}")
+    else:
+        print(f"   ❌ subscriptions={server.subscriptions}, live={ingestor.is_live()}")
+        ok = False
+
+    print("🧪 Test 2: kline events...")
+    t = adapter.now_ms + MINUTE_MS
+    server.push_kline("BTCUSDT", "1m", t, 100, 101, 99, 100.5, 3)
+    if wait_for(lambda: last_ts(ingestor) == t):
+        print(f"   ✅ close={ingestor.latest('BTC/USDT', 'M1').frame.close[-1]}")
+    else:
+        print(f"   ❌ last_ts={last_ts(ingestor)}")
+        ok = False
+
+    print("🧪 Test 3: reconnect...")
+    server.drop_connections()
+    if wait_for(lambda: server.connections_total == 2 and ingestor.is_live(), timeout=5):
+        print(f"   ✅ reconnected (connections: {server.connections_total})")
+    else:
+        print(f"   ❌ connections={server.connections_total}, live={ingestor.is_live()}")
+        ok = False
+
+    print("🧪 Test 4: gap backfill...")
+    adapter.now_ms = t + 4 * MINUTE_MS
+    server.push_kline("ETHUSDT", "1m", adapter.now_ms + MINUTE_MS, 1, 1, 1, 1, 1)
+    if wait_for(lambda: last_ts(ingestor, "ETH/USDT") == adapter.now_ms + MINUTE_MS):
+        frame = ingestor.latest("ETH/USDT", "M1").frame
+        diffs = set((frame.timestamp_ms[1:] - frame.timestamp_ms[:-1]).tolist())
+        if diffs == {MINUTE_MS}:
+            print(f"   ✅ continuous series, stats: {ingestor.stats()}")
+        else:
+            print(f"   ❌ gaps remain: {diffs}")
+            ok = False
+    else:
+        print(f"   ❌ last_ts={last_ts(ingestor, 'ETH/USDT')}")
+        ok = False
+
+    ingestor.stop()
+    return ok
+
+
+def main():
+    print("=" * 60)
+    print("Binance kline stream test (fake websocket server)")
+    print("=" * 60)
+
+    server = FakeBinanceWSServer(port=PORT)
+    server.start()
+    try:
+        ok = run_checks(server)
+    finally:
+        server.stop()
+
+    print("\n" + "=" * 60)
+    print("✅ All tests passed!" if ok else "❌ Some tests failed")
+    print("=" * 60)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
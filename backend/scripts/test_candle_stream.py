@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Test script for CandleStreamIngestor with the in-process fake stream.
+No provider access required (REST backfills come from a synthetic adapter).
+
+Usage:
+    python scripts/test_candle_stream.py
+
+Checks:
+- Series are backfilled over REST before they are served
+- Stream updates replace the forming bar and append new bars
+- A disconnect makes the series unavailable until the reconnect backfill
+- Gaps between streamed bars are backfilled (detect_gaps=True)
+- Buffers are not served while a reconnect has not connected yet
+"""
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+# Add backend directory to path
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from app.services.data.normalized import CandleFrame, MarketData
+from app.services.data.streams import CandleStreamIngestor, FakeCandleStreamSource
+
+MINUTE_MS = 60_000
+START_MS = 1_700_000_000_000 // MINUTE_MS * MINUTE_MS
+
+
+class SyntheticAdapter:
+    """REST stand-in: one M1 bar per minute up to `now_ms`, close = minute index."""
+
+    def __init__(self, now_ms: int):
+        self.now_ms = now_ms
+        self.calls = []
+
+    def _frame(self, start_ms: int) -> CandleFrame:
+        ts = list(range(start_ms, self.now_ms + 1, MINUTE_MS))
+        closes = [float((t - START_MS) // MINUTE_MS) for t in ts]
+        return CandleFrame(ts, closes, closes, closes, closes, [1.0] * len(ts), assume_sorted=True)
+
+    def _data(self, instrument, timeframe, frame) -> MarketData:
+        return MarketData(instrument=instrument, timeframe=timeframe, exchange="fake",
+                          frame=frame, fetched_at=datetime.now(timezone.utc))
+
+    def fetch_ohlcv(self, instrument, timeframe, limit=500, since=None):
+        self.calls.append(("fetch_ohlcv", instrument))
+        return self._data(instrument, timeframe, self._frame(self.now_ms - (limit - 1) * MINUTE_MS))
+
+    def fetch_range(self, instrument, timeframe, start, end=None, on_page=None, max_workers=None):
+        self.calls.append(("fetch_range", instrument))
+        return self._data(instrument, timeframe, self._frame(int(start.timestamp() * 1000)))
+
+
+def wait_for(condition, timeout=5.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+def run_checks() -> bool:
+    ok = True
+    adapter = SyntheticAdapter(now_ms=START_MS + 99 * MINUTE_MS)
+    source = FakeCandleStreamSource()
+    ingestor = CandleStreamIngestor(
+        name="test",
+        source=source,
+        backfill_adapter=adapter,
+        # No instrument ids: nothing is written to the candle store
+        subscriptions=lambda: {("SBER", "M1"): None},
+        detect_gaps=True,
+        max_candles=50,
+    )
+    ingestor.start()
+
+    print("🧪 Test 1: initial backfill...")
+    if wait_for(ingestor.is_live) and wait_for(lambda: ingestor.latest("SBER", "M1") is not None):
+        data = ingestor.latest("SBER", "M1")
+        if len(data.frame) == 50 and int(data.frame.timestamp_ms[-1]) == adapter.now_ms:
+            print(f"   ✅ {len(data.frame)} candles, REST calls: {adapter.calls}")
+        else:
+            print(f"   ❌ Unexpected frame: {data.frame}")
+            ok = False
+    else:
+        print("   ❌ Stream did not become live")
+        ok = False
+
+    print("🧪 Test 2: stream updates...")
+    last = adapter.now_ms
+    source.push("SBER", "M1", last, 99, 105, 98, 104, 5)
+    source.push("SBER", "M1", last + MINUTE_MS, 104, 104, 104, 104, 1)
+    if wait_for(lambda: int(ingestor.latest("SBER", "M1").frame.timestamp_ms[-1]) == last + MINUTE_MS):
+        frame = ingestor.latest("SBER", "M1").frame
+        if len(frame) == 50 and frame.high[-2] == 105:
+            print("   ✅ forming bar updated, new bar appended")
+        else:
+            print(f"   ❌ Unexpected frame: {frame}")
+            ok = False
+    else:
+        print("   ❌ Updates not applied")
+        ok = False
+
+    print("🧪 Test 3: disconnect and reconnect backfill...")
+    adapter.now_ms = last + 5 * MINUTE_MS
+    source.disconnect()
+    went_down = wait_for(lambda: not ingestor.is_live(), timeout=2)
+    came_back = wait_for(lambda: source.connections == 2 and ingestor.is_live(), timeout=5)
+    frame = ingestor.latest("SBER", "M1").frame if came_back else None
+    if went_down and came_back and int(frame.timestamp_ms[-1]) == adapter.now_ms:
+        print(f"   ✅ reconnected, backfilled to the REST tail (connections: {source.connections})")
+    else:
+        print(f"   ❌ went_down={went_down}, came_back={came_back}, frame={frame}")
+        ok = False
+
+    print("🧪 Test 4: gap backfill...")
+    adapter.now_ms = last + 9 * MINUTE_MS
+    source.push("SBER", "M1", adapter.now_ms, 1, 1, 1, 1, 1)
+    wait_for(lambda: int(ingestor.latest("SBER", "M1").frame.timestamp_ms[-1]) == adapter.now_ms)
+    frame = ingestor.latest("SBER", "M1").frame
+    gaps = (frame.timestamp_ms[-10:] - frame.timestamp_ms[-11:-1]) != MINUTE_MS
+    if ingestor.stats()["gap_backfills"] == 1 and not gaps.any():
+        print(f"   ✅ gap filled over REST, stats: {ingestor.stats()}")
+    else:
+        print(f"   ❌ stats={ingestor.stats()}, timestamps={frame.timestamp_ms[-10:]}")
+        ok = False
+
+    print("🧪 Test 5: not live until the reconnect has connected...")
+    source.connectable.clear()
+    source.disconnect()
+    reconnecting = wait_for(lambda: source.connections == 3, timeout=5)
+    time.sleep(0.3)
+    served_early = ingestor.is_live() or ingestor.latest("SBER", "M1") is not None
+    source.connectable.set()
+    came_back = wait_for(ingestor.is_live, timeout=2)
+    if reconnecting and not served_early and came_back:
+        print("   ✅ buffers withheld until the stream connected")
+    else:
+        print(f"   ❌ reconnecting={reconnecting}, served_early={served_early}, came_back={came_back}")
+        ok = False
+
+    ingestor.stop()
+    return ok
+
+
+def main():
+    print("=" * 60)
+    print("Candle stream test (fake stream)")
+    print("=" * 60)
+
+    ok = run_checks()
+
+    print("\n" + "=" * 60)
+    print("✅ All tests passed!" if ok else "❌ Some tests failed")
+    print("=" * 60)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -19,7 +19,7 @@ TELEGRAM_BOT_TOKEN = "PASTE_YOUR_TELEGRAM_BOT_TOKEN"
 TELEGRAM_CHANNEL_ID = -1001234567890  # replace with your channel id
 
 # Scheduler
-DAYSTART_SCHEDULE = "08:00"  # local server time HH:MM
+DAYSTART_SCHEDULE = "08:00"  # local server time HH:MM (initial time of the daystart_morning schedule)
 
 # Security
 SESSION_COOKIE_NAME = "maxsignal_session"
@@ -29,4 +29,53 @@ SESSION_SECRET = "CHANGE_ME_RANDOM_SECRET_FOR_SIGNING"  # keep only on the serve
 ENABLE_TELEGRAM_AUTO_SEND = False
 ENABLE_BACKTESTING = False
 
-
+# Performance tuning (optional, defaults shown)
+# PIPELINE_MAX_PARALLEL_STEPS = 4  # independent pipeline steps run concurrently per run
+# LLM_MAX_CONCURRENT_CALLS_PER_MODEL = 8  # in-flight LLM calls per model (per process, pipeline steps included)
+# LLM_HTTP_MAX_CONNECTIONS = 20  # pooled connections for LLM calls (per process)
+# LLM_CACHE_MAX_ENTRIES = 1000  # in-memory LLM response cache size (enable per step with "use_cache": true)
+# LLM_CACHE_DEFAULT_TTL_SECONDS = 3600
+# DATA_CACHE_COMPRESSION = True  # zlib-compress cached market data
+# DATA_INCREMENTAL_FETCH = True  # refresh expired market data with only the new candles
+# DATA_RETENTION_CANDLES = 500  # candles kept per instrument/timeframe
+# DATA_CANDLE_STORE = True  # persist fetched candles in the candles table
+# DATA_RESAMPLE_FROM_STORE = True  # build higher timeframes from stored lower ones when enough history is stored
+# DATA_FETCH_LOCK_TIMEOUT_SECONDS = 30  # wait for another worker fetching the same instrument/timeframe
+# DATA_MEMORY_CACHE_MAX_BYTES = 64 * 1024 * 1024  # in-process market data cache (stats at /health/cache)
+# UNIVERSE_BACKGROUND_REFRESH = True  # refresh MOEX/Binance instrument listings in the background
+# UNIVERSE_REFRESH_INTERVAL_SECONDS = 21600
+# UNIVERSE_HTTP_TIMEOUT_SECONDS = 30
+# CCXT_MARKETS_REFRESH_SECONDS = 3600  # shared exchange clients reload markets after this age
+# CCXT_HTTP_POOL_SIZE = 10
+# CCXT_ASYNC_MAX_CONCURRENCY = 10  # in-flight requests per AsyncCCXTAdapter.fetch_many sweep
+# DATA_RANGE_FETCH_CONCURRENCY = 4  # concurrent pages when fetching deep history
+# TINKOFF_CHANNEL_POOL_SIZE = 2  # long-lived gRPC channels per Tinkoff token
+# TINKOFF_LISTING_REFRESH_SECONDS = 21600
+# MOEX_CANDLE_STREAM = True  # keep enabled MOEX instruments' latest bars in memory via Tinkoff MarketDataStream (one app.worker process)
+# MOEX_STREAM_TIMEFRAMES = ("M1", "M5", "M15", "H1")
+# CANDLE_STREAM_FLUSH_SECONDS = 5  # streamed candles are written to the candle store this often
+# BINANCE_KLINE_STREAM = False  # keep enabled Binance instruments' latest bars in memory via the kline websocket (one app.worker process)
+# BINANCE_STREAM_TIMEFRAMES = ("M1", "M5", "M15", "H1")
+# BINANCE_WS_URL = "wss://stream.binance.com:9443"  # e.g. "ws://127.0.0.1:8767" for scripts/fake_binance_ws_server.py
+# DATA_PROVIDER_RETRIES = 1  # retries of a transient provider error before failing over
+# DATA_PROVIDER_RETRY_BACKOFF_SECONDS = 0.5
+# DATA_CIRCUIT_FAILURE_THRESHOLD = 5  # consecutive failures that take a data source out of rotation
+# DATA_CIRCUIT_RESET_SECONDS = 30
+# DATA_CRYPTO_FALLBACK_EXCHANGE = "bybit"  # alternate CCXT exchange for crypto (None disables)
+# RUN_QUEUE_EMBEDDED_WORKERS = 2  # runs executed inside each API process while no max-signal-worker is alive (0 = never)
+# RUN_WORKER_CONCURRENCY = 4  # runs at a time per `python -m app.worker` process
+# RUN_QUEUE_POLL_SECONDS = 2
+# RUN_QUEUE_LEASE_SECONDS = 120  # lost runs are re-queued after this long without a heartbeat
+# RUN_QUEUE_HEARTBEAT_SECONDS = 20
+# RUN_QUEUE_MAX_ATTEMPTS = 2
+# SCHEDULER_ENABLED = True  # fire analysis_schedules (/api/schedules) from the API processes
+# SCHEDULER_TIMEZONE = None  # e.g. "Europe/Moscow"; None = server local time
+# SCHEDULER_RELOAD_SECONDS = 60
+# PREFETCH_CONCURRENCY_PER_PROVIDER = 4  # concurrent fetches per provider when prefetching data for scheduled runs
+# STEP_MEMO_ENABLED = True  # reuse outputs of identical steps across runs (opt out per step/pipeline with "memoize": false)
+# STEP_MEMO_LOCK_TIMEOUT_SECONDS = 300  # identical steps wait this long for the one already running
+# LLM_STREAMING_ENABLED = True  # stream LLM output of running steps to GET /api/runs/{id}/stream
+# RUN_STREAM_POLL_SECONDS = 15  # run streams re-check the run in the DB this often (events that never arrive)
+# RUN_EVENTS_FLUSH_SECONDS = 0.25  # run events (incl. LLM token deltas) are written to the run_events table this often
+# RUN_EVENTS_TAIL_SECONDS = 0.5  # API processes with open run streams read new run events this often
+# RUN_EVENTS_RETENTION_SECONDS = 900  # stored run events are deleted after this long
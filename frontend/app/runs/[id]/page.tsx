@@ -3,9 +3,10 @@
 import { useQuery, useMutation, useQueryClient } from '@tanstack/react-query'
 import axios from 'axios'
 import { useParams, useRouter } from 'next/navigation'
-import { useState } from 'react'
+import { useEffect, useState } from 'react'
 import { API_BASE_URL } from '@/lib/config'
 import Tooltip from '@/components/Tooltip'
+import { useRunStream } from '@/hooks/useRunStream'
 
 interface RunStep {
   step_name: string
@@ -59,13 +60,15 @@ export default function RunDetailPage() {
   const [copied, setCopied] = useState(false)
   const [publishStatus, setPublishStatus] = useState<{ success?: boolean; message?: string; error?: string } | null>(null)
 
+  const [streamConnected, setStreamConnected] = useState(false)
+
   const { data: run, isLoading, error } = useQuery({
     queryKey: ['run', runId],
     queryFn: () => fetchRun(runId),
     refetchInterval: (query) => {
       const data = query.state.data as Run | undefined
-      // Poll every 2 seconds if still running/queued, otherwise stop polling
-      if (data?.status === 'running' || data?.status === 'queued') {
+      // Poll every 2 seconds if still running/queued and the live stream is unavailable
+      if ((data?.status === 'running' || data?.status === 'queued') && !streamConnected) {
         return 2000
       }
       return false
@@ -77,6 +80,10 @@ export default function RunDetailPage() {
     staleTime: 0,
   })
 
+  // Live step output while the run is in progress (refreshes the query as steps finish)
+  const { liveOutputs, connected } = useRunStream(runId, run?.status === 'running' || run?.status === 'queued')
+  useEffect(() => setStreamConnected(connected), [connected])
+
   const getStatusColor = (status: string) => {
     switch (status) {
       case 'succeeded':
@@ -506,6 +513,32 @@ export default function RunDetailPage() {
               })}
             </div>
           )}
+
+          {/* Steps still generating (streamed output) */}
+          {Object.keys(liveOutputs).length > 0 && (
+            <div className="space-y-3 mt-3">
+              {Object.entries(liveOutputs).map(([stepName, text]) => (
+                <div
+                  key={stepName}
+                  className="border border-blue-200 dark:border-blue-800 rounded-lg px-4 py-3"
+                >
+                  <div className="flex items-center gap-3 mb-2">
+                    <span className="text-lg font-semibold text-gray-900 dark:text-white">
+                      {stepName}
+                    </span>
+                    <span className="text-xs px-2 py-1 bg-blue-50 dark:bg-blue-900/20 rounded text-blue-600 dark:text-blue-400 animate-pulse">
+                      Generating...
+                    </span>
+                  </div>
+                  {text && (
+                    <pre className="whitespace-pre-wrap text-sm text-gray-900 dark:text-gray-100">
+                      {text}
+                    </pre>
+                  )}
+                </div>
+              ))}
+            </div>
+          )}
         </div>
       </div>
     </div>
@@ -1,6 +1,6 @@
 'use client'
 
-import { useQuery, useMutation, useQueryClient } from '@tanstack/react-query'
+import { useQuery, useInfiniteQuery, useMutation, useQueryClient, InfiniteData, keepPreviousData } from '@tanstack/react-query'
 import axios from 'axios'
 import { useState, useEffect, useRef } from 'react'
 import { useRouter } from 'next/navigation'
@@ -28,6 +28,7 @@ interface DataSource {
   supports_stocks: boolean
   supports_forex: boolean
   is_enabled: boolean
+  priority: number
 }
 
 interface Instrument {
@@ -39,6 +40,14 @@ interface Instrument {
   id: number | null
 }
 
+interface InstrumentPage {
+  items: Instrument[]
+  next_cursor: string | null
+  total: number
+}
+
+const INSTRUMENTS_PAGE_SIZE = 100
+
 async function fetchModels() {
   const { data } = await axios.get<Model[]>(`${API_BASE_URL}/api/settings/models`)
   return data
@@ -151,8 +160,13 @@ async function syncModelsFromOpenRouter() {
   return data
 }
 
-async function fetchAllInstruments() {
-  const { data } = await axios.get<Instrument[]>(`${API_BASE_URL}/api/instruments/all`, {
+async function fetchInstrumentsPage(search: string, type: 'all' | 'crypto' | 'equity', cursor: string | null) {
+  const params: Record<string, string | number> = { limit: INSTRUMENTS_PAGE_SIZE }
+  if (search) params.search = search
+  if (type !== 'all') params.type = type
+  if (cursor) params.cursor = cursor
+  const { data } = await axios.get<InstrumentPage>(`${API_BASE_URL}/api/instruments/all`, {
+    params,
     withCredentials: true
   })
   return data
@@ -183,6 +197,7 @@ export default function SettingsPage() {
   const openRouterInitialized = useRef(false)
   const tinkoffInitialized = useRef(false)
   const [instrumentSearch, setInstrumentSearch] = useState('')
+  const [debouncedInstrumentSearch, setDebouncedInstrumentSearch] = useState('')
   const [instrumentTypeFilter, setInstrumentTypeFilter] = useState<'all' | 'crypto' | 'equity'>('all')
   const [modelSearch, setModelSearch] = useState('')
   const [modelProviderFilter, setModelProviderFilter] = useState<'all' | string>('all')
@@ -222,11 +237,29 @@ export default function SettingsPage() {
     enabled: !authLoading,
   })
 
-  const { data: allInstruments = [], isLoading: instrumentsLoading } = useQuery({
-    queryKey: ['instruments', 'all'],
-    queryFn: fetchAllInstruments,
+  // Search is evaluated server-side; wait until the user stops typing
+  useEffect(() => {
+    const timer = setTimeout(() => setDebouncedInstrumentSearch(instrumentSearch.trim()), 300)
+    return () => clearTimeout(timer)
+  }, [instrumentSearch])
+
+  const {
+    data: instrumentPages,
+    isLoading: instrumentsLoading,
+    fetchNextPage: fetchNextInstrumentsPage,
+    hasNextPage: hasMoreInstruments,
+    isFetchingNextPage: fetchingMoreInstruments,
+  } = useInfiniteQuery({
+    queryKey: ['instruments', 'all', debouncedInstrumentSearch, instrumentTypeFilter],
+    queryFn: ({ pageParam }) => fetchInstrumentsPage(debouncedInstrumentSearch, instrumentTypeFilter, pageParam),
+    initialPageParam: null as string | null,
+    getNextPageParam: (lastPage) => lastPage.next_cursor,
+    // Keep showing the current list (and the search box) while a new search loads
+    placeholderData: keepPreviousData,
     enabled: !authLoading,
   })
+  const filteredInstruments = instrumentPages?.pages.flatMap((page) => page.items) ?? []
+  const instrumentsTotal = instrumentPages?.pages[0]?.total ?? 0
 
   // Initialize form values from API
   useEffect(() => {
@@ -288,14 +321,20 @@ export default function SettingsPage() {
   const toggleInstrumentMutation = useMutation({
     mutationFn: toggleInstrument,
     onSuccess: (data) => {
-      // Optimistically update the cache
-      queryClient.setQueryData(['instruments', 'all'], (old: Instrument[] | undefined) => {
+      // Optimistically update every cached page
+      queryClient.setQueriesData({ queryKey: ['instruments', 'all'] }, (old: InfiniteData<InstrumentPage> | undefined) => {
         if (!old) return old
-        return old.map(inst => 
-          inst.symbol === data.symbol 
-            ? { ...inst, is_enabled: data.is_enabled, id: data.id }
-            : inst
-        )
+        return {
+          ...old,
+          pages: old.pages.map(page => ({
+            ...page,
+            items: page.items.map(inst =>
+              inst.symbol === data.symbol
+                ? { ...inst, is_enabled: data.is_enabled, id: data.id }
+                : inst
+            ),
+          })),
+        }
       })
       // Also invalidate to ensure consistency
       queryClient.invalidateQueries({ queryKey: ['instruments', 'all'] })
@@ -320,14 +359,6 @@ export default function SettingsPage() {
     },
   })
 
-  // Filter instruments based on search and type
-  const filteredInstruments = allInstruments.filter((inst) => {
-    const matchesSearch = inst.symbol.toLowerCase().includes(instrumentSearch.toLowerCase()) ||
-                         inst.display_name.toLowerCase().includes(instrumentSearch.toLowerCase())
-    const matchesType = instrumentTypeFilter === 'all' || inst.type === instrumentTypeFilter
-    return matchesSearch && matchesType
-  })
-
   // Filter models based on search, provider, free filter, and enabled filter
   const filteredModels = models.filter((model) => {
     const matchesSearch = model.name.toLowerCase().includes(modelSearch.toLowerCase()) ||
@@ -529,9 +560,9 @@ export default function SettingsPage() {
           </h2>
           <p className="text-sm text-gray-600 dark:text-gray-400 mb-4">
             Enable or disable instruments. Only enabled instruments will appear in dropdowns throughout the application.
-            {filteredInstruments.length > 0 && (
+            {instrumentsTotal > 0 && (
               <span className="ml-2 font-medium text-blue-600 dark:text-blue-400">
-                {filteredInstruments.length} instrument{filteredInstruments.length !== 1 ? 's' : ''} found
+                {instrumentsTotal} instrument{instrumentsTotal !== 1 ? 's' : ''} found
               </span>
             )}
           </p>
@@ -576,7 +607,7 @@ export default function SettingsPage() {
                   >
                     {filteredInstruments.map((instrument) => (
                       <div
-                        key={instrument.symbol}
+                        key={`${instrument.exchange}:${instrument.symbol}`}
                         className="border-b border-gray-200 dark:border-gray-700 last:border-b-0 p-4 hover:bg-gray-50 dark:hover:bg-gray-700/50 transition-colors"
                       >
                         <div className="flex items-center justify-between">
@@ -615,6 +646,19 @@ export default function SettingsPage() {
                         </div>
                       </div>
                     ))}
+                    {hasMoreInstruments && (
+                      <div className="p-4 text-center">
+                        <button
+                          onClick={() => fetchNextInstrumentsPage()}
+                          disabled={fetchingMoreInstruments}
+                          className="px-4 py-2 text-sm bg-gray-100 dark:bg-gray-700 text-gray-700 dark:text-gray-300 rounded-md hover:bg-gray-200 dark:hover:bg-gray-600 disabled:opacity-50"
+                        >
+                          {fetchingMoreInstruments
+                            ? 'Loading...'
+                            : `Load more (${filteredInstruments.length} of ${instrumentsTotal})`}
+                        </button>
+                      </div>
+                    )}
                   </div>
                 </div>
               )}
@@ -862,7 +906,7 @@ export default function SettingsPage() {
             Available Data Sources
           </h2>
           <p className="text-sm text-gray-600 dark:text-gray-400 mb-4">
-            Data sources used by the system to fetch market data. Sources are automatically selected based on instrument type.
+            Data sources used by the system to fetch market data. Sources are selected based on instrument type; when a source fails, the next one by priority (lower first) is used.
           </p>
 
           {dataSourcesLoading ? (
@@ -882,6 +926,9 @@ export default function SettingsPage() {
                       <span className="text-xs px-2 py-1 bg-gray-100 dark:bg-gray-700 rounded text-gray-600 dark:text-gray-400">
                         {source.name}
                       </span>
+                      <span className="text-xs px-2 py-1 bg-gray-100 dark:bg-gray-700 rounded text-gray-600 dark:text-gray-400">
+                        Priority {source.priority}
+                      </span>
                     </div>
                     {source.description && (
                       <p className="text-sm text-gray-600 dark:text-gray-400 mb-2">
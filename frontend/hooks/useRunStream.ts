@@ -0,0 +1,67 @@
+'use client'
+
+import { useQueryClient } from '@tanstack/react-query'
+import { useEffect, useState } from 'react'
+import { API_BASE_URL } from '@/lib/config'
+
+// Events after which the persisted run (GET /api/runs/{id}) has changed
+const RUN_CHANGED_EVENTS = ['run_started', 'step_completed', 'step_failed', 'run_finished']
+
+/**
+ * Live progress of a queued/running run over GET /api/runs/{id}/stream (SSE).
+ *
+ * Returns the partial output of steps still being generated and whether the
+ * stream is connected. The ['run', runId] query is refreshed when a step or
+ * the run finishes, so callers only need to poll while `connected` is false.
+ */
+export function useRunStream(runId: string, active: boolean) {
+  const queryClient = useQueryClient()
+  const [liveOutputs, setLiveOutputs] = useState<Record<string, string>>({})
+  const [connected, setConnected] = useState(false)
+
+  useEffect(() => {
+    if (!active || typeof window === 'undefined' || !('EventSource' in window)) {
+      return
+    }
+
+    const source = new EventSource(`${API_BASE_URL}/api/runs/${runId}/stream`, { withCredentials: true })
+    const refresh = () => queryClient.invalidateQueries({ queryKey: ['run', runId] })
+
+    source.addEventListener('snapshot', () => setConnected(true))
+    source.addEventListener('step_started', (event) => {
+      const { step } = JSON.parse((event as MessageEvent).data)
+      setLiveOutputs(prev => ({ ...prev, [step]: '' }))
+    })
+    source.addEventListener('delta', (event) => {
+      const { step, text } = JSON.parse((event as MessageEvent).data)
+      setLiveOutputs(prev => ({ ...prev, [step]: (prev[step] || '') + text }))
+    })
+    RUN_CHANGED_EVENTS.forEach(name => source.addEventListener(name, (event) => {
+      if (name === 'step_completed' || name === 'step_failed') {
+        const { step } = JSON.parse((event as MessageEvent).data)
+        setLiveOutputs(prev => {
+          const next = { ...prev }
+          delete next[step]
+          return next
+        })
+      }
+      refresh()
+      if (name === 'run_finished') {
+        source.close()
+        setConnected(false)
+      }
+    }))
+    // Stream unavailable (or dropped): fall back to polling
+    source.onerror = () => {
+      source.close()
+      setConnected(false)
+    }
+
+    return () => {
+      source.close()
+      setConnected(false)
+    }
+  }, [runId, active, queryClient])
+
+  return { liveOutputs, connected }
+}
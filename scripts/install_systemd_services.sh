@@ -41,6 +41,7 @@ fi
 # Create temporary service files with actual user/group
 TMP_BACKEND=$(mktemp)
 TMP_FRONTEND=$(mktemp)
+TMP_WORKER=$(mktemp)
 
 sed "s/YOUR_USERNAME/$CURRENT_USER/g; s/YOUR_GROUP/$CURRENT_GROUP/g" \
     "$SYSTEMD_DIR/max-signal-backend.service" > "$TMP_BACKEND"
@@ -48,6 +49,9 @@ sed "s/YOUR_USERNAME/$CURRENT_USER/g; s/YOUR_GROUP/$CURRENT_GROUP/g" \
 sed "s/YOUR_USERNAME/$CURRENT_USER/g; s/YOUR_GROUP/$CURRENT_GROUP/g" \
     "$SYSTEMD_DIR/max-signal-frontend.service" > "$TMP_FRONTEND"
 
+sed "s/YOUR_USERNAME/$CURRENT_USER/g; s/YOUR_GROUP/$CURRENT_GROUP/g" \
+    "$SYSTEMD_DIR/max-signal-worker.service" > "$TMP_WORKER"
+
 # Copy to systemd directory
 echo "📋 Installing backend service..."
 sudo cp "$TMP_BACKEND" /etc/systemd/system/max-signal-backend.service
@@ -55,12 +59,15 @@ sudo cp "$TMP_BACKEND" /etc/systemd/system/max-signal-backend.service
 echo "📋 Installing frontend service..."
 sudo cp "$TMP_FRONTEND" /etc/systemd/system/max-signal-frontend.service
 
+echo "📋 Installing run queue worker service..."
+sudo cp "$TMP_WORKER" /etc/systemd/system/max-signal-worker.service
+
 # Reload systemd
 echo "🔄 Reloading systemd daemon..."
 sudo systemctl daemon-reload
 
 # Cleanup
-rm "$TMP_BACKEND" "$TMP_FRONTEND"
+rm "$TMP_BACKEND" "$TMP_FRONTEND" "$TMP_WORKER"
 
 echo ""
 echo -e "${GREEN}✅ Systemd services installed!${NC}"
@@ -75,10 +82,13 @@ echo ""
 echo "   3. Enable and start services:"
 echo "      sudo systemctl enable max-signal-backend"
 echo "      sudo systemctl enable max-signal-frontend"
+echo "      sudo systemctl enable max-signal-worker"
 echo "      sudo systemctl start max-signal-backend"
 echo "      sudo systemctl start max-signal-frontend"
+echo "      sudo systemctl start max-signal-worker  # executes queued runs (the API does until it runs)"
 echo ""
 echo "   4. Check status:"
 echo "      sudo systemctl status max-signal-backend"
 echo "      sudo systemctl status max-signal-frontend"
+echo "      sudo systemctl status max-signal-worker"
 
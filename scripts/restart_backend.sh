@@ -64,6 +64,13 @@ else
     echo "   To start manually: uvicorn app.main:app --host 0.0.0.0 --port 8000 --workers 2"
 fi
 
+# Restart the run queue worker too (if installed): it runs the same code
+if systemctl is-active --quiet max-signal-worker 2>/dev/null; then
+    echo "🔄 Restarting run queue worker..."
+    sudo systemctl restart max-signal-worker
+    echo -e "${GREEN}✅ Worker restarted${NC}"
+fi
+
 echo ""
 echo "📋 Useful commands:"
 echo "   Check status: sudo systemctl status max-signal-backend"
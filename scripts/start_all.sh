@@ -1,6 +1,6 @@
 #!/usr/bin/env bash
 # Start all services for Max Signal Bot
-# Starts backend (FastAPI) and frontend (Next.js) servers
+# Starts backend (FastAPI), run queue worker and frontend (Next.js) servers
 
 set -e
 
@@ -41,6 +41,14 @@ echo "   URL: http://localhost:8000"
 echo "   Logs: $PROJECT_ROOT/backend.log"
 echo ""
 
+# Start Run Queue Worker (executes queued analysis runs)
+echo "⚙️  Starting Run Queue Worker..."
+nohup python -m app.worker > "$PROJECT_ROOT/worker.log" 2>&1 &
+WORKER_PID=$!
+echo "   Worker PID: $WORKER_PID"
+echo "   Logs: $PROJECT_ROOT/worker.log"
+echo ""
+
 # Wait a moment for backend to start
 sleep 2
 
@@ -62,6 +70,7 @@ echo ""
 # Save PIDs to file
 echo "$BACKEND_PID" > "$PID_FILE"
 echo "$FRONTEND_PID" >> "$PID_FILE"
+echo "$WORKER_PID" >> "$PID_FILE"
 
 # Wait a moment and check if servers started
 sleep 3
@@ -75,6 +84,6 @@ echo "Frontend: http://localhost:3000"
 echo "API Docs: http://localhost:8000/docs"
 echo ""
 echo "To stop all services, run: ./scripts/stop_all.sh"
-echo "To view logs: tail -f backend.log frontend.log"
+echo "To view logs: tail -f backend.log worker.log frontend.log"
 echo ""
 
@@ -1,6 +1,6 @@
 #!/usr/bin/env bash
 # Stop all services for Max Signal Bot
-# Stops backend (FastAPI) and frontend (Next.js) servers
+# Stops backend (FastAPI), run queue worker and frontend (Next.js) servers
 
 set -e
 
@@ -26,6 +26,9 @@ if [ ! -f "$PID_FILE" ]; then
     # Try to find and kill uvicorn processes
     pkill -f "uvicorn app.main:app" 2>/dev/null && echo "✅ Killed backend processes" || echo "   No backend processes found"
     
+    # Try to find and kill run queue workers
+    pkill -f "python -m app.worker" 2>/dev/null && echo "✅ Killed worker processes" || echo "   No worker processes found"
+    
     # Try to find and kill Next.js processes
     pkill -f "next dev" 2>/dev/null && echo "✅ Killed frontend processes" || echo "   No frontend processes found"
     
@@ -36,7 +39,8 @@ fi
 # Read PIDs from file
 PIDS=$(cat "$PID_FILE")
 BACKEND_PID=$(echo "$PIDS" | head -n 1)
-FRONTEND_PID=$(echo "$PIDS" | tail -n 1)
+FRONTEND_PID=$(echo "$PIDS" | sed -n 2p)
+WORKER_PID=$(echo "$PIDS" | sed -n 3p)
 
 # Stop Backend
 if [ ! -z "$BACKEND_PID" ] && kill -0 "$BACKEND_PID" 2>/dev/null; then
@@ -50,6 +54,17 @@ else
     echo "   Backend was not running (PID: $BACKEND_PID)"
 fi
 
+# Stop Run Queue Worker (unfinished runs are re-queued once their lease expires)
+if [ ! -z "$WORKER_PID" ] && kill -0 "$WORKER_PID" 2>/dev/null; then
+    echo "⚙️  Stopping Run Queue Worker (PID: $WORKER_PID)..."
+    kill "$WORKER_PID" 2>/dev/null || true
+    sleep 1
+    kill -9 "$WORKER_PID" 2>/dev/null || true
+    echo -e "   ${GREEN}✅ Worker stopped${NC}"
+else
+    echo "   Worker was not running (PID: $WORKER_PID)"
+fi
+
 # Stop Frontend
 if [ ! -z "$FRONTEND_PID" ] && kill -0 "$FRONTEND_PID" 2>/dev/null; then
     echo "🎨 Stopping Frontend (PID: $FRONTEND_PID)..."
@@ -64,6 +79,7 @@ fi
 
 # Clean up any remaining processes
 pkill -f "uvicorn app.main:app" 2>/dev/null || true
+pkill -f "python -m app.worker" 2>/dev/null || true
 pkill -f "next dev" 2>/dev/null || true
 
 # Remove PID file